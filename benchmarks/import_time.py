@@ -0,0 +1,194 @@
+"""
+Import-time benchmark of orichain with a budget check, to keep cold starts of serverless and CLI
+workers down.
+
+Each module is imported in a fresh interpreter under `python -X importtime`, the best of several
+runs is compared against its budget, and the heaviest imports are listed. Importing a module must
+also not pull in any provider SDK or web framework, those are only loaded once a provider is used.
+
+The script exits with status 1 when a module is over budget or imports a forbidden dependency, so
+it can run as a CI step.
+
+Usage:
+    python benchmarks/import_time.py --runs 5 --budget orichain.llm=150 --output import_time.json
+"""
+
+from typing import Dict, List, Optional, Tuple
+import argparse
+import json
+import subprocess
+import sys
+
+# Budget of the cumulative import time of each module, in milliseconds
+BUDGETS_MS = {
+    "orichain": 60.0,
+    "orichain.llm": 90.0,
+    "orichain.embeddings": 60.0,
+    "orichain.knowledge_base": 60.0,
+    "orichain.lang_detect": 60.0,
+}
+
+# Packages that must only be imported once a provider is used
+FORBIDDEN = (
+    "fastapi",
+    "starlette",
+    "huggingface_hub",
+    "openai",
+    "anthropic",
+    "boto3",
+    "botocore",
+    "google.genai",
+    "together",
+    "httpx",
+    "tiktoken",
+    "sentence_transformers",
+    "torch",
+    "pinecone",
+    "chromadb",
+    "lingua",
+    "opentelemetry",
+)
+
+
+def import_profile(
+    module: str, python: str = sys.executable
+) -> List[Tuple[str, int, int]]:
+    """Imports a module in a fresh interpreter and parses the `-X importtime` report.
+
+    Args:
+        - module (str): Module to import
+        - python (str, optional): Interpreter to use. Defaults to the current one
+
+    Returns:
+        List[Tuple[str, int, int]]: (module, self microseconds, cumulative microseconds) of every
+        module imported, in import order
+
+    Raises:
+        - RuntimeError: If the import fails
+    """
+    process = subprocess.run(
+        [python, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    if process.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{process.stderr[-2000:]}")
+
+    profile = []
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        profile.append((name.strip(), int(self_us), int(cumulative_us)))
+    return profile
+
+
+def measure(module: str, runs: int = 5, top: int = 10) -> Dict:
+    """Measures the import time of a module, keeping the fastest of several runs.
+
+    Args:
+        - module (str): Module to import
+        - runs (int, optional): Number of fresh interpreters to import it in. Defaults to 5
+        - top (int, optional): Number of heaviest imports to report. Defaults to 10
+
+    Returns:
+        Dict: Cumulative milliseconds of the best run, the heaviest imports of that run and the
+        forbidden packages it imported
+    """
+    best: Optional[List[Tuple[str, int, int]]] = None
+    best_us = None
+    for _ in range(max(runs, 1)):
+        profile = import_profile(module)
+        total_us = next(cumulative for name, _, cumulative in profile if name == module)
+        if best_us is None or total_us < best_us:
+            best, best_us = profile, total_us
+
+    imported = {name for name, _, _ in best}
+    forbidden = sorted(
+        package
+        for package in FORBIDDEN
+        if any(name == package or name.startswith(package + ".") for name in imported)
+    )
+    heaviest = sorted(best, key=lambda entry: -entry[1])[:top]
+
+    return {
+        "module": module,
+        "import_ms": round(best_us / 1000, 2),
+        "modules_imported": len(imported),
+        "forbidden_imports": forbidden,
+        "heaviest": [
+            {"module": name, "self_ms": round(self_us / 1000, 2)}
+            for name, self_us, _ in heaviest
+        ],
+    }
+
+
+def _budget(value: str) -> Tuple[str, float]:
+    module, _, budget = value.partition("=")
+    return module.strip(), float(budget)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="orichain import-time benchmark")
+    parser.add_argument(
+        "--modules",
+        type=lambda v: [m.strip() for m in v.split(",") if m.strip()],
+        default=list(BUDGETS_MS),
+    )
+    parser.add_argument(
+        "--budget",
+        type=_budget,
+        action="append",
+        default=[],
+        help="Override a budget, e.g. orichain.llm=150 (milliseconds)",
+    )
+    parser.add_argument(
+        "--runs", type=int, default=5, help="Fresh interpreters per module"
+    )
+    parser.add_argument("--top", type=int, default=10, help="Heaviest imports to list")
+    parser.add_argument("--output", default=None, help="Write the results as JSON")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    budgets = {**BUDGETS_MS, **dict(args.budget)}
+
+    results = []
+    failed = False
+    for module in args.modules:
+        result = measure(module, args.runs, args.top)
+        result["budget_ms"] = budgets.get(module)
+        result["over_budget"] = (
+            result["budget_ms"] is not None
+            and result["import_ms"] > result["budget_ms"]
+        )
+        results.append(result)
+
+        status = "OK"
+        if result["over_budget"]:
+            status = "OVER BUDGET"
+        if result["forbidden_imports"]:
+            status = f"FORBIDDEN {', '.join(result['forbidden_imports'])}"
+        failed = failed or status != "OK"
+
+        budget = (
+            f"{result['budget_ms']:.0f}" if result["budget_ms"] is not None else "-"
+        )
+        print(
+            f"{module:<26} {result['import_ms']:>8.1f} ms  budget {budget:>5} ms"
+            f"  {result['modules_imported']:>4} modules  {status}"
+        )
+        if status != "OK":
+            for entry in result["heaviest"]:
+                print(f"    {entry['self_ms']:>8.2f} ms  {entry['module']}")
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump({"python": sys.version, "results": results}, output, indent=2)
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
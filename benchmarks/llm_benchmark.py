@@ -0,0 +1,445 @@
+"""
+Throughput and latency benchmark of orichain's LLM and AsyncLLM against the local mock providers.
+
+Every selected provider, mode (call or stream) and API (sync or async) is driven at increasing
+concurrency. Each run reports requests/sec, latency and time to first token percentiles, CPU time
+per request and memory, and all the runs are written as JSON so results can be compared across
+releases.
+
+The mock server runs in a subprocess by default, so the CPU figures only cover orichain, the
+provider SDKs and the benchmark itself.
+
+Usage:
+    python benchmarks/llm_benchmark.py --providers OpenAI,Anthropic --concurrency 1,8,32 \\
+        --requests 200 --output results.json
+"""
+
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import urllib.request
+import warnings
+
+# Providers the mock server can stand in for
+PROVIDERS = (
+    "OpenAI",
+    "AzureOpenAI",
+    "TogetherAI",
+    "Anthropic",
+    "GoogleGemini",
+    "AWSBedrock",
+    "OpenAICompatible",
+)
+
+
+def point_providers_at(url: str) -> None:
+    """Routes the provider SDKs that read their endpoint from the environment to the mock.
+
+    Args:
+        - url (str): Base URL of the mock server
+    """
+    os.environ["OPENAI_BASE_URL"] = f"{url}/v1"
+    os.environ["ANTHROPIC_BASE_URL"] = url
+    os.environ["TOGETHER_BASE_URL"] = f"{url}/v1"
+    os.environ["AWS_ENDPOINT_URL_BEDROCK_RUNTIME"] = url
+
+
+def llm_kwargs(provider: str, url: str, model_name: str) -> Dict[str, Any]:
+    """Constructor arguments of LLM/AsyncLLM for a provider served by the mock.
+
+    Args:
+        - provider (str): Provider name
+        - url (str): Base URL of the mock server
+        - model_name (str): Model to request
+
+    Returns:
+        Dict[str, Any]: Keyword arguments for LLM and AsyncLLM
+    """
+    kwargs = {"provider": provider, "model_name": model_name}
+
+    if provider == "OpenAICompatible":
+        kwargs.update({"base_url": f"{url}/v1"})
+    elif provider == "AzureOpenAI":
+        kwargs.update(
+            {"api_key": "mock", "azure_endpoint": url, "api_version": "2024-06-01"}
+        )
+    elif provider == "GoogleGemini":
+        from google.genai import types
+
+        kwargs.update(
+            {"api_key": "mock", "http_options": types.HttpOptions(base_url=url)}
+        )
+    elif provider == "AWSBedrock":
+        from botocore.config import Config
+
+        kwargs.update(
+            {
+                "aws_access_key": "mock",
+                "aws_secret_key": "mock",
+                "aws_region": "us-east-1",
+                "config": Config(
+                    region_name="us-east-1",
+                    retries={"total_max_attempts": 1},
+                    max_pool_connections=1024,
+                ),
+            }
+        )
+    else:
+        kwargs["api_key"] = "mock"
+
+    return kwargs
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile.
+
+    Args:
+        - values (List[float]): Observations
+        - q (float): Percentile between 0 and 100
+
+    Returns:
+        Optional[float]: The percentile, None without observations
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(math.ceil(q / 100 * len(ordered)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def rss_mb() -> Optional[float]:
+    """Current resident set size in MB, None where /proc is not available"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return None
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of the process in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KB elsewhere
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+class Sample(object):
+    """Outcome of one request"""
+
+    __slots__ = ("latency", "ttft", "error")
+
+    def __init__(
+        self, latency: float, ttft: Optional[float], error: Optional[str]
+    ) -> None:
+        self.latency = latency
+        self.ttft = ttft
+        self.error = error
+
+
+def _error_of(result: Any) -> Optional[str]:
+    """Error code of an orichain result, None on success"""
+    if isinstance(result, dict) and "error" in result:
+        return str(result.get("error"))
+    return None
+
+
+def sync_request(llm: Any, mode: str) -> Sample:
+    """Sends one request through LLM and times it"""
+    start = time.perf_counter()
+    if mode == "call":
+        result = llm("Benchmark prompt")
+        return Sample(time.perf_counter() - start, None, _error_of(result))
+
+    ttft, error = None, None
+    for chunk in llm.stream("Benchmark prompt", do_sse=False):
+        if isinstance(chunk, str):
+            if ttft is None:
+                ttft = time.perf_counter() - start
+        else:
+            error = _error_of(chunk)
+    return Sample(time.perf_counter() - start, ttft, error)
+
+
+async def async_request(llm: Any, mode: str) -> Sample:
+    """Sends one request through AsyncLLM and times it"""
+    start = time.perf_counter()
+    if mode == "call":
+        result = await llm("Benchmark prompt")
+        return Sample(time.perf_counter() - start, None, _error_of(result))
+
+    ttft, error = None, None
+    async for chunk in llm.stream("Benchmark prompt", do_sse=False):
+        if isinstance(chunk, str):
+            if ttft is None:
+                ttft = time.perf_counter() - start
+        else:
+            error = _error_of(chunk)
+    return Sample(time.perf_counter() - start, ttft, error)
+
+
+def run_sync(llm: Any, mode: str, concurrency: int, requests: int) -> List[Sample]:
+    """Sends the requests from a pool of threads"""
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(lambda _: sync_request(llm, mode), range(requests)))
+
+
+async def run_async(
+    llm: Any, mode: str, concurrency: int, requests: int
+) -> List[Sample]:
+    """Sends the requests from concurrent tasks"""
+    queue = iter(range(requests))
+    samples: List[Sample] = []
+
+    async def worker() -> None:
+        for _ in queue:
+            samples.append(await async_request(llm, mode))
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return samples
+
+
+def measure(run: Callable[[], List[Sample]]) -> Dict[str, Any]:
+    """Runs one synchronous benchmark and summarizes it"""
+    started = (rss_mb(), time.process_time(), time.perf_counter())
+    return summarize(run(), started)
+
+
+async def ameasure(run: Callable[[], Awaitable[List[Sample]]]) -> Dict[str, Any]:
+    """Runs one asynchronous benchmark and summarizes it"""
+    started = (rss_mb(), time.process_time(), time.perf_counter())
+    return summarize(await run(), started)
+
+
+def summarize(samples: List[Sample], started: tuple) -> Dict[str, Any]:
+    """Summarizes the samples of a run started at the given (rss, cpu, wall) readings"""
+    rss_before, cpu_start, wall_start = started
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    rss_after = rss_mb()
+
+    ok = [s for s in samples if s.error is None]
+    latencies = [s.latency for s in ok]
+    ttfts = [s.ttft for s in ok if s.ttft is not None]
+    errors: Dict[str, int] = {}
+    for s in samples:
+        if s.error is not None:
+            errors[s.error] = errors.get(s.error, 0) + 1
+
+    def ms(value: Optional[float]) -> Optional[float]:
+        return round(value * 1000, 3) if value is not None else None
+
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "wall_seconds": round(wall, 4),
+        "requests_per_second": round(len(samples) / wall, 2) if wall else None,
+        "latency_ms": {
+            "p50": ms(percentile(latencies, 50)),
+            "p95": ms(percentile(latencies, 95)),
+            "p99": ms(percentile(latencies, 99)),
+        },
+        "ttft_ms": {
+            "p50": ms(percentile(ttfts, 50)),
+            "p95": ms(percentile(ttfts, 95)),
+            "p99": ms(percentile(ttfts, 99)),
+        },
+        "cpu_ms_per_request": ms(cpu / len(samples)) if samples else None,
+        "rss_mb": round(rss_after, 1) if rss_after is not None else None,
+        "rss_delta_mb": (
+            round(rss_after - rss_before, 1)
+            if rss_after is not None and rss_before is not None
+            else None
+        ),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def start_mock(args: argparse.Namespace) -> subprocess.Popen:
+    """Starts the mock server in a subprocess and waits until it answers"""
+    command = [
+        sys.executable,
+        str(Path(__file__).with_name("mock_servers.py")),
+        "--port",
+        str(args.mock_port),
+        "--latency",
+        str(args.latency),
+        "--ttft",
+        str(args.ttft),
+        "--tokens-per-second",
+        str(args.tokens_per_second),
+        "--output-tokens",
+        str(args.output_tokens),
+        "--error-rate",
+        str(args.error_rate),
+        "--error-status",
+        str(args.error_status),
+    ]
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+
+    url = f"http://127.0.0.1:{args.mock_port}"
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"{url}/mock/stats", timeout=1).read()
+            return process
+        except OSError:
+            time.sleep(0.05)
+
+    process.terminate()
+    raise RuntimeError(f"Mock server did not start on {url}")
+
+
+def mock_config(url: str) -> Dict[str, Any]:
+    """Reads the configuration of a running mock server"""
+    return json.loads(urllib.request.urlopen(f"{url}/mock/config", timeout=5).read())
+
+
+def _csv(value: str) -> List[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="orichain LLM benchmark")
+    parser.add_argument("--providers", type=_csv, default=["OpenAI"])
+    parser.add_argument("--modes", type=_csv, default=["call", "stream"])
+    parser.add_argument("--apis", type=_csv, default=["sync", "async"])
+    parser.add_argument(
+        "--concurrency",
+        type=lambda v: [int(c) for c in _csv(v)],
+        default=[1, 4, 16, 64],
+    )
+    parser.add_argument(
+        "--requests", type=int, default=200, help="Requests per benchmark run"
+    )
+    parser.add_argument("--model-name", default=None)
+    parser.add_argument(
+        "--mock-url", default=None, help="Use an already running mock server"
+    )
+    parser.add_argument("--mock-port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--ttft", type=float, default=0.1)
+    parser.add_argument("--tokens-per-second", type=float, default=100.0)
+    parser.add_argument("--output-tokens", type=int, default=64)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--output", default=None, help="Write the results as JSON")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    unknown = [p for p in args.providers if p not in PROVIDERS]
+    if unknown:
+        raise SystemExit(f"Providers without a mock: {', '.join(unknown)}")
+
+    process = None if args.mock_url else start_mock(args)
+    url = args.mock_url or f"http://127.0.0.1:{args.mock_port}"
+    point_providers_at(url)
+
+    # Imported after the endpoints are set, as some SDKs read them at import time
+    from orichain.llm import LLM, AsyncLLM
+
+    warnings.simplefilter("ignore")
+
+    try:
+        from importlib.metadata import version
+
+        orichain_version = version("orichain")
+    except Exception:
+        orichain_version = "unknown"
+
+    report = {
+        "meta": {
+            "orichain_version": orichain_version,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "mock": mock_config(url),
+            "requests_per_run": args.requests,
+        },
+        "results": [],
+    }
+
+    def record(
+        provider: str,
+        model_name: str,
+        api: str,
+        mode: str,
+        concurrency: int,
+        stats: Dict[str, Any],
+    ) -> None:
+        row = {
+            "provider": provider,
+            "model_name": model_name,
+            "api": api,
+            "mode": mode,
+            "concurrency": concurrency,
+            **stats,
+        }
+        report["results"].append(row)
+        print(
+            f"{provider:<13} {api:<5} {mode:<6} c={concurrency:<4}"
+            f" rps={row['requests_per_second']:<8}"
+            f" p50={row['latency_ms']['p50']}ms"
+            f" p99={row['latency_ms']['p99']}ms"
+            f" ttft_p50={row['ttft_ms']['p50']}ms"
+            f" cpu/req={row['cpu_ms_per_request']}ms"
+            f" errors={sum(row['errors'].values())}",
+            flush=True,
+        )
+
+    async def async_suite(
+        provider: str, model_name: str, kwargs: Dict[str, Any]
+    ) -> None:
+        # Async clients are bound to the loop they were created in, keep one loop per provider
+        llm = AsyncLLM(**kwargs)
+        for mode in args.modes:
+            for concurrency in args.concurrency:
+                await async_request(llm, mode)
+                stats = await ameasure(
+                    lambda: run_async(llm, mode, concurrency, args.requests)
+                )
+                record(provider, model_name, "async", mode, concurrency, stats)
+
+    try:
+        for provider in args.providers:
+            model_name = (
+                args.model_name or (LLM.supported_models[provider] or ["mock"])[0]
+            )
+            kwargs = llm_kwargs(provider, url, model_name)
+
+            if "sync" in args.apis:
+                llm = LLM(**kwargs)
+                for mode in args.modes:
+                    for concurrency in args.concurrency:
+                        sync_request(llm, mode)
+                        stats = measure(
+                            lambda: run_sync(llm, mode, concurrency, args.requests)
+                        )
+                        record(provider, model_name, "sync", mode, concurrency, stats)
+
+            if "async" in args.apis:
+                asyncio.run(async_suite(provider, model_name, kwargs))
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
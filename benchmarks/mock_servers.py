@@ -0,0 +1,748 @@
+"""
+Local stand-ins for the provider HTTP APIs used by orichain.
+
+A single asyncio server speaks the wire formats of:
+
+- OpenAI compatible chat completions (OpenAI, AzureOpenAI, TogetherAI, OpenAICompatible):
+  ``POST .../chat/completions``
+- OpenAI compatible embeddings and model list, as served by vLLM, Ollama or llama.cpp server:
+  ``POST .../embeddings``, ``GET .../models``
+- Anthropic messages: ``POST /v1/messages``
+- Gemini generateContent / streamGenerateContent: ``POST /v1beta/models/{model}:generateContent``
+- Bedrock Converse / ConverseStream: ``POST /model/{model_id}/converse[-stream]``
+
+Latency, time to first token, token rate, response length and error injection are configurable,
+at start up or at runtime through ``POST /mock/config``. ``GET /mock/stats`` returns the number of
+requests served per API.
+
+Usage:
+    python benchmarks/mock_servers.py --port 8900 --ttft 0.2 --tokens-per-second 80
+"""
+
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
+import argparse
+import asyncio
+import json
+import random
+import struct
+import threading
+import time
+import zlib
+
+# Length of the mock embedding vectors
+EMBEDDING_DIMENSIONS = 8
+
+
+class MockConfig(object):
+    """Behaviour of the mock providers."""
+
+    FIELDS = (
+        "latency",
+        "ttft",
+        "tokens_per_second",
+        "output_tokens",
+        "error_rate",
+        "error_status",
+        "seed",
+        "models",
+    )
+
+    def __init__(
+        self,
+        latency: float = 0.05,
+        ttft: float = 0.1,
+        tokens_per_second: float = 100.0,
+        output_tokens: int = 64,
+        error_rate: float = 0.0,
+        error_status: int = 500,
+        seed: Optional[int] = None,
+        models: Optional[List[str]] = None,
+    ) -> None:
+        """
+        Args:
+            - latency (float, optional): Seconds before a non-streaming response, or before the
+              headers of a stream. Defaults to 0.05
+            - ttft (float, optional): Seconds between the stream headers and the first token. Defaults to 0.1
+            - tokens_per_second (float, optional): Token rate after the first token, 0 for no delay. Defaults to 100
+            - output_tokens (int, optional): Number of tokens generated per response. Defaults to 64
+            - error_rate (float, optional): Share of requests answered with an error. Defaults to 0
+            - error_status (int, optional): HTTP status of injected errors, e.g. 429 or 500. Defaults to 500
+            - seed (int, optional): Seed of the error injection
+            - models (List[str], optional): Models listed by ``GET .../models``. Defaults to ["mock"]
+        """
+        self.latency = latency
+        self.ttft = ttft
+        self.tokens_per_second = tokens_per_second
+        self.output_tokens = output_tokens
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.seed = seed
+        self.models = models or ["mock"]
+        self.random = random.Random(seed)
+
+    def update(self, values: Dict[str, Any]) -> None:
+        """Updates some of the fields.
+
+        Args:
+            - values (Dict[str, Any]): Field names mapped to their new values
+
+        Raises:
+            - KeyError: If an unknown field is given
+        """
+        for key, value in values.items():
+            if key not in self.FIELDS:
+                raise KeyError(f"Unknown mock config field '{key}'")
+            setattr(self, key, value)
+        if "seed" in values:
+            self.random = random.Random(self.seed)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns the fields as a dict"""
+        return {key: getattr(self, key) for key in self.FIELDS}
+
+    def fail(self) -> bool:
+        """Draws whether the current request gets an injected error"""
+        return self.error_rate > 0 and self.random.random() < self.error_rate
+
+
+class _Request(object):
+    """Parsed HTTP request"""
+
+    __slots__ = ("method", "path", "query", "headers", "body")
+
+    def __init__(
+        self,
+        method: str,
+        path: str,
+        query: str,
+        headers: Dict[str, str],
+        body: bytes,
+    ) -> None:
+        self.method = method
+        self.path = path
+        self.query = query
+        self.headers = headers
+        self.body = body
+
+    def json(self) -> Dict[str, Any]:
+        try:
+            return json.loads(self.body or b"{}")
+        except ValueError:
+            return {}
+
+
+class MockProviderServer(object):
+    """
+    HTTP/1.1 server answering like the LLM providers, with keep-alive and chunked streaming.
+
+    Use ``await start()``/``await stop()`` inside an event loop, or ``start_in_thread()`` to run it
+    on a background loop from synchronous code.
+    """
+
+    def __init__(
+        self,
+        config: Optional[MockConfig] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        """
+        Args:
+            - config (MockConfig, optional): Behaviour of the providers. Defaults to MockConfig()
+            - host (str, optional): Address to bind. Defaults to "127.0.0.1"
+            - port (int, optional): Port to bind, 0 picks a free one. Defaults to 0
+        """
+        self.config = config or MockConfig()
+        self.host = host
+        self.port = port
+        self.stats: Dict[str, int] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def url(self) -> str:
+        """Base URL of the running server"""
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> str:
+        """Starts listening.
+
+        Returns:
+            str: Base URL of the server
+        """
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.url
+
+    async def stop(self) -> None:
+        """Stops listening and closes the server."""
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def start_in_thread(self) -> str:
+        """Runs the server on its own event loop in a daemon thread.
+
+        Returns:
+            str: Base URL of the server
+        """
+        started = threading.Event()
+
+        def _run() -> None:
+            self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(self.start())
+            started.set()
+            self._loop.run_forever()
+
+        threading.Thread(target=_run, daemon=True).start()
+        started.wait()
+        return self.url
+
+    def stop_thread(self) -> None:
+        """Stops a server started with `start_in_thread`."""
+        if self._loop:
+            asyncio.run_coroutine_threadsafe(self.stop(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop = None
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Serves the requests of one keep-alive connection"""
+        try:
+            while True:
+                request = await self._read_request(reader, writer)
+                if request is None:
+                    break
+                await self._route(request, writer)
+                if request.headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_request(
+        reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> Optional[_Request]:
+        """Reads one request, None once the client closed the connection"""
+        request_line = await reader.readline()
+        if not request_line.strip():
+            return None
+
+        method, target, _ = request_line.decode("latin-1").split(" ", 2)
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get("expect", "").lower() == "100-continue":
+            writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+            await writer.drain()
+
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            parts = []
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await reader.readline()
+                    break
+                parts.append(await reader.readexactly(size))
+                await reader.readline()
+            body = b"".join(parts)
+        else:
+            body = await reader.readexactly(int(headers.get("content-length") or 0))
+
+        path, _, query = target.partition("?")
+        return _Request(method, path, query, headers, body)
+
+    async def _route(self, request: _Request, writer: asyncio.StreamWriter) -> None:
+        """Dispatches a request to the matching provider"""
+        path = request.path
+
+        if path == "/mock/stats":
+            return await self._send_json(writer, 200, self.stats)
+        if path == "/mock/config":
+            if request.method == "POST":
+                try:
+                    self.config.update(request.json())
+                except KeyError as e:
+                    return await self._send_json(writer, 400, {"error": str(e)})
+            return await self._send_json(writer, 200, self.config.to_dict())
+
+        if path.endswith("/chat/completions"):
+            api, handler = "openai", self._openai
+        elif path.endswith("/embeddings"):
+            api, handler = "openai_embeddings", self._openai_embeddings
+        elif path.endswith("/models") and request.method == "GET":
+            api, handler = "openai_models", self._openai_models
+        elif path.endswith("/messages"):
+            api, handler = "anthropic", self._anthropic
+        elif ":generateContent" in path or ":streamGenerateContent" in path:
+            api, handler = "gemini", self._gemini
+        elif path.endswith("/converse") or path.endswith("/converse-stream"):
+            api, handler = "bedrock", self._bedrock
+        else:
+            return await self._send_json(writer, 404, {"error": f"Unknown path {path}"})
+
+        self.stats[api] = self.stats.get(api, 0) + 1
+        await handler(request, writer)
+
+    # Wire formats
+
+    async def _openai(self, request: _Request, writer: asyncio.StreamWriter) -> None:
+        """OpenAI compatible chat completions"""
+        body = request.json()
+        model = body.get("model", "mock")
+        input_tokens = _estimate_tokens(request.body)
+        output_tokens = self.config.output_tokens
+        usage = {
+            "prompt_tokens": input_tokens,
+            "completion_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+        base = {"id": "chatcmpl-mock", "created": int(time.time()), "model": model}
+
+        if await self._inject_error(writer, "openai"):
+            return
+
+        if not body.get("stream"):
+            await asyncio.sleep(self.config.latency)
+            return await self._send_json(
+                writer,
+                200,
+                {
+                    **base,
+                    "object": "chat.completion",
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {
+                                "role": "assistant",
+                                "content": _text(output_tokens),
+                            },
+                            "logprobs": None,
+                            "finish_reason": "stop",
+                        }
+                    ],
+                    "usage": usage,
+                },
+            )
+
+        def chunk(delta: Dict, finish_reason: Optional[str] = None) -> bytes:
+            choice = {"index": 0, "delta": delta, "finish_reason": finish_reason}
+            payload = {**base, "object": "chat.completion.chunk", "choices": [choice]}
+            return _sse(payload)
+
+        async def events() -> AsyncGenerator[bytes, None]:
+            yield chunk({"role": "assistant", "content": ""})
+            async for token in self._tokens():
+                yield chunk({"content": token})
+            yield chunk({}, "stop")
+            if (body.get("stream_options") or {}).get("include_usage"):
+                payload = {
+                    **base,
+                    "object": "chat.completion.chunk",
+                    "choices": [],
+                    "usage": usage,
+                }
+                yield _sse(payload)
+            yield b"data: [DONE]\n\n"
+
+        await self._send_stream(writer, "text/event-stream", events())
+
+    async def _openai_embeddings(
+        self, request: _Request, writer: asyncio.StreamWriter
+    ) -> None:
+        """OpenAI compatible embeddings, one deterministic vector per input text"""
+        body = request.json()
+        texts = body.get("input", "")
+        if isinstance(texts, str):
+            texts = [texts]
+        input_tokens = _estimate_tokens(request.body)
+
+        if await self._inject_error(writer, "openai"):
+            return
+
+        await asyncio.sleep(self.config.latency)
+        await self._send_json(
+            writer,
+            200,
+            {
+                "object": "list",
+                "model": body.get("model", "mock"),
+                "data": [
+                    {"object": "embedding", "index": index, "embedding": _vector(text)}
+                    for index, text in enumerate(texts)
+                ],
+                "usage": {"prompt_tokens": input_tokens, "total_tokens": input_tokens},
+            },
+        )
+
+    async def _openai_models(
+        self, request: _Request, writer: asyncio.StreamWriter
+    ) -> None:
+        """OpenAI compatible model list"""
+        await self._send_json(
+            writer,
+            200,
+            {
+                "object": "list",
+                "data": [
+                    {"id": model, "object": "model", "created": 0, "owned_by": "mock"}
+                    for model in self.config.models
+                ],
+            },
+        )
+
+    async def _anthropic(self, request: _Request, writer: asyncio.StreamWriter) -> None:
+        """Anthropic messages"""
+        body = request.json()
+        model = body.get("model", "mock")
+        input_tokens = _estimate_tokens(request.body)
+        output_tokens = self.config.output_tokens
+
+        if await self._inject_error(writer, "anthropic"):
+            return
+
+        message = {
+            "id": "msg_mock",
+            "type": "message",
+            "role": "assistant",
+            "model": model,
+            "content": [],
+            "stop_reason": None,
+            "stop_sequence": None,
+            "usage": {"input_tokens": input_tokens, "output_tokens": 1},
+        }
+
+        if not body.get("stream"):
+            await asyncio.sleep(self.config.latency)
+            message["content"] = [{"type": "text", "text": _text(output_tokens)}]
+            message["stop_reason"] = "end_turn"
+            message["usage"]["output_tokens"] = output_tokens
+            return await self._send_json(writer, 200, message)
+
+        async def events() -> AsyncGenerator[bytes, None]:
+            yield _sse({"type": "message_start", "message": message}, "message_start")
+            yield _sse(
+                {
+                    "type": "content_block_start",
+                    "index": 0,
+                    "content_block": {"type": "text", "text": ""},
+                },
+                "content_block_start",
+            )
+            async for token in self._tokens():
+                yield _sse(
+                    {
+                        "type": "content_block_delta",
+                        "index": 0,
+                        "delta": {"type": "text_delta", "text": token},
+                    },
+                    "content_block_delta",
+                )
+            yield _sse({"type": "content_block_stop", "index": 0}, "content_block_stop")
+            yield _sse(
+                {
+                    "type": "message_delta",
+                    "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                    "usage": {"output_tokens": output_tokens},
+                },
+                "message_delta",
+            )
+            yield _sse({"type": "message_stop"}, "message_stop")
+
+        await self._send_stream(writer, "text/event-stream", events())
+
+    async def _gemini(self, request: _Request, writer: asyncio.StreamWriter) -> None:
+        """Gemini generateContent and streamGenerateContent"""
+        model = request.path.rsplit("/", 1)[-1].split(":")[0]
+        input_tokens = _estimate_tokens(request.body)
+        output_tokens = self.config.output_tokens
+
+        if await self._inject_error(writer, "gemini"):
+            return
+
+        def response(text: str, final: bool) -> Dict[str, Any]:
+            candidate = {
+                "content": {"parts": [{"text": text}], "role": "model"},
+                "index": 0,
+            }
+            usage = {"promptTokenCount": input_tokens}
+            if final:
+                candidate["finishReason"] = "STOP"
+                usage.update(
+                    {
+                        "candidatesTokenCount": output_tokens,
+                        "totalTokenCount": input_tokens + output_tokens,
+                    }
+                )
+            return {
+                "candidates": [candidate],
+                "usageMetadata": usage,
+                "modelVersion": model,
+            }
+
+        if ":streamGenerateContent" not in request.path:
+            await asyncio.sleep(self.config.latency)
+            return await self._send_json(
+                writer, 200, response(_text(output_tokens), True)
+            )
+
+        async def events() -> AsyncGenerator[bytes, None]:
+            sent = 0
+            async for token in self._tokens():
+                sent += 1
+                yield _sse(response(token, sent == output_tokens))
+
+        await self._send_stream(writer, "text/event-stream", events())
+
+    async def _bedrock(self, request: _Request, writer: asyncio.StreamWriter) -> None:
+        """Bedrock Converse and ConverseStream"""
+        input_tokens = _estimate_tokens(request.body)
+        output_tokens = self.config.output_tokens
+        usage = {
+            "inputTokens": input_tokens,
+            "outputTokens": output_tokens,
+            "totalTokens": input_tokens + output_tokens,
+        }
+        started = time.perf_counter()
+
+        if await self._inject_error(writer, "bedrock"):
+            return
+
+        if not request.path.endswith("/converse-stream"):
+            await asyncio.sleep(self.config.latency)
+            latency_ms = int((time.perf_counter() - started) * 1000)
+            return await self._send_json(
+                writer,
+                200,
+                {
+                    "output": {
+                        "message": {
+                            "role": "assistant",
+                            "content": [{"text": _text(output_tokens)}],
+                        }
+                    },
+                    "stopReason": "end_turn",
+                    "usage": usage,
+                    "metrics": {"latencyMs": latency_ms},
+                },
+            )
+
+        async def events() -> AsyncGenerator[bytes, None]:
+            yield _event_message("messageStart", {"role": "assistant"})
+            async for token in self._tokens():
+                yield _event_message(
+                    "contentBlockDelta",
+                    {"contentBlockIndex": 0, "delta": {"text": token}},
+                )
+            yield _event_message("contentBlockStop", {"contentBlockIndex": 0})
+            yield _event_message("messageStop", {"stopReason": "end_turn"})
+            latency_ms = int((time.perf_counter() - started) * 1000)
+            yield _event_message(
+                "metadata", {"usage": usage, "metrics": {"latencyMs": latency_ms}}
+            )
+
+        await self._send_stream(writer, "application/vnd.amazon.eventstream", events())
+
+    # Helpers
+
+    async def _tokens(self) -> AsyncGenerator[str, None]:
+        """Yields the output tokens on the configured schedule"""
+        config = self.config
+        start = time.perf_counter() + config.ttft
+        for i in range(config.output_tokens):
+            due = start + (
+                i / config.tokens_per_second if config.tokens_per_second else 0
+            )
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            yield f"t{i} "
+
+    async def _inject_error(self, writer: asyncio.StreamWriter, api: str) -> bool:
+        """Answers with an injected error in the provider's format when drawn"""
+        if not self.config.fail():
+            return False
+
+        await asyncio.sleep(self.config.latency)
+        status = self.config.error_status
+        message = f"Injected mock error ({status})"
+        headers = {}
+        if api == "openai":
+            payload = {
+                "error": {"message": message, "type": "server_error", "code": None}
+            }
+        elif api == "anthropic":
+            payload = {
+                "type": "error",
+                "error": {"type": "api_error", "message": message},
+            }
+        elif api == "gemini":
+            payload = {
+                "error": {"code": status, "message": message, "status": "INTERNAL"}
+            }
+        else:
+            payload = {"message": message}
+            headers["x-amzn-ErrorType"] = (
+                "ThrottlingException" if status == 429 else "InternalServerException"
+            )
+
+        self.stats["errors"] = self.stats.get("errors", 0) + 1
+        await self._send_json(writer, status, payload, headers)
+        return True
+
+    @staticmethod
+    async def _send_json(
+        writer: asyncio.StreamWriter,
+        status: int,
+        payload: Any,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """Writes a complete JSON response"""
+        body = json.dumps(payload).encode("utf-8")
+        head = _head(
+            status,
+            {
+                "Content-Type": "application/json",
+                "Content-Length": str(len(body)),
+                **(headers or {}),
+            },
+        )
+        writer.write(head + body)
+        await writer.drain()
+
+    async def _send_stream(
+        self,
+        writer: asyncio.StreamWriter,
+        content_type: str,
+        events: AsyncGenerator[bytes, None],
+    ) -> None:
+        """Writes a chunked streaming response, after the configured latency"""
+        await asyncio.sleep(self.config.latency)
+        writer.write(
+            _head(200, {"Content-Type": content_type, "Transfer-Encoding": "chunked"})
+        )
+        async for event in events:
+            writer.write(b"%x\r\n%s\r\n" % (len(event), event))
+            await writer.drain()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+
+# Reason phrases of the statuses the mock answers with
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    429: "Too Many Requests",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+def _head(status: int, headers: Dict[str, str]) -> bytes:
+    """Status line and headers of a response"""
+    lines = [f"HTTP/1.1 {status} {_REASONS.get(status, 'Error')}"]
+    lines.extend(f"{name}: {value}" for name, value in headers.items())
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+def _sse(payload: Dict[str, Any], event: Optional[str] = None) -> bytes:
+    """One Server-Sent Event"""
+    data = json.dumps(payload)
+    if event:
+        return f"event: {event}\ndata: {data}\n\n".encode("utf-8")
+    return f"data: {data}\n\n".encode("utf-8")
+
+
+def _event_message(event_type: str, payload: Dict[str, Any]) -> bytes:
+    """One message of the AWS event stream encoding used by ConverseStream"""
+    headers = b"".join(
+        _event_header(name, value)
+        for name, value in (
+            (":event-type", event_type),
+            (":content-type", "application/json"),
+            (":message-type", "event"),
+        )
+    )
+    body = json.dumps(payload).encode("utf-8")
+    prelude = struct.pack(">II", 12 + len(headers) + len(body) + 4, len(headers))
+    prelude += struct.pack(">I", zlib.crc32(prelude))
+    message = prelude + headers + body
+    return message + struct.pack(">I", zlib.crc32(message))
+
+
+def _event_header(name: str, value: str) -> bytes:
+    """A string header of the AWS event stream encoding"""
+    name_bytes, value_bytes = name.encode("utf-8"), value.encode("utf-8")
+    return (
+        struct.pack(">B", len(name_bytes))
+        + name_bytes
+        + struct.pack(">BH", 7, len(value_bytes))
+        + value_bytes
+    )
+
+
+def _estimate_tokens(body: bytes) -> int:
+    """Rough input token count, 4 bytes per token"""
+    return max(len(body) // 4, 1)
+
+
+def _vector(text: Any) -> List[float]:
+    """Embedding of a text, the same for the same text"""
+    generator = random.Random(zlib.crc32(str(text).encode()))
+    return [generator.uniform(-1, 1) for _ in range(EMBEDDING_DIMENSIONS)]
+
+
+def _text(tokens: int) -> str:
+    """Complete response text made of the given number of tokens"""
+    return "".join(f"t{i} " for i in range(tokens))
+
+
+def _parse_args() -> Tuple[argparse.Namespace, MockConfig]:
+    parser = argparse.ArgumentParser(description="Mock LLM provider server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--ttft", type=float, default=0.1)
+    parser.add_argument("--tokens-per-second", type=float, default=100.0)
+    parser.add_argument("--output-tokens", type=int, default=64)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument(
+        "--models", default="mock", help="Comma separated models listed by /models"
+    )
+    args = parser.parse_args()
+    config = MockConfig(
+        latency=args.latency,
+        ttft=args.ttft,
+        tokens_per_second=args.tokens_per_second,
+        output_tokens=args.output_tokens,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        seed=args.seed,
+        models=[model for model in args.models.split(",") if model],
+    )
+    return args, config
+
+
+async def _serve(server: MockProviderServer) -> None:
+    await server.start()
+    print(f"Mock providers listening on {server.url}", flush=True)
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    args, config = _parse_args()
+    try:
+        asyncio.run(_serve(MockProviderServer(config, args.host, args.port)))
+    except KeyboardInterrupt:
+        pass
@@ -1,12 +1,23 @@
-from typing import Optional
-from huggingface_hub import repo_info
+from typing import Any, Dict, Iterator, Optional
+from collections.abc import Mapping
+from contextvars import ContextVar
+import importlib
 import traceback
 import logging
 import sys
 
-# Configure logging with colored output
-logger = logging.getLogger()
+from orichain.metrics import note_exception
+
+# Orichain's own logger, the logging configuration of the application is left untouched
+logger = logging.getLogger("orichain")
 logger.setLevel(logging.ERROR)
+# Errors are printed once by the colored handler below, not again by the root handlers
+logger.propagate = False
+
+# Last exception explained in this context, read by the retry layer to classify provider errors
+last_error: ContextVar[Optional[BaseException]] = ContextVar(
+    "orichain_last_error", default=None
+)
 
 # Create console handler
 console_handler = logging.StreamHandler(sys.stdout)
@@ -94,12 +105,16 @@ def error_explainer(e: Exception) -> None:
         f"{Colors.BOLD}Full Traceback:{Colors.RESET}\n{Colors.GRAY}{full_traceback}{Colors.RESET}"
     )
 
+    # Attribute the error to the call being measured, if any
+    note_exception(e)
+    last_error.set(e)
+
     # Decide log level based on exception type
     log_level = (
         logging.CRITICAL if isinstance(e, CRITICAL_EXCEPTIONS) else logging.ERROR
     )
 
-    logging.log(log_level, error_details)
+    logger.log(log_level, error_details)
 
 
 def hf_repo_exists(
@@ -115,8 +130,46 @@ def hf_repo_exists(
     Returns:
         bool: True if repo exists, False otherwise
     """
+    from huggingface_hub import repo_info
+
     try:
         repo_info(repo_id, repo_type=repo_type, token=token)
         return True
     except Exception:
         return False
+
+
+class LazyHandlers(Mapping):
+    """
+    Read-only mapping of provider names to provider classes, used as `model_handler`.
+
+    A provider module, and the SDK it depends on, is only imported the first time its entry is
+    looked up, so using a single provider does not pay for importing all the others.
+    """
+
+    def __init__(self, package: str, handlers: Dict[str, str]) -> None:
+        """
+        Args:
+            - package (str): Package holding the provider modules, e.g. orichain.llm
+            - handlers (Dict[str, str]): Provider name mapped to "module.Class" inside the package
+        """
+        self.package = package
+        self.handlers = handlers
+        self._loaded: Dict[str, Any] = {}
+
+    def __getitem__(self, provider: str) -> Any:
+        handler = self._loaded.get(provider)
+        if handler is None:
+            module_name, class_name = self.handlers[provider].rsplit(".", 1)
+            module = importlib.import_module(f"{self.package}.{module_name}")
+            handler = self._loaded[provider] = getattr(module, class_name)
+        return handler
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.handlers)
+
+    def __len__(self) -> int:
+        return len(self.handlers)
+
+    def __repr__(self) -> str:
+        return f"LazyHandlers({self.package!r}, {self.handlers!r})"
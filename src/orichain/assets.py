@@ -0,0 +1,364 @@
+from typing import Any, Dict, List, Optional
+import json
+import os
+
+# Default download directory of SentenceTransformers models
+DEFAULT_MODEL_DIR = "/home/ubuntu/projects/models/embedding_models"
+
+# Sub-directories of a bundle
+MODELS_SUBDIR = "sentence_transformers"
+TIKTOKEN_SUBDIR = "tiktoken"
+MANIFEST = "manifest.json"
+
+# Files tiktoken downloads for each encoding
+TIKTOKEN_FILES = {
+    "gpt2": [
+        "https://openaipublic.blob.core.windows.net/gpt-2/encodings/main/vocab.bpe",
+        "https://openaipublic.blob.core.windows.net/gpt-2/encodings/main/encoder.json",
+    ],
+    "r50k_base": [
+        "https://openaipublic.blob.core.windows.net/encodings/r50k_base.tiktoken"
+    ],
+    "p50k_base": [
+        "https://openaipublic.blob.core.windows.net/encodings/p50k_base.tiktoken"
+    ],
+    "p50k_edit": [
+        "https://openaipublic.blob.core.windows.net/encodings/p50k_base.tiktoken"
+    ],
+    "cl100k_base": [
+        "https://openaipublic.blob.core.windows.net/encodings/cl100k_base.tiktoken"
+    ],
+    "o200k_base": [
+        "https://openaipublic.blob.core.windows.net/encodings/o200k_base.tiktoken"
+    ],
+}
+
+# Offline mode, None defers to the HF_HUB_OFFLINE environment variable
+_offline: Optional[bool] = None
+
+# Whether HF_HUB_OFFLINE was set by `set_offline`
+_env_set = False
+
+# Bundle in use, if any
+_bundle_dir: Optional[str] = None
+
+# Encodings loaded so far, by model name
+_encodings: Dict[str, Any] = {}
+
+
+def use_bundle(bundle_dir: str, offline: bool = True) -> None:
+    """Serves the SentenceTransformers models and tiktoken files from a prefetched bundle.
+
+    The bundle is written once with
+    `python -m orichain.assets prefetch --bundle DIR --sentence-transformers ... --tiktoken ...`.
+    Without code changes, the same is achieved with the environment variables `HF_HUB_OFFLINE=1`
+    and `TIKTOKEN_CACHE_DIR=DIR/tiktoken`, passing `model_download_path=DIR/sentence_transformers`.
+
+    Args:
+        - bundle_dir (str): Directory written by `python -m orichain.assets prefetch`
+        - offline (bool, optional): Never reach the network for these assets. Default: True
+    """
+    global _bundle_dir
+    _bundle_dir = bundle_dir
+    os.environ["TIKTOKEN_CACHE_DIR"] = os.path.join(bundle_dir, TIKTOKEN_SUBDIR)
+    set_offline(offline)
+
+
+def set_offline(offline: Optional[bool]) -> None:
+    """Enables or disables the offline mode.
+
+    In offline mode SentenceTransformers models are only validated against the local model
+    directory and tiktoken encodings are only loaded from the tiktoken cache, missing assets raise
+    an error right away instead of hanging on the network.
+
+    Args:
+        - offline (bool, optional): True or False, None to follow HF_HUB_OFFLINE
+    """
+    global _offline, _env_set
+    _offline = offline
+    if offline:
+        # Honoured by huggingface_hub and transformers when they are imported afterwards
+        os.environ["HF_HUB_OFFLINE"] = "1"
+        _env_set = True
+    elif _env_set:
+        os.environ.pop("HF_HUB_OFFLINE", None)
+        _env_set = False
+
+
+def is_offline() -> bool:
+    """Returns whether the offline mode is enabled."""
+    if _offline is not None:
+        return _offline
+    return os.environ.get("HF_HUB_OFFLINE", "").lower() in ("1", "true", "yes", "on")
+
+
+def model_dir(model_download_path: Optional[str] = None) -> str:
+    """Returns the directory holding the SentenceTransformers models.
+
+    Args:
+        - model_download_path (str, optional): Directory given by the caller, takes precedence
+
+    Returns:
+        str: The given directory, else the bundle's, else the default one
+    """
+    if model_download_path:
+        return model_download_path
+    if _bundle_dir:
+        return os.path.join(_bundle_dir, MODELS_SUBDIR)
+    return DEFAULT_MODEL_DIR
+
+
+def local_model_exists(
+    model_name: str, model_download_path: Optional[str] = None
+) -> bool:
+    """Checks whether a SentenceTransformers model was already downloaded.
+
+    Args:
+        - model_name (str): Hugging Face repo id of the model
+        - model_download_path (str, optional): Directory holding the models
+
+    Returns:
+        bool: True if the model directory exists
+    """
+    return os.path.isdir(os.path.join(model_dir(model_download_path), model_name))
+
+
+def tiktoken_cache_dir() -> str:
+    """Returns the directory tiktoken caches its BPE files in, resolved like tiktoken does."""
+    if "TIKTOKEN_CACHE_DIR" in os.environ:
+        return os.environ["TIKTOKEN_CACHE_DIR"]
+    if "DATA_GYM_CACHE_DIR" in os.environ:
+        return os.environ["DATA_GYM_CACHE_DIR"]
+    import tempfile
+
+    return os.path.join(tempfile.gettempdir(), "data-gym-cache")
+
+
+def tiktoken_missing(encoding_name: str) -> List[str]:
+    """Lists the files of an encoding that are not in the tiktoken cache.
+
+    Args:
+        - encoding_name (str): tiktoken encoding, e.g. o200k_base
+
+    Returns:
+        List[str]: URLs of the missing files, empty when the encoding can load offline
+    """
+    import hashlib
+
+    cache_dir = tiktoken_cache_dir()
+    return [
+        url
+        for url in TIKTOKEN_FILES.get(encoding_name, [])
+        if not os.path.exists(
+            os.path.join(cache_dir, hashlib.sha1(url.encode()).hexdigest())
+        )
+    ]
+
+
+def encoding_for_model(model_name: str) -> Any:
+    """Returns the tiktoken encoding of a model, loaded once per process.
+
+    Args:
+        - model_name (str): OpenAI model name
+
+    Returns:
+        tiktoken.Encoding: The encoding
+
+    Raises:
+        - FileNotFoundError: In offline mode, if the encoding files are not in the tiktoken cache
+    """
+    encoding = _encodings.get(model_name)
+    if encoding is not None:
+        return encoding
+
+    import tiktoken
+
+    if is_offline():
+        encoding_name = tiktoken.encoding_name_for_model(model_name)
+        missing = tiktoken_missing(encoding_name)
+        if missing:
+            raise FileNotFoundError(
+                f"tiktoken encoding '{encoding_name}' for model '{model_name}' is not in the "
+                f"cache directory {tiktoken_cache_dir()} and offline mode is enabled. Prefetch it "
+                f"with `python -m orichain.assets prefetch --tiktoken {model_name}`."
+            )
+
+    encoding = _encodings[model_name] = tiktoken.encoding_for_model(model_name)
+    return encoding
+
+
+def prefetch(
+    bundle_dir: str,
+    sentence_transformers: Optional[List[str]] = None,
+    tiktoken_models: Optional[List[str]] = None,
+    token: Optional[str] = None,
+    trust_remote_code: bool = False,
+) -> Dict:
+    """Downloads SentenceTransformers models and tiktoken files into a bundle directory.
+
+    Args:
+        - bundle_dir (str): Directory to write the bundle to, created if missing
+        - sentence_transformers (List[str], optional): Hugging Face repo ids of the models
+        - tiktoken_models (List[str], optional): OpenAI model names or tiktoken encoding names
+        - token (str, optional): Hugging Face API token
+        - trust_remote_code (bool, optional): Trust remote code of the models. Default: False
+
+    Returns:
+        Dict: The bundle manifest, also written to `manifest.json` in the bundle
+
+    Raises:
+        - ImportError: If sentence-transformers or tiktoken is needed but not installed
+    """
+    manifest = _read_manifest(bundle_dir)
+
+    if sentence_transformers:
+        from sentence_transformers import SentenceTransformer
+
+        for model_name in sentence_transformers:
+            path = os.path.join(bundle_dir, MODELS_SUBDIR, model_name)
+            if not os.path.isdir(path):
+                SentenceTransformer(
+                    model_name_or_path=model_name,
+                    device="cpu",
+                    trust_remote_code=trust_remote_code,
+                    token=token,
+                ).save(path)
+            if model_name not in manifest["sentence_transformers"]:
+                manifest["sentence_transformers"].append(model_name)
+
+    if tiktoken_models:
+        # tiktoken writes the files it downloads into its cache directory
+        os.environ["TIKTOKEN_CACHE_DIR"] = os.path.join(bundle_dir, TIKTOKEN_SUBDIR)
+        import tiktoken
+
+        for name in tiktoken_models:
+            if name in TIKTOKEN_FILES:
+                encoding_name = name
+            else:
+                encoding_name = tiktoken.encoding_name_for_model(name)
+            tiktoken.get_encoding(encoding_name)
+            manifest["tiktoken"][name] = encoding_name
+
+    os.makedirs(bundle_dir, exist_ok=True)
+    with open(os.path.join(bundle_dir, MANIFEST), "w") as file:
+        json.dump(manifest, file, indent=2)
+    return manifest
+
+
+def verify(bundle_dir: str) -> List[str]:
+    """Checks that every asset listed in a bundle manifest is present.
+
+    Args:
+        - bundle_dir (str): Bundle directory
+
+    Returns:
+        List[str]: Descriptions of the missing assets, empty when the bundle is complete
+    """
+    manifest = _read_manifest(bundle_dir)
+    missing = [
+        f"sentence_transformers: {model_name}"
+        for model_name in manifest["sentence_transformers"]
+        if not os.path.isdir(os.path.join(bundle_dir, MODELS_SUBDIR, model_name))
+    ]
+
+    cache_dir = os.environ.get("TIKTOKEN_CACHE_DIR")
+    os.environ["TIKTOKEN_CACHE_DIR"] = os.path.join(bundle_dir, TIKTOKEN_SUBDIR)
+    try:
+        for name, encoding_name in manifest["tiktoken"].items():
+            missing += [
+                f"tiktoken: {name} ({url})" for url in tiktoken_missing(encoding_name)
+            ]
+    finally:
+        if cache_dir is None:
+            del os.environ["TIKTOKEN_CACHE_DIR"]
+        else:
+            os.environ["TIKTOKEN_CACHE_DIR"] = cache_dir
+    return missing
+
+
+def _read_manifest(bundle_dir: str) -> Dict:
+    """Reads the manifest of a bundle, or returns an empty one"""
+    path = os.path.join(bundle_dir, MANIFEST)
+    if os.path.exists(path):
+        with open(path) as file:
+            manifest = json.load(file)
+    else:
+        manifest = {}
+    manifest.setdefault("sentence_transformers", [])
+    manifest.setdefault("tiktoken", {})
+    return manifest
+
+
+def _csv(value: str) -> List[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point, `python -m orichain.assets --help`"""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="python -m orichain.assets",
+        description="Prefetch orichain assets for offline use",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    fetch = commands.add_parser(
+        "prefetch", help="Download models and tiktoken files into a bundle"
+    )
+    fetch.add_argument("--bundle", required=True, help="Bundle directory")
+    fetch.add_argument(
+        "--config",
+        default=None,
+        help='JSON file like {"sentence_transformers": [...], "tiktoken": [...]}',
+    )
+    fetch.add_argument(
+        "--sentence-transformers",
+        type=_csv,
+        default=[],
+        help="Comma separated Hugging Face repo ids",
+    )
+    fetch.add_argument(
+        "--tiktoken",
+        type=_csv,
+        default=[],
+        help="Comma separated OpenAI model names or tiktoken encodings",
+    )
+    fetch.add_argument("--token", default=None, help="Hugging Face API token")
+    fetch.add_argument("--trust-remote-code", action="store_true")
+
+    check = commands.add_parser(
+        "verify", help="Check that a bundle holds every asset of its manifest"
+    )
+    check.add_argument("--bundle", required=True, help="Bundle directory")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "prefetch":
+        models = list(args.sentence_transformers)
+        encodings = list(args.tiktoken)
+        if args.config:
+            with open(args.config) as file:
+                config = json.load(file)
+            models += config.get("sentence_transformers", [])
+            encodings += config.get("tiktoken", [])
+        manifest = prefetch(
+            args.bundle,
+            sentence_transformers=models,
+            tiktoken_models=encodings,
+            token=args.token,
+            trust_remote_code=args.trust_remote_code,
+        )
+        print(json.dumps(manifest, indent=2))
+        return 0
+
+    missing = verify(args.bundle)
+    for asset in missing:
+        print(f"missing {asset}")
+    if not missing:
+        print(f"{args.bundle} is complete")
+    return 1 if missing else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
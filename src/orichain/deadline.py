@@ -0,0 +1,302 @@
+from typing import Any, AsyncGenerator, Awaitable, Dict, List, Optional, Union
+from contextvars import ContextVar, Token
+import time
+
+from orichain.streaming import aclose_stream
+
+# Deadline of the request being handled in this context
+_current: ContextVar[Optional["Deadline"]] = ContextVar(
+    "orichain_deadline", default=None
+)
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised by `Deadline.wait` when the deadline passes before the awaitable completes."""
+
+
+class Deadline(object):
+    """
+    Total time budget of a request, shared by every step of its path (embedding, retrieval,
+    language detection, generation).
+
+    Pass it as `deadline=` to `AsyncEmbeddingModel`, `AsyncKnowledgeBase`, `AsyncLLM` and
+    `AsyncLanguageDetection`, or enter it with `with deadline:` so every orichain call made inside
+    picks it up. Each call is then bounded by the time left instead of its own fixed timeout: it
+    is cancelled once the deadline passes and returns `{"error": 504, ...}`, streams end with that
+    error as their final chunk, retries that would not fit are not made, and optional steps are
+    skipped once less than `optional_margin` seconds are left. The HTTP requests of the SDKs that
+    take a per-request timeout get the time left as theirs (see `request_timeout`).
+
+    Example:
+        deadline = Deadline(8.0)
+        vector = await embed(query, deadline=deadline)
+        chunks = await kb(5, vector, deadline=deadline.child(reserve=4.0))
+        answer = await llm(query, deadline=deadline)
+    """
+
+    def __init__(
+        self,
+        seconds: Optional[float] = None,
+        at: Optional[float] = None,
+        optional_margin: float = 0.5,
+    ) -> None:
+        """
+        Args:
+            - seconds (float, optional): Budget from now, in seconds
+            - at (float, optional): Absolute deadline on the `time.monotonic()` clock, used
+              instead of `seconds`
+            - optional_margin (float, optional): Optional steps are skipped once less time than
+              this is left, in seconds. Default: 0.5
+
+        Raises:
+            - ValueError: If neither `seconds` nor `at` is given
+        """
+        if at is None:
+            if seconds is None:
+                raise ValueError("Either `seconds` or `at` is needed for a Deadline")
+            at = time.monotonic() + seconds
+        self.at = at
+        self.optional_margin = optional_margin
+        self._tokens: List[Token] = []
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline, never negative."""
+        return max(self.at - time.monotonic(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        """Whether the deadline has passed."""
+        return time.monotonic() >= self.at
+
+    @property
+    def skip_optional(self) -> bool:
+        """Whether optional steps should be skipped to leave the time to the required ones."""
+        return self.remaining() < self.optional_margin
+
+    def allows(self, seconds: float) -> bool:
+        """Tells whether a step of the given length still fits before the deadline.
+
+        Args:
+            - seconds (float): Expected duration of the step
+
+        Returns:
+            bool: True if at least that much time is left
+        """
+        return self.remaining() >= seconds
+
+    def timeout(self, default: Optional[float] = None) -> float:
+        """Timeout to give a blocking client call: the time left, capped by its own timeout.
+
+        Args:
+            - default (float, optional): Timeout the call would use without a deadline
+
+        Returns:
+            float: Seconds
+        """
+        remaining = self.remaining()
+        return remaining if default is None else min(default, remaining)
+
+    def child(
+        self, seconds: Optional[float] = None, reserve: float = 0.0
+    ) -> "Deadline":
+        """Carves a budget for one step out of this deadline.
+
+        Args:
+            - seconds (float, optional): Longest the step may take. Default: the time left
+            - reserve (float, optional): Time to keep for the steps after this one, e.g. for
+              generation. Default: 0
+
+        Returns:
+            Deadline: A deadline that never ends after this one
+        """
+        at = self.at - reserve
+        if seconds is not None:
+            at = min(at, time.monotonic() + seconds)
+        return Deadline(at=at, optional_margin=self.optional_margin)
+
+    def exceeded(self, step: str) -> Dict:
+        """Error dict returned by a step cut short by the deadline.
+
+        Args:
+            - step (str): Name of the step, e.g. llm call
+
+        Returns:
+            Dict: The error
+        """
+        return {"error": 504, "reason": f"deadline exceeded during {step}"}
+
+    async def wait(self, awaitable: Awaitable) -> Any:
+        """Awaits within the time left, cancelling the awaitable once the deadline passes.
+
+        The deadline is the current one while the awaitable runs, so nested orichain calls (e.g.
+        the retry layer) see it.
+
+        Args:
+            - awaitable (Awaitable): Coroutine to run
+
+        Returns:
+            Any: Result of the awaitable
+
+        Raises:
+            - DeadlineExceeded: If the deadline passes first
+        """
+        import asyncio
+
+        remaining = self.at - time.monotonic()
+        if remaining <= 0:
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+            raise DeadlineExceeded("deadline exceeded")
+
+        token = _current.set(self)
+        try:
+            if hasattr(asyncio, "timeout"):
+                # Python 3.11+, cancels in the same task
+                async with asyncio.timeout(remaining):
+                    return await awaitable
+            return await asyncio.wait_for(awaitable, remaining)
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded("deadline exceeded") from None
+        finally:
+            _current.reset(token)
+
+    async def run(self, awaitable: Awaitable, step: str) -> Any:
+        """Like `wait`, but returns the `exceeded` error dict instead of raising.
+
+        Args:
+            - awaitable (Awaitable): Coroutine to run
+            - step (str): Name of the step, used in the error
+
+        Returns:
+            Any: Result of the awaitable, or the error dict if the deadline passed first
+        """
+        try:
+            return await self.wait(awaitable)
+        except DeadlineExceeded:
+            return self.exceeded(step)
+
+    async def limit(self, stream: Any, step: str) -> AsyncGenerator:
+        """Iterates an async stream within the time left.
+
+        One timer covers the whole stream: it cancels the consuming task if the deadline passes
+        while the stream is waiting for its next chunk, and is checked before each chunk is asked
+        for otherwise. Once the deadline passes, the stream is closed and the `exceeded` error
+        dict is yielded as its final chunk.
+
+        Args:
+            - stream (AsyncGenerator): Stream to iterate
+            - step (str): Name of the step, used in the error
+
+        Yields:
+            Any: Chunks of the stream
+        """
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        # Task waiting for the next chunk, only cancelled while it waits on the stream
+        waiting: Optional[asyncio.Task] = None
+        fired = False
+
+        def expire() -> None:
+            nonlocal fired
+            if waiting is not None and not fired:
+                fired = True
+                waiting.cancel()
+
+        timer = loop.call_at(loop.time() + (self.at - time.monotonic()), expire)
+        iterator = stream.__aiter__()
+        try:
+            while True:
+                if self.expired:
+                    yield self.exceeded(step)
+                    break
+
+                task = waiting = asyncio.current_task()
+                token = _current.set(self)
+                try:
+                    chunk = await iterator.__anext__()
+                except StopAsyncIteration:
+                    break
+                except asyncio.CancelledError:
+                    if not fired:
+                        raise
+                    # Python 3.11+, also cancelled by someone else
+                    uncancel = getattr(task, "uncancel", None)
+                    if uncancel and uncancel():
+                        raise
+                    chunk = self.exceeded(step)
+                finally:
+                    waiting = None
+                    _current.reset(token)
+
+                yield chunk
+                if fired:
+                    break
+        finally:
+            timer.cancel()
+            await aclose_stream(stream)
+
+    def __enter__(self) -> "Deadline":
+        self._tokens.append(_current.set(self))
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        _current.reset(self._tokens.pop())
+
+    def __repr__(self) -> str:
+        return f"Deadline(remaining={self.remaining():.3f})"
+
+
+def current_deadline() -> Optional[Deadline]:
+    """Returns the deadline of the request being handled in this context, if any."""
+    return _current.get()
+
+
+def request_timeout(client: Any = None) -> Dict[str, Any]:
+    """Per-request `timeout=` argument of an SDK call, so the HTTP request itself gives up once
+    the current deadline passes instead of running on in the background after being cancelled.
+
+    Args:
+        - client (Any, optional): SDK client of the call, its own `timeout` (seconds or an
+          `httpx.Timeout`) caps the time left
+
+    Returns:
+        Dict[str, Any]: `{"timeout": ...}` to unpack into the call, empty without a current deadline
+    """
+    deadline = _current.get()
+    if deadline is None:
+        return {}
+
+    default = getattr(client, "timeout", None)
+    if isinstance(default, (int, float)):
+        return {"timeout": deadline.timeout(default)}
+
+    phases = ("connect", "read", "write", "pool")
+    if all(hasattr(default, phase) for phase in phases):
+        # httpx.Timeout, every phase capped by the time left
+        return {
+            "timeout": type(default)(
+                **{phase: deadline.timeout(getattr(default, phase)) for phase in phases}
+            )
+        }
+
+    return {"timeout": deadline.timeout()}
+
+
+def resolve_deadline(
+    deadline: Union[Deadline, float, None],
+) -> Optional[Deadline]:
+    """Turns the `deadline` argument of an orichain call into a deadline.
+
+    Args:
+        - deadline (Deadline, float or None): A deadline, a budget in seconds from now, or None
+          for the deadline of the current context
+
+    Returns:
+        Optional[Deadline]: The deadline of the call, if any
+    """
+    if deadline is None:
+        return _current.get()
+    if isinstance(deadline, Deadline):
+        return deadline
+    return Deadline(float(deadline))
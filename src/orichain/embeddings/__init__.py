@@ -1,15 +1,40 @@
-from typing import Any, List, Dict, Union
-from orichain.embeddings import (
-    openai_embeddings,
-    awsbedrock_embeddings,
-    stransformers_embeddings,
-    azureopenai_embeddings,
-    gcp_gemini_embeddings,
-    gcp_vertex_embeddings,
-    togetherai_embeddings,
-)
+from typing import Any, List, Dict, Optional, Union
+import functools
+import importlib
 import warnings
-from orichain import hf_repo_exists
+from orichain import (
+    LazyHandlers,
+    assets,
+    error_explainer,
+    hf_repo_exists,
+    metrics,
+    pool,
+    resilience,
+    tracing,
+)
+from orichain.deadline import Deadline, resolve_deadline
+from orichain.embeddings.batcher import resolve_batcher
+from orichain.embeddings.cache import resolve_cache
+
+# Provider modules, imported on first use
+PROVIDER_MODULES = (
+    "openai_embeddings",
+    "awsbedrock_embeddings",
+    "stransformers_embeddings",
+    "azureopenai_embeddings",
+    "gcp_gemini_embeddings",
+    "gcp_vertex_embeddings",
+    "togetherai_embeddings",
+    "openaicompatible_embeddings",
+)
+
+
+def __getattr__(name: str) -> Any:
+    """Imports a provider module on first attribute access, e.g. `orichain.embeddings.openai_embeddings`"""
+    if name in PROVIDER_MODULES:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 DEFUALT_EMBEDDING_MODEL = "text-embedding-3-small"
 DEFAULT_MODEL_PROVIDER = "OpenAI"
@@ -50,6 +75,8 @@ SUPPORTED_MODELS = {
         "Alibaba-NLP/gte-modernbert-base",
         "intfloat/multilingual-e5-large-instruct",
     ],
+    # Self-hosted servers, the models are listed per instance with `models`
+    "OpenAICompatible": [],
 }
 
 
@@ -61,15 +88,19 @@ class EmbeddingModel(object):
     default_model = DEFUALT_EMBEDDING_MODEL
     default_model_provider = DEFAULT_MODEL_PROVIDER
     supported_models = SUPPORTED_MODELS
-    model_handler = {
-        "OpenAI": openai_embeddings.Embed,
-        "AWSBedrock": awsbedrock_embeddings.Embed,
-        "SentenceTransformers": stransformers_embeddings.Embed,
-        "AzureOpenAI": azureopenai_embeddings.Embed,
-        "GoogleGemini": gcp_gemini_embeddings.Embed,
-        "GoogleVertexAI": gcp_vertex_embeddings.Embed,
-        "TogetherAI": togetherai_embeddings.Embed,
-    }
+    model_handler = LazyHandlers(
+        "orichain.embeddings",
+        {
+            "OpenAI": "openai_embeddings.Embed",
+            "AWSBedrock": "awsbedrock_embeddings.Embed",
+            "SentenceTransformers": "stransformers_embeddings.Embed",
+            "AzureOpenAI": "azureopenai_embeddings.Embed",
+            "GoogleGemini": "gcp_gemini_embeddings.Embed",
+            "GoogleVertexAI": "gcp_vertex_embeddings.Embed",
+            "TogetherAI": "togetherai_embeddings.Embed",
+            "OpenAICompatible": "openaicompatible_embeddings.Embed",
+        },
+    )
 
     def __init__(self, **kwds: Any) -> None:
         """Initialize the Embedding Models class with the required parameters.
@@ -84,6 +115,7 @@ class EmbeddingModel(object):
                 - AzureOpenAI
                 - TogetherAI
                 - SentenceTransformers
+                - OpenAICompatible
 
             **Authentication Arguments by provider:**
 
@@ -103,6 +135,8 @@ class EmbeddingModel(object):
                         - max_pool_connections: The maximum number of connections to keep in a connection pool. Defualt: 10
                         - retries (Dict, optional):
                             - total_max_attempts: Number of retries for the request. Default: 2
+                    - regions (List[str or Dict], optional): Several regions to spread the calls over instead of `aws_region`. Each entry is a region name, or a dict with `aws_region` and optionally the credentials, `model_name` (e.g. an inference profile), `weight` and `name`. Each call goes to the healthiest, lowest latency region, and throttled regions cool down while the load shifts to the others. Default: None
+                    - pool (Dict, optional): Settings of the region pool, see `orichain.pool.ClientPool`. Default: None
 
                 **Google Gemini models:**
                     - api_key (str): Gemini API key
@@ -118,7 +152,7 @@ class EmbeddingModel(object):
                     - debug_config (DebugConfig, optional): Configuration options that change client network behavior when testing. Default is None
 
                 **Sentence Transformers models:**
-                    - model_download_path (str, optional): Path to download the model. Default: "/home/ubuntu/projects/models/embedding_models"
+                    - model_download_path (str, optional): Path to download the model. Default: the bundle set with `orichain.assets.use_bundle`, else "/home/ubuntu/projects/models/embedding_models"
                     - device (str, optional): Device to run the model. Default: "cpu"
                     - trust_remote_code (bool, optional): Trust remote code. Default: False
                     - token (str, optional): Hugging Face API token
@@ -135,6 +169,28 @@ class EmbeddingModel(object):
                     - timeout (float or int, optional): Request timeout in seconds. Default: 60
                     - max_retries (int, optional): Number of retries for the request. Default: 2
 
+                **OpenAI compatible servers (vLLM, Ollama, llama.cpp server, TGI, ...):**
+                    - base_url (str): Base URL of the server's OpenAI API, e.g. http://localhost:8000/v1
+                    - api_key (str, optional): API key of the server, if it checks one. Default: "EMPTY"
+                    - models (List[str], optional): Models served, `model_name` is checked against them instead of Orichain's model lists. Default: None, any model
+                    - timeout (Timeout, optional): Request timeout parameter like connect, read, write. Default: 60.0, 5.0, 10.0, 2.0
+                    - max_retries (int, optional): Number of retries for the request. Default: 2
+                    - servers (List[str or Dict], optional): Several replicas to spread the calls over instead of one `base_url`. Each entry is a base URL, or a dict with `base_url` and optionally its `models`, `api_key`, `weight` and `name`. Calls only go to the replicas that serve their model, balanced by latency and health, and move on to another replica when one fails or is overloaded. Default: None
+                    - pool (Dict, optional): Settings of the replica pool, see `orichain.pool.ClientPool`. Default: None
+
+            **Circuit breaker arguments (any provider):**
+                - circuit_breaker (CircuitBreaker, Dict or bool, optional): Fail fast while the provider is unhealthy. True or a dict of CircuitBreaker settings uses the breaker shared by every embedding model of the same client, i.e. provider, endpoint, region and key (`embeddings:<provider>#<hash>`, see `orichain.resilience.client_name`), or pass your own `orichain.resilience.CircuitBreaker`. Default: None
+
+            **Retry arguments (any provider):**
+                - retry_policy (RetryPolicy, Dict or bool, optional): Retry transient errors (timeouts, throttling, server errors) with orichain instead of the provider SDK, using jittered backoff, Retry-After and a retry budget shared by the process. True uses the default policy, or pass a dict of RetryPolicy settings or an `orichain.resilience.RetryPolicy`. Turns SDK retries off unless `max_retries` is given. Default: None
+
+            **API key pool arguments (OpenAI, TogetherAI, GoogleGemini):**
+                - api_keys (List[str or Dict], optional): Several API keys (or projects) to spread the calls over instead of one `api_key`, to add up their rate limits. Each entry is a key, or a dict with `api_key` and optionally a `weight` and a `name` for metrics. A throttled key cools down for the Retry-After it was given and the call moves on to another key. Default: None
+                - pool (Dict, optional): Settings of the key pool, see `orichain.pool.ClientPool`, e.g. {"strategy": "round_robin"} or {"strategy": "least_loaded"}. Default: latency based selection
+
+            **Embedding cache arguments (any provider):**
+                - embedding_cache (EmbeddingCache, Dict or bool, optional): Serve the texts already embedded from a cache instead of the provider, and coalesce concurrent calls for the same text. True uses the shared in-memory cache, a dict of EmbeddingCache settings (e.g. {"path": "/var/cache/orichain/embeddings"} for the on-disk tier) the shared cache of its `name`, or pass your own `orichain.embeddings.cache.EmbeddingCache`. Default: None
+
         Raises:
             - ValueError: If the model is not supported
             - KeyError: If required parameters are missing
@@ -167,15 +223,35 @@ class EmbeddingModel(object):
                 f"\n- " + "\n- ".join(list(self.model_handler.keys()))
             )
         elif self.model_provider == "SentenceTransformers":
-            repo_check = hf_repo_exists(
+            # A model already downloaded needs no Hugging Face Hub round trip
+            if assets.local_model_exists(
+                self.model_name, kwds.get("model_download_path")
+            ):
+                pass
+            elif assets.is_offline():
+                raise ValueError(
+                    f"\nThe model '{self.model_name}' is not in {assets.model_dir(kwds.get('model_download_path'))} and offline mode is enabled. \nPrefetch it with `python -m orichain.assets prefetch --sentence-transformers {self.model_name}`."
+                )
+            elif not hf_repo_exists(
                 repo_id=self.model_name,
                 repo_type=kwds.get("repo_type"),
                 token=kwds.get("token"),
-            )
-            if not repo_check:
+            ):
                 raise ValueError(
                     f"\nThe Huggingface repository '{self.model_name}' does not exist. \nPlease ensure you provide the full repository path in 'model_name'."
                 )
+        elif self.model_provider == "OpenAICompatible":
+            # A self-hosted server serves whatever it was started with
+            served = pool.served_models(kwds)
+            self.supported_models = {
+                **self.supported_models,
+                "OpenAICompatible": served,
+            }
+            if served and self.model_name not in served:
+                warnings.warn(
+                    f"\nModel {self.model_name} is not among the models served by the OpenAI compatible server(s): [{', '.join(served)}] \nPlease make sure you're using the correct 'model_name' and 'provider'",
+                    UserWarning,
+                )
         elif self.model_name not in self.supported_models.get(self.model_provider):
             warnings.warn(
                 f"\nModel {self.model_name} for provider {self.model_provider} is not supported by Orichain. Supported models for {self.model_provider} are: [{', '.join(self.supported_models.get(self.model_provider))}] \nPlease make sure you're using the correct 'model_name' and 'provider'",
@@ -185,7 +261,39 @@ class EmbeddingModel(object):
             pass
 
         # Initialize the model
-        self.model = self.model_handler.get(self.model_provider)(**kwds)
+        # Let the orichain retry policy own retries, SDK retries would multiply with it
+        self.retry_policy = resilience.resolve_retry_policy(kwds.get("retry_policy"))
+        if self.retry_policy:
+            kwds.setdefault("max_retries", 0)
+
+        members = pool.pool_argument(kwds, self.model_provider)
+        if members:
+            # Spread the calls over several clients, e.g. regions
+            self.model = pool.build(
+                self.model_handler.get(self.model_provider),
+                kwds,
+                members,
+                f"embeddings:{self.model_provider}",
+                asynchronous=False,
+            )
+        else:
+            self.model = self.model_handler.get(self.model_provider)(**kwds)
+
+        # Guard the provider client with a circuit breaker if asked for
+        self.breaker = resilience.resolve_breaker(
+            kwds.get("circuit_breaker"), "embeddings", self.model_provider, kwds
+        )
+        if self.breaker:
+            self.model = resilience.Guarded(self.model, self.breaker)
+
+        # Retry transient provider errors if asked for, each attempt goes through the breaker
+        if self.retry_policy:
+            self.model = resilience.Retrying(
+                self.model, self.retry_policy, f"embeddings:{self.model_provider}"
+            )
+
+        # Serve repeated texts from a cache if asked for
+        self.embedding_cache = resolve_cache(kwds.get("embedding_cache"))
 
     def __call__(
         self, user_message: Union[str, List[str]], **kwds: Any
@@ -268,10 +376,11 @@ class EmbeddingModel(object):
                     )
                 # Defaulting to the model_name that is already loaded
                 model_name = self.model_name
-            # Check if the model is supported in the model type class
+            # Check if the model is supported in the model type class, an OpenAI compatible
+            # server without a models list serves any model
             elif kwds.get("model_name") in self.supported_models.get(
                 self.model_provider
-            ):
+            ) or not self.supported_models.get(self.model_provider):
                 model_name = kwds.get("model_name")
             else:
                 warnings.warn(
@@ -284,12 +393,39 @@ class EmbeddingModel(object):
         else:
             model_name = self.model_name
 
-        # Get the embeddings
-        user_message_vector = self.model(
-            text=user_message, model_name=model_name, **kwds
+        # Measure the call when metrics are enabled
+        call_metrics = metrics.start_call(
+            "embeddings", "embed", self.model_provider, model_name
         )
 
-        return user_message_vector
+        try:
+            # Get the embeddings, only embedding the texts the cache does not have
+            if self.embedding_cache is not None:
+                user_message_vector = self.embedding_cache.embed(
+                    self.model_provider,
+                    model_name,
+                    kwds,
+                    user_message,
+                    lambda text: self.model(text=text, model_name=model_name, **kwds),
+                )
+            else:
+                user_message_vector = self.model(
+                    text=user_message, model_name=model_name, **kwds
+                )
+
+            if call_metrics:
+                call_metrics.finish(user_message_vector)
+
+            return user_message_vector
+
+        except Exception as e:
+            error_explainer(e)
+            if call_metrics:
+                call_metrics.finish(error=e)
+            return {"error": 500, "reason": str(e)}
+        finally:
+            if call_metrics:
+                call_metrics.close()
 
 
 class AsyncEmbeddingModel(object):
@@ -300,15 +436,19 @@ class AsyncEmbeddingModel(object):
     default_model = DEFUALT_EMBEDDING_MODEL
     default_model_provider = DEFAULT_MODEL_PROVIDER
     supported_models = SUPPORTED_MODELS
-    model_handler = {
-        "OpenAI": openai_embeddings.AsyncEmbed,
-        "AWSBedrock": awsbedrock_embeddings.AsyncEmbed,
-        "SentenceTransformers": stransformers_embeddings.AsyncEmbed,
-        "AzureOpenAI": azureopenai_embeddings.AsyncEmbed,
-        "GoogleGemini": gcp_gemini_embeddings.AsyncEmbed,
-        "GoogleVertexAI": gcp_vertex_embeddings.AsyncEmbed,
-        "TogetherAI": togetherai_embeddings.AsyncEmbed,
-    }
+    model_handler = LazyHandlers(
+        "orichain.embeddings",
+        {
+            "OpenAI": "openai_embeddings.AsyncEmbed",
+            "AWSBedrock": "awsbedrock_embeddings.AsyncEmbed",
+            "SentenceTransformers": "stransformers_embeddings.AsyncEmbed",
+            "AzureOpenAI": "azureopenai_embeddings.AsyncEmbed",
+            "GoogleGemini": "gcp_gemini_embeddings.AsyncEmbed",
+            "GoogleVertexAI": "gcp_vertex_embeddings.AsyncEmbed",
+            "TogetherAI": "togetherai_embeddings.AsyncEmbed",
+            "OpenAICompatible": "openaicompatible_embeddings.AsyncEmbed",
+        },
+    )
 
     def __init__(self, **kwds: Any) -> None:
         """Initialize the Embedding Models class with the required parameters.
@@ -323,6 +463,7 @@ class AsyncEmbeddingModel(object):
                 - AzureOpenAI
                 - TogetherAI
                 - SentenceTransformers
+                - OpenAICompatible
 
             **Authentication Arguments by provider:**
 
@@ -342,6 +483,8 @@ class AsyncEmbeddingModel(object):
                         - max_pool_connections: The maximum number of connections to keep in a connection pool. Defualt: 10
                         - retries (Dict, optional):
                             - total_max_attempts: Number of retries for the request. Default: 2
+                    - regions (List[str or Dict], optional): Several regions to spread the calls over instead of `aws_region`. Each entry is a region name, or a dict with `aws_region` and optionally the credentials, `model_name` (e.g. an inference profile), `weight` and `name`. Each call goes to the healthiest, lowest latency region, and throttled regions cool down while the load shifts to the others. Default: None
+                    - pool (Dict, optional): Settings of the region pool, see `orichain.pool.ClientPool`. Default: None
 
                 **Google Gemini models:**
                     - api_key (str): Gemini API key
@@ -357,7 +500,7 @@ class AsyncEmbeddingModel(object):
                     - debug_config (DebugConfig, optional): Configuration options that change client network behavior when testing. Default is None
 
                 **Sentence Transformers models:**
-                    - model_download_path (str, optional): Path to download the model. Default: "/home/ubuntu/projects/models/embedding_models"
+                    - model_download_path (str, optional): Path to download the model. Default: the bundle set with `orichain.assets.use_bundle`, else "/home/ubuntu/projects/models/embedding_models"
                     - device (str, optional): Device to run the model. Default: "cpu"
                     - trust_remote_code (bool, optional): Trust remote code. Default: False
                     - token (str, optional): Hugging Face API token
@@ -374,6 +517,31 @@ class AsyncEmbeddingModel(object):
                     - timeout (float or int, optional): Request timeout in seconds. Default: 60
                     - max_retries (int, optional): Number of retries for the request. Default: 2
 
+                **OpenAI compatible servers (vLLM, Ollama, llama.cpp server, TGI, ...):**
+                    - base_url (str): Base URL of the server's OpenAI API, e.g. http://localhost:8000/v1
+                    - api_key (str, optional): API key of the server, if it checks one. Default: "EMPTY"
+                    - models (List[str], optional): Models served, `model_name` is checked against them instead of Orichain's model lists. Default: None, any model
+                    - timeout (Timeout, optional): Request timeout parameter like connect, read, write. Default: 60.0, 5.0, 10.0, 2.0
+                    - max_retries (int, optional): Number of retries for the request. Default: 2
+                    - servers (List[str or Dict], optional): Several replicas to spread the calls over instead of one `base_url`. Each entry is a base URL, or a dict with `base_url` and optionally its `models`, `api_key`, `weight` and `name`. Calls only go to the replicas that serve their model, balanced by latency and health, and move on to another replica when one fails or is overloaded. Default: None
+                    - pool (Dict, optional): Settings of the replica pool, see `orichain.pool.ClientPool`. Default: None
+
+            **Circuit breaker arguments (any provider):**
+                - circuit_breaker (CircuitBreaker, Dict or bool, optional): Fail fast while the provider is unhealthy. True or a dict of CircuitBreaker settings uses the breaker shared by every embedding model of the same client, i.e. provider, endpoint, region and key (`embeddings:<provider>#<hash>`, see `orichain.resilience.client_name`), or pass your own `orichain.resilience.CircuitBreaker`. Default: None
+
+            **Retry arguments (any provider):**
+                - retry_policy (RetryPolicy, Dict or bool, optional): Retry transient errors (timeouts, throttling, server errors) with orichain instead of the provider SDK, using jittered backoff, Retry-After and a retry budget shared by the process. True uses the default policy, or pass a dict of RetryPolicy settings or an `orichain.resilience.RetryPolicy`. Turns SDK retries off unless `max_retries` is given. Default: None
+
+            **API key pool arguments (OpenAI, TogetherAI, GoogleGemini):**
+                - api_keys (List[str or Dict], optional): Several API keys (or projects) to spread the calls over instead of one `api_key`, to add up their rate limits. Each entry is a key, or a dict with `api_key` and optionally a `weight` and a `name` for metrics. A throttled key cools down for the Retry-After it was given and the call moves on to another key. Default: None
+                - pool (Dict, optional): Settings of the key pool, see `orichain.pool.ClientPool`, e.g. {"strategy": "round_robin"} or {"strategy": "least_loaded"}. Default: latency based selection
+
+            **Embedding cache arguments (any provider):**
+                - embedding_cache (EmbeddingCache, Dict or bool, optional): Serve the texts already embedded from a cache instead of the provider, and coalesce concurrent calls for the same text. True uses the shared in-memory cache, a dict of EmbeddingCache settings (e.g. {"path": "/var/cache/orichain/embeddings"} for the on-disk tier) the shared cache of its `name`, or pass your own `orichain.embeddings.cache.EmbeddingCache`. Default: None
+
+            **Micro-batching arguments (any provider):**
+                - micro_batch (MicroBatcher, Dict or bool, optional): Collect the concurrent calls of the model for a few milliseconds and send their texts in one provider call, to make fewer requests under load. True uses the default settings (up to 64 texts or 5 ms), or pass a dict of MicroBatcher settings, e.g. {"max_batch": 128, "max_wait": 0.01}, or an `orichain.embeddings.batcher.MicroBatcher`. Default: None
+
         Raises:
             - ValueError: If the model is not supported
             - KeyError: If required parameters are missing
@@ -406,15 +574,35 @@ class AsyncEmbeddingModel(object):
                 f"\n- " + "\n- ".join(list(self.model_handler.keys()))
             )
         elif self.model_provider == "SentenceTransformers":
-            repo_check = hf_repo_exists(
+            # A model already downloaded needs no Hugging Face Hub round trip
+            if assets.local_model_exists(
+                self.model_name, kwds.get("model_download_path")
+            ):
+                pass
+            elif assets.is_offline():
+                raise ValueError(
+                    f"\nThe model '{self.model_name}' is not in {assets.model_dir(kwds.get('model_download_path'))} and offline mode is enabled. \nPrefetch it with `python -m orichain.assets prefetch --sentence-transformers {self.model_name}`."
+                )
+            elif not hf_repo_exists(
                 repo_id=self.model_name,
                 repo_type=kwds.get("repo_type"),
                 token=kwds.get("token"),
-            )
-            if not repo_check:
+            ):
                 raise ValueError(
                     f"\nThe Huggingface repository '{self.model_name}' does not exist. \nPlease ensure you provide the full repository path in 'model_name'."
                 )
+        elif self.model_provider == "OpenAICompatible":
+            # A self-hosted server serves whatever it was started with
+            served = pool.served_models(kwds)
+            self.supported_models = {
+                **self.supported_models,
+                "OpenAICompatible": served,
+            }
+            if served and self.model_name not in served:
+                warnings.warn(
+                    f"\nModel {self.model_name} is not among the models served by the OpenAI compatible server(s): [{', '.join(served)}] \nPlease make sure you're using the correct 'model_name' and 'provider'",
+                    UserWarning,
+                )
         elif self.model_name not in self.supported_models.get(self.model_provider):
             warnings.warn(
                 f"\nModel {self.model_name} for provider {self.model_provider} is not supported by Orichain. Supported models for {self.model_provider} are: [{', '.join(self.supported_models.get(self.model_provider))}] \nPlease make sure you're using the correct 'model_name' and 'provider'",
@@ -424,15 +612,56 @@ class AsyncEmbeddingModel(object):
             pass
 
         # Initialize the model
-        self.model = self.model_handler.get(self.model_provider)(**kwds)
+        # Let the orichain retry policy own retries, SDK retries would multiply with it
+        self.retry_policy = resilience.resolve_retry_policy(kwds.get("retry_policy"))
+        if self.retry_policy:
+            kwds.setdefault("max_retries", 0)
+
+        members = pool.pool_argument(kwds, self.model_provider)
+        if members:
+            # Spread the calls over several clients, e.g. regions
+            self.model = pool.build(
+                self.model_handler.get(self.model_provider),
+                kwds,
+                members,
+                f"embeddings:{self.model_provider}",
+                asynchronous=True,
+            )
+        else:
+            self.model = self.model_handler.get(self.model_provider)(**kwds)
+
+        # Guard the provider client with a circuit breaker if asked for
+        self.breaker = resilience.resolve_breaker(
+            kwds.get("circuit_breaker"), "embeddings", self.model_provider, kwds
+        )
+        if self.breaker:
+            self.model = resilience.AsyncGuarded(self.model, self.breaker)
+
+        # Retry transient provider errors if asked for, each attempt goes through the breaker
+        if self.retry_policy:
+            self.model = resilience.AsyncRetrying(
+                self.model, self.retry_policy, f"embeddings:{self.model_provider}"
+            )
+
+        # Serve repeated texts from a cache if asked for
+        self.embedding_cache = resolve_cache(kwds.get("embedding_cache"))
+
+        # Batch the concurrent calls into fewer provider calls if asked for
+        self.micro_batch = resolve_batcher(
+            kwds.get("micro_batch"), f"embeddings:{self.model_provider}"
+        )
 
     async def __call__(
-        self, user_message: Union[str, List[str]], **kwds: Any
+        self,
+        user_message: Union[str, List[str]],
+        deadline: Optional[Union[Deadline, float]] = None,
+        **kwds: Any,
     ) -> Union[List[float], List[List[float]], Dict]:
         """Get embeddings for the given text(s).
 
         Args:
             - user_message (Union[str, List[str]]): Input text or list of texts
+            - deadline (Deadline or float, optional): Total time budget of the request (`orichain.deadline.Deadline` or seconds). The call is cancelled once it passes and returns an error 504. Default: the deadline entered with `with deadline:`, if any
 
             **Generation Arguments by provider:**
 
@@ -507,10 +736,11 @@ class AsyncEmbeddingModel(object):
                     )
                 # Defaulting to the model_name that is already loaded
                 model_name = self.model_name
-            # Check if the model is supported in the model type class
+            # Check if the model is supported in the model type class, an OpenAI compatible
+            # server without a models list serves any model
             elif kwds.get("model_name") in self.supported_models.get(
                 self.model_provider
-            ):
+            ) or not self.supported_models.get(self.model_provider):
                 model_name = kwds.get("model_name")
             else:
                 warnings.warn(
@@ -523,9 +753,65 @@ class AsyncEmbeddingModel(object):
         else:
             model_name = self.model_name
 
-        # Get the embeddings
-        user_message_vector = await self.model(
-            text=user_message, model_name=model_name, **kwds
+        # Measure the call when metrics are enabled
+        call_metrics = metrics.start_call(
+            "embeddings", "embed", self.model_provider, model_name
         )
 
-        return user_message_vector
+        # Trace the call when tracing is enabled
+        span = tracing.start_span(
+            "orichain.embeddings.embed",
+            {
+                "gen_ai.operation.name": "embeddings",
+                "gen_ai.system": self.model_provider,
+                "gen_ai.request.model": model_name,
+                "orichain.inputs": (
+                    1 if isinstance(user_message, str) else len(user_message)
+                ),
+            },
+        )
+
+        # Provider call, batched with the concurrent calls of the model if asked for
+        def provider(text: Union[str, List[str]]) -> Any:
+            return self.model(text=text, model_name=model_name, **kwds)
+
+        embed = provider
+        if self.micro_batch is not None:
+            embed = functools.partial(
+                self.micro_batch.embed, model_name, kwds, compute=provider
+            )
+
+        try:
+            # Get the embeddings, within the deadline if there is one
+            deadline = resolve_deadline(deadline)
+            if self.embedding_cache is not None:
+                # Only embed the texts the cache does not have
+                call = self.embedding_cache.aembed(
+                    self.model_provider, model_name, kwds, user_message, embed
+                )
+            else:
+                call = embed(user_message)
+            if deadline:
+                user_message_vector = await deadline.run(call, "embedding")
+            else:
+                user_message_vector = await call
+
+            if call_metrics:
+                call_metrics.finish(user_message_vector)
+            if span:
+                span.finish(user_message_vector)
+
+            return user_message_vector
+
+        except Exception as e:
+            error_explainer(e)
+            if call_metrics:
+                call_metrics.finish(error=e)
+            if span:
+                span.finish(error=e)
+            return {"error": 500, "reason": str(e)}
+        finally:
+            if call_metrics:
+                call_metrics.close()
+            if span:
+                span.close()
@@ -4,7 +4,7 @@ import json
 from concurrent.futures import ThreadPoolExecutor
 import asyncio
 
-from orichain import error_explainer
+from orichain import error_explainer, metrics, resilience
 
 
 class Embed(object):
@@ -27,6 +27,7 @@ class Embed(object):
                 - max_pool_connections: The maximum number of connections to keep in a connection pool. Defualt: 10
                 - retries (Dict, optional):
                     - total_max_attempts: Number of retries for the request. Default: 2
+            - max_retries (int, optional): Number of retries of the default config, and of a given config under a `retry_policy`. Default: 1
 
         Raises:
             - KeyError: If required parameters are not provided.
@@ -57,14 +58,7 @@ class Embed(object):
             service_name="bedrock-runtime",
             aws_access_key_id=kwds.get("aws_access_key"),
             aws_secret_access_key=kwds.get("aws_secret_key"),
-            config=kwds.get("config")
-            or Config(
-                region_name=kwds.get("aws_region"),
-                read_timeout=10,
-                connect_timeout=2,
-                retries={"total_max_attempts": 2},
-                max_pool_connections=100,
-            ),
+            config=resilience.botocore_config(kwds),
         )
 
         # Set up accept and content type for different models that wil be used by respective models
@@ -229,6 +223,7 @@ class AsyncEmbed(object):
                 - max_pool_connections: The maximum number of connections to keep in a connection pool. Defualt: 10
                 - retries (Dict, optional):
                     - total_max_attempts: Number of retries for the request. Default: 2
+            - max_retries (int, optional): Number of retries of the default config, and of a given config under a `retry_policy`. Default: 1
 
         Raises:
             - KeyError: If required parameters are not provided.
@@ -259,14 +254,7 @@ class AsyncEmbed(object):
             service_name="bedrock-runtime",
             aws_access_key_id=kwds.get("aws_access_key"),
             aws_secret_access_key=kwds.get("aws_secret_key"),
-            config=kwds.get("config")
-            or Config(
-                region_name=kwds.get("aws_region"),
-                read_timeout=10,
-                connect_timeout=2,
-                retries={"total_max_attempts": 2},
-                max_pool_connections=100,
-            ),
+            config=resilience.botocore_config(kwds),
         )
 
         # Set up accept and content type for different models that wil be used by respective models
@@ -375,7 +363,7 @@ class AsyncEmbed(object):
         """
         try:
             # Invoke model in a separate thread
-            response = await asyncio.to_thread(
+            response = await metrics.run_in_thread(
                 self.client.invoke_model,
                 body=json.dumps(body),
                 modelId=model_id,
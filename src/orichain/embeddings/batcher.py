@@ -0,0 +1,208 @@
+import contextvars
+import sys
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple, Union
+
+from orichain import error_explainer, metrics
+from orichain.deadline import current_deadline
+
+
+class _Batch(object):
+    """Texts collected for one provider call, with the future of each caller"""
+
+    __slots__ = ("texts", "waiters", "timer")
+
+    def __init__(self) -> None:
+        self.texts: List[str] = []
+        # Future of each caller, with the slice of the texts it asked for
+        self.waiters: List[Tuple[Any, int, int, bool]] = []
+        self.timer: Any = None
+
+
+class MicroBatcher(object):
+    """
+    Batches the concurrent calls of an `AsyncEmbeddingModel` into fewer provider calls.
+
+    Calls with the same model and generation arguments are collected for up to `max_wait`
+    seconds, or until `max_batch` texts are waiting, then sent as one provider call whose vectors
+    are handed back to each caller. Under load, hundreds of single query embeddings per second
+    become a few batched requests, using fewer connections and rate limit requests. A call
+    already holding `max_batch` texts or more is sent on its own.
+
+    An error of the batched call is returned to every caller in it. The batch is sent in a fresh
+    context, so it does not inherit the deadline, span or other context variables of the caller
+    that opened it; each caller only bounds its own wait by its own deadline, and a caller
+    cancelled while waiting leaves the batch going for the others.
+    """
+
+    def __init__(
+        self,
+        name: str = "default",
+        max_batch: int = 64,
+        max_wait: float = 0.005,
+    ) -> None:
+        """
+        Args:
+            - name (str, optional): Name used in metrics, e.g. embeddings:OpenAI
+            - max_batch (int, optional): Texts sent in one provider call at most. Default: 64
+            - max_wait (float, optional): Seconds a call waits for others to join its batch. Default: 0.005
+        """
+        self.name = name
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+
+        # Open batch of each model and generation arguments
+        self._batches: Dict[Tuple[str, str], _Batch] = {}
+        # Provider calls in flight, kept referenced until they are done
+        self._tasks: Set[Any] = set()
+
+    async def embed(
+        self,
+        model_name: str,
+        kwds: Dict[str, Any],
+        text: Union[str, List[str]],
+        compute: Callable[[List[str]], Awaitable[Any]],
+    ) -> Union[List[float], List[List[float]], Dict]:
+        """Embeds text(s) as part of a batch with the concurrent calls of the same model.
+
+        Args:
+            - model_name (str): Name of the model
+            - kwds (Dict): Generation arguments of the call, only calls with the same ones are batched together
+            - text (Union[str, List[str]]): Input text or list of texts
+            - compute (Callable[[List[str]], Awaitable[Any]]): Calls the provider for a list of texts
+
+        Returns:
+            (Union[List[float], List[List[float]], Dict[str, Any]]): Embeddings or error information
+        """
+        import asyncio
+
+        texts = [text] if isinstance(text, str) else list(text)
+        if not texts or len(texts) >= self.max_batch:
+            return await compute(text)
+
+        loop = asyncio.get_running_loop()
+        key = (model_name, repr(sorted(kwds.items())))
+        batch = self._batches.get(key)
+        if batch is None or len(batch.texts) + len(texts) > self.max_batch:
+            if batch is not None:
+                # No room left for this call, send the open batch now
+                self._flush(key, compute)
+            batch = self._batches[key] = _Batch()
+            batch.timer = loop.call_later(
+                self.max_wait,
+                self._flush,
+                key,
+                compute,
+                context=contextvars.Context(),
+            )
+
+        future = loop.create_future()
+        start = len(batch.texts)
+        batch.texts.extend(texts)
+        batch.waiters.append((future, start, len(batch.texts), isinstance(text, str)))
+        if len(batch.texts) >= self.max_batch:
+            self._flush(key, compute)
+
+        # Wait within this caller's deadline only, cancelling just its own future
+        deadline = current_deadline()
+        if deadline is not None:
+            return await deadline.run(future, "embedding")
+        return await future
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Returns the state of the batcher, for metrics and health endpoints."""
+        return {
+            "name": self.name,
+            "open_batches": len(self._batches),
+            "waiting": sum(len(batch.texts) for batch in self._batches.values()),
+            "in_flight": len(self._tasks),
+        }
+
+    def _flush(
+        self, key: Tuple[str, str], compute: Callable[[List[str]], Awaitable[Any]]
+    ) -> None:
+        """Closes the open batch of a model and sends it to the provider"""
+        import asyncio
+
+        batch = self._batches.pop(key, None)
+        if batch is None:
+            return
+        batch.timer.cancel()
+        task = _create_task(asyncio.get_running_loop(), self._send(batch, compute))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(
+        self, batch: _Batch, compute: Callable[[List[str]], Awaitable[Any]]
+    ) -> None:
+        """Embeds a batch in one provider call and hands each caller its vectors"""
+        sink = metrics.get_sink()
+        if sink:
+            sink.observe(
+                "orichain_embedding_batch_size",
+                len(batch.texts),
+                {"batcher": self.name},
+            )
+
+        try:
+            result = await compute(batch.texts)
+        except Exception as e:
+            error_explainer(e)
+            result = {"error": 500, "reason": str(e)}
+
+        rows = _rows(result, len(batch.texts))
+        if rows is None and not isinstance(result, dict):
+            result = {
+                "error": 500,
+                "reason": f"Expected {len(batch.texts)} embeddings from the batched call",
+            }
+        for future, start, end, single in batch.waiters:
+            if future.done():
+                # Cancelled while waiting
+                continue
+            if rows is None:
+                future.set_result(result)
+            elif single or end - start == 1:
+                # One vector for one text, as the providers return it
+                future.set_result(rows[start])
+            else:
+                future.set_result(rows[start:end])
+
+    def __repr__(self) -> str:
+        return f"MicroBatcher({self.name!r}, max_batch={self.max_batch}, max_wait={self.max_wait})"
+
+
+def resolve_batcher(batcher: Any, name: str) -> Optional[MicroBatcher]:
+    """Turns the `micro_batch` argument of an `AsyncEmbeddingModel` into a batcher.
+
+    Args:
+        - batcher (MicroBatcher, Dict, bool or None): A batcher, True for the default settings, a
+          dict of `MicroBatcher` settings, or None/False to disable it
+        - name (str): Name of the batcher, e.g. embeddings:OpenAI
+
+    Returns:
+        Optional[MicroBatcher]: The batcher to use, if any
+    """
+    if isinstance(batcher, MicroBatcher):
+        return batcher
+    if not batcher:
+        return None
+    settings = batcher if isinstance(batcher, dict) else {}
+    return MicroBatcher(**{"name": name, **settings})
+
+
+def _create_task(loop: Any, coro: Awaitable) -> Any:
+    """Creates a task in a fresh context, without the context variables of the caller"""
+    context = contextvars.Context()
+    if sys.version_info >= (3, 11):
+        return loop.create_task(coro, context=context)
+    # Tasks copy the current context before Python 3.11
+    return context.run(loop.create_task, coro)
+
+
+def _rows(result: Any, count: int) -> Optional[List[Any]]:
+    """One vector per text of a batched result, None if the call failed"""
+    if isinstance(result, dict) or result is None:
+        return None
+    # The providers return a single vector for a single text
+    rows = [result] if count == 1 else list(result)
+    return rows if len(rows) == count else None
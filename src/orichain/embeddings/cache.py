@@ -0,0 +1,662 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+from collections import OrderedDict
+from array import array
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+
+from orichain import error_explainer, metrics
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover, Windows
+    fcntl = None
+
+# Shared embedding caches, by name
+_caches: Dict[str, "EmbeddingCache"] = {}
+
+# Generation arguments whose results are not plain float vectors, they are never cached
+UNCACHEABLE_ARGUMENTS = ("convert_to_numpy", "convert_to_tensor", "embedding_types")
+
+# Size of the index entries (sha256 digests) and of the vector file header (dimensions)
+DIGEST_SIZE = 32
+HEADER = struct.Struct("<I")
+
+
+class DiskTier(object):
+    """
+    Vectors of one namespace (provider, model and arguments) stored on disk.
+
+    The vectors are rows of float32 in a memory-mapped file after a header holding their
+    dimensions, and the index is an append-only file of the sha256 digests of their texts, the
+    n-th digest being the text of the n-th row. Both files only grow: a row is written before its
+    digest, so a reader never finds a digest without its vector. Rows appended by other processes
+    sharing the directory are picked up on the next miss, and appends are serialized with a file
+    lock where `fcntl` is available.
+    """
+
+    def __init__(
+        self, directory: str, namespace: str, max_entries: Optional[int] = None
+    ) -> None:
+        """
+        Args:
+            - directory (str): Directory of the files, created if missing
+            - namespace (str): Namespace of the vectors, names the files
+            - max_entries (int, optional): Rows after which no more vectors are written. Default: None, no limit
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.vectors_path = os.path.join(directory, f"{namespace}.f32")
+        self.index_path = os.path.join(directory, f"{namespace}.idx")
+        self.max_entries = max_entries
+        self.dimensions: Optional[int] = None
+
+        self._rows: Dict[bytes, int] = {}
+        self._index_read = 0
+        self._map: Optional[mmap.mmap] = None
+        self._lock = threading.Lock()
+        self._vectors = _open(self.vectors_path)
+        self._index = _open(self.index_path)
+        self._sync()
+
+    def get(self, digest: bytes) -> Optional[List[float]]:
+        """Returns the vector of a text, None if it is not on disk.
+
+        Args:
+            - digest (bytes): sha256 digest of the text
+
+        Returns:
+            Optional[List[float]]: The vector
+        """
+        with self._lock:
+            row = self._rows.get(digest)
+            if row is None:
+                # Another process may have written it since
+                self._sync()
+                row = self._rows.get(digest)
+                if row is None:
+                    return None
+            return self._read(row)
+
+    def put(self, items: List[Tuple[bytes, List[float]]]) -> None:
+        """Appends vectors, skipping the ones already on disk or of other dimensions.
+
+        Args:
+            - items (List[Tuple[bytes, List[float]]]): Digests of the texts and their vectors
+        """
+        if not items:
+            return
+        with self._lock:
+            self._acquire()
+            try:
+                self._sync()
+                if self.dimensions is None:
+                    self.dimensions = len(items[0][1])
+                    self._vectors.seek(0)
+                    self._vectors.truncate()
+                    self._vectors.write(HEADER.pack(self.dimensions))
+                rows = self._index_read // DIGEST_SIZE
+                digests = []
+                for digest, vector in items:
+                    if digest in self._rows or len(vector) != self.dimensions:
+                        continue
+                    if self.max_entries is not None and rows >= self.max_entries:
+                        break
+                    # A row left by an interrupted append is overwritten
+                    self._vectors.seek(HEADER.size + rows * self.dimensions * 4)
+                    self._vectors.write(array("f", vector).tobytes())
+                    self._rows[digest] = rows
+                    digests.append(digest)
+                    rows += 1
+                if not digests:
+                    return
+                self._vectors.flush()
+                self._index.seek(0, os.SEEK_END)
+                self._index.write(b"".join(digests))
+                self._index.flush()
+                self._index_read += len(digests) * DIGEST_SIZE
+            finally:
+                self._release()
+
+    def close(self) -> None:
+        """Closes the files."""
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            self._vectors.close()
+            self._index.close()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _sync(self) -> None:
+        """Reads the digests appended to the index since the last call. Call with the lock held"""
+        if self.dimensions is None:
+            self._vectors.seek(0)
+            header = self._vectors.read(HEADER.size)
+            if len(header) < HEADER.size:
+                return
+            self.dimensions = HEADER.unpack(header)[0]
+        size = os.path.getsize(self.index_path)
+        size -= size % DIGEST_SIZE
+        if size <= self._index_read:
+            return
+        self._index.seek(self._index_read)
+        data = self._index.read(size - self._index_read)
+        row = self._index_read // DIGEST_SIZE
+        for start in range(0, len(data), DIGEST_SIZE):
+            self._rows.setdefault(data[start : start + DIGEST_SIZE], row)
+            row += 1
+        self._index_read = size
+
+    def _read(self, row: int) -> Optional[List[float]]:
+        """Reads a row from the memory map, remapping the file once it grew. Call with the lock held"""
+        start = HEADER.size + row * self.dimensions * 4
+        end = start + self.dimensions * 4
+        if self._map is None or len(self._map) < end:
+            if self._map is not None:
+                self._map.close()
+            self._vectors.flush()
+            self._map = mmap.mmap(self._vectors.fileno(), 0, access=mmap.ACCESS_READ)
+            if len(self._map) < end:
+                # Truncated by hand, treat the row as missing
+                return None
+        return array("f", self._map[start:end]).tolist()
+
+    def _acquire(self) -> None:
+        """Locks the index against appends from other processes"""
+        if fcntl is not None:
+            fcntl.flock(self._index.fileno(), fcntl.LOCK_EX)
+
+    def _release(self) -> None:
+        """Unlocks the index"""
+        if fcntl is not None:
+            fcntl.flock(self._index.fileno(), fcntl.LOCK_UN)
+
+
+class EmbeddingCache(object):
+    """
+    Cache of the embeddings of `EmbeddingModel` and `AsyncEmbeddingModel`, so common queries and
+    unchanged documents are not embedded again.
+
+    Vectors are keyed by the provider, the model, the generation arguments and the sha256 of the
+    text, and kept in two tiers:
+
+    - an in-memory LRU of `max_entries` vectors
+    - with `path`, a directory of memory-mapped float32 files (see `DiskTier`) that persists
+      across restarts and can be shared by the processes of a host
+
+    The texts of a call that miss both tiers are embedded together in one provider call, and hits
+    are served without any network. Calls running at the same time for the same text wait for
+    the one provider call already embedding it (single-flight), across threads for
+    `EmbeddingModel` and within the event loop for `AsyncEmbeddingModel`. Vectors read from disk
+    are float32, and results that are not plain float vectors (numpy, tensors, int8 types) are
+    never cached.
+    """
+
+    def __init__(
+        self,
+        name: str = "default",
+        max_entries: int = 10000,
+        path: Optional[str] = None,
+        max_disk_entries: Optional[int] = None,
+    ) -> None:
+        """
+        Args:
+            - name (str, optional): Name used in metrics. Default: default
+            - max_entries (int, optional): Vectors kept in memory. Default: 10000
+            - path (str, optional): Directory of the on-disk tier. Default: None, memory only
+            - max_disk_entries (int, optional): Vectors kept on disk per model and arguments, no more are written beyond. Default: None, no limit
+        """
+        self.name = name
+        self.max_entries = max_entries
+        self.path = path
+        self.max_disk_entries = max_disk_entries
+
+        self._memory: "OrderedDict[Tuple[str, bytes], List[float]]" = OrderedDict()
+        self._disks: Dict[str, DiskTier] = {}
+        # Texts being embedded: futures for the threads and for the event loops
+        self._inflight: Dict[Tuple[str, bytes], Any] = {}
+        self._ainflight: Dict[Tuple[str, bytes], Any] = {}
+        self._lock = threading.Lock()
+        self._open_lock = threading.Lock()
+
+    def embed(
+        self,
+        provider: str,
+        model_name: str,
+        kwds: Dict[str, Any],
+        text: Union[str, List[str]],
+        compute: Callable[[List[str]], Any],
+    ) -> Union[List[float], List[List[float]], Dict]:
+        """Embeds text(s), calling the provider only for the texts not cached or being embedded.
+
+        Args:
+            - provider (str): Provider of the model
+            - model_name (str): Name of the model
+            - kwds (Dict): Generation arguments of the call, part of the key
+            - text (Union[str, List[str]]): Input text or list of texts
+            - compute (Callable[[List[str]], Any]): Calls the provider for a list of texts
+
+        Returns:
+            (Union[List[float], List[List[float]], Dict[str, Any]]): Embeddings or error information
+        """
+        import concurrent.futures
+
+        if not self._cacheable(text, kwds):
+            return compute(text)
+
+        texts = [text] if isinstance(text, str) else list(text)
+        namespace = self._namespace(provider, model_name, kwds)
+        vectors, positions, owned, waiting = self._claim(
+            namespace, texts, self._inflight, concurrent.futures.Future
+        )
+
+        if owned:
+            # Read the disk tier outside the lock, other calls wait for the claimed texts
+            self._settle(vectors, positions, owned, self._load(namespace, owned))
+
+        if owned:
+            try:
+                result = compute([text for text, _ in owned.values()])
+            except BaseException:
+                # Failed, the waiters embed the texts themselves
+                self._abandon(owned)
+                raise
+            error = self._fill(vectors, positions, owned, result)
+            if error is not None:
+                return error
+            self._store(namespace, owned, vectors, positions)
+
+        for key, future in waiting.items():
+            self._place(future.result(), vectors, positions[key])
+
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            # A call we waited for failed, embed the rest without coalescing
+            result = compute([texts[i] for i in missing])
+            return self._complete(vectors, missing, result)
+        return self._result(vectors)
+
+    async def aembed(
+        self,
+        provider: str,
+        model_name: str,
+        kwds: Dict[str, Any],
+        text: Union[str, List[str]],
+        compute: Callable[[List[str]], Awaitable[Any]],
+    ) -> Union[List[float], List[List[float]], Dict]:
+        """Like `embed`, with an async provider call.
+
+        Args:
+            - provider (str): Provider of the model
+            - model_name (str): Name of the model
+            - kwds (Dict): Generation arguments of the call, part of the key
+            - text (Union[str, List[str]]): Input text or list of texts
+            - compute (Callable[[List[str]], Awaitable[Any]]): Calls the provider for a list of texts
+
+        Returns:
+            (Union[List[float], List[List[float]], Dict[str, Any]]): Embeddings or error information
+        """
+        import asyncio
+
+        if not self._cacheable(text, kwds):
+            return await compute(text)
+
+        texts = [text] if isinstance(text, str) else list(text)
+        namespace = self._namespace(provider, model_name, kwds)
+        loop = asyncio.get_running_loop()
+        vectors, positions, owned, waiting = self._claim(
+            namespace, texts, self._ainflight, loop.create_future
+        )
+
+        if owned:
+            # Read the disk tier in a thread, other calls wait for the claimed texts
+            found = {}
+            if self.path is not None:
+                try:
+                    found = await metrics.run_in_thread(self._load, namespace, owned)
+                except BaseException:
+                    self._abandon(owned)
+                    raise
+            self._settle(vectors, positions, owned, found)
+
+        if owned:
+            try:
+                result = await compute([text for text, _ in owned.values()])
+            except BaseException:
+                # Cancelled or failed, the waiters embed the texts themselves
+                self._abandon(owned)
+                raise
+            error = self._fill(vectors, positions, owned, result)
+            if error is not None:
+                return error
+            if self.path is not None:
+                await metrics.run_in_thread(
+                    self._store, namespace, owned, vectors, positions
+                )
+
+        for key, future in waiting.items():
+            self._place(await asyncio.shield(future), vectors, positions[key])
+
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            # A call we waited for failed, embed the rest without coalescing
+            result = await compute([texts[i] for i in missing])
+            return self._complete(vectors, missing, result)
+        return self._result(vectors)
+
+    def clear(self) -> None:
+        """Empties the memory tier. The disk tier is cleared by deleting its directory."""
+        with self._lock:
+            self._memory.clear()
+
+    def close(self) -> None:
+        """Closes the files of the disk tier."""
+        with self._open_lock:
+            disks, self._disks = list(self._disks.values()), {}
+        for disk in disks:
+            disk.close()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Returns the state of the cache, for metrics and health endpoints."""
+        with self._lock:
+            return {
+                "name": self.name,
+                "memory": len(self._memory),
+                "disk": {
+                    namespace: len(disk)
+                    for namespace, disk in list(self._disks.items())
+                },
+                "inflight": len(self._inflight) + len(self._ainflight),
+            }
+
+    def _cacheable(self, text: Any, kwds: Dict[str, Any]) -> bool:
+        """Whether the result of a call can be cached"""
+        if any(kwds.get(argument) for argument in UNCACHEABLE_ARGUMENTS):
+            return False
+        if isinstance(text, str):
+            return True
+        return bool(text) and all(isinstance(item, str) for item in text)
+
+    def _namespace(self, provider: str, model_name: str, kwds: Dict[str, Any]) -> str:
+        """Hash of the provider, the model and the generation arguments"""
+        return hashlib.sha256(
+            json.dumps(
+                [provider, model_name, kwds], sort_keys=True, default=_jsonable
+            ).encode()
+        ).hexdigest()[:32]
+
+    def _claim(
+        self,
+        namespace: str,
+        texts: List[str],
+        inflight: Dict[Tuple[str, bytes], Any],
+        new_future: Callable[[], Any],
+    ) -> Tuple[List[Optional[List[float]]], Dict, Dict, Dict]:
+        """Looks the texts up in memory, and claims the ones no other call is embedding.
+
+        Only the memory tier is read here, under the lock. The claimed texts are then looked up
+        on disk with `_load` and `_settle`, the other calls waiting for them meanwhile.
+
+        Returns:
+            The vectors found (None for the others), the positions of each key in the texts,
+            the texts to look up and embed with their futures, and the futures of the texts
+            other calls are embedding, by key
+        """
+        vectors: List[Optional[List[float]]] = [None] * len(texts)
+        positions: Dict[Tuple[str, bytes], List[int]] = {}
+        for i, text in enumerate(texts):
+            key = (namespace, hashlib.sha256(text.encode()).digest())
+            positions.setdefault(key, []).append(i)
+
+        owned: Dict[Tuple[str, bytes], Tuple[str, Any]] = {}
+        waiting: Dict[Tuple[str, bytes], Any] = {}
+        counts = {"memory": 0, "coalesced": 0}
+
+        with self._lock:
+            for key, indices in positions.items():
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    self._place(vector, vectors, indices)
+                    counts["memory"] += 1
+                elif key in inflight:
+                    waiting[key] = inflight[key]
+                    counts["coalesced"] += 1
+                else:
+                    inflight[key] = future = new_future()
+                    owned[key] = (texts[indices[0]], future)
+
+        self._count(counts)
+        return vectors, positions, owned, waiting
+
+    def _load(
+        self, namespace: str, owned: Dict[Tuple[str, bytes], Tuple[str, Any]]
+    ) -> Dict[Tuple[str, bytes], List[float]]:
+        """Reads the claimed texts from the disk tier, without the lock of the cache.
+
+        Returns:
+            Dict[Tuple[str, bytes], List[float]]: The vectors found on disk, by key
+        """
+        found: Dict[Tuple[str, bytes], List[float]] = {}
+        try:
+            disk = self._disk(namespace)
+            if disk is not None:
+                for key in owned:
+                    vector = disk.get(key[1])
+                    if vector is not None:
+                        found[key] = vector
+        except Exception as e:
+            # Embedded again instead
+            error_explainer(e)
+        return found
+
+    def _settle(
+        self,
+        vectors: List[Optional[List[float]]],
+        positions: Dict[Tuple[str, bytes], List[int]],
+        owned: Dict[Tuple[str, bytes], Tuple[str, Any]],
+        found: Dict[Tuple[str, bytes], List[float]],
+    ) -> None:
+        """Serves the claimed texts found on disk, leaving the ones to embed in `owned`"""
+        with self._lock:
+            for key, vector in found.items():
+                self._resolve(key, owned.pop(key)[1], vector)
+                self._place(vector, vectors, positions[key])
+        self._count({"disk": len(found), "miss": len(owned)})
+
+    def _fill(
+        self,
+        vectors: List[Optional[List[float]]],
+        positions: Dict[Tuple[str, bytes], List[int]],
+        owned: Dict[Tuple[str, bytes], Tuple[str, Any]],
+        result: Any,
+    ) -> Optional[Dict]:
+        """Keeps the vectors of the texts embedded by this call in memory and wakes up their
+        waiters. They are written to disk afterwards with `_store`.
+
+        Returns:
+            Optional[Dict]: The result of the provider call if it failed or is not plain float
+            vectors, to return as is
+        """
+        computed = _rows(result, len(owned))
+        if computed is None:
+            # The waiters embed the texts themselves
+            self._abandon(owned)
+            return result
+
+        with self._lock:
+            for (key, (_, future)), vector in zip(owned.items(), computed):
+                self._resolve(key, future, vector)
+                self._place(vector, vectors, positions[key])
+        return None
+
+    def _store(
+        self,
+        namespace: str,
+        owned: Dict[Tuple[str, bytes], Tuple[str, Any]],
+        vectors: List[Optional[List[float]]],
+        positions: Dict[Tuple[str, bytes], List[int]],
+    ) -> None:
+        """Writes the vectors embedded by this call to the disk tier, without the lock of the cache"""
+        try:
+            disk = self._disk(namespace)
+            if disk is not None:
+                disk.put([(key[1], vectors[positions[key][0]]) for key in owned])
+        except Exception as e:
+            error_explainer(e)
+
+    def _resolve(
+        self, key: Tuple[str, bytes], future: Any, vector: List[float]
+    ) -> None:
+        """Remembers the vector of a claimed text and wakes up its waiters. Call with the lock held"""
+        self._remember(key, vector)
+        self._inflight.pop(key, None)
+        self._ainflight.pop(key, None)
+        if not future.done():
+            future.set_result(vector)
+
+    def _abandon(self, owned: Dict[Tuple[str, bytes], Tuple[str, Any]]) -> None:
+        """Releases the texts this call failed to embed, their waiters get None"""
+        with self._lock:
+            for key, (_, future) in owned.items():
+                self._inflight.pop(key, None)
+                self._ainflight.pop(key, None)
+                if not future.done():
+                    future.set_result(None)
+
+    def _place(
+        self,
+        vector: Optional[List[float]],
+        vectors: List[Optional[List[float]]],
+        indices: List[int],
+    ) -> None:
+        """Puts a vector wherever its text appears in the call"""
+        if vector is None:
+            return
+        for i in indices:
+            vectors[i] = vector
+
+    def _complete(
+        self,
+        vectors: List[Optional[List[float]]],
+        missing: List[int],
+        result: Any,
+    ) -> Union[List[float], List[List[float]], Dict]:
+        """Adds the vectors embedded after a failed coalesced call"""
+        computed = _rows(result, len(missing))
+        if computed is None:
+            return result
+        for i, vector in zip(missing, computed):
+            vectors[i] = vector
+        return self._result(vectors)
+
+    def _result(
+        self, vectors: List[Optional[List[float]]]
+    ) -> Union[List[float], List[List[float]]]:
+        """Copies of the vectors, one vector for one text as the providers return them"""
+        copies = [list(vector) for vector in vectors]
+        return copies[0] if len(copies) == 1 else copies
+
+    def _remember(self, key: Tuple[str, bytes], vector: List[float]) -> None:
+        """Adds a vector to the memory LRU. Call with the lock held"""
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _disk(self, namespace: str) -> Optional[DiskTier]:
+        """Disk tier of a namespace, opened on first use"""
+        if self.path is None:
+            return None
+        disk = self._disks.get(namespace)
+        if disk is None:
+            # Opening reads the index, so not under the lock of the memory tier
+            with self._open_lock:
+                disk = self._disks.get(namespace)
+                if disk is None:
+                    disk = self._disks[namespace] = DiskTier(
+                        self.path, namespace, self.max_disk_entries
+                    )
+        return disk
+
+    def _count(self, counts: Dict[str, int]) -> None:
+        """Increments the lookup counter by result when metrics are enabled"""
+        sink = metrics.get_sink()
+        if sink:
+            for result, count in counts.items():
+                if count:
+                    sink.increment(
+                        "orichain_embedding_cache_lookups_total",
+                        count,
+                        {"cache": self.name, "result": result},
+                    )
+
+    def __repr__(self) -> str:
+        return f"EmbeddingCache({self.name!r}, memory={len(self._memory)}, path={self.path!r})"
+
+
+def get_cache(name: str = "default", **settings: Any) -> EmbeddingCache:
+    """Returns the shared embedding cache of that name, creating it on first use.
+
+    Args:
+        - name (str, optional): Cache name. Default: default
+        - **settings: `EmbeddingCache` arguments, only used when the cache is created
+
+    Returns:
+        EmbeddingCache: The shared cache
+    """
+    cache = _caches.get(name)
+    if cache is None:
+        cache = _caches[name] = EmbeddingCache(name, **settings)
+    return cache
+
+
+def resolve_cache(cache: Any) -> Optional[EmbeddingCache]:
+    """Turns the `embedding_cache` argument of an embedding model into a cache.
+
+    Args:
+        - cache (EmbeddingCache, Dict, bool or None): A cache, True for the shared default cache,
+          a dict of `EmbeddingCache` settings for the shared cache of its `name`, or None/False
+          to disable it
+
+    Returns:
+        Optional[EmbeddingCache]: The cache to use, if any
+    """
+    if isinstance(cache, EmbeddingCache):
+        return cache
+    if not cache:
+        return None
+    settings = dict(cache) if isinstance(cache, dict) else {}
+    return get_cache(settings.pop("name", "default"), **settings)
+
+
+def _rows(result: Any, count: int) -> Optional[List[List[float]]]:
+    """The vectors of a provider result for `count` texts, None if it is an error or not plain
+    float vectors"""
+    if not isinstance(result, list) or not result:
+        return None
+    # The providers return a single vector for a single text
+    rows = [result] if count == 1 and not isinstance(result[0], list) else result
+    if len(rows) != count:
+        return None
+    for row in rows:
+        if not isinstance(row, list) or not row or not isinstance(row[0], float):
+            return None
+    return rows
+
+
+def _open(path: str) -> Any:
+    """Opens a file for reading and writing at any offset, creating it if missing"""
+    return os.fdopen(os.open(path, os.O_RDWR | os.O_CREAT, 0o644), "r+b")
+
+
+def _jsonable(value: Any) -> Any:
+    """JSON form of the SDK objects found in generation arguments, e.g. configs"""
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json", exclude_none=True)
+    return repr(value)
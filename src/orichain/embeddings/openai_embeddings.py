@@ -3,7 +3,8 @@ from typing import Any, List, Dict, Union
 from asyncio import gather
 from concurrent.futures import ThreadPoolExecutor
 
-from orichain import error_explainer
+from orichain import assets, error_explainer
+from orichain.deadline import request_timeout
 
 
 class Embed(object):
@@ -50,7 +51,7 @@ class Embed(object):
             api_key=kwds.get("api_key"),
             timeout=kwds.get("timeout")
             or Timeout(60.0, read=5.0, write=10.0, connect=2.0),
-            max_retries=kwds.get("max_retries") or 2,
+            max_retries=kwds.get("max_retries", 2),
         )
         self.tiktoken = tiktoken
 
@@ -112,7 +113,7 @@ class Embed(object):
         Returns:
             (int): Number of tokens in the text string
         """
-        encoding = self.tiktoken.encoding_for_model(model_name)
+        encoding = assets.encoding_for_model(model_name)
         num_tokens = len(encoding.encode(string))
         return num_tokens
 
@@ -161,7 +162,7 @@ class AsyncEmbed(object):
             api_key=kwds.get("api_key"),
             timeout=kwds.get("timeout")
             or Timeout(60.0, read=5.0, write=10.0, connect=2.0),
-            max_retries=kwds.get("max_retries") or 2,
+            max_retries=kwds.get("max_retries", 2),
         )
         self.tiktoken = tiktoken
 
@@ -199,7 +200,9 @@ class AsyncEmbed(object):
                             however you requested {max_tokens} tokens. Please reduce text size",
                 }
 
-            response = await self.client.embeddings.create(input=text, model=model_name)
+            response = await self.client.embeddings.create(
+                input=text, model=model_name, **request_timeout(self.client)
+            )
             embeddings = [sentence.embedding for sentence in response.data]
 
             if len(embeddings) == 1:
@@ -220,6 +223,6 @@ class AsyncEmbed(object):
         Returns:
             (int): Number of tokens in the text string
         """
-        encoding = self.tiktoken.encoding_for_model(model_name)
+        encoding = assets.encoding_for_model(model_name)
         num_tokens = len(encoding.encode(string))
         return num_tokens
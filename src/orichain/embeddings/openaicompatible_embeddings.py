@@ -0,0 +1,195 @@
+from typing import Any, List, Dict, Union
+
+from orichain import error_explainer, pool
+
+
+class Embed(object):
+    """
+    Synchronous Embed class to get embeddings from an OpenAI compatible inference server (vLLM,
+    Ollama, llama.cpp server, TEI, ...).
+    """
+
+    def __init__(self, **kwds: Any) -> None:
+        """
+        Initialize the OpenAI client for the server.
+
+        Args:
+            - base_url (str): Base URL of the server's OpenAI API, e.g. http://localhost:8000/v1
+            - api_key (str, optional): API key of the server, if it checks one. Default is "EMPTY"
+            - models (List[str], optional): Models served by the server, see `list_models` to discover them
+            - timeout (Timeout, optional): Request timeout parameter like connect, read, write. Default is 60.0, 5.0, 10.0, 2.0
+            - max_retries (int, optional): Number of retries for the request. Default is 2
+            - response_hook (Callable, optional): Called with every HTTP response of the client, used by client pools. Default: None
+
+        Raises:
+            - KeyError: If required parameters are not provided.
+            - TypeError: If an invalid type is provided for a parameter
+        """
+        from httpx import Timeout
+
+        if not kwds.get("base_url"):
+            raise KeyError("Required `base_url` not found")
+        elif kwds.get("timeout") and not isinstance(kwds.get("timeout"), Timeout):
+            raise TypeError(
+                "Invalid 'timeout' type detected:",
+                type(kwds.get("timeout")),
+                ", Please enter valid timeout using:\n'from httpx import Timeout'",
+            )
+        elif kwds.get("max_retries") and not isinstance(kwds.get("max_retries"), int):
+            raise TypeError(
+                "Invalid 'max_retries' type detected:,",
+                type(kwds.get("max_retries")),
+                ", Please enter a value that is 'int'",
+            )
+        else:
+            pass
+
+        # Watch the responses of the client if asked for
+        http_client = pool.http_client(kwds.get("response_hook"))
+
+        from openai import OpenAI
+
+        self.client = OpenAI(
+            base_url=kwds.get("base_url"),
+            api_key=kwds.get("api_key") or "EMPTY",
+            timeout=kwds.get("timeout")
+            or Timeout(60.0, read=5.0, write=10.0, connect=2.0),
+            max_retries=kwds.get("max_retries", 2),
+            http_client=http_client,
+        )
+        self.models = kwds.get("models")
+
+    def __call__(
+        self, text: Union[str, List[str]], model_name: str, **kwds: Any
+    ) -> Union[List[float], List[List[float]], Dict]:
+        """
+        Get embeddings for the given text(s).
+
+        The server enforces the context length of its model, the texts are sent as they are.
+
+        Args:
+            - text (Union[str, List[str]]): Input text or list of texts
+            - model_name (str): Name of the embedding model, as served by the server
+            - **kwargs: Additional keyword arguments for the embedding API
+
+        Returns:
+            (Union[List[float], List[List[float]], Dict[str, Any]]): Embeddings or error information
+        """
+        try:
+            if isinstance(text, str):
+                text = [text]
+
+            response = self.client.embeddings.create(input=text, model=model_name)
+            embeddings = [sentence.embedding for sentence in response.data]
+
+            if len(embeddings) == 1:
+                embeddings = embeddings[0]
+
+            return embeddings
+        except Exception as e:
+            error_explainer(e)
+            return {"error": 500, "reason": str(e)}
+
+    def list_models(self) -> List[str]:
+        """Lists the models the server serves, from its `/models` endpoint.
+
+        Returns:
+            List[str]: Model names to pass as `model_name`
+        """
+        return [model.id for model in self.client.models.list()]
+
+
+class AsyncEmbed(object):
+    """
+    Asynchronous Embed class to get embeddings from an OpenAI compatible inference server (vLLM,
+    Ollama, llama.cpp server, TEI, ...).
+    """
+
+    def __init__(self, **kwds: Any) -> None:
+        """
+        Initialize the OpenAI client for the server.
+
+        Args:
+            - base_url (str): Base URL of the server's OpenAI API, e.g. http://localhost:8000/v1
+            - api_key (str, optional): API key of the server, if it checks one. Default is "EMPTY"
+            - models (List[str], optional): Models served by the server, see `list_models` to discover them
+            - timeout (Timeout, optional): Request timeout parameter like connect, read, write. Default is 60.0, 5.0, 10.0, 2.0
+            - max_retries (int, optional): Number of retries for the request. Default is 2
+            - response_hook (Callable, optional): Called with every HTTP response of the client, used by client pools. Default: None
+
+        Raises:
+            - KeyError: If required parameters are not provided.
+            - TypeError: If an invalid type is provided for a parameter
+        """
+        from httpx import Timeout
+
+        if not kwds.get("base_url"):
+            raise KeyError("Required `base_url` not found")
+        elif kwds.get("timeout") and not isinstance(kwds.get("timeout"), Timeout):
+            raise TypeError(
+                "Invalid 'timeout' type detected:",
+                type(kwds.get("timeout")),
+                ", Please enter valid timeout using:\n'from httpx import Timeout'",
+            )
+        elif kwds.get("max_retries") and not isinstance(kwds.get("max_retries"), int):
+            raise TypeError(
+                "Invalid 'max_retries' type detected:,",
+                type(kwds.get("max_retries")),
+                ", Please enter a value that is 'int'",
+            )
+        else:
+            pass
+
+        # Watch the responses of the client if asked for
+        http_client = pool.http_client(kwds.get("response_hook"), asynchronous=True)
+
+        from openai import AsyncOpenAI
+
+        self.client = AsyncOpenAI(
+            base_url=kwds.get("base_url"),
+            api_key=kwds.get("api_key") or "EMPTY",
+            timeout=kwds.get("timeout")
+            or Timeout(60.0, read=5.0, write=10.0, connect=2.0),
+            max_retries=kwds.get("max_retries", 2),
+            http_client=http_client,
+        )
+        self.models = kwds.get("models")
+
+    async def __call__(
+        self, text: Union[str, List[str]], model_name: str, **kwds: Any
+    ) -> Union[List[float], List[List[float]], Dict]:
+        """
+        Get embeddings for the given text(s).
+
+        The server enforces the context length of its model, the texts are sent as they are.
+
+        Args:
+            - text (Union[str, List[str]]): Input text or list of texts
+            - model_name (str): Name of the embedding model, as served by the server
+            - **kwargs: Additional keyword arguments for the embedding API
+
+        Returns:
+            (Union[List[float], List[List[float]], Dict[str, Any]]): Embeddings or error information
+        """
+        try:
+            if isinstance(text, str):
+                text = [text]
+
+            response = await self.client.embeddings.create(input=text, model=model_name)
+            embeddings = [sentence.embedding for sentence in response.data]
+
+            if len(embeddings) == 1:
+                embeddings = embeddings[0]
+
+            return embeddings
+        except Exception as e:
+            error_explainer(e)
+            return {"error": 500, "reason": str(e)}
+
+    async def list_models(self) -> List[str]:
+        """Lists the models the server serves, from its `/models` endpoint.
+
+        Returns:
+            List[str]: Model names to pass as `model_name`
+        """
+        return [model.id async for model in self.client.models.list()]
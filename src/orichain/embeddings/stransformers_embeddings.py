@@ -1,7 +1,5 @@
 from typing import Any, List, Dict, Union
-from orichain import error_explainer
-
-import asyncio
+from orichain import assets, error_explainer, metrics
 
 VERSION = "3.4.1"
 
@@ -48,9 +46,7 @@ class Embed(object):
                     f"sentence-transformers is required for embeddings functionalities ({kwds.get('model_name', 'NA')}). Please install it manually using `pip install orichain[sentence-transformers]' or 'pip install sentence-transformers=={VERSION}`."
                 )
 
-        self.default_model_dir = kwds.get(
-            "model_download_path", "/home/ubuntu/projects/models/embedding_models"
-        )
+        self.default_model_dir = assets.model_dir(kwds.get("model_download_path"))
 
         from sentence_transformers import SentenceTransformer
         import os
@@ -158,9 +154,7 @@ class AsyncEmbed(object):
                     f"sentence-transformers is required for embeddings functionalities ({kwds.get('model_name', 'NA')}). Please install it manually using `pip install orichain[sentence-transformers]' or 'pip install sentence-transformers=={VERSION}`."
                 )
 
-        self.default_model_dir = kwds.get(
-            "model_download_path", "/home/ubuntu/projects/models/embedding_models"
-        )
+        self.default_model_dir = assets.model_dir(kwds.get("model_download_path"))
 
         from sentence_transformers import SentenceTransformer
         import os
@@ -200,7 +194,7 @@ class AsyncEmbed(object):
             if isinstance(text, str):
                 text = [text]
 
-            embeddings = await asyncio.to_thread(
+            embeddings = await metrics.run_in_thread(
                 self.model.encode,
                 sentences=text,
                 prompt_name=kwds.get("prompt_name", None),
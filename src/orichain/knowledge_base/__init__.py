@@ -2,7 +2,8 @@ from typing import Any, List, Union, Optional, Dict
 import warnings
 
 from orichain.knowledge_base import pinecone_knowledgbase, chromadb_knowledgebase
-from orichain import error_explainer
+from orichain import error_explainer, metrics, tracing
+from orichain.deadline import Deadline, resolve_deadline
 
 DEFAULT_KNOWLEDGE_BASE = "pinecone"
 
@@ -122,6 +123,11 @@ class KnowledgeBase(object):
             - ValueError: If `user_message_vector` is needed except for pinecone but if ids are also not provided for pinecone this error will be raised
             - KeyError: If required `namespace` is not found for pinecone
         """
+        # Measure the call when metrics are enabled
+        call_metrics = metrics.start_call(
+            "knowledge_base", "query", self.vector_db_type
+        )
+
         try:
             if not user_message_vector and not self.vector_db_type == "pinecone":
                 raise ValueError("`user_message_vector` is needed except for pinecone")
@@ -132,11 +138,19 @@ class KnowledgeBase(object):
                 **kwds,
             )
 
+            if call_metrics:
+                call_metrics.finish(chunks)
+
             return chunks
 
         except Exception as e:
             error_explainer(e)
+            if call_metrics:
+                call_metrics.finish(error=e)
             return {"error": 500, "reason": str(e)}
+        finally:
+            if call_metrics:
+                call_metrics.close()
 
     def fetch(
         self,
@@ -167,6 +181,11 @@ class KnowledgeBase(object):
         Returns:
             Dict: Result of fetching the chunks
         """
+        # Measure the call when metrics are enabled
+        call_metrics = metrics.start_call(
+            "knowledge_base", "fetch", self.vector_db_type
+        )
+
         try:
             # Fetching the chunks based on the ids
             chunks = self.retriver.fetch(
@@ -174,11 +193,19 @@ class KnowledgeBase(object):
                 **kwds,
             )
 
+            if call_metrics:
+                call_metrics.finish(chunks)
+
             return chunks
 
         except Exception as e:
             error_explainer(e)
+            if call_metrics:
+                call_metrics.finish(error=e)
             return {"error": 500, "reason": str(e)}
+        finally:
+            if call_metrics:
+                call_metrics.close()
 
 
 class AsyncKnowledgeBase(object):
@@ -251,6 +278,7 @@ class AsyncKnowledgeBase(object):
         self,
         num_of_chunks: int,
         user_message_vector: Optional[List[Union[int, float]]] = None,
+        deadline: Optional[Union[Deadline, float]] = None,
         **kwds: Any,
     ) -> Dict:
         """Retrieves the chunks from the knowledge base
@@ -258,6 +286,7 @@ class AsyncKnowledgeBase(object):
         Args:
             - num_of_chunks (int): Number of chunks to retrieve
             - user_message_vector (Optional[List[Union[int, float]]]): Embedding of text. Defaults to None.
+            - deadline (Deadline or float, optional): Total time budget of the request (`orichain.deadline.Deadline` or seconds). The call is cancelled once it passes and returns an error 504. Default: the deadline entered with `with deadline:`, if any
 
             **Retrieval Arguments by VectorDB:**
 
@@ -296,31 +325,69 @@ class AsyncKnowledgeBase(object):
             - ValueError: If `user_message_vector` is needed except for pinecone but if ids are also not provided for pinecone this error will be raised
             - KeyError: If required `namespace` is not found for pinecone
         """
+        # Measure the call when metrics are enabled
+        call_metrics = metrics.start_call(
+            "knowledge_base", "query", self.vector_db_type
+        )
+
+        # Trace the call when tracing is enabled
+        span = tracing.start_span(
+            "orichain.knowledge_base.query",
+            {
+                "db.system": self.vector_db_type,
+                "db.operation.name": "query",
+                "orichain.top_k": num_of_chunks,
+            },
+        )
+
         try:
             if not user_message_vector and not self.vector_db_type == "pinecone":
                 raise ValueError("`user_message_vector` is needed except for pinecone")
 
-            chunks = await self.retriver(
+            # Retrieve the chunks, within the deadline if there is one
+            deadline = resolve_deadline(deadline)
+            call = self.retriver(
                 user_message_vector=user_message_vector,
                 num_of_chunks=num_of_chunks,
                 **kwds,
             )
+            if deadline:
+                chunks = await deadline.run(call, "knowledge base query")
+            else:
+                chunks = await call
+
+            if call_metrics:
+                call_metrics.finish(chunks)
+            if span:
+                span.set("orichain.chunks", tracing.count_chunks(chunks))
+                span.finish(chunks)
 
             return chunks
 
         except Exception as e:
             error_explainer(e)
+            if call_metrics:
+                call_metrics.finish(error=e)
+            if span:
+                span.finish(error=e)
             return {"error": 500, "reason": str(e)}
+        finally:
+            if call_metrics:
+                call_metrics.close()
+            if span:
+                span.close()
 
     async def fetch(
         self,
         ids: List[str],
+        deadline: Optional[Union[Deadline, float]] = None,
         **kwds: Any,
     ) -> Dict:
         """Fetches the chunks based on the ids from the knowledge base
 
         Args:
             - ids (List[str]): List of ids to fetch
+            - deadline (Deadline or float, optional): Total time budget of the request (`orichain.deadline.Deadline` or seconds). The call is cancelled once it passes and returns an error 504. Default: the deadline entered with `with deadline:`, if any
 
             **Retrieval Arguments by VectorDB:**
 
@@ -341,15 +408,50 @@ class AsyncKnowledgeBase(object):
         Returns:
             Dict: Result of fetching the chunks
         """
+        # Measure the call when metrics are enabled
+        call_metrics = metrics.start_call(
+            "knowledge_base", "fetch", self.vector_db_type
+        )
+
+        # Trace the call when tracing is enabled
+        span = tracing.start_span(
+            "orichain.knowledge_base.fetch",
+            {
+                "db.system": self.vector_db_type,
+                "db.operation.name": "fetch",
+                "orichain.ids": len(ids) if ids else 0,
+            },
+        )
+
         try:
-            # Fetching the chunks based on the ids
-            chunks = await self.retriver.fetch(
+            # Fetching the chunks based on the ids, within the deadline if there is one
+            deadline = resolve_deadline(deadline)
+            call = self.retriver.fetch(
                 ids=ids,
                 **kwds,
             )
+            if deadline:
+                chunks = await deadline.run(call, "knowledge base fetch")
+            else:
+                chunks = await call
+
+            if call_metrics:
+                call_metrics.finish(chunks)
+            if span:
+                span.set("orichain.chunks", tracing.count_chunks(chunks))
+                span.finish(chunks)
 
             return chunks
 
         except Exception as e:
             error_explainer(e)
+            if call_metrics:
+                call_metrics.finish(error=e)
+            if span:
+                span.finish(error=e)
             return {"error": 500, "reason": str(e)}
+        finally:
+            if call_metrics:
+                call_metrics.close()
+            if span:
+                span.close()
@@ -1,8 +1,6 @@
 from typing import Any, List, Union, Dict
 
-from orichain import error_explainer
-
-import asyncio
+from orichain import error_explainer, metrics
 
 
 class DataBase(object):
@@ -228,7 +226,7 @@ class AsyncDataBase(object):
                 collection = self.collection
 
             # Querying the collection
-            chunks = await asyncio.to_thread(
+            chunks = await metrics.run_in_thread(
                 collection.query,
                 query_embeddings=user_message_vector,
                 n_results=num_of_chunks,
@@ -264,7 +262,7 @@ class AsyncDataBase(object):
                 collection = self.collection
 
             # Fetching the chunks based on the ids
-            chunks = await asyncio.to_thread(
+            chunks = await metrics.run_in_thread(
                 collection.get,
                 ids=ids,
                 limit=kwds.get("limit"),
@@ -1,7 +1,6 @@
 from typing import Any, List, Union, Dict, Optional
-import asyncio
 
-from orichain import error_explainer
+from orichain import error_explainer, metrics
 
 
 class DataBase(object):
@@ -183,7 +182,7 @@ class AsyncDataBase(object):
                 )
 
             # Querying the chunks from the knowledge base
-            chunks = await asyncio.to_thread(
+            chunks = await metrics.run_in_thread(
                 self.index.query,
                 vector=user_message_vector,
                 top_k=num_of_chunks,
@@ -213,7 +212,7 @@ class AsyncDataBase(object):
         """
         try:
             # Fetching the chunks based on the ids
-            chunks = await asyncio.to_thread(
+            chunks = await metrics.run_in_thread(
                 self.index.fetch,
                 ids=ids,
                 namespace=kwds.get("namespace") or self.namespace,
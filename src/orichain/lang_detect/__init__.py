@@ -1,7 +1,6 @@
-from typing import List, Optional, Dict
-from orichain import error_explainer
-
-import asyncio
+from typing import List, Optional, Dict, Union
+from orichain import error_explainer, metrics, tracing
+from orichain.deadline import Deadline, DeadlineExceeded, resolve_deadline
 
 VERSION = "2.1.0"
 
@@ -89,6 +88,8 @@ class LanguageDetection(object):
             Dict: Result of language detection
         """
 
+        call_metrics = None
+
         try:
             result = {"user_lang": None}
             min_words = min_words or self.min_words
@@ -96,6 +97,9 @@ class LanguageDetection(object):
                 if len(user_message.split()) < min_words:
                     return result
 
+            # Measure the detection when metrics are enabled
+            call_metrics = metrics.start_call("lang_detect", "detect", "lingua")
+
             output = self.detector.compute_language_confidence_values(text=user_message)
 
             result["user_lang"] = (
@@ -107,10 +111,18 @@ class LanguageDetection(object):
             if add_confidence:
                 result["confidence"] = output[0].value
 
+            if call_metrics:
+                call_metrics.finish(result)
+
             return result
         except Exception as e:
             error_explainer(e)
+            if call_metrics:
+                call_metrics.finish(error=e)
             return {"error": 500, "reason": str(e)}
+        finally:
+            if call_metrics:
+                call_metrics.close()
 
 
 class AsyncLanguageDetection(object):
@@ -177,6 +189,7 @@ class AsyncLanguageDetection(object):
         min_words: Optional[int] = None,
         add_confidence: Optional[bool] = False,
         iso_code_639_3: Optional[bool] = False,
+        deadline: Optional[Union[Deadline, float]] = None,
     ) -> Dict:
         """Runs language detection
 
@@ -185,11 +198,15 @@ class AsyncLanguageDetection(object):
             - min_words (Optional[int], optional): Minimum words in the user message to detect language. Defaults to None.
             - add_confidence (Optional[bool], optional): To add confidence in the result. Defaults to False.
             - iso_code_639_3 (Optional[bool], optional): To get iso code 639-3 instead of 639-1. Defaults to False.
+            - deadline (Deadline or float, optional): Total time budget of the request (`orichain.deadline.Deadline` or seconds). Detection is an optional step, it is skipped (`user_lang` is None) once the deadline is close. Default: the deadline entered with `with deadline:`, if any
 
         Returns:
             Dict: Result of language detection
         """
 
+        call_metrics = None
+        span = None
+
         try:
             result = {"user_lang": None}
             min_words = min_words or self.min_words
@@ -197,9 +214,30 @@ class AsyncLanguageDetection(object):
                 if len(user_message.split()) < min_words:
                     return result
 
-            output = await asyncio.to_thread(
+            # Leave the time left to the required steps of the request
+            deadline = resolve_deadline(deadline)
+            if deadline and deadline.skip_optional:
+                return result
+
+            # Measure the detection when metrics are enabled
+            call_metrics = metrics.start_call("lang_detect", "detect", "lingua")
+
+            # Trace the detection when tracing is enabled
+            span = tracing.start_span(
+                "orichain.lang_detect.detect",
+                {
+                    "orichain.provider": "lingua",
+                    "orichain.words": len(user_message.split()),
+                },
+            )
+
+            call = metrics.run_in_thread(
                 self.detector.compute_language_confidence_values, text=user_message
             )
+            if deadline:
+                output = await deadline.wait(call)
+            else:
+                output = await call
 
             result["user_lang"] = (
                 output[0].language.iso_code_639_1.name
@@ -210,7 +248,30 @@ class AsyncLanguageDetection(object):
             if add_confidence:
                 result["confidence"] = output[0].value
 
+            if call_metrics:
+                call_metrics.finish(result)
+            if span:
+                span.set("orichain.user_lang", result.get("user_lang"))
+                span.finish(result)
+
+            return result
+        except DeadlineExceeded:
+            # Out of time, the request goes on without the detected language
+            result = {"user_lang": None}
+            if call_metrics:
+                call_metrics.finish(result)
+            if span:
+                span.finish(result)
             return result
         except Exception as e:
             error_explainer(e)
+            if call_metrics:
+                call_metrics.finish(error=e)
+            if span:
+                span.finish(error=e)
             return {"error": 500, "reason": str(e)}
+        finally:
+            if call_metrics:
+                call_metrics.close()
+            if span:
+                span.close()
@@ -1,21 +1,58 @@
-from typing import Any, Optional, List, Dict, Generator, AsyncGenerator
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Optional,
+    List,
+    Dict,
+    Generator,
+    AsyncGenerator,
+    Tuple,
+    Union,
+)
 import warnings
 import json
-from fastapi import Request
-
-from orichain import error_explainer
-
-from orichain.llm import (
-    openai_llm,
-    anthropicbedrock_llm,
-    anthropic_llm,
-    awsbedrock_llm,
-    azureopenai_llm,
-    gcp_gemini_llm,
-    gcp_vertex_llm,
-    togetherai_llm,
+import time
+import importlib
+
+if TYPE_CHECKING:
+    from fastapi import Request
+
+from orichain import (
+    LazyHandlers,
+    error_explainer,
+    metrics,
+    pool,
+    resilience,
+    tracing,
+    usage,
+)
+from orichain.deadline import Deadline, DeadlineExceeded, resolve_deadline
+from orichain.llm.scheduler import SchedulerRejected, Ticket, resolve_scheduler
+from orichain.streaming import DisconnectWatcher, aclose_stream, close_stream
+
+# Provider modules, imported on first use
+PROVIDER_MODULES = (
+    "openai_llm",
+    "anthropicbedrock_llm",
+    "anthropic_llm",
+    "awsbedrock_llm",
+    "azureopenai_llm",
+    "gcp_gemini_llm",
+    "gcp_vertex_llm",
+    "togetherai_llm",
+    "openaicompatible_llm",
+    "openairesponses_llm",
+    "replay",
 )
 
+
+def __getattr__(name: str) -> Any:
+    """Imports a provider module on first attribute access, e.g. `orichain.llm.openai_llm`"""
+    if name in PROVIDER_MODULES:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 DEFAULT_MODEL = "gpt-5-mini"
 DEFAULT_MODEL_PROVIDER = "OpenAI"
 SUPPORTED_MODELS = {
@@ -246,7 +283,12 @@ SUPPORTED_MODELS = {
         "Virtue-AI/VirtueGuard-Text-Lite",
         "zai-org/GLM-4.5-Air-FP8",
     ],
+    # Self-hosted servers, the models are listed per instance with `models`
+    "OpenAICompatible": [],
 }
+# The Responses API serves the same models as chat completions
+SUPPORTED_MODELS["OpenAIResponses"] = SUPPORTED_MODELS["OpenAI"]
+SUPPORTED_MODELS["AzureOpenAIResponses"] = SUPPORTED_MODELS["AzureOpenAI"]
 
 
 class LLM(object):
@@ -259,16 +301,22 @@ class LLM(object):
     default_model = DEFAULT_MODEL
     default_model_provider = DEFAULT_MODEL_PROVIDER
     supported_models = SUPPORTED_MODELS
-    model_handler = {
-        "OpenAI": openai_llm.Generate,
-        "AWSBedrock": awsbedrock_llm.Generate,
-        "AnthropicBedrock": anthropicbedrock_llm.Generate,
-        "Anthropic": anthropic_llm.Generate,
-        "AzureOpenAI": azureopenai_llm.Generate,
-        "GoogleGemini": gcp_gemini_llm.Generate,
-        "GoogleVertexAI": gcp_vertex_llm.Generate,
-        "TogetherAI": togetherai_llm.Generate,
-    }
+    model_handler = LazyHandlers(
+        "orichain.llm",
+        {
+            "OpenAI": "openai_llm.Generate",
+            "AWSBedrock": "awsbedrock_llm.Generate",
+            "AnthropicBedrock": "anthropicbedrock_llm.Generate",
+            "Anthropic": "anthropic_llm.Generate",
+            "AzureOpenAI": "azureopenai_llm.Generate",
+            "GoogleGemini": "gcp_gemini_llm.Generate",
+            "GoogleVertexAI": "gcp_vertex_llm.Generate",
+            "TogetherAI": "togetherai_llm.Generate",
+            "OpenAICompatible": "openaicompatible_llm.Generate",
+            "OpenAIResponses": "openairesponses_llm.Generate",
+            "AzureOpenAIResponses": "openairesponses_llm.Generate",
+        },
+    )
 
     def __init__(self, **kwds: Any) -> None:
         """Initialize the Language Model class with the required parameters.
@@ -284,6 +332,9 @@ class LLM(object):
                 - AnthropicBedrock
                 - Anthropic
                 - TogetherAI
+                - OpenAICompatible
+                - OpenAIResponses
+                - AzureOpenAIResponses
 
             **Authentication Arguments by provider:**
 
@@ -304,11 +355,14 @@ class LLM(object):
                         - max_pool_connections: The maximum number of connections to keep in a connection pool. Defualt: 10
                         - retries (Dict, optional):
                             - total_max_attempts: Number of retries for the request. Default: 2
+                    - regions (List[str or Dict], optional): Several regions to spread the calls over instead of `aws_region`. Each entry is a region name, or a dict with `aws_region` and optionally the credentials, `model_name` (e.g. an inference profile), `weight` and `name`. Each call goes to the healthiest, lowest latency region, and throttled regions cool down while the load shifts to the others. Default: None
+                    - pool (Dict, optional): Settings of the region pool, see `orichain.pool.ClientPool`. Default: None
 
                 **Google Gemini models:**
                     - api_key (str): Gemini API key
                     - http_options (types.HttpOptions, optional): HTTP options to be used in each of the requests. Default is None
                     - debug_config (DebugConfig, optional): Configuration options that change client network behavior when testing. Default is None
+                    - context_cache (bool, Dict or ContextCache, optional): Cache large system instructions and tools that repeat across calls on the server (explicit context caching). True or a dict of `orichain.llm.context_cache.ContextCache` settings. Default is None
 
                 **Google Vertex AI models:**
                     - api_key (str): Vertex AI API key
@@ -317,6 +371,7 @@ class LLM(object):
                     - location (str): The location to send API requests to (for example, us-central1).
                     - http_options (types.HttpOptions, optional): HTTP options to be used in each of the requests. Default is None
                     - debug_config (DebugConfig, optional): Configuration options that change client network behavior when testing. Default is None
+                    - context_cache (bool, Dict or ContextCache, optional): Cache large system instructions and tools that repeat across calls on the server (explicit context caching). True or a dict of `orichain.llm.context_cache.ContextCache` settings. Default is None
 
                 **Anthropic models:**
                     - api_key (str): Anthropic API key.
@@ -324,18 +379,57 @@ class LLM(object):
                     - max_retries (int, optional): Number of retries for the request. Default: 2
                     - prompt_caching (bool, optional): Whether to use prompt caching. Default: True
 
+                **Anthropic Bedrock models:**
+                    - aws_access_key, aws_secret_key and aws_region as for AWS Bedrock models.
+                    - regions (List[str or Dict], optional): Several regions to spread the calls over, as for AWS Bedrock models. Default: None
+
                 **Azure OpenAI models:**
                     - api_key (str): Azure OpenAI API key.
                     - azure_endpoint (str): Azure OpenAI endpoint.
                     - api_version (str): Azure OpenAI API version.
                     - timeout (Timeout, optional): Request timeout parameter like connect, read, write. Default: 60.0, 5.0, 10.0, 2.0
                     - max_retries (int, optional): Number of retries for the request. Default: 2
+                    - deployments (List[Dict], optional): Several deployments to spread the calls over instead of one. Each entry holds the `azure_endpoint`, `api_key`, `api_version` and `deployment` name that differ from the shared ones, and optionally a `tier` ("ptu" first, "payg" for spillover), a `weight` and a `name`. Calls go to the provisioned deployments while they have room and spill over on 429 or high utilization, balanced by latency and rate limit headers. Default: None
+                    - pool (Dict, optional): Settings of the deployment pool, see `orichain.pool.ClientPool`. Default: None
+
+                **OpenAI and Azure OpenAI Responses API (OpenAIResponses, AzureOpenAIResponses):**
+                    - api_key (str): OpenAI or Azure OpenAI API key.
+                    - azure_endpoint (str): Azure OpenAI endpoint, AzureOpenAIResponses only.
+                    - api_version (str): Azure OpenAI API version, 2025-03-01-preview or later, AzureOpenAIResponses only.
+                    - conversation_store (ConversationStore or Dict, optional): Where the last response of each conversation is remembered, see `orichain.llm.conversations.ConversationStore`. A dict of settings (e.g. {"ttl": 3600}) configures the store shared by every LLM of the provider. Default: the shared store
+                    - timeout (Timeout, optional): Request timeout parameter like connect, read, write. Default: 60.0, 5.0, 10.0, 2.0
+                    - max_retries (int, optional): Number of retries for the request. Default: 2
 
                 **TogetherAI models:**
                     - api_key (str): TogetherAI API key.
                     - timeout (float or int, optional): Request timeout in seconds. Default: 60
                     - max_retries (int, optional): Number of retries for the request. Default: 2
 
+                **OpenAI compatible servers (vLLM, Ollama, llama.cpp server, TGI, ...):**
+                    - base_url (str): Base URL of the server's OpenAI API, e.g. http://localhost:8000/v1
+                    - api_key (str, optional): API key of the server, if it checks one. Default: "EMPTY"
+                    - models (List[str], optional): Models served, `model_name` is checked against them instead of Orichain's model lists. Default: None, any model
+                    - timeout (Timeout, optional): Request timeout parameter like connect, read, write. Default: 60.0, 5.0, 10.0, 2.0
+                    - max_retries (int, optional): Number of retries for the request. Default: 2
+                    - stream_usage (bool, optional): Ask for the token usage in the final chunk of streams, turn off for servers that reject `stream_options`. Default: True
+                    - servers (List[str or Dict], optional): Several replicas to spread the calls over instead of one `base_url`. Each entry is a base URL, or a dict with `base_url` and optionally its `models`, `api_key`, `weight` and `name`. Calls only go to the replicas that serve their model, balanced by latency and health, and move on to another replica when one fails or is overloaded. Default: None
+                    - pool (Dict, optional): Settings of the replica pool, see `orichain.pool.ClientPool`. Default: None
+
+            **Record/replay arguments (any provider):**
+                - replay_mode (str, optional): "record" to record the provider traffic into the store, or "replay" to serve recorded traffic without calling (or authenticating with) the provider. Default: None
+                - replay_store (ReplayStore or str, optional): Store, or path of the store file, used by replay_mode. Default: None
+                - replay_time_scale (float, optional): Multiplier applied to the recorded latency and inter-chunk timing when replaying, 0 replays without waiting. Default: 1.0
+
+            **Circuit breaker arguments (any provider):**
+                - circuit_breaker (CircuitBreaker, Dict or bool, optional): Fail fast while the provider is unhealthy. True or a dict of CircuitBreaker settings uses the breaker shared by every LLM of the same client, i.e. provider, endpoint, region and key (`llm:<provider>#<hash>`, see `orichain.resilience.client_name`), or pass your own `orichain.resilience.CircuitBreaker`. Default: None
+
+            **Retry arguments (any provider):**
+                - retry_policy (RetryPolicy, Dict or bool, optional): Retry transient errors (timeouts, throttling, server errors) with orichain instead of the provider SDK, using jittered backoff, Retry-After and a retry budget shared by the process. Streams are only retried before their first chunk. True uses the default policy, or pass a dict of RetryPolicy settings or an `orichain.resilience.RetryPolicy`. Turns SDK retries off unless `max_retries` is given. Default: None
+
+            **API key pool arguments (OpenAI, Anthropic, TogetherAI, GoogleGemini):**
+                - api_keys (List[str or Dict], optional): Several API keys (or projects) to spread the calls over instead of one `api_key`, to add up their rate limits. Each entry is a key, or a dict with `api_key` and optionally a `weight` and a `name` for metrics. A throttled key cools down for the Retry-After it was given and the call moves on to another key. Default: None
+                - pool (Dict, optional): Settings of the key pool, see `orichain.pool.ClientPool`, e.g. {"strategy": "round_robin"} or {"strategy": "least_loaded"}. Default: latency based selection
+
         Raises:
             - ValueError: If an unsupported model is specified.
             - KeyError: If required parameters are not provided.
@@ -365,14 +459,64 @@ class LLM(object):
                 f"\nUnsupported model provider: {self.model_provider}\nSupported providers are:"
                 f"\n- " + "\n- ".join(list(self.model_handler.keys()))
             )
+        elif self.model_provider == "OpenAICompatible":
+            # A self-hosted server serves whatever it was started with
+            served = pool.served_models(kwds)
+            self.supported_models = {
+                **self.supported_models,
+                "OpenAICompatible": served,
+            }
+            if served and self.model_name not in served:
+                warnings.warn(
+                    f"\nModel {self.model_name} is not among the models served by the OpenAI compatible server(s): [{', '.join(served)}] \nUsing an unsupported model may lead to unexpected issues. Please verify that you are using the correct 'model_name' and 'provider'",
+                    UserWarning,
+                )
         elif self.model_name not in self.supported_models.get(self.model_provider):
             warnings.warn(
                 f"\nModel {self.model_name} for provider {self.model_provider} is not supported by Orichain. Supported models for {self.model_provider} are: [{', '.join(self.supported_models.get(self.model_provider))}] \nUsing an unsupported model may lead to unexpected issues. Please verify that you are using the correct 'model_name' and 'provider'",
                 UserWarning,
             )
 
-        # Initialize the appropriate model handler
-        self.model = self.model_handler.get(self.model_provider)(**kwds)
+        # Let the orichain retry policy own retries, SDK retries would multiply with it
+        self.retry_policy = resilience.resolve_retry_policy(kwds.get("retry_policy"))
+        if self.retry_policy:
+            kwds.setdefault("max_retries", 0)
+
+        # Initialize the appropriate model handler, behind the record/replay layer if asked for
+        members = pool.pool_argument(kwds, self.model_provider)
+        if kwds.get("replay_mode"):
+            from orichain.llm import replay
+
+            self.model = replay.wrap(
+                self.model_handler.get(self.model_provider),
+                self.model_provider,
+                asynchronous=False,
+                **kwds,
+            )
+        elif members:
+            # Spread the calls over several clients, e.g. deployments or regions
+            self.model = pool.build(
+                self.model_handler.get(self.model_provider),
+                kwds,
+                members,
+                f"llm:{self.model_provider}",
+                asynchronous=False,
+            )
+        else:
+            self.model = self.model_handler.get(self.model_provider)(**kwds)
+
+        # Guard the provider client with a circuit breaker if asked for
+        self.breaker = resilience.resolve_breaker(
+            kwds.get("circuit_breaker"), "llm", self.model_provider, kwds
+        )
+        if self.breaker:
+            self.model = resilience.Guarded(self.model, self.breaker)
+
+        # Retry transient provider errors if asked for, each attempt goes through the breaker
+        if self.retry_policy:
+            self.model = resilience.Retrying(
+                self.model, self.retry_policy, f"llm:{self.model_provider}"
+            )
 
     def __call__(
         self,
@@ -413,6 +557,9 @@ class LLM(object):
                 **AWS Bedrock models:**
                     - additional_model_fields (Dict, optional): additionalModelRequestFields passed to the client in the request body.
 
+                **OpenAIResponses & AzureOpenAIResponses models:**
+                    - conversation_id (str, optional): ID of the conversation. The turn is stored on the server, and the next turn of the same conversation sends `previous_response_id` with only the messages added to `chat_hist` since, instead of the whole history. Keep passing the full `chat_hist`: it is resent when the stored state expired or the history was rewritten.
+
                 **Google Gemini & Vertex AI models:**
                     - config (google.genai.types.GenerateContentConfig, optional): Optional model configuration parameters provided to the client.chats.create API.
                     - response_mime_type (str, optional): Output response mimetype of the generated candidate text. Supported mimetype: "text/plain" (Default), "application/json" (if do_json=True)
@@ -423,6 +570,14 @@ class LLM(object):
         Returns:
             Dict: The model's response with tool calls and metadata.
         """
+        # Measure the call when metrics are enabled
+        call_metrics = metrics.start_call(
+            "llm", "call", self.model_provider, kwds.get("model_name", self.model_name)
+        )
+
+        # Start time of the call, for usage accounting
+        started = time.perf_counter()
+
         try:
             # Handle model switching if a different model is specified in kwds
             if self._model_n_model_type_validator(**kwds):
@@ -449,6 +604,13 @@ class LLM(object):
 
             # Add user message and matched sentence to the response
             if "error" not in result:
+                # Normalize, price and aggregate the token usage
+                usage.account(
+                    result,
+                    self.model_provider,
+                    model_name,
+                    time.perf_counter() - started,
+                )
                 result.update({"message": user_message})
                 if matched_sentence:
                     result.update({"matched_sentence": matched_sentence})
@@ -456,10 +618,15 @@ class LLM(object):
                 if extra_metadata:
                     result["metadata"].update(extra_metadata)
 
+            if call_metrics:
+                call_metrics.finish(result)
+
             return result
 
         except Exception as e:
             error_explainer(e)
+            if call_metrics:
+                call_metrics.finish(error=e)
             return {"error": 500, "reason": str(e)}
 
     def stream(
@@ -474,6 +641,7 @@ class LLM(object):
         extra_metadata: Optional[Dict] = None,
         do_json: bool = False,
         do_sse: bool = True,
+        accumulate: bool = True,
         **kwds: Any,
     ) -> Generator:
         """Stream responses from the language model.
@@ -486,6 +654,7 @@ class LLM(object):
             - model_name (str, optional): Specifies the model to use. If not provided, the default is the model set during class instantiation.
             - do_json (bool, optional): Whether to return JSON responses. Default: False.
             - do_sse (bool, optional): Whether to format responses as Server-Sent Events. Default: True.
+            - accumulate (bool, optional): Whether to build the full response text for the final chunk. When False, the final chunk only carries usage, tool calls and metadata. Default: True.
             - tools (List[Dict], optional): List of tools to be used by the model. Example format
 
                 [{"name": "tool name", "description": "tool description", "parameters": {"type": "object", "properties": {"arg_1": {"type": "string", "description": "An example argument for the tool."}}, "required": ["arg_1"]}}, .....]
@@ -503,6 +672,9 @@ class LLM(object):
                 **AWS Bedrock models:**
                     - additional_model_fields (Dict, optional): additionalModelRequestFields passed to the client in the request body.
 
+                **OpenAIResponses & AzureOpenAIResponses models:**
+                    - conversation_id (str, optional): ID of the conversation. The turn is stored on the server, and the next turn of the same conversation sends `previous_response_id` with only the messages added to `chat_hist` since, instead of the whole history. Keep passing the full `chat_hist`: it is resent when the stored state expired or the history was rewritten.
+
                 **Google Gemini & Vertex AI models:**
                     - config (google.genai.types.GenerateContentConfig, optional): Optional model configuration parameters provided to the client.chats.create API.
                     - response_mime_type (str, optional): Output response mimetype of the generated candidate text. Supported mimetype: "text/plain" (Default), "application/json" (if do_json=True)
@@ -510,6 +682,20 @@ class LLM(object):
         Yields:
             Generator: Stream of responses from the language model, followed by a final dictionary containing the complete response, including tool calls and metadata.
         """
+        # Provider generator, closed even if the consumer stops iterating early
+        result = None
+
+        # Measure the call when metrics are enabled
+        call_metrics = metrics.start_call(
+            "llm",
+            "stream",
+            self.model_provider,
+            kwds.get("model_name", self.model_name),
+        )
+
+        # Start time of the call, for usage accounting
+        started = time.perf_counter()
+
         try:
             # Handle model switching if a different model is specified in kwds
             if self._model_n_model_type_validator(**kwds):
@@ -531,18 +717,30 @@ class LLM(object):
                 tools=tools,
                 tool_choice=tool_choice,
                 do_json=do_json,
+                accumulate=accumulate,
                 **kwds,
             )
 
             # Process each chunk in the stream
             for chunk in result:
                 if isinstance(chunk, str):
+                    if call_metrics:
+                        call_metrics.chunk()
                     if do_sse:
                         yield self._format_sse(chunk, event="text")
                     else:
                         yield chunk
                 elif isinstance(chunk, Dict):
+                    if call_metrics:
+                        call_metrics.finish(chunk)
                     if "error" not in chunk:
+                        # Normalize, price and aggregate the token usage
+                        usage.account(
+                            chunk,
+                            self.model_provider,
+                            model_name,
+                            time.perf_counter() - started,
+                        )
                         chunk.update(
                             {
                                 "message": user_message,
@@ -559,7 +757,13 @@ class LLM(object):
 
         except Exception as e:
             error_explainer(e)
+            if call_metrics:
+                call_metrics.finish(error=e)
             yield self._format_sse({"error": 500, "reason": str(e)}, event="body")
+        finally:
+            close_stream(result)
+            if call_metrics:
+                call_metrics.close()
 
     def _format_sse(self, data: Any, event=None) -> str:
         """Format data for Server-Sent Events (SSE).
@@ -591,6 +795,14 @@ class LLM(object):
         if kwds.get("model_name"):
             if kwds.get("model_name") in self.supported_models.get(self.model_provider):
                 return True
+            elif self.model_provider == "OpenAICompatible":
+                # Only the server knows what it serves, the other lists do not apply
+                if self.supported_models.get(self.model_provider):
+                    warnings.warn(
+                        f"\nModel {kwds.get('model_name')} is not among the models served by the OpenAI compatible server(s): [{', '.join(self.supported_models.get(self.model_provider))}] \nUsing an unsupported model may lead to unexpected issues. Please verify that you are using the correct 'model_name'",
+                        UserWarning,
+                    )
+                return True
             elif kwds.get("model_name") in [
                 item for sublist in self.supported_models.values() for item in sublist
             ]:
@@ -621,16 +833,22 @@ class AsyncLLM(object):
     default_model = DEFAULT_MODEL
     default_model_provider = DEFAULT_MODEL_PROVIDER
     supported_models = SUPPORTED_MODELS
-    model_handler = model_handler = {
-        "OpenAI": openai_llm.AsyncGenerate,
-        "AWSBedrock": awsbedrock_llm.AsyncGenerate,
-        "AnthropicBedrock": anthropicbedrock_llm.AsyncGenerate,
-        "Anthropic": anthropic_llm.AsyncGenerate,
-        "AzureOpenAI": azureopenai_llm.AsyncGenerate,
-        "GoogleGemini": gcp_gemini_llm.AsyncGenerate,
-        "GoogleVertexAI": gcp_vertex_llm.AsyncGenerate,
-        "TogetherAI": togetherai_llm.AsyncGenerate,
-    }
+    model_handler = LazyHandlers(
+        "orichain.llm",
+        {
+            "OpenAI": "openai_llm.AsyncGenerate",
+            "AWSBedrock": "awsbedrock_llm.AsyncGenerate",
+            "AnthropicBedrock": "anthropicbedrock_llm.AsyncGenerate",
+            "Anthropic": "anthropic_llm.AsyncGenerate",
+            "AzureOpenAI": "azureopenai_llm.AsyncGenerate",
+            "GoogleGemini": "gcp_gemini_llm.AsyncGenerate",
+            "GoogleVertexAI": "gcp_vertex_llm.AsyncGenerate",
+            "TogetherAI": "togetherai_llm.AsyncGenerate",
+            "OpenAICompatible": "openaicompatible_llm.AsyncGenerate",
+            "OpenAIResponses": "openairesponses_llm.AsyncGenerate",
+            "AzureOpenAIResponses": "openairesponses_llm.AsyncGenerate",
+        },
+    )
 
     def __init__(self, **kwds: Any) -> None:
         """Initialize the Language Model class with the required parameters.
@@ -646,6 +864,9 @@ class AsyncLLM(object):
                 - AnthropicBedrock
                 - Anthropic
                 - TogetherAI
+                - OpenAICompatible
+                - OpenAIResponses
+                - AzureOpenAIResponses
 
             **Authentication Arguments by provider:**
 
@@ -666,11 +887,14 @@ class AsyncLLM(object):
                         - max_pool_connections: The maximum number of connections to keep in a connection pool. Defualt: 10
                         - retries (Dict, optional):
                             - total_max_attempts: Number of retries for the request. Default: 2
+                    - regions (List[str or Dict], optional): Several regions to spread the calls over instead of `aws_region`. Each entry is a region name, or a dict with `aws_region` and optionally the credentials, `model_name` (e.g. an inference profile), `weight` and `name`. Each call goes to the healthiest, lowest latency region, and throttled regions cool down while the load shifts to the others. Default: None
+                    - pool (Dict, optional): Settings of the region pool, see `orichain.pool.ClientPool`. Default: None
 
                 **Google Gemini models:**
                     - api_key (str): Gemini API key
                     - http_options (types.HttpOptions, optional): HTTP options to be used in each of the requests. Default is None
                     - debug_config (DebugConfig, optional): Configuration options that change client network behavior when testing. Default is None
+                    - context_cache (bool, Dict or ContextCache, optional): Cache large system instructions and tools that repeat across calls on the server (explicit context caching). True or a dict of `orichain.llm.context_cache.ContextCache` settings. Default is None
 
                 **Google Vertex AI models:**
                     - api_key (str): Vertex AI API key
@@ -679,6 +903,7 @@ class AsyncLLM(object):
                     - location (str): The location to send API requests to (for example, us-central1).
                     - http_options (types.HttpOptions, optional): HTTP options to be used in each of the requests. Default is None
                     - debug_config (DebugConfig, optional): Configuration options that change client network behavior when testing. Default is None
+                    - context_cache (bool, Dict or ContextCache, optional): Cache large system instructions and tools that repeat across calls on the server (explicit context caching). True or a dict of `orichain.llm.context_cache.ContextCache` settings. Default is None
 
                 **Anthropic models:**
                     - api_key (str): Anthropic API key.
@@ -686,18 +911,60 @@ class AsyncLLM(object):
                     - max_retries (int, optional): Number of retries for the request. Default: 2
                     - prompt_caching (bool, optional): Whether to use prompt caching. Default: True
 
+                **Anthropic Bedrock models:**
+                    - aws_access_key, aws_secret_key and aws_region as for AWS Bedrock models.
+                    - regions (List[str or Dict], optional): Several regions to spread the calls over, as for AWS Bedrock models. Default: None
+
                 **Azure OpenAI models:**
                     - api_key (str): Azure OpenAI API key.
                     - azure_endpoint (str): Azure OpenAI endpoint.
                     - api_version (str): Azure OpenAI API version.
                     - timeout (Timeout, optional): Request timeout parameter like connect, read, write. Default: 60.0, 5.0, 10.0, 2.0
                     - max_retries (int, optional): Number of retries for the request. Default: 2
+                    - deployments (List[Dict], optional): Several deployments to spread the calls over instead of one. Each entry holds the `azure_endpoint`, `api_key`, `api_version` and `deployment` name that differ from the shared ones, and optionally a `tier` ("ptu" first, "payg" for spillover), a `weight` and a `name`. Calls go to the provisioned deployments while they have room and spill over on 429 or high utilization, balanced by latency and rate limit headers. Default: None
+                    - pool (Dict, optional): Settings of the deployment pool, see `orichain.pool.ClientPool`. Default: None
+
+                **OpenAI and Azure OpenAI Responses API (OpenAIResponses, AzureOpenAIResponses):**
+                    - api_key (str): OpenAI or Azure OpenAI API key.
+                    - azure_endpoint (str): Azure OpenAI endpoint, AzureOpenAIResponses only.
+                    - api_version (str): Azure OpenAI API version, 2025-03-01-preview or later, AzureOpenAIResponses only.
+                    - conversation_store (ConversationStore or Dict, optional): Where the last response of each conversation is remembered, see `orichain.llm.conversations.ConversationStore`. A dict of settings (e.g. {"ttl": 3600}) configures the store shared by every LLM of the provider. Default: the shared store
+                    - timeout (Timeout, optional): Request timeout parameter like connect, read, write. Default: 60.0, 5.0, 10.0, 2.0
+                    - max_retries (int, optional): Number of retries for the request. Default: 2
 
                 **TogetherAI models:**
                     - api_key (str): TogetherAI API key.
                     - timeout (float or int, optional): Request timeout in seconds. Default: 60
                     - max_retries (int, optional): Number of retries for the request. Default: 2
 
+                **OpenAI compatible servers (vLLM, Ollama, llama.cpp server, TGI, ...):**
+                    - base_url (str): Base URL of the server's OpenAI API, e.g. http://localhost:8000/v1
+                    - api_key (str, optional): API key of the server, if it checks one. Default: "EMPTY"
+                    - models (List[str], optional): Models served, `model_name` is checked against them instead of Orichain's model lists. Default: None, any model
+                    - timeout (Timeout, optional): Request timeout parameter like connect, read, write. Default: 60.0, 5.0, 10.0, 2.0
+                    - max_retries (int, optional): Number of retries for the request. Default: 2
+                    - stream_usage (bool, optional): Ask for the token usage in the final chunk of streams, turn off for servers that reject `stream_options`. Default: True
+                    - servers (List[str or Dict], optional): Several replicas to spread the calls over instead of one `base_url`. Each entry is a base URL, or a dict with `base_url` and optionally its `models`, `api_key`, `weight` and `name`. Calls only go to the replicas that serve their model, balanced by latency and health, and move on to another replica when one fails or is overloaded. Default: None
+                    - pool (Dict, optional): Settings of the replica pool, see `orichain.pool.ClientPool`. Default: None
+
+            **Record/replay arguments (any provider):**
+                - replay_mode (str, optional): "record" to record the provider traffic into the store, or "replay" to serve recorded traffic without calling (or authenticating with) the provider. Default: None
+                - replay_store (ReplayStore or str, optional): Store, or path of the store file, used by replay_mode. Default: None
+                - replay_time_scale (float, optional): Multiplier applied to the recorded latency and inter-chunk timing when replaying, 0 replays without waiting. Default: 1.0
+
+            **Circuit breaker arguments (any provider):**
+                - circuit_breaker (CircuitBreaker, Dict or bool, optional): Fail fast while the provider is unhealthy. True or a dict of CircuitBreaker settings uses the breaker shared by every LLM of the same client, i.e. provider, endpoint, region and key (`llm:<provider>#<hash>`, see `orichain.resilience.client_name`), or pass your own `orichain.resilience.CircuitBreaker`. Default: None
+
+            **Retry arguments (any provider):**
+                - retry_policy (RetryPolicy, Dict or bool, optional): Retry transient errors (timeouts, throttling, server errors) with orichain instead of the provider SDK, using jittered backoff, Retry-After and a retry budget shared by the process. Streams are only retried before their first chunk. True uses the default policy, or pass a dict of RetryPolicy settings or an `orichain.resilience.RetryPolicy`. Turns SDK retries off unless `max_retries` is given. Default: None
+
+            **API key pool arguments (OpenAI, Anthropic, TogetherAI, GoogleGemini):**
+                - api_keys (List[str or Dict], optional): Several API keys (or projects) to spread the calls over instead of one `api_key`, to add up their rate limits. Each entry is a key, or a dict with `api_key` and optionally a `weight` and a `name` for metrics. A throttled key cools down for the Retry-After it was given and the call moves on to another key. Default: None
+                - pool (Dict, optional): Settings of the key pool, see `orichain.pool.ClientPool`, e.g. {"strategy": "round_robin"} or {"strategy": "least_loaded"}. Default: latency based selection
+
+            **Scheduling arguments (any provider):**
+                - scheduler (Scheduler, Dict or bool, optional): Admit calls through a scheduler with priority classes (interactive, normal, batch), weighted fair queuing across tenants and shedding of low priority work when the queue is full. True or a dict of Scheduler settings uses the scheduler shared by every AsyncLLM of the same client, i.e. provider, endpoint, region and key (`llm:<provider>#<hash>`, see `orichain.resilience.client_name`), or pass your own `orichain.llm.scheduler.Scheduler`. Default: None
+
         Raises:
             - ValueError: If an unsupported model is specified.
             - KeyError: If required parameters are not provided.
@@ -727,19 +994,74 @@ class AsyncLLM(object):
                 f"\nUnsupported model provider: {self.model_provider}\nSupported providers are:"
                 f"\n- " + "\n- ".join(list(self.model_handler.keys()))
             )
+        elif self.model_provider == "OpenAICompatible":
+            # A self-hosted server serves whatever it was started with
+            served = pool.served_models(kwds)
+            self.supported_models = {
+                **self.supported_models,
+                "OpenAICompatible": served,
+            }
+            if served and self.model_name not in served:
+                warnings.warn(
+                    f"\nModel {self.model_name} is not among the models served by the OpenAI compatible server(s): [{', '.join(served)}] \nUsing an unsupported model may lead to unexpected issues. Please verify that you are using the correct 'model_name' and 'provider'",
+                    UserWarning,
+                )
         elif self.model_name not in self.supported_models.get(self.model_provider):
             warnings.warn(
                 f"\nModel {self.model_name} for provider {self.model_provider} is not supported by Orichain. Supported models for {self.model_provider} are: [{', '.join(self.supported_models.get(self.model_provider))}] \nUsing an unsupported model may lead to unexpected issues. Please verify that you are using the correct 'model_name' and 'provider'",
                 UserWarning,
             )
 
-        # Initialize the appropriate model handler
-        self.model = self.model_handler.get(self.model_provider)(**kwds)
+        # Let the orichain retry policy own retries, SDK retries would multiply with it
+        self.retry_policy = resilience.resolve_retry_policy(kwds.get("retry_policy"))
+        if self.retry_policy:
+            kwds.setdefault("max_retries", 0)
+
+        # Initialize the appropriate model handler, behind the record/replay layer if asked for
+        members = pool.pool_argument(kwds, self.model_provider)
+        if kwds.get("replay_mode"):
+            from orichain.llm import replay
+
+            self.model = replay.wrap(
+                self.model_handler.get(self.model_provider),
+                self.model_provider,
+                asynchronous=True,
+                **kwds,
+            )
+        elif members:
+            # Spread the calls over several clients, e.g. deployments or regions
+            self.model = pool.build(
+                self.model_handler.get(self.model_provider),
+                kwds,
+                members,
+                f"llm:{self.model_provider}",
+                asynchronous=True,
+            )
+        else:
+            self.model = self.model_handler.get(self.model_provider)(**kwds)
+
+        # Guard the provider client with a circuit breaker if asked for
+        self.breaker = resilience.resolve_breaker(
+            kwds.get("circuit_breaker"), "llm", self.model_provider, kwds
+        )
+        if self.breaker:
+            self.model = resilience.AsyncGuarded(self.model, self.breaker)
+
+        # Retry transient provider errors if asked for, each attempt goes through the breaker
+        if self.retry_policy:
+            self.model = resilience.AsyncRetrying(
+                self.model, self.retry_policy, f"llm:{self.model_provider}"
+            )
+
+        # Admission scheduler shared by the instances of the same client, if asked for
+        self.scheduler = resolve_scheduler(
+            kwds.get("scheduler"), self.model_provider, kwds
+        )
 
     async def __call__(
         self,
         user_message: str,
-        request: Optional[Request] = None,
+        request: Optional["Request"] = None,
         matched_sentence: Optional[List[str]] = None,
         system_prompt: Optional[str] = None,
         chat_hist: Optional[List[Dict[str, str]]] = None,
@@ -748,6 +1070,9 @@ class AsyncLLM(object):
         tool_choice: Optional[str] = None,
         extra_metadata: Optional[Dict] = None,
         do_json: bool = False,
+        deadline: Optional[Union[Deadline, float]] = None,
+        priority: Optional[str] = None,
+        tenant: Optional[str] = None,
         **kwds: Any,
     ) -> Dict:
         """Generate a synchronous response from the language model.
@@ -771,12 +1096,18 @@ class AsyncLLM(object):
             - request (Request, optional): FastAPI Request object for cancellation detection.
             - matched_sentence (List[str], optional): A list of matched text chunks for context. Not used internally, but included in the response under the matched_sentence key.
             - extra_metadata (Dict, optional): Additional metadata to be included in the response.
+            - deadline (Deadline or float, optional): Total time budget of the request (`orichain.deadline.Deadline` or seconds). The call is cancelled once it passes and returns an error 504. Default: the deadline entered with `with deadline:`, if any
+            - priority (str, optional): Priority class of the call for the scheduler: interactive, normal or batch. Default: normal
+            - tenant (str, optional): Tenant key for fair queuing in the scheduler. Default: None
 
             **Generation Arguments by provider:**
 
                 **AWS Bedrock models:**
                     - additional_model_fields (Dict, optional): additionalModelRequestFields passed to the client in the request body.
 
+                **OpenAIResponses & AzureOpenAIResponses models:**
+                    - conversation_id (str, optional): ID of the conversation. The turn is stored on the server, and the next turn of the same conversation sends `previous_response_id` with only the messages added to `chat_hist` since, instead of the whole history. Keep passing the full `chat_hist`: it is resent when the stored state expired or the history was rewritten.
+
                 **Google Gemini & Vertex AI models:**
                     - config (google.genai.types.GenerateContentConfig, optional): Optional model configuration parameters provided to the client.chats.create API.
                     - response_mime_type (str, optional): Output response mimetype of the generated candidate text. Supported mimetype: "text/plain" (Default), "application/json" (if do_json=True)
@@ -787,6 +1118,35 @@ class AsyncLLM(object):
         Returns:
             Dict: The model's response with tool calls and metadata.
         """
+        # Measure the call when metrics are enabled
+        call_metrics = metrics.start_call(
+            "llm", "call", self.model_provider, kwds.get("model_name", self.model_name)
+        )
+
+        # Start time of the call, for usage accounting
+        started = time.perf_counter()
+
+        # Trace the call when tracing is enabled
+        span = tracing.start_span(
+            "orichain.llm.call",
+            {
+                "gen_ai.operation.name": "chat",
+                "gen_ai.system": self.model_provider,
+                "gen_ai.request.model": kwds.get("model_name", self.model_name),
+                "orichain.do_json": do_json,
+                "orichain.tools": len(tools) if tools else 0,
+            },
+        )
+
+        # Shared background watcher for client disconnects
+        watcher = DisconnectWatcher.acquire(request)
+
+        # Time budget of the call, given or inherited from the current context
+        deadline = resolve_deadline(deadline)
+
+        # Admission from the scheduler, released once the call is done
+        ticket = None
+
         try:
             # Handle model switching if a different model is specified in kwds
             if await self._model_n_model_type_validator(**kwds):
@@ -798,12 +1158,31 @@ class AsyncLLM(object):
             sampling_paras = sampling_paras or {}
             extra_metadata = extra_metadata or {}
 
-            # Check if request is disconnected
-            if request and await request.is_disconnected():
-                return {"error": 400, "reason": "request aborted by user"}
+            # Wait for a slot from the scheduler, if there is one
+            if self.scheduler:
+                ticket, rejection = await self._admit(
+                    priority, tenant, watcher, deadline
+                )
+                if rejection:
+                    if call_metrics:
+                        call_metrics.finish(rejection)
+                    if span:
+                        span.finish(rejection)
+                    return rejection
+                if call_metrics:
+                    call_metrics.queue_wait(ticket.waited)
 
-            # Generate the response
-            result = await self.model(
+            # Check if request is disconnected
+            if watcher and watcher.disconnected:
+                result = {"error": 400, "reason": "request aborted by user"}
+                if call_metrics:
+                    call_metrics.finish(result)
+                if span:
+                    span.finish(result)
+                return result
+
+            # Generate the response, within the deadline if there is one
+            call = self.model(
                 request=request,
                 model_name=model_name,
                 user_message=user_message,
@@ -815,9 +1194,17 @@ class AsyncLLM(object):
                 do_json=do_json,
                 **kwds,
             )
+            result = await deadline.run(call, "llm call") if deadline else await call
 
             # Add user message and matched sentence to the response
             if "error" not in result:
+                # Normalize, price and aggregate the token usage
+                usage.account(
+                    result,
+                    self.model_provider,
+                    model_name,
+                    time.perf_counter() - started,
+                )
                 result.update({"message": user_message})
                 if matched_sentence:
                     result.update({"matched_sentence": matched_sentence})
@@ -825,16 +1212,34 @@ class AsyncLLM(object):
                 if extra_metadata:
                     result["metadata"].update(extra_metadata)
 
+            if call_metrics:
+                call_metrics.finish(result)
+            if span:
+                span.finish(result)
+
             return result
 
         except Exception as e:
             error_explainer(e)
+            if call_metrics:
+                call_metrics.finish(error=e)
+            if span:
+                span.finish(error=e)
             return {"error": 500, "reason": str(e)}
+        finally:
+            if ticket:
+                ticket.release()
+            if watcher:
+                watcher.release()
+            if call_metrics:
+                call_metrics.close()
+            if span:
+                span.close()
 
     async def stream(
         self,
         user_message: str,
-        request: Optional[Request] = None,
+        request: Optional["Request"] = None,
         matched_sentence: Optional[List[str]] = None,
         system_prompt: Optional[str] = None,
         chat_hist: List = None,
@@ -844,6 +1249,10 @@ class AsyncLLM(object):
         extra_metadata: Optional[Dict] = None,
         do_json: bool = False,
         do_sse: bool = True,
+        accumulate: bool = True,
+        deadline: Optional[Union[Deadline, float]] = None,
+        priority: Optional[str] = None,
+        tenant: Optional[str] = None,
         **kwds: Any,
     ) -> AsyncGenerator:
         """Stream responses from the language model.
@@ -856,6 +1265,7 @@ class AsyncLLM(object):
             - model_name (str, optional): Specifies the model to use. If not provided, the default is the model set during class instantiation.
             - do_json (bool, optional): Whether to return JSON responses. Default: False.
             - do_sse (bool, optional): Whether to format responses as Server-Sent Events. Default: True.
+            - accumulate (bool, optional): Whether to build the full response text for the final chunk. When False, the final chunk only carries usage, tool calls and metadata. Default: True.
             - tools (List[Dict], optional): List of tools to be used by the model. Example format
 
                 [{"name": "tool name", "description": "tool description", "parameters": {"type": "object", "properties": {"arg_1": {"type": "string", "description": "An example argument for the tool."}}, "required": ["arg_1"]}}, .....]
@@ -868,12 +1278,18 @@ class AsyncLLM(object):
             - request (Request, optional): FastAPI Request object for cancellation detection.
             - matched_sentence (List[str], optional): A list of matched text chunks for context. Not used internally, but included in the response under the matched_sentence key.
             - extra_metadata (Dict, optional): Additional metadata to be included in the response.
+            - deadline (Deadline or float, optional): Total time budget of the request (`orichain.deadline.Deadline` or seconds). The call is cancelled once it passes and returns an error 504. Default: the deadline entered with `with deadline:`, if any
+            - priority (str, optional): Priority class of the call for the scheduler: interactive, normal or batch. Default: normal
+            - tenant (str, optional): Tenant key for fair queuing in the scheduler. Default: None
 
             **Generation Arguments by provider:**
 
                 **AWS Bedrock models:**
                     - additional_model_fields (Dict, optional): additionalModelRequestFields passed to the client in the request body.
 
+                **OpenAIResponses & AzureOpenAIResponses models:**
+                    - conversation_id (str, optional): ID of the conversation. The turn is stored on the server, and the next turn of the same conversation sends `previous_response_id` with only the messages added to `chat_hist` since, instead of the whole history. Keep passing the full `chat_hist`: it is resent when the stored state expired or the history was rewritten.
+
                 **Google Gemini & Vertex AI models:**
                     - config (google.genai.types.GenerateContentConfig, optional): Optional model configuration parameters provided to the client.chats.create API.
                     - response_mime_type (str, optional): Output response mimetype of the generated candidate text. Supported mimetype: "text/plain" (Default), "application/json" (if do_json=True)
@@ -881,6 +1297,43 @@ class AsyncLLM(object):
         Yields:
             AsyncGenerator: Stream of responses from the language model, followed by a final dictionary containing the complete response, including tool calls and metadata.
         """
+        # Shared background watcher for client disconnects
+        watcher = DisconnectWatcher.acquire(request)
+
+        # Provider generator, closed even if the consumer stops iterating early
+        result = None
+
+        # Time budget of the stream, given or inherited from the current context
+        deadline = resolve_deadline(deadline)
+
+        # Admission from the scheduler, released once the stream is done
+        ticket = None
+        rejection = None
+
+        # Measure the call when metrics are enabled
+        call_metrics = metrics.start_call(
+            "llm",
+            "stream",
+            self.model_provider,
+            kwds.get("model_name", self.model_name),
+        )
+
+        # Start time of the call, for usage accounting
+        started = time.perf_counter()
+
+        # Trace the call when tracing is enabled
+        span = tracing.start_span(
+            "orichain.llm.stream",
+            {
+                "gen_ai.operation.name": "chat",
+                "gen_ai.system": self.model_provider,
+                "gen_ai.request.model": kwds.get("model_name", self.model_name),
+                "orichain.do_json": do_json,
+                "orichain.tools": len(tools) if tools else 0,
+            },
+            current=False,
+        )
+
         try:
             # Handle model switching if a different model is specified in kwds
             if await self._model_n_model_type_validator(**kwds):
@@ -892,8 +1345,31 @@ class AsyncLLM(object):
             sampling_paras = sampling_paras or {}
             extra_metadata = extra_metadata or {}
 
+            # Wait for a slot from the scheduler, if there is one
+            if self.scheduler:
+                ticket, rejection = await self._admit(
+                    priority, tenant, watcher, deadline
+                )
+                if ticket and call_metrics:
+                    call_metrics.queue_wait(ticket.waited)
+
+            if rejection:
+                if call_metrics:
+                    call_metrics.finish(rejection)
+                if span:
+                    span.finish(rejection)
+                if do_sse:
+                    yield await self._format_sse(rejection, event="body")
+                else:
+                    yield rejection
             # Check if the request has been disconnected
-            if request and await request.is_disconnected():
+            elif watcher and watcher.disconnected:
+                if call_metrics:
+                    call_metrics.finish(
+                        {"error": 400, "reason": "request aborted by user"}
+                    )
+                if span:
+                    span.finish({"error": 400, "reason": "request aborted by user"})
                 yield await self._format_sse(
                     {"error": 400, "reason": "request aborted by user"}, event="body"
                 )
@@ -909,18 +1385,36 @@ class AsyncLLM(object):
                     tools=tools,
                     tool_choice=tool_choice,
                     do_json=do_json,
+                    accumulate=accumulate,
                     **kwds,
                 )
+                if deadline:
+                    result = deadline.limit(result, "llm stream")
 
                 # Process each chunk in the stream
                 async for chunk in result:
                     if isinstance(chunk, str):
+                        if call_metrics:
+                            call_metrics.chunk()
+                        if span:
+                            span.chunks += 1
                         if do_sse:
                             yield await self._format_sse(chunk, event="text")
                         else:
                             yield chunk
                     elif isinstance(chunk, Dict):
+                        if call_metrics:
+                            call_metrics.finish(chunk)
+                        if span:
+                            span.finish(chunk)
                         if "error" not in chunk:
+                            # Normalize, price and aggregate the token usage
+                            usage.account(
+                                chunk,
+                                self.model_provider,
+                                model_name,
+                                time.perf_counter() - started,
+                            )
                             chunk.update(
                                 {
                                     "message": user_message,
@@ -937,7 +1431,54 @@ class AsyncLLM(object):
 
         except Exception as e:
             error_explainer(e)
+            if call_metrics:
+                call_metrics.finish(error=e)
+            if span:
+                span.finish(error=e)
             yield await self._format_sse({"error": 500, "reason": str(e)}, event="body")
+        finally:
+            await aclose_stream(result)
+            if ticket:
+                ticket.release()
+            if call_metrics:
+                call_metrics.close()
+            if span:
+                span.close()
+            if watcher:
+                watcher.release()
+
+    async def _admit(
+        self,
+        priority: Optional[str],
+        tenant: Optional[str],
+        watcher: Optional[DisconnectWatcher],
+        deadline: Optional[Deadline],
+    ) -> Tuple[Optional[Ticket], Optional[Dict]]:
+        """Waits for a slot from the scheduler, giving up if the client leaves or time runs out.
+
+        Args:
+            - priority (str, optional): Priority class of the call
+            - tenant (str, optional): Tenant key of the call
+            - watcher (DisconnectWatcher, optional): Watcher of the client request
+            - deadline (Deadline, optional): Deadline of the call
+
+        Returns:
+            Tuple[Optional[Ticket], Optional[Dict]]: The admission, or the error to return instead
+        """
+        try:
+            admission = self.scheduler.acquire(priority, tenant)
+            if deadline:
+                admission = deadline.wait(admission)
+            ticket = await watcher.run(admission) if watcher else await admission
+        except SchedulerRejected as e:
+            return None, {"error": 503, "reason": e.reason}
+        except DeadlineExceeded:
+            return None, deadline.exceeded("llm queue")
+
+        # The client left while the call was queued
+        if ticket is None:
+            return None, {"error": 400, "reason": "request aborted by user"}
+        return ticket, None
 
     async def _format_sse(self, data: Any, event=None) -> str:
         """Format data for Server-Sent Events (SSE).
@@ -969,6 +1510,14 @@ class AsyncLLM(object):
         if kwds.get("model_name"):
             if kwds.get("model_name") in self.supported_models.get(self.model_provider):
                 return True
+            elif self.model_provider == "OpenAICompatible":
+                # Only the server knows what it serves, the other lists do not apply
+                if self.supported_models.get(self.model_provider):
+                    warnings.warn(
+                        f"\nModel {kwds.get('model_name')} is not among the models served by the OpenAI compatible server(s): [{', '.join(self.supported_models.get(self.model_provider))}] \nUsing an unsupported model may lead to unexpected issues. Please verify that you are using the correct 'model_name'",
+                        UserWarning,
+                    )
+                return True
             elif kwds.get("model_name") in [
                 item for sublist in self.supported_models.values() for item in sublist
             ]:
@@ -1,8 +1,25 @@
-from typing import Any, List, Dict, Optional, Union, Generator, AsyncGenerator
-
-from fastapi import Request
-
-from orichain import error_explainer
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    List,
+    Dict,
+    Optional,
+    Union,
+    Generator,
+    AsyncGenerator,
+)
+
+if TYPE_CHECKING:
+    from fastapi import Request
+
+from orichain import error_explainer, profiling
+from orichain.deadline import request_timeout
+from orichain.streaming import (
+    DisconnectWatcher,
+    aclose_stream,
+    close_stream,
+    stream_tracker,
+)
 
 
 class Generate(object):
@@ -102,11 +119,15 @@ class Generate(object):
         Returns:
             Dict: Response from the model or error information
         """
+        # Time the phases when profiling is enabled
+        timer = profiling.start("AnthropicBedrock", "call")
+
         try:
             # Format the chat history and user message
             messages = self._chat_formatter(
                 user_message=user_message, chat_hist=chat_hist, do_json=do_json
             )
+            timer.lap("format")
 
             # Return early if message formatting failed
             if isinstance(messages, Dict):
@@ -156,6 +177,8 @@ class Generate(object):
             else:
                 tool_choice = self.not_given
 
+            timer.lap("prepare")
+
             # Call the AWSBedrock Anthropic API with the formatted messages
             message = self.client.with_options(
                 timeout=kwds.get("timeout")
@@ -166,6 +189,7 @@ class Generate(object):
                 tool_choice=tool_choice,
                 **sampling_paras,
             )
+            timer.lap("request")
 
             # Format the response with metadata
             result = {"response": "", "metadata": {"usage": message.usage.to_dict()}}
@@ -187,11 +211,14 @@ class Generate(object):
             if tools:
                 result["tools"] = tool_calls
 
+            timer.lap("parse")
             return result
 
         except Exception as e:
             error_explainer(e)
             return {"error": 500, "reason": str(e)}
+        finally:
+            timer.finish()
 
     def streaming(
         self,
@@ -203,6 +230,7 @@ class Generate(object):
         tool_choice: Optional[str] = None,
         system_prompt: Optional[str] = None,
         do_json: Optional[bool] = False,
+        accumulate: Optional[bool] = True,
     ) -> Generator:
         """
         Stream responses from the specified model.
@@ -216,15 +244,23 @@ class Generate(object):
             - tools (List[Dict], optional): List of tools to be used by the model.
             - tool_choice (Optional[str], optional): Specifies if and which tool the model must call — "auto" for automatic, "required" for mandatory, or a specific tool's name.
             - do_json (bool, optional): Whether to format the response as JSON. Defaults to False
+            - accumulate (bool, optional): Whether to build the full response text for the final chunk. Defaults to True
 
         Yields:
             Generator: Chunks of the model's response or error information
         """
+        # Provider stream, always closed in the finally block
+        stream = None
+
+        # Time the phases when profiling is enabled
+        timer = profiling.start("AnthropicBedrock", "stream")
+
         try:
             # Format the chat history and user message
             messages = self._chat_formatter(
                 user_message=user_message, chat_hist=chat_hist, do_json=do_json
             )
+            timer.lap("format")
 
             # Yield error and return early if message formatting failed
             if isinstance(messages, Dict):
@@ -273,6 +309,8 @@ class Generate(object):
                 else:
                     tool_choice = self.not_given
 
+                timer.lap("prepare")
+
                 # Start the streaming session
                 with self.client.messages.stream(
                     messages=messages,
@@ -281,30 +319,35 @@ class Generate(object):
                     tool_choice=tool_choice,
                     **sampling_paras,
                 ) as stream:
+                    stream_tracker.track(stream, "AnthropicBedrock")
+                    timer.lap("request")
+
                     # Start JSON response if requested
                     if do_json:
+                        timer.lap("parse")
                         yield "{"
+                        timer.skip()
 
                     # Stream text chunks as they become available
-                    for chunk in stream.text_stream:
+                    for chunk in timer.iterate(stream.text_stream):
                         # Yield non-empty chunks
                         if chunk:
+                            timer.lap("parse")
                             yield chunk
+                            timer.skip()
 
                 # Get the final complete message after streaming
                 final_response = stream.get_final_message()
 
-                # Format the final response with metadata
-                result = {
-                    "response": "",
-                    "metadata": {"usage": final_response.usage.to_dict()},
-                }
+                # Collect the text and tool calls from the final message
+                response_parts = []
                 tool_calls = []
                 for content in final_response.content:
                     if content.type == "text":
-                        result["response"] += (
-                            "{" + content.text if do_json else content.text
-                        )
+                        if accumulate:
+                            response_parts.append(
+                                "{" + content.text if do_json else content.text
+                            )
                     elif content.type == "tool_use":
                         tool = content.to_dict()
                         tool["function"] = {
@@ -313,13 +356,21 @@ class Generate(object):
                         }
                         tool_calls.append(tool)
 
+                # Format the final response with metadata
+                result = {"response": "".join(response_parts)} if accumulate else {}
+                result["metadata"] = {"usage": final_response.usage.to_dict()}
+
                 if tools:
                     result["tools"] = tool_calls
 
+                timer.lap("parse")
                 yield result
         except Exception as e:
             error_explainer(e)
             yield {"error": 500, "reason": str(e)}
+        finally:
+            timer.finish()
+            close_stream(stream)
 
     def _chat_formatter(
         self,
@@ -445,7 +496,7 @@ class AsyncGenerate(object):
         self,
         model_name: str,
         user_message: Union[str, List[Dict[str, str]]],
-        request: Optional[Request] = None,
+        request: Optional["Request"] = None,
         chat_hist: Optional[List[str]] = None,
         sampling_paras: Optional[Dict] = None,
         tools: Optional[List[Dict]] = None,
@@ -472,11 +523,18 @@ class AsyncGenerate(object):
         Returns:
             Dict: Response from the model or error information
         """
+        # Shared background watcher for client disconnects
+        watcher = DisconnectWatcher.acquire(request)
+
+        # Time the phases when profiling is enabled
+        timer = profiling.start("AnthropicBedrock", "call")
+
         try:
             # Format the chat history and user message
             messages = await self._chat_formatter(
                 user_message=user_message, chat_hist=chat_hist, do_json=do_json
             )
+            timer.lap("format")
 
             # Return early if message formatting failed
             if isinstance(messages, Dict):
@@ -527,20 +585,29 @@ class AsyncGenerate(object):
                 tool_choice = self.not_given
 
             # Check if the request was disconnected
-            if request and await request.is_disconnected():
+            if watcher and watcher.disconnected:
                 return {"error": 400, "reason": "request aborted by user"}
 
+            timer.lap("prepare")
+
             # Call the AWSBedrock Anthropic API with the formatted messages
-            message = await self.client.with_options(
-                timeout=kwds.get("timeout")
-            ).messages.create(
+            client = self.client.with_options(timeout=kwds.get("timeout"))
+            call = client.messages.create(
                 messages=messages,
                 model=model_name,
                 tools=tools,
                 tool_choice=tool_choice,
                 **sampling_paras,
+                **request_timeout(client),
             )
 
+            # Cancel the in-flight call if the client disconnects meanwhile
+            message = await watcher.run(call) if watcher else await call
+            if message is None:
+                return {"error": 400, "reason": "request aborted by user"}
+
+            timer.lap("request")
+
             # Format the response with metadata
             result = {"response": "", "metadata": {"usage": message.usage.to_dict()}}
             tool_calls = []
@@ -561,23 +628,29 @@ class AsyncGenerate(object):
             if tools:
                 result["tools"] = tool_calls
 
+            timer.lap("parse")
             return result
 
         except Exception as e:
             error_explainer(e)
             return {"error": 500, "reason": str(e)}
+        finally:
+            timer.finish()
+            if watcher:
+                watcher.release()
 
     async def streaming(
         self,
         model_name: str,
         user_message: Union[str, List[Dict[str, str]]],
-        request: Optional[Request] = None,
+        request: Optional["Request"] = None,
         chat_hist: Optional[List[str]] = None,
         sampling_paras: Optional[Dict] = None,
         tools: Optional[List[Dict]] = None,
         tool_choice: Optional[str] = None,
         system_prompt: Optional[str] = None,
         do_json: Optional[bool] = False,
+        accumulate: Optional[bool] = True,
     ) -> AsyncGenerator:
         """
         Stream responses from the specified model.
@@ -592,15 +665,26 @@ class AsyncGenerate(object):
             - tools (List[Dict], optional): List of tools to be used by the model.
             - tool_choice (Optional[str], optional): Specifies if and which tool the model must call — "auto" for automatic, "required" for mandatory, or a specific tool's name.
             - do_json (bool, optional): Whether to format the response as JSON. Defaults to False
+            - accumulate (bool, optional): Whether to build the full response text for the final chunk. Defaults to True
 
         Yields:
             AsyncGenerator: Chunks of the model's response or error information
         """
+        # Shared background watcher for client disconnects
+        watcher = DisconnectWatcher.acquire(request)
+
+        # Provider stream, always closed in the finally block
+        stream = None
+
+        # Time the phases when profiling is enabled
+        timer = profiling.start("AnthropicBedrock", "stream")
+
         try:
             # Format the chat history and user message
             messages = await self._chat_formatter(
                 user_message=user_message, chat_hist=chat_hist, do_json=do_json
             )
+            timer.lap("format")
 
             # Yield error and return early if message formatting failed
             if isinstance(messages, Dict):
@@ -649,6 +733,8 @@ class AsyncGenerate(object):
                 else:
                     tool_choice = self.not_given
 
+                timer.lap("prepare")
+
                 # Start the streaming session
                 async with self.client.messages.stream(
                     messages=messages,
@@ -656,37 +742,51 @@ class AsyncGenerate(object):
                     tools=tools,
                     tool_choice=tool_choice,
                     **sampling_paras,
+                    **request_timeout(self.client),
                 ) as stream:
+                    stream_tracker.track(stream, "AnthropicBedrock")
+                    timer.lap("request")
+
+                    # Close the stream right away if the client disconnects
+                    if watcher:
+                        watcher.register(stream.close)
+
                     # Start JSON response if requested
                     if do_json:
+                        timer.lap("parse")
                         yield "{"
+                        timer.skip()
 
                     # Stream text chunks as they become available
-                    async for chunk in stream.text_stream:
+                    async for chunk in timer.aiterate(stream.text_stream):
                         # Check if the request was disconnected
-                        if request and await request.is_disconnected():
+                        if watcher and watcher.disconnected:
                             yield {"error": 400, "reason": "request aborted by user"}
                             await stream.close()
                             break
 
                         # Yield non-empty chunks
                         if chunk:
+                            timer.lap("parse")
                             yield chunk
+                            timer.skip()
+
+                # Nothing left to report once the client is gone
+                if watcher and watcher.disconnected:
+                    return
 
                 # Get the final complete message after streaming
                 final_response = await stream.get_final_message()
 
-                # Format the final response with metadata
-                result = {
-                    "response": "",
-                    "metadata": {"usage": final_response.usage.to_dict()},
-                }
+                # Collect the text and tool calls from the final message
+                response_parts = []
                 tool_calls = []
                 for content in final_response.content:
                     if content.type == "text":
-                        result["response"] += (
-                            "{" + content.text if do_json else content.text
-                        )
+                        if accumulate:
+                            response_parts.append(
+                                "{" + content.text if do_json else content.text
+                            )
                     elif content.type == "tool_use":
                         tool = content.to_dict()
                         tool["function"] = {
@@ -695,13 +795,26 @@ class AsyncGenerate(object):
                         }
                         tool_calls.append(tool)
 
+                # Format the final response with metadata
+                result = {"response": "".join(response_parts)} if accumulate else {}
+                result["metadata"] = {"usage": final_response.usage.to_dict()}
+
                 if tools:
                     result["tools"] = tool_calls
 
+                timer.lap("parse")
                 yield result
         except Exception as e:
-            error_explainer(e)
-            yield {"error": 500, "reason": str(e)}
+            if watcher and watcher.disconnected:
+                yield {"error": 400, "reason": "request aborted by user"}
+            else:
+                error_explainer(e)
+                yield {"error": 500, "reason": str(e)}
+        finally:
+            timer.finish()
+            await aclose_stream(stream)
+            if watcher:
+                watcher.release()
 
     async def _chat_formatter(
         self,
@@ -1,9 +1,25 @@
-from typing import Any, List, Dict, Optional, Union, Generator, AsyncGenerator
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    List,
+    Dict,
+    Optional,
+    Union,
+    Generator,
+    AsyncGenerator,
+)
 from botocore.eventstream import EventStream
-import asyncio
 import json
-from fastapi import Request
-from orichain import error_explainer
+
+if TYPE_CHECKING:
+    from fastapi import Request
+from orichain import error_explainer, metrics, profiling, resilience
+from orichain.streaming import (
+    DisconnectWatcher,
+    aclose_stream,
+    close_stream,
+    stream_tracker,
+)
 
 
 class CreateAiter(object):
@@ -61,6 +77,7 @@ class Generate(object):
                 - max_pool_connections: The maximum number of connections to keep in a connection pool. Defualt: 10
                 - retries (Dict, optional):
                     - total_max_attempts: Number of retries for the request. Default: 2
+            - max_retries (int, optional): Number of retries of the default config, and of a given config under a `retry_policy`. Default: 1
 
         Raises:
             - KeyError: If required parameters are not provided.
@@ -97,14 +114,7 @@ class Generate(object):
             service_name="bedrock-runtime",
             aws_access_key_id=kwds.get("aws_access_key"),
             aws_secret_access_key=kwds.get("aws_secret_key"),
-            config=kwds.get("config")
-            or Config(
-                region_name=kwds.get("aws_region"),
-                read_timeout=10,
-                connect_timeout=2,
-                retries={"total_max_attempts": 2},
-                max_pool_connections=100,
-            ),
+            config=resilience.botocore_config(kwds),
         )
 
     def __call__(
@@ -136,6 +146,9 @@ class Generate(object):
         Returns:
             Dict: Response from the model or error information
         """
+        # Time the phases when profiling is enabled
+        timer = profiling.start("AWSBedrock", "call")
+
         try:
             # Format the chat history and user message
             messages = self._chat_formatter(
@@ -143,6 +156,7 @@ class Generate(object):
                 chat_hist=chat_hist,
                 do_json=do_json,
             )
+            timer.lap("format")
 
             # Return early if message formatting failed
             if not isinstance(messages, List):
@@ -194,14 +208,18 @@ class Generate(object):
                     system.append({"cachePoint": {"type": "default"}})
                 body.update({"system": system})
 
+            timer.lap("prepare")
+
             # Call the AWSBedrock client with the formatted messages
-            result = self._generate_response(body=body)
+            result = self._generate_response(body=body, timer=timer)
 
             return result
 
         except Exception as e:
             error_explainer(e)
             return {"error": 500, "reason": str(e)}
+        finally:
+            timer.finish()
 
     def streaming(
         self,
@@ -213,6 +231,7 @@ class Generate(object):
         tool_choice: Optional[str] = None,
         system_prompt: Optional[str] = None,
         do_json: Optional[bool] = False,
+        accumulate: Optional[bool] = True,
         **kwds: Any,
     ) -> Generator:
         """
@@ -227,11 +246,18 @@ class Generate(object):
             - tools (List[Dict], optional): List of tools to be used by the model.
             - tool_choice (Optional[str], optional): Specifies if and which tool the model must call — "auto" for automatic, "required" for mandatory, or a specific tool's name.
             - do_json (bool, optional): Whether to format the response as JSON. Defaults to False
+            - accumulate (bool, optional): Whether to build the full response text for the final chunk. Defaults to True
             - **kwds: Additional keyword arguments to pass to the client
 
         Yields:
             Generator: Chunks of the model's response or error information
         """
+        # Response generator, always closed in the finally block
+        streaming_response = None
+
+        # Time the phases when profiling is enabled
+        timer = profiling.start("AWSBedrock", "stream")
+
         try:
             # Format the chat history and user message
             messages = self._chat_formatter(
@@ -239,6 +265,7 @@ class Generate(object):
                 chat_hist=chat_hist,
                 do_json=do_json,
             )
+            timer.lap("format")
 
             # Yield error and return early if message formatting failed
             if not isinstance(messages, List):
@@ -291,10 +318,12 @@ class Generate(object):
                         system.append({"cachePoint": {"type": "default"}})
                     body.update({"system": system})
 
+                timer.lap("prepare")
+
                 # Start the streaming session
-                streaming_response = self._stream_response(body=body)
+                streaming_response = self._stream_response(body=body, timer=timer)
 
-                response = ""
+                response_parts = []
                 tool_calls = []
                 usage = None
                 no_error = True
@@ -302,8 +331,11 @@ class Generate(object):
                 # Stream text chunks as they become available
                 for text in streaming_response:
                     if text and isinstance(text, str):
-                        response += text
+                        if accumulate:
+                            response_parts.append(text)
+                        timer.lap("parse")
                         yield text
+                        timer.skip()
                     elif isinstance(text, Dict):
                         if text.get("toolUseId"):
                             tool = text
@@ -335,31 +367,39 @@ class Generate(object):
 
                 if no_error:
                     # Format the final response with metadata
-                    result = {
-                        "response": response.strip(),
-                        "metadata": {"usage": usage},
-                    }
+                    result = (
+                        {"response": "".join(response_parts).strip()}
+                        if accumulate
+                        else {}
+                    )
+                    result["metadata"] = {"usage": usage}
 
                     if tools:
                         result["tools"] = tool_calls
 
+                    timer.lap("parse")
                     yield result
 
         except Exception as e:
             error_explainer(e)
             yield {"error": 500, "reason": str(e)}
+        finally:
+            timer.finish()
+            close_stream(streaming_response)
 
-    def _generate_response(self, body: Dict) -> Dict:
+    def _generate_response(self, body: Dict, timer: Any = profiling.NULL_TIMER) -> Dict:
         """Converse function for generating response
 
         Args:
             body (Dict): Contains all the paras to pass
+            timer (PhaseTimer, optional): Phase timer of the calling method
 
         Returns:
             Dict: Formatted response from the Converse"""
         try:
             # Call to Bedrock service from Converse method
             response = self.client.converse(**body)
+            timer.lap("request")
 
             # Structuring response
             result = {"response": ""}
@@ -384,29 +424,39 @@ class Generate(object):
             if response.get("metrics"):
                 result["metadata"]["usage"].update(response.get("metrics"))
 
+            timer.lap("parse")
             return result
 
         except Exception as e:
             error_explainer(e)
             return {"error": 500, "reason": str(e)}
 
-    def _stream_response(self, body: Dict) -> Generator:
+    def _stream_response(
+        self, body: Dict, timer: Any = profiling.NULL_TIMER
+    ) -> Generator:
         """ConverseStream function for generating response
 
         Args:
             body (Dict): Contains all the paras to pass
+            timer (PhaseTimer, optional): Phase timer of the calling method
 
         Yeilds:
             Generator: Chunks of the model's response or error information"""
+        # AWS event stream, always closed in the finally block
+        streaming_response = None
+
         try:
             # Call to Bedrock service from ConverseStream method
             response = self.client.converse_stream(**body)
 
             # Fetching generator
-            streaming_response = response.get("stream")
+            streaming_response = stream_tracker.track(
+                response.get("stream"), "AWSBedrock"
+            )
+            timer.lap("request")
 
             # Start the streaming session
-            for event in streaming_response:
+            for event in timer.iterate(streaming_response):
                 # Waiting for text chunks to be generated
                 if (
                     text := event.get("contentBlockDelta", {})
@@ -437,6 +487,8 @@ class Generate(object):
         except Exception as e:
             error_explainer(e)
             yield {"error": 500, "reason": str(e)}
+        finally:
+            close_stream(streaming_response)
 
     def _chat_formatter(
         self,
@@ -547,6 +599,7 @@ class AsyncGenerate(object):
                 - max_pool_connections: The maximum number of connections to keep in a connection pool. Defualt: 10
                 - retries (Dict, optional):
                     - total_max_attempts: Number of retries for the request. Default: 2
+            - max_retries (int, optional): Number of retries of the default config, and of a given config under a `retry_policy`. Default: 1
 
         Raises:
             - KeyError: If required parameters are not provided.
@@ -583,21 +636,14 @@ class AsyncGenerate(object):
             service_name="bedrock-runtime",
             aws_access_key_id=kwds.get("aws_access_key"),
             aws_secret_access_key=kwds.get("aws_secret_key"),
-            config=kwds.get("config")
-            or Config(
-                region_name=kwds.get("aws_region"),
-                read_timeout=10,
-                connect_timeout=2,
-                retries={"total_max_attempts": 2},
-                max_pool_connections=100,
-            ),
+            config=resilience.botocore_config(kwds),
         )
 
     async def __call__(
         self,
         model_name: str,
         user_message: Union[str, List[Dict[str, str]]],
-        request: Optional[Request] = None,
+        request: Optional["Request"] = None,
         chat_hist: Optional[List[Dict[str, str]]] = None,
         sampling_paras: Optional[Dict] = None,
         tools: Optional[List[Dict]] = None,
@@ -624,6 +670,12 @@ class AsyncGenerate(object):
         Returns:
             Dict: Response from the model or error information
         """
+        # Shared background watcher for client disconnects
+        watcher = DisconnectWatcher.acquire(request)
+
+        # Time the phases when profiling is enabled
+        timer = profiling.start("AWSBedrock", "call")
+
         try:
             # Format the chat history and user message
             messages = await self._chat_formatter(
@@ -631,6 +683,7 @@ class AsyncGenerate(object):
                 chat_hist=chat_hist,
                 do_json=do_json,
             )
+            timer.lap("format")
 
             # Return early if message formatting failed
             if not isinstance(messages, List):
@@ -640,7 +693,7 @@ class AsyncGenerate(object):
             sampling_paras = sampling_paras or {}
 
             # Check if the request was disconnected
-            if request and await request.is_disconnected():
+            if watcher and watcher.disconnected:
                 return {"error": 400, "reason": "request aborted by user"}
 
             # Setting up the request body
@@ -686,26 +739,38 @@ class AsyncGenerate(object):
                     system.append({"cachePoint": {"type": "default"}})
                 body.update({"system": system})
 
+            timer.lap("prepare")
+
             # Call the AWSBedrock client with the formatted messages
-            result = await self._generate_response(body=body)
+            call = self._generate_response(body=body, timer=timer)
+
+            # Stop waiting on the call if the client disconnects meanwhile
+            result = await watcher.run(call) if watcher else await call
+            if result is None:
+                return {"error": 400, "reason": "request aborted by user"}
 
             return result
 
         except Exception as e:
             error_explainer(e)
             return {"error": 500, "reason": str(e)}
+        finally:
+            timer.finish()
+            if watcher:
+                watcher.release()
 
     async def streaming(
         self,
         model_name: str,
         user_message: Union[str, List[Dict[str, str]]],
-        request: Optional[Request] = None,
+        request: Optional["Request"] = None,
         chat_hist: Optional[List[Dict[str, str]]] = None,
         sampling_paras: Optional[Dict] = None,
         tools: Optional[List[Dict]] = None,
         tool_choice: Optional[str] = None,
         system_prompt: Optional[str] = None,
         do_json: Optional[bool] = False,
+        accumulate: Optional[bool] = True,
         **kwds: Any,
     ) -> AsyncGenerator:
         """
@@ -721,11 +786,21 @@ class AsyncGenerate(object):
             - tools (List[Dict], optional): List of tools to be used by the model.
             - tool_choice (Optional[str], optional): Specifies if and which tool the model must call — "auto" for automatic, "required" for mandatory, or a specific tool's name.
             - do_json (bool, optional): Whether to format the response as JSON. Defaults to False
+            - accumulate (bool, optional): Whether to build the full response text for the final chunk. Defaults to True
             - **kwds: Additional keyword arguments to pass to the client
 
         Yields:
             AsyncGenerator: Chunks of the model's response or error information
         """
+        # Shared background watcher for client disconnects
+        watcher = DisconnectWatcher.acquire(request)
+
+        # Response generator, always closed in the finally block
+        streaming_response = None
+
+        # Time the phases when profiling is enabled
+        timer = profiling.start("AWSBedrock", "stream")
+
         try:
             # Format the chat history and user message
             messages = await self._chat_formatter(
@@ -733,6 +808,7 @@ class AsyncGenerate(object):
                 chat_hist=chat_hist,
                 do_json=do_json,
             )
+            timer.lap("format")
 
             # Yield error and return early if message formatting failed
             if not isinstance(messages, List):
@@ -785,10 +861,14 @@ class AsyncGenerate(object):
                         system.append({"cachePoint": {"type": "default"}})
                     body.update({"system": system})
 
+                timer.lap("prepare")
+
                 # Start the streaming session
-                streaming_response = self._stream_response(body=body)
+                streaming_response = self._stream_response(
+                    body=body, watcher=watcher, timer=timer
+                )
 
-                response = ""
+                response_parts = []
                 tool_calls = []
                 usage = None
                 no_error = True
@@ -796,13 +876,16 @@ class AsyncGenerate(object):
                 # Stream text chunks as they become available
                 async for text in streaming_response:
                     # Check if the request was disconnected
-                    if request and await request.is_disconnected():
+                    if watcher and watcher.disconnected:
                         yield {"error": 400, "reason": "request aborted by user"}
                         await streaming_response.aclose()
                         break
                     elif text and isinstance(text, str):
-                        response += text
+                        if accumulate:
+                            response_parts.append(text)
+                        timer.lap("parse")
                         yield text
+                        timer.skip()
                     elif isinstance(text, Dict):
                         if text.get("toolUseId"):
                             tool = text
@@ -834,31 +917,46 @@ class AsyncGenerate(object):
 
                 if no_error:
                     # Format the final response with metadata
-                    result = {
-                        "response": response.strip(),
-                        "metadata": {"usage": usage},
-                    }
+                    result = (
+                        {"response": "".join(response_parts).strip()}
+                        if accumulate
+                        else {}
+                    )
+                    result["metadata"] = {"usage": usage}
 
                     if tools:
                         result["tools"] = tool_calls
 
+                    timer.lap("parse")
                     yield result
 
         except Exception as e:
-            error_explainer(e)
-            yield {"error": 500, "reason": str(e)}
-
-    async def _generate_response(self, body: Dict) -> Dict:
+            if watcher and watcher.disconnected:
+                yield {"error": 400, "reason": "request aborted by user"}
+            else:
+                error_explainer(e)
+                yield {"error": 500, "reason": str(e)}
+        finally:
+            timer.finish()
+            await aclose_stream(streaming_response)
+            if watcher:
+                watcher.release()
+
+    async def _generate_response(
+        self, body: Dict, timer: Any = profiling.NULL_TIMER
+    ) -> Dict:
         """Converse function for generating response
 
         Args:
             body (Dict): Contains all the paras to pass
+            timer (PhaseTimer, optional): Phase timer of the calling method
 
         Returns:
             Dict: Formatted response from the Converse"""
         try:
             # Call to Bedrock service from Converse method
-            response = await asyncio.to_thread(self.client.converse, **body)
+            response = await metrics.run_in_thread(self.client.converse, **body)
+            timer.lap("request")
 
             # Structuring response
             result = {"response": ""}
@@ -883,29 +981,46 @@ class AsyncGenerate(object):
             if response.get("metrics"):
                 result["metadata"]["usage"].update(response.get("metrics"))
 
+            timer.lap("parse")
             return result
 
         except Exception as e:
             error_explainer(e)
             return {"error": 500, "reason": str(e)}
 
-    async def _stream_response(self, body: Dict) -> AsyncGenerator:
+    async def _stream_response(
+        self,
+        body: Dict,
+        watcher: Optional[DisconnectWatcher] = None,
+        timer: Any = profiling.NULL_TIMER,
+    ) -> AsyncGenerator:
         """ConverseStream function for generating response
 
         Args:
             body (Dict): Contains all the paras to pass
+            watcher (Optional[DisconnectWatcher]): Closes the event stream once the client disconnects
+            timer (PhaseTimer, optional): Phase timer of the calling method
 
         Yeilds:
             AsyncGenerator: Chunks of the model's response or error information"""
+        # AWS event stream, always closed in the finally block
+        event_stream = None
+
         try:
             # Call to Bedrock service from ConverseStream method
-            response = await asyncio.to_thread(self.client.converse_stream, **body)
+            response = await metrics.run_in_thread(self.client.converse_stream, **body)
+            event_stream = stream_tracker.track(response.get("stream"), "AWSBedrock")
+            timer.lap("request")
+
+            # Close the event stream right away if the client disconnects
+            if watcher:
+                watcher.register(event_stream.close)
 
             # Fetching generator
-            streaming_response = CreateAiter(event_stream=response.get("stream"))
+            streaming_response = CreateAiter(event_stream=event_stream)
 
             # Use the async wrapper to iterate over events asynchronously.
-            async for event in streaming_response:
+            async for event in timer.aiterate(streaming_response):
                 # Waiting for text chunks to be generated.
                 if event is streaming_response.SENTINEL:
                     break
@@ -928,8 +1043,8 @@ class AsyncGenerate(object):
                 ):
                     yield tool_args
                 elif usage := event.get("metadata", {}).get("usage"):
-                    if metrics := event["metadata"].get("metrics"):
-                        usage.update(metrics)
+                    if usage_metrics := event["metadata"].get("metrics"):
+                        usage.update(usage_metrics)
                     yield usage
                 elif event.get("error"):
                     yield event
@@ -939,6 +1054,8 @@ class AsyncGenerate(object):
         except Exception as e:
             error_explainer(e)
             yield {"error": 500, "reason": str(e)}
+        finally:
+            close_stream(event_stream)
 
     async def _chat_formatter(
         self,
@@ -1,8 +1,24 @@
 import json
-from typing import Dict, List, Optional, Generator, AsyncGenerator
-from fastapi import Request
-
-from orichain import error_explainer
+from typing import (
+    TYPE_CHECKING,
+    AsyncGenerator,
+    Dict,
+    Generator,
+    List,
+    Optional,
+)
+
+if TYPE_CHECKING:
+    from fastapi import Request
+
+from orichain import assets, error_explainer, pool, profiling
+from orichain.deadline import request_timeout
+from orichain.streaming import (
+    DisconnectWatcher,
+    aclose_stream,
+    close_stream,
+    stream_tracker,
+)
 
 
 class Generate(object):
@@ -24,6 +40,7 @@ class Generate(object):
             - api_version (str): Azure OpenAI API version.
             - timeout (Timeout, optional): Request timeout parameter like connect, read, write. Default: 60.0, 5.0, 10.0, 2.0
             - max_retries (int, optional): Number of retries for the request. Default: 2
+            - response_hook (Callable, optional): Called with every HTTP response of the client, used by client pools to read the rate limit headers. Default: None
 
         Raises:
             - KeyError: If required parameters are not provided.
@@ -58,13 +75,17 @@ class Generate(object):
         from openai import AzureOpenAI
         import tiktoken
 
+        # Watch the responses of the client if asked for
+        http_client = pool.http_client(kwds.get("response_hook"))
+
         self.client = AzureOpenAI(
             azure_endpoint=kwds.get("azure_endpoint"),
             api_key=kwds.get("api_key"),
             api_version=kwds.get("api_version"),
             timeout=kwds.get("timeout")
             or Timeout(60.0, read=5.0, write=10.0, connect=2.0),
-            max_retries=kwds.get("max_retries") or 2,
+            max_retries=kwds.get("max_retries", 2),
+            http_client=http_client,
         )
         self.tiktoken = tiktoken
 
@@ -95,6 +116,9 @@ class Generate(object):
         Returns:
             Dict: Response from the model or error information
         """
+        # Time the phases when profiling is enabled
+        timer = profiling.start("AzureOpenAI", "call")
+
         try:
             # Format the chat history and user message
             messages = self._chat_formatter(
@@ -102,6 +126,7 @@ class Generate(object):
                 chat_hist=chat_hist,
                 system_prompt=system_prompt,
             )
+            timer.lap("format")
 
             # Return early if message formatting failed
             if isinstance(messages, Dict):
@@ -134,6 +159,8 @@ class Generate(object):
                         "reason": f"Invalid tool_choice '{tool_choice}' provided. It must be one of ['none', 'auto', 'required'] or match a tool name in the provided tools.",
                     }
 
+            timer.lap("prepare")
+
             # Call the OpenAI API with the formatted messages
             completion = self.client.chat.completions.create(
                 model=model_name,
@@ -145,6 +172,7 @@ class Generate(object):
                 else {"type": "text"},
                 **sampling_paras,
             )
+            timer.lap("request")
 
             result = {
                 "response": completion.choices[0].message.content or "",
@@ -171,11 +199,14 @@ class Generate(object):
             if tools and result.get("tools") and tool_choice == "required":
                 result["tool_response"] = result["tools"][0]["function"]["arguments"]
 
+            timer.lap("parse")
             return result
 
         except Exception as e:
             error_explainer(e)
             return {"error": 500, "reason": str(e)}
+        finally:
+            timer.finish()
 
     def streaming(
         self,
@@ -187,6 +218,7 @@ class Generate(object):
         tool_choice: Optional[str] = None,
         system_prompt: Optional[str] = None,
         do_json: Optional[bool] = False,
+        accumulate: Optional[bool] = True,
     ) -> Generator:
         """
         Stream responses from the specified model.
@@ -200,10 +232,17 @@ class Generate(object):
             - tools (List[Dict], optional): List of tools to be used by the model.
             - tool_choice (Optional[str], optional): Specifies if and which tool the model must call — "none" for no tools, "auto" for automatic, "required" for mandatory, or a specific tool's name.
             - do_json (bool, optional): Whether to format the response as JSON. Defaults to False
+            - accumulate (bool, optional): Whether to build the full response text for the final chunk. Defaults to True
 
         Yields:
             Generator: Chunks of the model's response or error information
         """
+        # Provider stream, always closed in the finally block
+        completion = None
+
+        # Time the phases when profiling is enabled
+        timer = profiling.start("AzureOpenAI", "stream")
+
         try:
             # Format the chat history and user message
             messages = self._chat_formatter(
@@ -211,6 +250,7 @@ class Generate(object):
                 chat_hist=chat_hist,
                 system_prompt=system_prompt,
             )
+            timer.lap("format")
 
             # Yield error and return early if message formatting failed
             if isinstance(messages, Dict):
@@ -243,6 +283,8 @@ class Generate(object):
                             f"Invalid tool_choice '{tool_choice}' provided. It must be one of ['none', 'auto', 'required'] or match a tool name in the provided tools."
                         )
 
+                timer.lap("prepare")
+
                 # Start the streaming session
                 completion = self.client.chat.completions.create(
                     model=model_name,
@@ -256,18 +298,23 @@ class Generate(object):
                     stream_options={"include_usage": True},
                     **sampling_paras,
                 )
+                stream_tracker.track(completion, "AzureOpenAI")
+                timer.lap("request")
 
-                response = ""
+                response_parts = []
                 usage = {}
                 tool_calls = []
                 tool_arg_buffer = ""
 
                 # Stream text chunks as they become available
-                for chunk in completion:
+                for chunk in timer.iterate(completion):
                     delta = chunk.choices[0].delta if chunk.choices else None
                     if delta and delta.content:
-                        response += delta.content
+                        if accumulate:
+                            response_parts.append(delta.content)
+                        timer.lap("parse")
                         yield delta.content
+                        timer.skip()
                     elif delta and delta.tool_calls:
                         tc = delta.tool_calls[0]
                         if tc.id:
@@ -285,20 +332,22 @@ class Generate(object):
                         usage = chunk.usage.to_dict()
 
                 # Format the final response with metadata
-                result = {
-                    "response": response,
-                    "metadata": {"usage": usage},
-                }
+                result = {"response": "".join(response_parts)} if accumulate else {}
+                result["metadata"] = {"usage": usage}
 
                 if tools:
                     result["tools"] = tool_calls
                 if tools and result.get("tools") and tool_choice == "required":
                     result["tool_response"] = result["tools"][0]["function"]["arguments"]
+                timer.lap("parse")
                 yield result
-                
+
         except Exception as e:
             error_explainer(e)
             yield {"error": 500, "reason": str(e)}
+        finally:
+            timer.finish()
+            close_stream(completion)
 
     def _chat_formatter(
         self,
@@ -352,7 +401,7 @@ class Generate(object):
         Returns:
         int: Number of tokens"""
         if string and model_name:
-            encoding = self.tiktoken.encoding_for_model(model_name)
+            encoding = assets.encoding_for_model(model_name)
             num_tokens = len(encoding.encode(string))
             return num_tokens
         else:
@@ -378,6 +427,7 @@ class AsyncGenerate(object):
             - api_version (str): Azure OpenAI API version.
             - timeout (Timeout, optional): Request timeout parameter like connect, read, write. Default: 60.0, 5.0, 10.0, 2.0
             - max_retries (int, optional): Number of retries for the request. Default: 2
+            - response_hook (Callable, optional): Called with every HTTP response of the client, used by client pools to read the rate limit headers. Default: None
 
         Raises:
             - KeyError: If required parameters are not provided.
@@ -412,13 +462,17 @@ class AsyncGenerate(object):
         from openai import AsyncAzureOpenAI
         import tiktoken
 
+        # Watch the responses of the client if asked for
+        http_client = pool.http_client(kwds.get("response_hook"), asynchronous=True)
+
         self.client = AsyncAzureOpenAI(
             azure_endpoint=kwds.get("azure_endpoint"),
             api_key=kwds.get("api_key"),
             api_version=kwds.get("api_version"),
             timeout=kwds.get("timeout")
             or Timeout(60.0, read=5.0, write=10.0, connect=2.0),
-            max_retries=kwds.get("max_retries") or 2,
+            max_retries=kwds.get("max_retries", 2),
+            http_client=http_client,
         )
         self.tiktoken = tiktoken
 
@@ -426,7 +480,7 @@ class AsyncGenerate(object):
         self,
         model_name: str,
         user_message: str,
-        request: Optional[Request] = None,
+        request: Optional["Request"] = None,
         chat_hist: Optional[List[str]] = None,
         sampling_paras: Optional[Dict] = None,
         tools: Optional[List[Dict]] = None,
@@ -451,6 +505,12 @@ class AsyncGenerate(object):
         Returns:
             Dict: Response from the model or error information
         """
+        # Shared background watcher for client disconnects
+        watcher = DisconnectWatcher.acquire(request)
+
+        # Time the phases when profiling is enabled
+        timer = profiling.start("AzureOpenAI", "call")
+
         try:
             # Format the chat history and user message
             messages = await self._chat_formatter(
@@ -458,6 +518,7 @@ class AsyncGenerate(object):
                 chat_hist=chat_hist,
                 system_prompt=system_prompt,
             )
+            timer.lap("format")
 
             # Return early if message formatting failed
             if isinstance(messages, Dict):
@@ -467,7 +528,7 @@ class AsyncGenerate(object):
             sampling_paras = sampling_paras or {}
 
             # Check if the request was disconnected
-            if request and await request.is_disconnected():
+            if watcher and watcher.disconnected:
                 return {"error": 400, "reason": "request aborted by user"}
 
             # Check if tools and tool_choice are provided and format them
@@ -497,8 +558,10 @@ class AsyncGenerate(object):
                         "reason": f"Invalid tool_choice '{tool_choice}' provided. It must be one of ['none', 'auto', 'required'] or match a tool name in the provided tools.",
                     }
 
+            timer.lap("prepare")
+
             # Call the Azure OpenAI API with the formatted messages
-            completion = await self.client.chat.completions.create(
+            call = self.client.chat.completions.create(
                 model=model_name,
                 messages=messages,
                 tools=tools,
@@ -507,8 +570,16 @@ class AsyncGenerate(object):
                 if do_json
                 else {"type": "text"},
                 **sampling_paras,
+                **request_timeout(self.client),
             )
 
+            # Cancel the in-flight call if the client disconnects meanwhile
+            completion = await watcher.run(call) if watcher else await call
+            if completion is None:
+                return {"error": 400, "reason": "request aborted by user"}
+
+            timer.lap("request")
+
             result = {
                 "response": completion.choices[0].message.content or "",
                 "metadata": {"usage": completion.usage.to_dict()},
@@ -533,23 +604,29 @@ class AsyncGenerate(object):
 
             if tools and result.get("tools") and tool_choice == "required":
                 result["tool_response"] = result["tools"][0]["function"]["arguments"]
-            return result 
-        
+            timer.lap("parse")
+            return result
+
         except Exception as e:
             error_explainer(e)
             return {"error": 500, "reason": str(e)}
+        finally:
+            timer.finish()
+            if watcher:
+                watcher.release()
 
     async def streaming(
         self,
         model_name: str,
         user_message: str,
-        request: Optional[Request] = None,
+        request: Optional["Request"] = None,
         chat_hist: Optional[List[str]] = None,
         sampling_paras: Optional[Dict] = None,
         tools: Optional[List[Dict]] = None,
         tool_choice: Optional[str] = None,
         system_prompt: Optional[str] = None,
         do_json: Optional[bool] = False,
+        accumulate: Optional[bool] = True,
     ) -> AsyncGenerator:
         """
         Stream responses from the specified model.
@@ -564,10 +641,20 @@ class AsyncGenerate(object):
             - tools (List[Dict], optional): List of tools to be used by the model.
             - tool_choice (Optional[str], optional): Specifies if and which tool the model must call — "none" for no tools, "auto" for automatic, "required" for mandatory, or a specific tool's name.
             - do_json (bool, optional): Whether to format the response as JSON. Defaults to False
+            - accumulate (bool, optional): Whether to build the full response text for the final chunk. Defaults to True
 
         Yields:
             AsyncGenerator: Chunks of the model's response or error information
         """
+        # Shared background watcher for client disconnects
+        watcher = DisconnectWatcher.acquire(request)
+
+        # Provider stream, always closed in the finally block
+        completion = None
+
+        # Time the phases when profiling is enabled
+        timer = profiling.start("AzureOpenAI", "stream")
+
         try:
             # Format the chat history and user message
             messages = await self._chat_formatter(
@@ -575,6 +662,7 @@ class AsyncGenerate(object):
                 chat_hist=chat_hist,
                 system_prompt=system_prompt,
             )
+            timer.lap("format")
 
             # Yield error and return early if message formatting failed
             if isinstance(messages, Dict):
@@ -607,6 +695,8 @@ class AsyncGenerate(object):
                             f"Invalid tool_choice '{tool_choice}' provided. It must be one of ['none', 'auto', 'required'] or match a tool name in the provided tools."
                         )
 
+                timer.lap("prepare")
+
                 # Start the streaming session
                 completion = await self.client.chat.completions.create(
                     model=model_name,
@@ -619,24 +709,34 @@ class AsyncGenerate(object):
                     else {"type": "text"},
                     stream_options={"include_usage": True},
                     **sampling_paras,
+                    **request_timeout(self.client),
                 )
+                stream_tracker.track(completion, "AzureOpenAI")
+                timer.lap("request")
+
+                # Close the stream right away if the client disconnects
+                if watcher:
+                    watcher.register(completion.close)
 
-                response = ""
+                response_parts = []
                 usage = {}
                 tool_calls = []
                 tool_arg_buffer = ""
 
                 # Stream text chunks as they become available
-                async for chunk in completion:
-                    if request and await request.is_disconnected():
+                async for chunk in timer.aiterate(completion):
+                    if watcher and watcher.disconnected:
                         yield {"error": 400, "reason": "request aborted by user"}
                         await completion.close()
                         break
                     else:
                         delta = chunk.choices[0].delta if chunk.choices else None
                         if delta and delta.content:
-                            response += delta.content
+                            if accumulate:
+                                response_parts.append(delta.content)
+                            timer.lap("parse")
                             yield delta.content
+                            timer.skip()
                         elif delta and delta.tool_calls:
                             tc = delta.tool_calls[0]
                             if tc.id:
@@ -654,21 +754,28 @@ class AsyncGenerate(object):
                             usage = chunk.usage.to_dict()
 
                 # Format the final response with metadata
-                result = {
-                    "response": response,
-                    "metadata": {"usage": usage},
-                }
+                result = {"response": "".join(response_parts)} if accumulate else {}
+                result["metadata"] = {"usage": usage}
 
                 if tools:
                     result["tools"] = tool_calls
-                
+
                 if tools and result.get("tools") and tool_choice == "required":
                     result["tool_response"] = result["tools"][0]["function"]["arguments"]
 
+                timer.lap("parse")
                 yield result
         except Exception as e:
-            error_explainer(e)
-            yield {"error": 500, "reason": str(e)}
+            if watcher and watcher.disconnected:
+                yield {"error": 400, "reason": "request aborted by user"}
+            else:
+                error_explainer(e)
+                yield {"error": 500, "reason": str(e)}
+        finally:
+            timer.finish()
+            await aclose_stream(completion)
+            if watcher:
+                watcher.release()
 
     async def _chat_formatter(
         self,
@@ -722,7 +829,7 @@ class AsyncGenerate(object):
         Returns:
         int: Number of tokens"""
         if string and model_name:
-            encoding = self.tiktoken.encoding_for_model(model_name)
+            encoding = assets.encoding_for_model(model_name)
             num_tokens = len(encoding.encode(string))
             return num_tokens
         else:
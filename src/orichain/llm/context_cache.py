@@ -0,0 +1,429 @@
+from typing import Any, Dict, List, Optional, Set, Tuple
+from collections import OrderedDict
+import hashlib
+import json
+import threading
+import time
+
+from orichain import error_explainer, metrics, resilience
+
+
+class _Entry(object):
+    """A context cache created on the server"""
+
+    __slots__ = ("name", "expires_at", "last_used")
+
+    def __init__(self, name: str, expires_at: float, last_used: float) -> None:
+        self.name = name
+        self.expires_at = expires_at
+        self.last_used = last_used
+
+
+class ContextCache(object):
+    """
+    Explicit context caching for the Google Gemini and Vertex AI models.
+
+    Calls that keep sending the same large prefix, i.e. system instruction, tools and tool config
+    (reference documents included in the system prompt), get it cached on the server as a
+    `CachedContent` and reference it with `cached_content` instead of sending it again. The input
+    tokens of the prefix are then billed at the cached rate and not processed again on every call.
+
+    - A prefix is cached once it was seen `min_uses` times and is estimated to hold at least
+      `min_tokens` tokens, the minimum the models accept.
+    - A background thread extends the TTL of the caches used in the last `idle_ttl` seconds before
+      they expire, the others are left to expire.
+    - Beyond `max_entries` caches, the least recently used ones are deleted.
+
+    A prefix the server refuses to cache (a 400 or 404, e.g. too small for the model or a model
+    without caching) is not tried again. After other failures (throttling, server errors,
+    timeouts) the calls go on without a cache and creating it is tried again after a backoff,
+    doubling from `retry_backoff` seconds. The cache is thread-safe, and one instance serves one
+    client.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        name: str = "default",
+        min_tokens: int = 4096,
+        min_uses: int = 2,
+        ttl: float = 3600.0,
+        idle_ttl: Optional[float] = None,
+        refresh_margin: float = 300.0,
+        refresh_interval: float = 60.0,
+        max_entries: int = 32,
+        background: bool = True,
+        retry_backoff: float = 30.0,
+    ) -> None:
+        """
+        Args:
+            - client (google.genai.Client): Client the caches are created with
+            - name (str, optional): Name used in metrics, e.g. llm:GoogleGemini
+            - min_tokens (int, optional): Estimated tokens, at 4 characters per token, from which
+              a prefix is cached. Default: 4096
+            - min_uses (int, optional): Calls with the same prefix before it is cached. Default: 2
+            - ttl (float, optional): TTL given to the caches on the server, in seconds. Default: 3600
+            - idle_ttl (float, optional): Seconds without a call after which a cache is not
+              refreshed anymore. Default: ttl
+            - refresh_margin (float, optional): A used cache is refreshed once it has less than
+              this many seconds left. Default: 300
+            - refresh_interval (float, optional): Seconds between two refresh passes of the
+              background thread. Default: 60
+            - max_entries (int, optional): Caches kept at a time. Default: 32
+            - background (bool, optional): Whether to refresh the TTLs and delete the evicted
+              caches in a background thread, instead of leaving them to expire. Default: True
+            - retry_backoff (float, optional): Seconds before creating a cache is tried again
+              after a transient failure, doubled on each failure up to `ttl`. Default: 30
+        """
+        self.client = client
+        self.name = name
+        self.min_tokens = min_tokens
+        self.min_uses = min_uses
+        self.ttl = ttl
+        self.idle_ttl = ttl if idle_ttl is None else idle_ttl
+        self.refresh_margin = refresh_margin
+        self.refresh_interval = refresh_interval
+        self.max_entries = max_entries
+        self.background = background
+        self.retry_backoff = retry_backoff
+
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        # Prefixes seen but not cached yet, being created, or refused by the server
+        self._seen: Dict[str, int] = {}
+        self._creating: Set[str] = set()
+        self._refused: Set[str] = set()
+        # Prefixes whose cache failed transiently: consecutive failures and when to try again
+        self._failures: Dict[str, Tuple[int, float]] = {}
+        # Caches to delete on the server, by the background thread
+        self._doomed: List[str] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def lookup(
+        self,
+        model_name: str,
+        system_prompt: Optional[str],
+        tools: Optional[List[Dict]] = None,
+        tool_config: Any = None,
+    ) -> Optional[str]:
+        """Returns the cache holding the prefix of a call, creating it when it is due.
+
+        Args:
+            - model_name (str): Model of the call
+            - system_prompt (str, optional): System instruction of the call
+            - tools (List[Dict], optional): Function declarations of the call
+            - tool_config (types.ToolConfig, optional): Tool config of the call
+
+        Returns:
+            Optional[str]: Name of the cache to pass as `cached_content`, None to send the prefix
+        """
+        key = self._due(model_name, system_prompt, tools, tool_config)
+        if key is None or isinstance(key, _Entry):
+            return key.name if key else None
+        try:
+            cache = self.client.caches.create(
+                model=model_name,
+                config=self._create_config(key, system_prompt, tools, tool_config),
+            )
+        except Exception as e:
+            return self._failed(key, e)
+        return self._created(key, cache.name)
+
+    async def alookup(
+        self,
+        model_name: str,
+        system_prompt: Optional[str],
+        tools: Optional[List[Dict]] = None,
+        tool_config: Any = None,
+    ) -> Optional[str]:
+        """Like `lookup`, creating the cache with the async client.
+
+        Args:
+            - model_name (str): Model of the call
+            - system_prompt (str, optional): System instruction of the call
+            - tools (List[Dict], optional): Function declarations of the call
+            - tool_config (types.ToolConfig, optional): Tool config of the call
+
+        Returns:
+            Optional[str]: Name of the cache to pass as `cached_content`, None to send the prefix
+        """
+        key = self._due(model_name, system_prompt, tools, tool_config)
+        if key is None or isinstance(key, _Entry):
+            return key.name if key else None
+        try:
+            cache = await self.client.aio.caches.create(
+                model=model_name,
+                config=self._create_config(key, system_prompt, tools, tool_config),
+            )
+        except Exception as e:
+            return self._failed(key, e)
+        return self._created(key, cache.name)
+
+    def invalidate(self, name: str) -> None:
+        """Forgets a cache the server no longer has, the next call creates it again.
+
+        Args:
+            - name (str): Name of the cache
+        """
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if entry.name == name:
+                    del self._entries[key]
+                    self._seen[key] = self.min_uses - 1
+        self._count("invalidated")
+
+    def refresh(self) -> None:
+        """Extends the TTL of the caches in use that expire soon, and deletes the evicted ones.
+
+        Run every `refresh_interval` seconds by the background thread.
+        """
+        from google.genai import types
+
+        now = time.monotonic()
+        with self._lock:
+            doomed, self._doomed = self._doomed, []
+            due = []
+            for key, entry in list(self._entries.items()):
+                if entry.expires_at <= now:
+                    # Expired on the server already
+                    del self._entries[key]
+                elif (
+                    now - entry.last_used < self.idle_ttl
+                    and entry.expires_at - now < self.refresh_margin
+                ):
+                    due.append(entry)
+
+        for entry in due:
+            try:
+                self.client.caches.update(
+                    name=entry.name,
+                    config=types.UpdateCachedContentConfig(ttl=f"{int(self.ttl)}s"),
+                )
+                entry.expires_at = time.monotonic() + self.ttl
+                self._count("refreshed")
+            except Exception as e:
+                error_explainer(e)
+                self.invalidate(entry.name)
+
+        for name in doomed:
+            self._delete(name)
+
+    def close(self) -> None:
+        """Stops the background thread and deletes every cache from the server."""
+        self._stop.set()
+        with self._lock:
+            names = [entry.name for entry in self._entries.values()] + self._doomed
+            self._entries.clear()
+            self._doomed = []
+        for name in names:
+            self._delete(name)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Returns the state of the cache, for metrics and health endpoints."""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "name": self.name,
+                "caches": [
+                    {
+                        "name": entry.name,
+                        "expires_in": max(entry.expires_at - now, 0.0),
+                        "idle": now - entry.last_used,
+                    }
+                    for entry in self._entries.values()
+                ],
+                "pending": len(self._seen),
+                "refused": len(self._refused),
+                "backing_off": len(self._failures),
+            }
+
+    def _due(
+        self,
+        model_name: str,
+        system_prompt: Optional[str],
+        tools: Optional[List[Dict]],
+        tool_config: Any,
+    ) -> Any:
+        """Returns the live entry of a prefix, its key if it should be cached now, else None"""
+        text = (system_prompt or "") + (
+            json.dumps(tools, sort_keys=True, default=_jsonable) if tools else ""
+        )
+        if len(text) // 4 < self.min_tokens:
+            return None
+        key = hashlib.sha256(
+            json.dumps(
+                [model_name, text, tool_config], sort_keys=True, default=_jsonable
+            ).encode()
+        ).hexdigest()
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at > now + 5.0:
+                entry.last_used = now
+                self._entries.move_to_end(key)
+                hit = True
+            else:
+                if entry is not None:
+                    del self._entries[key]
+                hit = False
+                failure = self._failures.get(key)
+                if key in self._refused or key in self._creating:
+                    key = None
+                elif failure is not None and failure[1] > now:
+                    # Failed transiently, waiting for the backoff
+                    key = None
+                else:
+                    uses = self._seen[key] = self._seen.get(key, 0) + 1
+                    if uses < self.min_uses:
+                        key = None
+                    else:
+                        self._creating.add(key)
+
+        self._count("hit" if hit else "miss")
+        return entry if hit else key
+
+    def _create_config(
+        self,
+        key: str,
+        system_prompt: Optional[str],
+        tools: Optional[List[Dict]],
+        tool_config: Any,
+    ) -> Any:
+        """Config of the cache of a prefix"""
+        from google.genai import types
+
+        return types.CreateCachedContentConfig(
+            display_name=f"orichain-{key[:16]}",
+            system_instruction=system_prompt,
+            tools=[types.Tool(function_declarations=tools)] if tools else None,
+            tool_config=tool_config,
+            ttl=f"{int(self.ttl)}s",
+        )
+
+    def _created(self, key: str, name: str) -> str:
+        """Records a new cache, evicting the least recently used ones beyond max_entries"""
+        now = time.monotonic()
+        with self._lock:
+            self._creating.discard(key)
+            self._seen.pop(key, None)
+            self._failures.pop(key, None)
+            self._entries[key] = _Entry(name, now + self.ttl, now)
+            evicted = []
+            while len(self._entries) > self.max_entries:
+                evicted.append(self._entries.popitem(last=False)[1].name)
+            if self.background:
+                self._doomed.extend(evicted)
+            # Prefixes seen once long ago should not pile up
+            if len(self._seen) > 16 * self.max_entries:
+                self._seen.clear()
+            if len(self._failures) > 16 * self.max_entries:
+                self._failures.clear()
+        self._count("created")
+        for _ in evicted:
+            self._count("evicted")
+        self._start()
+        return name
+
+    def _failed(self, key: str, error: BaseException) -> Optional[str]:
+        """Records a prefix whose cache could not be created, the call goes on without a cache.
+
+        A prefix the server refuses (400 or 404) is not tried again, the others are tried again
+        after a backoff.
+        """
+        error_explainer(error)
+        refused = resilience.error_status(None, error) in (400, 404)
+        now = time.monotonic()
+        with self._lock:
+            self._creating.discard(key)
+            if refused:
+                self._seen.pop(key, None)
+                self._failures.pop(key, None)
+                self._refused.add(key)
+            else:
+                failures = self._failures.get(key, (0, 0.0))[0] + 1
+                delay = min(self.retry_backoff * 2 ** (failures - 1), self.ttl)
+                self._failures[key] = (failures, now + delay)
+                # Created by the first call after the backoff
+                self._seen[key] = self.min_uses - 1
+        self._count("refused" if refused else "failed")
+        return None
+
+    def _delete(self, name: str) -> None:
+        """Deletes a cache from the server, ignoring the ones already gone"""
+        try:
+            self.client.caches.delete(name=name)
+        except Exception as e:
+            error_explainer(e)
+
+    def _start(self) -> None:
+        """Starts the background refresh thread on the first cache"""
+        if not self.background or self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._run,
+                name=f"orichain-context-cache-{self.name}",
+                daemon=True,
+            )
+        self._thread.start()
+
+    def _run(self) -> None:
+        """Refresh loop of the background thread"""
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                error_explainer(e)
+
+    def _count(self, event: str) -> None:
+        """Increments the context cache counter when metrics are enabled"""
+        sink = metrics.get_sink()
+        if sink:
+            sink.increment(
+                "orichain_context_cache_events_total",
+                1,
+                {"cache": self.name, "event": event},
+            )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __repr__(self) -> str:
+        return f"ContextCache({self.name!r}, caches={len(self)})"
+
+
+def resolve_cache(cache: Any, client: Any, name: str) -> Optional[ContextCache]:
+    """Turns the `context_cache` argument of a Gemini or Vertex AI client into a cache.
+
+    Args:
+        - cache (ContextCache, Dict, bool or None): A cache, True for the default settings, a
+          dict of `ContextCache` settings, or None/False to disable it
+        - client (google.genai.Client): Client the caches are created with
+        - name (str): Name of the cache, e.g. llm:GoogleGemini
+
+    Returns:
+        Optional[ContextCache]: The cache to use, if any
+    """
+    if isinstance(cache, ContextCache):
+        return cache
+    if not cache:
+        return None
+    settings = cache if isinstance(cache, dict) else {}
+    return ContextCache(client, name=name, **settings)
+
+
+def stale(error: BaseException) -> bool:
+    """Whether a call failed because its cached content is gone from the server"""
+    text = str(error).lower().replace(" ", "").replace("_", "")
+    return "cachedcontent" in text
+
+
+def _jsonable(value: Any) -> Any:
+    """JSON form of the SDK objects found in tools and tool configs"""
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json", exclude_none=True)
+    return repr(value)
@@ -0,0 +1,172 @@
+from typing import Any, Dict, List, Optional, Tuple
+from collections import OrderedDict
+import threading
+import time
+
+from orichain import metrics
+
+# Shared conversation stores, by name
+_stores: Dict[str, "ConversationStore"] = {}
+
+
+class ConversationStore(object):
+    """
+    Maps the conversation IDs of the caller to the last response the OpenAI Responses API stored
+    for them, so the next turn sends `previous_response_id` and only the new messages instead of
+    the whole `chat_hist`.
+
+    A mapping is only trusted while:
+
+    - it is younger than `ttl` seconds, the server forgets stored responses after a while
+    - the `chat_hist` of the next turn still starts with the turns the server has, i.e. it is at
+      least as long as the history of the last call plus its user message and the answer
+
+    Otherwise the full history is sent and the mapping starts over. The least recently used
+    conversations are dropped beyond `max_size`. The store is thread-safe.
+    """
+
+    def __init__(
+        self, name: str = "default", ttl: float = 86400.0, max_size: int = 10000
+    ) -> None:
+        """
+        Args:
+            - name (str, optional): Name used in metrics, e.g. llm:OpenAIResponses
+            - ttl (float, optional): Seconds a stored response is reused for. Default: 86400
+            - max_size (int, optional): Conversations kept at a time. Default: 10000
+        """
+        self.name = name
+        self.ttl = ttl
+        self.max_size = max_size
+        # Conversation ID: (response ID, turns the server has, expiry time)
+        self._entries: "OrderedDict[str, Tuple[str, int, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def resume(
+        self, conversation_id: Optional[str], chat_hist: Optional[List[Dict]]
+    ) -> Tuple[Optional[str], List[Dict]]:
+        """Tells how to send the history of a turn.
+
+        Args:
+            - conversation_id (str, optional): Conversation of the turn, None for a stateless call
+            - chat_hist (List[Dict], optional): Full history of the conversation, as the caller
+              keeps it
+
+        Returns:
+            Tuple[Optional[str], List[Dict]]: The response ID to continue from, if any, and the
+            part of the history the server does not have
+        """
+        chat_hist = chat_hist or []
+        if not conversation_id:
+            return None, chat_hist
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(conversation_id)
+            if entry is not None and (entry[2] <= now or len(chat_hist) < entry[1]):
+                # Expired, or the caller rewrote the history since
+                del self._entries[conversation_id]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(conversation_id)
+
+        if entry is None:
+            self._count("resent")
+            return None, chat_hist
+        self._count("continued")
+        return entry[0], chat_hist[entry[1] :]
+
+    def save(
+        self,
+        conversation_id: Optional[str],
+        response_id: str,
+        chat_hist: Optional[List[Dict]],
+    ) -> None:
+        """Records the response of a turn, for the next turn to continue from.
+
+        Args:
+            - conversation_id (str, optional): Conversation of the turn, nothing is saved if None
+            - response_id (str): ID of the response the server stored
+            - chat_hist (List[Dict], optional): Full history the turn was made with
+        """
+        if not conversation_id or not response_id:
+            return
+        # The next history holds this one, the user message and the answer
+        turns = len(chat_hist or []) + 2
+        with self._lock:
+            self._entries[conversation_id] = (
+                response_id,
+                turns,
+                time.monotonic() + self.ttl,
+            )
+            self._entries.move_to_end(conversation_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def expire(self, conversation_id: Optional[str]) -> None:
+        """Forgets a conversation the server no longer has.
+
+        Args:
+            - conversation_id (str, optional): Conversation to forget
+        """
+        if not conversation_id:
+            return
+        with self._lock:
+            self._entries.pop(conversation_id, None)
+        self._count("expired")
+
+    def clear(self) -> None:
+        """Forgets every conversation."""
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Returns the state of the store, for metrics and health endpoints."""
+        return {"name": self.name, "conversations": len(self)}
+
+    def _count(self, state: str) -> None:
+        """Increments the conversation state counter when metrics are enabled"""
+        sink = metrics.get_sink()
+        if sink:
+            sink.increment(
+                "orichain_conversation_turns_total",
+                1,
+                {"store": self.name, "state": state},
+            )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __repr__(self) -> str:
+        return f"ConversationStore({self.name!r}, conversations={len(self)})"
+
+
+def get_store(name: str, **settings: Any) -> ConversationStore:
+    """Returns the shared conversation store of that name, creating it on first use.
+
+    Args:
+        - name (str): Store name, e.g. llm:OpenAIResponses
+        - **settings: `ConversationStore` arguments, only used when the store is created
+
+    Returns:
+        ConversationStore: The shared store
+    """
+    store = _stores.get(name)
+    if store is None:
+        store = _stores[name] = ConversationStore(name, **settings)
+    return store
+
+
+def resolve_store(store: Any, name: str) -> ConversationStore:
+    """Turns the `conversation_store` argument of a Responses API client into a store.
+
+    Args:
+        - store (ConversationStore, Dict or None): A store, a dict of `ConversationStore`
+          settings for the shared store, or None for the shared store
+        - name (str): Name of the shared store, e.g. llm:OpenAIResponses
+
+    Returns:
+        ConversationStore: The store to use
+    """
+    if isinstance(store, ConversationStore):
+        return store
+    return get_store(name, **(store if isinstance(store, dict) else {}))
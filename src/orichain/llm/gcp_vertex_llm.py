@@ -1,4 +1,5 @@
 from typing import (
+    TYPE_CHECKING,
     Any,
     Dict,
     List,
@@ -7,8 +8,17 @@ from typing import (
     Generator,
     AsyncGenerator,
 )
-from fastapi import Request
-from orichain import error_explainer
+
+if TYPE_CHECKING:
+    from fastapi import Request
+from orichain import error_explainer, profiling
+from orichain.llm import context_cache
+from orichain.streaming import (
+    DisconnectWatcher,
+    aclose_stream,
+    close_stream,
+    stream_tracker,
+)
 
 
 class Generate(object):
@@ -31,6 +41,7 @@ class Generate(object):
             - location (str): The location to send API requests to (for example, us-central1).
             - http_options (types.HttpOptions, optional): HTTP options to be used in each of the requests. Default is None
             - debug_config (DebugConfig, optional): Configuration options that change client network behavior when testing. Default is None
+            - context_cache (bool, Dict or ContextCache, optional): Cache the large system instructions and tools that repeat across calls on the server, see `orichain.llm.context_cache.ContextCache`. True or a dict of settings creates a cache for this client. Default is None
 
         Raises:
             - KeyError: If required parameters are not provided.
@@ -100,6 +111,11 @@ class Generate(object):
 
         self.types = types
 
+        # Cache large, stable prompt prefixes on the server if asked for
+        self.context_cache = context_cache.resolve_cache(
+            kwds.get("context_cache"), self.client, "llm:GoogleVertexAI"
+        )
+
     def __call__(
         self,
         model_name: str,
@@ -129,11 +145,15 @@ class Generate(object):
         Returns:
             Dict: Response from the model or error information
         """
+        # Time the phases when profiling is enabled
+        timer = profiling.start("GoogleVertexAI", "call")
+
         try:
             # Format the chat history and user message
             messages = self._chat_formatter(
                 chat_hist=chat_hist,
             )
+            timer.lap("format")
 
             # Return early if message formatting failed
             if isinstance(messages, Dict):
@@ -165,29 +185,48 @@ class Generate(object):
                         "reason": f"Invalid tool_choice '{tool_choice}' provided. It must be one of ['none', 'auto', 'required'] or match a tool name in the provided tools.",
                     }
 
+            # Reuse the server-side cache of a large, stable prefix if there is one
+            cached = self._cached(model_name, system_prompt, tools, tool_config, kwds)
+
             # Create new chat session with Google API with the formatted messages
             chat_session = self.client.chats.create(
                 model=model_name,
-                config=kwds.get(
-                    "config",
-                    self.types.GenerateContentConfig(
-                        system_instruction=system_prompt,
-                        response_mime_type=(
-                            "application/json"
-                            if do_json
-                            else kwds.get("response_mime_type") or "text/plain"
-                        ),
-                        tools=[self.types.Tool(function_declarations=tools)]
-                        if tools
-                        else [],
-                        tool_config=tool_config,
-                        **sampling_paras,
-                    ),
+                config=self._config(
+                    cached,
+                    system_prompt,
+                    tools,
+                    tool_config,
+                    do_json,
+                    sampling_paras,
+                    kwds,
                 ),
                 history=messages,
             )
 
-            response = chat_session.send_message(message=user_message)
+            timer.lap("prepare")
+
+            try:
+                response = chat_session.send_message(message=user_message)
+            except Exception as e:
+                if not cached or not context_cache.stale(e):
+                    raise
+                # The cache is gone from the server, send the prefix again
+                self.context_cache.invalidate(cached)
+                chat_session = self.client.chats.create(
+                    model=model_name,
+                    config=self._config(
+                        None,
+                        system_prompt,
+                        tools,
+                        tool_config,
+                        do_json,
+                        sampling_paras,
+                        kwds,
+                    ),
+                    history=messages,
+                )
+                response = chat_session.send_message(message=user_message)
+            timer.lap("request")
 
             # Fetching responses from the LLM for tools and text
             result = {
@@ -207,11 +246,14 @@ class Generate(object):
                         )
                 result["tools"] = tool_calls
 
+            timer.lap("parse")
             return result
 
         except Exception as e:
             error_explainer(e=e)
             return {"error": 500, "reason": str(e)}
+        finally:
+            timer.finish()
 
     def streaming(
         self,
@@ -223,6 +265,7 @@ class Generate(object):
         tool_choice: Optional[str] = None,
         system_prompt: Optional[str] = None,
         do_json: Optional[bool] = False,
+        accumulate: Optional[bool] = True,
         **kwds: Any,
     ) -> Generator:
         """
@@ -237,16 +280,27 @@ class Generate(object):
             - tools (List[Dict], optional): List of tools to be used by the model.
             - tool_choice (Optional[str], optional): Specifies if and which tool the model must call — "none" for no tools, "auto" for automatic, "required" for mandatory, or a specific tool's name.
             - do_json (bool, optional): Whether to format the response as JSON. Defaults to False
+            - accumulate (bool, optional): Whether to build the full response text for the final chunk. Defaults to True
             - **kwds: Additional keyword arguments to pass to the client
 
         Yields:
             AsyncGenerator: Chunks of the model's response or error information
         """
+        # Provider stream, always closed in the finally block
+        stream = None
+
+        # Context cache used by the call, if any
+        cached = None
+
+        # Time the phases when profiling is enabled
+        timer = profiling.start("GoogleVertexAI", "stream")
+
         try:
             # Format the chat history and user message
             messages = self._chat_formatter(
                 chat_hist=chat_hist,
             )
+            timer.lap("format")
 
             # Yield error and return early if message formatting failed
             if isinstance(messages, Dict):
@@ -278,56 +332,134 @@ class Generate(object):
                             f"Invalid tool_choice '{tool_choice}' provided. It must be one of ['none', 'auto', 'required'] or match a tool name in the provided tools."
                         )
 
-                # Create new chat session with Google API with the formatted messages
-                chat_session = self.client.chats.create(
-                    model=model_name,
-                    config=kwds.get(
-                        "config",
-                        self.types.GenerateContentConfig(
-                            system_instruction=system_prompt,
-                            response_mime_type=(
-                                "application/json"
-                                if do_json
-                                else kwds.get("response_mime_type") or "text/plain"
-                            ),
-                            tools=[self.types.Tool(function_declarations=tools)]
-                            if tools
-                            else [],
-                            tool_config=tool_config,
-                            **sampling_paras,
-                        ),
-                    ),
-                    history=messages,
+                # Reuse the server-side cache of a large, stable prefix if there is one
+                cached = self._cached(
+                    model_name, system_prompt, tools, tool_config, kwds
                 )
 
-                result: Dict = {"response": ""}
-                tool_calls = []
+                # Sent again without the cache if it is gone from the server, as long as
+                # nothing was streamed yet
+                started = False
+                while True:
+                    # Create new chat session with Google API with the formatted messages
+                    chat_session = self.client.chats.create(
+                        model=model_name,
+                        config=self._config(
+                            cached,
+                            system_prompt,
+                            tools,
+                            tool_config,
+                            do_json,
+                            sampling_paras,
+                            kwds,
+                        ),
+                        history=messages,
+                    )
 
-                for chunk in chat_session.send_message_stream(message=user_message):
-                    if chunk.text:
-                        result["response"] = result["response"] + chunk.text
-                        yield chunk.text
-                    elif chunk.function_calls:
-                        for tool in chunk.function_calls:
-                            tool_calls.append(
-                                {
-                                    "id": tool.id,
-                                    "function": {
-                                        "name": tool.name,
-                                        "arguments": tool.args,
-                                    },
-                                }
-                            )
-                    if chunk.usage_metadata:
-                        result.update({"usage": chunk.usage_metadata.to_json_dict()})
+                    response_parts = []
+                    usage = {}
+                    tool_calls = []
+
+                    timer.lap("prepare")
+
+                    try:
+                        stream = stream_tracker.track(
+                            chat_session.send_message_stream(message=user_message),
+                            "GoogleVertexAI",
+                        )
+                        timer.lap("request")
+
+                        for chunk in timer.iterate(stream):
+                            if chunk.text:
+                                if accumulate:
+                                    response_parts.append(chunk.text)
+                                timer.lap("parse")
+                                started = True
+                                yield chunk.text
+                                timer.skip()
+                            elif chunk.function_calls:
+                                for tool in chunk.function_calls:
+                                    tool_calls.append(
+                                        {
+                                            "id": tool.id,
+                                            "function": {
+                                                "name": tool.name,
+                                                "arguments": tool.args,
+                                            },
+                                        }
+                                    )
+                            if chunk.usage_metadata:
+                                usage = chunk.usage_metadata.to_json_dict()
+                        break
+                    except Exception as e:
+                        if not cached or started or not context_cache.stale(e):
+                            raise
+                        # The cache is gone from the server, send the prefix again
+                        self.context_cache.invalidate(cached)
+                        close_stream(stream)
+                        cached = None
+
+                # Format the final response with metadata
+                result = {"response": "".join(response_parts)} if accumulate else {}
+                result["metadata"] = {"usage": usage}
 
                 if tools:
                     result["tools"] = tool_calls
 
+                timer.lap("parse")
                 yield result
         except Exception as e:
+            # A cache gone from the server is created again on the next call
+            if cached and context_cache.stale(e):
+                self.context_cache.invalidate(cached)
             error_explainer(e)
             yield {"error": 500, "reason": str(e)}
+        finally:
+            timer.finish()
+            close_stream(stream)
+
+    def _cached(
+        self,
+        model_name: str,
+        system_prompt: Optional[str],
+        tools: Optional[List[Dict]],
+        tool_config: Any,
+        kwds: Dict,
+    ) -> Optional[str]:
+        """Name of the context cache holding the prefix of a call, None if it is not cached"""
+        if self.context_cache is None or "config" in kwds:
+            return None
+        return self.context_cache.lookup(model_name, system_prompt, tools, tool_config)
+
+    def _config(
+        self,
+        cached: Optional[str],
+        system_prompt: Optional[str],
+        tools: Optional[List[Dict]],
+        tool_config: Any,
+        do_json: Optional[bool],
+        sampling_paras: Dict,
+        kwds: Dict,
+    ) -> Any:
+        """Generation config of a call, without the prefix when it is cached"""
+        if "config" in kwds:
+            return kwds["config"]
+        tools = [self.types.Tool(function_declarations=tools)] if tools else []
+        if cached:
+            # The cached content holds the system instruction and the tools
+            system_prompt, tools, tool_config = None, None, None
+        return self.types.GenerateContentConfig(
+            system_instruction=system_prompt,
+            response_mime_type=(
+                "application/json"
+                if do_json
+                else kwds.get("response_mime_type") or "text/plain"
+            ),
+            tools=tools,
+            tool_config=tool_config,
+            cached_content=cached,
+            **sampling_paras,
+        )
 
     def _chat_formatter(
         self,
@@ -399,6 +531,7 @@ class AsyncGenerate(object):
             - location (str): The location to send API requests to (for example, us-central1).
             - http_options (types.HttpOptions, optional): HTTP options to be used in each of the requests. Default is None
             - debug_config (DebugConfig, optional): Configuration options that change client network behavior when testing. Default is None
+            - context_cache (bool, Dict or ContextCache, optional): Cache the large system instructions and tools that repeat across calls on the server, see `orichain.llm.context_cache.ContextCache`. True or a dict of settings creates a cache for this client. Default is None
 
         Raises:
             - KeyError: If required parameters are not provided.
@@ -468,11 +601,16 @@ class AsyncGenerate(object):
 
         self.types = types
 
+        # Cache large, stable prompt prefixes on the server if asked for
+        self.context_cache = context_cache.resolve_cache(
+            kwds.get("context_cache"), self.client, "llm:GoogleVertexAI"
+        )
+
     async def __call__(
         self,
         model_name: str,
         user_message: Union[str, List[Union[Dict[str, str], Any]]],
-        request: Optional[Request] = None,
+        request: Optional["Request"] = None,
         chat_hist: Optional[List[str]] = None,
         sampling_paras: Optional[Dict] = None,
         tools: Optional[List[Dict]] = None,
@@ -499,11 +637,18 @@ class AsyncGenerate(object):
         Returns:
             Dict: Response from the model or error information
         """
+        # Shared background watcher for client disconnects
+        watcher = DisconnectWatcher.acquire(request)
+
+        # Time the phases when profiling is enabled
+        timer = profiling.start("GoogleVertexAI", "call")
+
         try:
             # Format the chat history and user message
             messages = await self._chat_formatter(
                 chat_hist=chat_hist,
             )
+            timer.lap("format")
 
             # Return early if message formatting failed
             if isinstance(messages, Dict):
@@ -536,32 +681,59 @@ class AsyncGenerate(object):
                     }
 
             # Check if the request was disconnected
-            if request and await request.is_disconnected():
+            if watcher and watcher.disconnected:
                 return {"error": 400, "reason": "request aborted by user"}
 
+            # Reuse the server-side cache of a large, stable prefix if there is one
+            cached = await self._cached(
+                model_name, system_prompt, tools, tool_config, kwds
+            )
+
             # Create new chat session with Google API with the formatted messages
             chat_session = self.client.aio.chats.create(
                 model=model_name,
-                config=kwds.get(
-                    "config",
-                    self.types.GenerateContentConfig(
-                        system_instruction=system_prompt,
-                        response_mime_type=(
-                            "application/json"
-                            if do_json
-                            else kwds.get("response_mime_type") or "text/plain"
-                        ),
-                        tools=[self.types.Tool(function_declarations=tools)]
-                        if tools
-                        else [],
-                        tool_config=tool_config,
-                        **sampling_paras,
-                    ),
+                config=self._config(
+                    cached,
+                    system_prompt,
+                    tools,
+                    tool_config,
+                    do_json,
+                    sampling_paras,
+                    kwds,
                 ),
                 history=messages,
             )
 
-            response = await chat_session.send_message(message=user_message)
+            timer.lap("prepare")
+
+            # Cancel the in-flight call if the client disconnects meanwhile
+            try:
+                call = chat_session.send_message(message=user_message)
+                response = await watcher.run(call) if watcher else await call
+            except Exception as e:
+                if not cached or not context_cache.stale(e):
+                    raise
+                # The cache is gone from the server, send the prefix again
+                self.context_cache.invalidate(cached)
+                chat_session = self.client.aio.chats.create(
+                    model=model_name,
+                    config=self._config(
+                        None,
+                        system_prompt,
+                        tools,
+                        tool_config,
+                        do_json,
+                        sampling_paras,
+                        kwds,
+                    ),
+                    history=messages,
+                )
+                call = chat_session.send_message(message=user_message)
+                response = await watcher.run(call) if watcher else await call
+            if response is None:
+                return {"error": 400, "reason": "request aborted by user"}
+
+            timer.lap("request")
 
             # Fetching responses from the LLM for tools and text
             result = {
@@ -581,23 +753,29 @@ class AsyncGenerate(object):
                         )
                 result["tools"] = tool_calls
 
+            timer.lap("parse")
             return result
 
         except Exception as e:
             error_explainer(e=e)
             return {"error": 500, "reason": str(e)}
+        finally:
+            timer.finish()
+            if watcher:
+                watcher.release()
 
     async def streaming(
         self,
         model_name: str,
         user_message: Union[str, List[Union[Dict[str, str], Any]]],
-        request: Optional[Request] = None,
+        request: Optional["Request"] = None,
         chat_hist: Optional[List[str]] = None,
         sampling_paras: Optional[Dict] = None,
         tools: Optional[List[Dict]] = None,
         tool_choice: Optional[str] = None,
         system_prompt: Optional[str] = None,
         do_json: Optional[bool] = False,
+        accumulate: Optional[bool] = True,
         **kwds: Any,
     ) -> AsyncGenerator:
         """
@@ -613,16 +791,30 @@ class AsyncGenerate(object):
             - tools (List[Dict], optional): List of tools to be used by the model.
             - tool_choice (Optional[str], optional): Specifies if and which tool the model must call — "none" for no tools, "auto" for automatic, "required" for mandatory, or a specific tool's name.
             - do_json (bool, optional): Whether to format the response as JSON. Defaults to False
+            - accumulate (bool, optional): Whether to build the full response text for the final chunk. Defaults to True
             - **kwds: Additional keyword arguments to pass to the client
 
         Yields:
             AsyncGenerator: Chunks of the model's response or error information
         """
+        # Shared background watcher for client disconnects
+        watcher = DisconnectWatcher.acquire(request)
+
+        # Provider stream, always closed in the finally block
+        stream = None
+
+        # Context cache used by the call, if any
+        cached = None
+
+        # Time the phases when profiling is enabled
+        timer = profiling.start("GoogleVertexAI", "stream")
+
         try:
             # Format the chat history and user message
             messages = await self._chat_formatter(
                 chat_hist=chat_hist,
             )
+            timer.lap("format")
 
             # Yield error and return early if message formatting failed
             if isinstance(messages, Dict):
@@ -654,62 +846,150 @@ class AsyncGenerate(object):
                             f"Invalid tool_choice '{tool_choice}' provided. It must be one of ['none', 'auto', 'required'] or match a tool name in the provided tools."
                         )
 
-                # Create new chat session with Google API with the formatted messages
-                chat_session = self.client.aio.chats.create(
-                    model=model_name,
-                    config=kwds.get(
-                        "config",
-                        self.types.GenerateContentConfig(
-                            system_instruction=system_prompt,
-                            response_mime_type=(
-                                "application/json"
-                                if do_json
-                                else kwds.get("response_mime_type") or "text/plain"
-                            ),
-                            tools=[self.types.Tool(function_declarations=tools)]
-                            if tools
-                            else [],
-                            tool_config=tool_config,
-                            **sampling_paras,
-                        ),
-                    ),
-                    history=messages,
+                # Reuse the server-side cache of a large, stable prefix if there is one
+                cached = await self._cached(
+                    model_name, system_prompt, tools, tool_config, kwds
                 )
 
-                result: Dict = {"response": ""}
-                tool_calls = []
+                # Sent again without the cache if it is gone from the server, as long as
+                # nothing was streamed yet
+                started = False
+                while True:
+                    # Create new chat session with Google API with the formatted messages
+                    chat_session = self.client.aio.chats.create(
+                        model=model_name,
+                        config=self._config(
+                            cached,
+                            system_prompt,
+                            tools,
+                            tool_config,
+                            do_json,
+                            sampling_paras,
+                            kwds,
+                        ),
+                        history=messages,
+                    )
 
-                async for chunk in await chat_session.send_message_stream(
-                    message=user_message
-                ):
-                    if request and await request.is_disconnected():
-                        yield {"error": 400, "reason": "request aborted by user"}
-                        break
+                    response_parts = []
+                    usage = {}
+                    tool_calls = []
+
+                    timer.lap("prepare")
 
-                    if chunk.text:
-                        result["response"] = result["response"] + chunk.text
-                        yield chunk.text
-                    elif chunk.function_calls:
-                        for tool in chunk.function_calls:
-                            tool_calls.append(
-                                {
-                                    "id": tool.id,
-                                    "function": {
-                                        "name": tool.name,
-                                        "arguments": tool.args,
-                                    },
+                    try:
+                        stream = stream_tracker.track(
+                            await chat_session.send_message_stream(
+                                message=user_message
+                            ),
+                            "GoogleVertexAI",
+                        )
+                        timer.lap("request")
+
+                        async for chunk in timer.aiterate(stream):
+                            if watcher and watcher.disconnected:
+                                yield {
+                                    "error": 400,
+                                    "reason": "request aborted by user",
                                 }
-                            )
-                    if chunk.usage_metadata:
-                        result.update({"usage": chunk.usage_metadata.to_json_dict()})
+                                break
+
+                            if chunk.text:
+                                if accumulate:
+                                    response_parts.append(chunk.text)
+                                timer.lap("parse")
+                                started = True
+                                yield chunk.text
+                                timer.skip()
+                            elif chunk.function_calls:
+                                for tool in chunk.function_calls:
+                                    tool_calls.append(
+                                        {
+                                            "id": tool.id,
+                                            "function": {
+                                                "name": tool.name,
+                                                "arguments": tool.args,
+                                            },
+                                        }
+                                    )
+                            if chunk.usage_metadata:
+                                usage = chunk.usage_metadata.to_json_dict()
+                        break
+                    except Exception as e:
+                        if not cached or started or not context_cache.stale(e):
+                            raise
+                        # The cache is gone from the server, send the prefix again
+                        self.context_cache.invalidate(cached)
+                        await aclose_stream(stream)
+                        cached = None
+
+                # Format the final response with metadata
+                result = {"response": "".join(response_parts)} if accumulate else {}
+                result["metadata"] = {"usage": usage}
 
                 if tools:
                     result["tools"] = tool_calls
 
+                timer.lap("parse")
                 yield result
         except Exception as e:
-            error_explainer(e)
-            yield {"error": 500, "reason": str(e)}
+            # A cache gone from the server is created again on the next call
+            if cached and context_cache.stale(e):
+                self.context_cache.invalidate(cached)
+            if watcher and watcher.disconnected:
+                yield {"error": 400, "reason": "request aborted by user"}
+            else:
+                error_explainer(e)
+                yield {"error": 500, "reason": str(e)}
+        finally:
+            timer.finish()
+            await aclose_stream(stream)
+            if watcher:
+                watcher.release()
+
+    async def _cached(
+        self,
+        model_name: str,
+        system_prompt: Optional[str],
+        tools: Optional[List[Dict]],
+        tool_config: Any,
+        kwds: Dict,
+    ) -> Optional[str]:
+        """Name of the context cache holding the prefix of a call, None if it is not cached"""
+        if self.context_cache is None or "config" in kwds:
+            return None
+        return await self.context_cache.alookup(
+            model_name, system_prompt, tools, tool_config
+        )
+
+    def _config(
+        self,
+        cached: Optional[str],
+        system_prompt: Optional[str],
+        tools: Optional[List[Dict]],
+        tool_config: Any,
+        do_json: Optional[bool],
+        sampling_paras: Dict,
+        kwds: Dict,
+    ) -> Any:
+        """Generation config of a call, without the prefix when it is cached"""
+        if "config" in kwds:
+            return kwds["config"]
+        tools = [self.types.Tool(function_declarations=tools)] if tools else []
+        if cached:
+            # The cached content holds the system instruction and the tools
+            system_prompt, tools, tool_config = None, None, None
+        return self.types.GenerateContentConfig(
+            system_instruction=system_prompt,
+            response_mime_type=(
+                "application/json"
+                if do_json
+                else kwds.get("response_mime_type") or "text/plain"
+            ),
+            tools=tools,
+            tool_config=tool_config,
+            cached_content=cached,
+            **sampling_paras,
+        )
 
     async def _chat_formatter(
         self,
@@ -0,0 +1,881 @@
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+from collections import OrderedDict, deque
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+
+from orichain import error_explainer, metrics
+from orichain.llm.router import CHARS_PER_TOKEN
+
+# Instructions given to the summarizer model when old turns are compacted
+SUMMARY_PROMPT = (
+    "You maintain the running summary of a conversation between a user and an assistant. "
+    "Merge the current summary and the new turns into one updated summary. Keep every fact, "
+    "name, number, decision, preference and open question the assistant may need later, drop "
+    "greetings and repetitions, and write it in the third person. Answer with the summary only."
+)
+
+
+def estimate_message_tokens(text: str) -> int:
+    """Estimates the tokens of a message from its length, without a tokenizer.
+
+    Args:
+        - text (str): Content of the message
+
+    Returns:
+        int: Estimated number of tokens
+    """
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+class Conversation(object):
+    """Messages of a conversation not compacted yet, with their token counts and the summary of
+    the older ones"""
+
+    __slots__ = (
+        "id",
+        "messages",
+        "tokens",
+        "summary",
+        "summary_tokens",
+        "compacted",
+        "formatted",
+        "version",
+        "updated_at",
+    )
+
+    def __init__(
+        self,
+        id: str,
+        messages: Optional[List[Dict]] = None,
+        tokens: Optional[List[int]] = None,
+        summary: str = "",
+        summary_tokens: int = 0,
+        compacted: int = 0,
+        updated_at: Optional[float] = None,
+    ) -> None:
+        """
+        Args:
+            - id (str): Conversation ID
+            - messages (List[Dict], optional): Messages after the summary, oldest first
+            - tokens (List[int], optional): Token count of each message
+            - summary (str, optional): Summary of the compacted messages. Default: ""
+            - summary_tokens (int, optional): Token count of the summary. Default: 0
+            - compacted (int, optional): Messages folded into the summary so far. Default: 0
+            - updated_at (float, optional): Unix time of the last change. Default: now
+        """
+        self.id = id
+        self.messages = messages or []
+        self.tokens = tokens or []
+        self.summary = summary
+        self.summary_tokens = summary_tokens
+        self.compacted = compacted
+        # Provider-formatted copies of the messages, dropped on every change
+        self.formatted: Dict[str, Any] = {}
+        # Bumped when messages are removed, so a compaction can tell it is outdated
+        self.version = 0
+        self.updated_at = time.time() if updated_at is None else updated_at
+
+    @property
+    def total_tokens(self) -> int:
+        """Tokens sent with every turn: the summary and the messages after it"""
+        return self.summary_tokens + sum(self.tokens)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns the conversation as stored by the backends.
+
+        The lists are copies, so a save queued for the backend does not pick up the messages
+        added before it is written.
+        """
+        return {
+            "id": self.id,
+            "messages": list(self.messages),
+            "tokens": list(self.tokens),
+            "summary": self.summary,
+            "summary_tokens": self.summary_tokens,
+            "compacted": self.compacted,
+            "updated_at": self.updated_at,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Conversation":
+        """Builds a conversation from the dict stored by a backend"""
+        return cls(
+            data["id"],
+            messages=data.get("messages"),
+            tokens=data.get("tokens"),
+            summary=data.get("summary", ""),
+            summary_tokens=data.get("summary_tokens", 0),
+            compacted=data.get("compacted", 0),
+            updated_at=data.get("updated_at"),
+        )
+
+    def __repr__(self) -> str:
+        return f"Conversation({self.id!r}, messages={len(self.messages)}, tokens={self.total_tokens})"
+
+
+class MemoryBackend(object):
+    """Persistent storage of the conversations of a `MemoryStore`.
+
+    The store keeps the recent conversations in memory and writes every change through to the
+    backend, so a conversation evicted from memory, or held by another process, is loaded back on
+    its next turn. New messages are appended, the whole conversation is only saved again when it
+    is compacted or truncated.
+    """
+
+    def load(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """Returns the stored conversation, None if there is none"""
+        raise NotImplementedError
+
+    def save(self, conversation_id: str, data: Dict[str, Any]) -> None:
+        """Stores a conversation, replacing the previous version"""
+        raise NotImplementedError
+
+    def append(self, conversation_id: str, data: Dict[str, Any]) -> None:
+        """Adds messages to a stored conversation.
+
+        The default loads the conversation and saves it again, backends that can append in place
+        override it.
+
+        Args:
+            - conversation_id (str): Conversation ID
+            - data (Dict): The new `messages`, their `tokens` and the `updated_at` time
+        """
+        self.save(
+            conversation_id, _merge(self.load(conversation_id), conversation_id, data)
+        )
+
+    def delete(self, conversation_id: str) -> None:
+        """Deletes a stored conversation"""
+        raise NotImplementedError
+
+
+class FileBackend(MemoryBackend):
+    """Stores each conversation as a JSON lines file in a directory: the conversation as last
+    saved, followed by the messages appended since"""
+
+    def __init__(self, directory: str) -> None:
+        """
+        Args:
+            - directory (str): Directory of the files, created if missing
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def load(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(conversation_id), encoding="utf-8") as file:
+                lines = file.readlines()
+        except FileNotFoundError:
+            return None
+        return _replay(conversation_id, lines)
+
+    def save(self, conversation_id: str, data: Dict[str, Any]) -> None:
+        # Write to a temporary file first so readers never see a partial file
+        path = self._path(conversation_id)
+        temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            file.write(_record("save", data))
+        os.replace(temporary, path)
+
+    def append(self, conversation_id: str, data: Dict[str, Any]) -> None:
+        with open(self._path(conversation_id), "a", encoding="utf-8") as file:
+            file.write(_record("append", data))
+
+    def delete(self, conversation_id: str) -> None:
+        try:
+            os.remove(self._path(conversation_id))
+        except FileNotFoundError:
+            pass
+
+    def _path(self, conversation_id: str) -> str:
+        """File of a conversation, named after the hash of its ID"""
+        digest = hashlib.sha256(conversation_id.encode()).hexdigest()
+        return os.path.join(self.directory, f"{digest}.jsonl")
+
+
+class RedisBackend(MemoryBackend):
+    """Stores each conversation in Redis, as a JSON string of the conversation as last saved and
+    a list of the messages appended since"""
+
+    def __init__(
+        self, client: Any, prefix: str = "orichain:memory:", ttl: Optional[int] = None
+    ) -> None:
+        """
+        Args:
+            - client (redis.Redis): Synchronous redis-py client
+            - prefix (str, optional): Prefix of the keys. Default: orichain:memory:
+            - ttl (int, optional): Seconds a conversation is kept after its last change. Default: None, kept forever
+        """
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def load(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        key = self.prefix + conversation_id
+        pipeline = self.client.pipeline()
+        pipeline.get(key)
+        pipeline.lrange(key + ":log", 0, -1)
+        saved, log = pipeline.execute()
+        return _replay(conversation_id, log, json.loads(saved) if saved else None)
+
+    def save(self, conversation_id: str, data: Dict[str, Any]) -> None:
+        key = self.prefix + conversation_id
+        pipeline = self.client.pipeline()
+        pipeline.set(key, json.dumps(data, ensure_ascii=False), ex=self.ttl)
+        pipeline.delete(key + ":log")
+        pipeline.execute()
+
+    def append(self, conversation_id: str, data: Dict[str, Any]) -> None:
+        key = self.prefix + conversation_id
+        pipeline = self.client.pipeline()
+        pipeline.rpush(key + ":log", _record("append", data))
+        if self.ttl:
+            pipeline.expire(key, self.ttl)
+            pipeline.expire(key + ":log", self.ttl)
+        pipeline.execute()
+
+    def delete(self, conversation_id: str) -> None:
+        key = self.prefix + conversation_id
+        self.client.delete(key, key + ":log")
+
+
+class MemoryStore(object):
+    """
+    Conversation memory kept by Orichain, instead of passing the whole history in as `chat_hist`
+    from an external store on every turn.
+
+    Recent conversations are kept in an in-process LRU of `max_conversations` entries, with every
+    change written through to an optional `MemoryBackend` (`FileBackend`, `RedisBackend` or your
+    own), from which evicted conversations are loaded back. Each message is stored with its token
+    count, and each conversation has a `formatted` cache for provider-formatted copies of its
+    messages, dropped whenever the messages change.
+
+    Once the summary and the messages of a conversation pass `max_tokens`, the oldest turns are
+    compacted into the summary, keeping the last `keep_tokens` (at least `keep_messages` messages)
+    verbatim:
+
+    - with a `summarizer` (an `AsyncLLM`), the summary is generated in a background task when a
+      message is added from a running event loop, or by awaiting `compact`
+    - without one, the oldest turns are dropped
+
+    so the prompt of each turn stays bounded. Pass `chat_hist=store.history(id)` and
+    `system_prompt=store.system_prompt(id, system_prompt)` to the model, then `store.record(id,
+    user_message, result)`. From async code, use `aget`, `aextend` and `arecord`, which run the
+    backend I/O in a thread instead of blocking the event loop; the other methods then find the
+    conversation in memory. The store is thread-safe.
+    """
+
+    def __init__(
+        self,
+        name: str = "default",
+        backend: Optional[MemoryBackend] = None,
+        max_conversations: int = 1000,
+        max_tokens: int = 8000,
+        keep_tokens: int = 2000,
+        keep_messages: int = 4,
+        summarizer: Any = None,
+        summary_prompt: str = SUMMARY_PROMPT,
+        summary_paras: Optional[Dict] = None,
+        token_counter: Optional[Callable[[str], int]] = None,
+    ) -> None:
+        """
+        Args:
+            - name (str, optional): Name used in metrics. Default: default
+            - backend (MemoryBackend, optional): Persistent storage of the conversations. Default: None, in memory only
+            - max_conversations (int, optional): Conversations kept in memory. Default: 1000
+            - max_tokens (int, optional): Tokens of the summary and messages of a conversation past which it is compacted. Default: 8000
+            - keep_tokens (int, optional): Tokens of the latest messages kept verbatim by a compaction. Default: 2000
+            - keep_messages (int, optional): Latest messages always kept verbatim by a compaction. Default: 4
+            - summarizer (AsyncLLM, optional): Model that writes the summaries. Default: None, old turns are dropped
+            - summary_prompt (str, optional): System prompt of the summarizer. Default: SUMMARY_PROMPT
+            - summary_paras (Dict, optional): Sampling parameters of the summarizer. Default: None
+            - token_counter (Callable[[str], int], optional): Counts the tokens of a message, e.g. with tiktoken. Default: `estimate_message_tokens`
+        """
+        self.name = name
+        self.backend = backend
+        self.max_conversations = max_conversations
+        self.max_tokens = max_tokens
+        self.keep_tokens = keep_tokens
+        self.keep_messages = keep_messages
+        self.summarizer = summarizer
+        self.summary_prompt = summary_prompt
+        self.summary_paras = summary_paras
+        self.token_counter = token_counter or estimate_message_tokens
+
+        self._conversations: "OrderedDict[str, Conversation]" = OrderedDict()
+        # Conversations with a compaction in flight, and the tasks running them
+        self._compacting: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._lock = threading.RLock()
+        # Backend writes not made yet, in the order of the changes
+        self._pending: Deque[Tuple[str, str, Optional[Dict[str, Any]]]] = deque()
+        self._io_lock = threading.Lock()
+
+    def get(self, conversation_id: str) -> Optional[Conversation]:
+        """Returns a conversation, loading it from the backend if it is not in memory.
+
+        Args:
+            - conversation_id (str): Conversation ID
+
+        Returns:
+            Optional[Conversation]: The conversation, None if it has no message yet
+        """
+        conversation = self._lookup(conversation_id)
+        if conversation is not None or self.backend is None:
+            return conversation
+        return self._loaded(conversation_id, self.backend.load(conversation_id))
+
+    async def aget(self, conversation_id: str) -> Optional[Conversation]:
+        """Like `get`, loading the conversation from the backend in a thread.
+
+        Args:
+            - conversation_id (str): Conversation ID
+
+        Returns:
+            Optional[Conversation]: The conversation, None if it has no message yet
+        """
+        conversation = self._lookup(conversation_id)
+        if conversation is not None or self.backend is None:
+            return conversation
+        data = await asyncio.to_thread(self.backend.load, conversation_id)
+        return self._loaded(conversation_id, data)
+
+    def append(
+        self,
+        conversation_id: str,
+        message: Dict[str, Any],
+        tokens: Optional[int] = None,
+    ) -> Conversation:
+        """Adds a message to a conversation, compacting it if it grew past `max_tokens`.
+
+        Args:
+            - conversation_id (str): Conversation ID
+            - message (Dict): Message in the `chat_hist` format, e.g. {"role": "user", "content": "..."}
+            - tokens (int, optional): Tokens of the message. Default: counted with `token_counter`
+
+        Returns:
+            Conversation: The conversation
+        """
+        return self.extend(conversation_id, [message], [tokens])
+
+    def extend(
+        self,
+        conversation_id: str,
+        messages: List[Dict[str, Any]],
+        tokens: Optional[List[Optional[int]]] = None,
+    ) -> Conversation:
+        """Adds several messages to a conversation, compacting it if it grew past `max_tokens`.
+
+        Args:
+            - conversation_id (str): Conversation ID
+            - messages (List[Dict]): Messages in the `chat_hist` format
+            - tokens (List[Optional[int]], optional): Tokens of each message, None to count them with `token_counter`
+
+        Returns:
+            Conversation: The conversation
+        """
+        counts = self._counts(messages, tokens)
+        conversation, over = self._add(
+            conversation_id, self.get(conversation_id), messages, counts
+        )
+        self._flush()
+        if over and self.summarizer is not None:
+            self._schedule(conversation_id)
+        return conversation
+
+    async def aextend(
+        self,
+        conversation_id: str,
+        messages: List[Dict[str, Any]],
+        tokens: Optional[List[Optional[int]]] = None,
+    ) -> Conversation:
+        """Like `extend`, with the backend I/O in a thread.
+
+        Args:
+            - conversation_id (str): Conversation ID
+            - messages (List[Dict]): Messages in the `chat_hist` format
+            - tokens (List[Optional[int]], optional): Tokens of each message, None to count them with `token_counter`
+
+        Returns:
+            Conversation: The conversation
+        """
+        counts = self._counts(messages, tokens)
+        conversation, over = self._add(
+            conversation_id, await self.aget(conversation_id), messages, counts
+        )
+        await self._aflush()
+        if over and self.summarizer is not None:
+            self._schedule(conversation_id)
+        return conversation
+
+    def record(
+        self,
+        conversation_id: str,
+        user_message: Any,
+        result: Dict[str, Any],
+    ) -> Optional[Conversation]:
+        """Adds a turn to a conversation from the result of an `LLM`/`AsyncLLM` call or the final
+        chunk of a stream. Failed calls are not recorded, and tool calls are left to `extend`
+        since their message format depends on the provider.
+
+        Args:
+            - conversation_id (str): Conversation ID
+            - user_message (Any): Message the call was made with
+            - result (Dict): Result of the call
+
+        Returns:
+            Optional[Conversation]: The conversation, None if the call failed
+        """
+        if not isinstance(result, dict) or "error" in result:
+            return None
+        return self.extend(conversation_id, _turn(user_message, result))
+
+    async def arecord(
+        self,
+        conversation_id: str,
+        user_message: Any,
+        result: Dict[str, Any],
+    ) -> Optional[Conversation]:
+        """Like `record`, with the backend I/O in a thread.
+
+        Args:
+            - conversation_id (str): Conversation ID
+            - user_message (Any): Message the call was made with
+            - result (Dict): Result of the call
+
+        Returns:
+            Optional[Conversation]: The conversation, None if the call failed
+        """
+        if not isinstance(result, dict) or "error" in result:
+            return None
+        return await self.aextend(conversation_id, _turn(user_message, result))
+
+    def history(self, conversation_id: str) -> List[Dict[str, Any]]:
+        """Messages of a conversation after its summary, to pass as `chat_hist`.
+
+        Args:
+            - conversation_id (str): Conversation ID
+
+        Returns:
+            List[Dict]: The messages, oldest first
+        """
+        conversation = self.get(conversation_id)
+        if conversation is None:
+            return []
+        with self._lock:
+            return list(conversation.messages)
+
+    def summary(self, conversation_id: str) -> str:
+        """Summary of the compacted turns of a conversation, "" if there is none.
+
+        Args:
+            - conversation_id (str): Conversation ID
+
+        Returns:
+            str: The summary
+        """
+        conversation = self.get(conversation_id)
+        return conversation.summary if conversation is not None else ""
+
+    def system_prompt(
+        self, conversation_id: str, system_prompt: Optional[str] = None
+    ) -> Optional[str]:
+        """System prompt of a turn, with the summary of the compacted turns appended.
+
+        Args:
+            - conversation_id (str): Conversation ID
+            - system_prompt (str, optional): System prompt of the application
+
+        Returns:
+            Optional[str]: The system prompt to pass to the model
+        """
+        summary = self.summary(conversation_id)
+        if not summary:
+            return system_prompt
+        context = f"Summary of the earlier conversation:\n{summary}"
+        return f"{system_prompt}\n\n{context}" if system_prompt else context
+
+    def tokens(self, conversation_id: str) -> int:
+        """Tokens of the summary and messages of a conversation, sent with every turn.
+
+        Args:
+            - conversation_id (str): Conversation ID
+
+        Returns:
+            int: Number of tokens
+        """
+        conversation = self.get(conversation_id)
+        return conversation.total_tokens if conversation is not None else 0
+
+    def formatted(self, conversation_id: str, key: str) -> Any:
+        """Cached provider-formatted copy of the messages of a conversation.
+
+        Args:
+            - conversation_id (str): Conversation ID
+            - key (str): Name of the format, e.g. the provider
+
+        Returns:
+            Any: The cached value, None if the messages changed since it was cached
+        """
+        conversation = self.get(conversation_id)
+        if conversation is None:
+            return None
+        with self._lock:
+            return conversation.formatted.get(key)
+
+    def set_formatted(self, conversation_id: str, key: str, value: Any) -> None:
+        """Caches a provider-formatted copy of the messages of a conversation, in memory only.
+
+        Args:
+            - conversation_id (str): Conversation ID
+            - key (str): Name of the format, e.g. the provider
+            - value (Any): Formatted messages
+        """
+        conversation = self.get(conversation_id)
+        if conversation is None:
+            return
+        with self._lock:
+            conversation.formatted[key] = value
+
+    def delete(self, conversation_id: str) -> None:
+        """Forgets a conversation, in memory and in the backend.
+
+        Args:
+            - conversation_id (str): Conversation ID
+        """
+        with self._lock:
+            conversation = self._conversations.pop(conversation_id, None)
+            if conversation is not None:
+                conversation.version += 1
+            self._write(conversation_id, "delete")
+        self._flush()
+
+    async def compact(self, conversation_id: str, force: bool = False) -> bool:
+        """Folds the oldest turns of a conversation into its summary with the `summarizer`.
+
+        Args:
+            - conversation_id (str): Conversation ID
+            - force (bool, optional): Compact even if the conversation is within `max_tokens`. Default: False
+
+        Returns:
+            bool: Whether the conversation was compacted
+        """
+        conversation = await self.aget(conversation_id)
+        if conversation is None or self.summarizer is None:
+            return False
+
+        with self._lock:
+            if not force and conversation.total_tokens <= self.max_tokens:
+                return False
+            split = self._split(conversation)
+            if not split:
+                return False
+            version = conversation.version
+            summary = conversation.summary
+            old = conversation.messages[:split]
+
+        # Summarize outside the lock, new messages may be added meanwhile
+        transcript = "\n".join(
+            f"{message.get('role', 'user')}: {_text(message)}" for message in old
+        )
+        user_message = (
+            f"Current summary:\n{summary or '(none)'}\n\nNew turns:\n{transcript}"
+        )
+        try:
+            result = await self.summarizer(
+                user_message=user_message,
+                system_prompt=self.summary_prompt,
+                sampling_paras=self.summary_paras,
+            )
+        except Exception as e:
+            error_explainer(e)
+            result = {"error": 500, "reason": str(e)}
+        if "error" in result or not result.get("response"):
+            self._count("compaction_failed")
+            return False
+
+        with self._lock:
+            # Messages were removed meanwhile, the summary no longer matches them
+            if conversation.version != version:
+                self._count("compaction_discarded")
+                return False
+            conversation.summary = result["response"].strip()
+            conversation.summary_tokens = self.token_counter(conversation.summary)
+            del conversation.messages[:split]
+            del conversation.tokens[:split]
+            conversation.compacted += split
+            conversation.version += 1
+            conversation.formatted.clear()
+            conversation.updated_at = time.time()
+            self._write(conversation_id, "save", conversation.to_dict())
+
+        await self._aflush()
+        self._count("compacted")
+        return True
+
+    async def wait(self) -> None:
+        """Waits for the compactions running in the background."""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Returns the state of the store, for metrics and health endpoints."""
+        with self._lock:
+            return {
+                "name": self.name,
+                "conversations": len(self._conversations),
+                "compacting": len(self._compacting),
+                "pending_writes": len(self._pending),
+                "tokens": sum(
+                    conversation.total_tokens
+                    for conversation in self._conversations.values()
+                ),
+            }
+
+    def _lookup(self, conversation_id: str) -> Optional[Conversation]:
+        """Returns a conversation kept in memory, if any"""
+        with self._lock:
+            conversation = self._conversations.get(conversation_id)
+            if conversation is not None:
+                self._conversations.move_to_end(conversation_id)
+            return conversation
+
+    def _loaded(
+        self, conversation_id: str, data: Optional[Dict[str, Any]]
+    ) -> Optional[Conversation]:
+        """Keeps a conversation loaded from the backend in memory"""
+        if data is None:
+            return None
+        self._count("loaded")
+        with self._lock:
+            # Another thread may have loaded it meanwhile
+            conversation = self._conversations.get(conversation_id)
+            if conversation is None:
+                conversation = Conversation.from_dict(data)
+                self._keep(conversation)
+            return conversation
+
+    def _counts(
+        self, messages: List[Dict[str, Any]], tokens: Optional[List[Optional[int]]]
+    ) -> List[int]:
+        """Token count of each message, counting the ones not given"""
+        tokens = tokens or [None] * len(messages)
+        return [
+            self.token_counter(_text(message)) if count is None else count
+            for message, count in zip(messages, tokens)
+        ]
+
+    def _add(
+        self,
+        conversation_id: str,
+        conversation: Optional[Conversation],
+        messages: List[Dict[str, Any]],
+        counts: List[int],
+    ) -> Tuple[Conversation, bool]:
+        """Adds messages to a conversation in memory and queues their backend write.
+
+        Returns the conversation, and whether it grew past `max_tokens`.
+        """
+        with self._lock:
+            if conversation is None:
+                conversation = self._conversations.get(conversation_id)
+            if conversation is None:
+                conversation = Conversation(conversation_id)
+                self._keep(conversation)
+            conversation.messages.extend(messages)
+            conversation.tokens.extend(counts)
+            conversation.formatted.clear()
+            conversation.updated_at = time.time()
+            over = conversation.total_tokens > self.max_tokens
+            if over and self.summarizer is None and self._truncate(conversation):
+                # Old messages were dropped, store the conversation again
+                self._write(conversation_id, "save", conversation.to_dict())
+            else:
+                # Only the new messages are written
+                self._write(
+                    conversation_id,
+                    "append",
+                    {
+                        "messages": list(messages),
+                        "tokens": counts,
+                        "updated_at": conversation.updated_at,
+                    },
+                )
+        return conversation, over
+
+    def _keep(self, conversation: Conversation) -> None:
+        """Adds a conversation to the LRU, evicting the least recently used ones. Call with the lock held"""
+        self._conversations[conversation.id] = conversation
+        self._conversations.move_to_end(conversation.id)
+        while len(self._conversations) > self.max_conversations:
+            self._conversations.popitem(last=False)
+            self._count("evicted")
+
+    def _split(self, conversation: Conversation) -> int:
+        """Number of old messages to compact, keeping the latest ones verbatim. Call with the lock held"""
+        kept, split = 0, len(conversation.messages)
+        while split > 0:
+            kept_messages = len(conversation.messages) - split
+            if (
+                kept_messages >= self.keep_messages
+                and kept + conversation.tokens[split - 1] > self.keep_tokens
+            ):
+                break
+            split -= 1
+            kept += conversation.tokens[split]
+        # Keep whole turns, the kept messages start with a user message
+        while (
+            split < len(conversation.messages)
+            and conversation.messages[split].get("role") != "user"
+        ):
+            split += 1
+        return split if split < len(conversation.messages) else 0
+
+    def _truncate(self, conversation: Conversation) -> bool:
+        """Drops the oldest turns of a conversation without a summarizer. Call with the lock held"""
+        split = self._split(conversation)
+        if not split:
+            return False
+        del conversation.messages[:split]
+        del conversation.tokens[:split]
+        conversation.compacted += split
+        conversation.version += 1
+        self._count("truncated")
+        return True
+
+    def _schedule(self, conversation_id: str) -> None:
+        """Compacts a conversation in a background task, if there is a running event loop"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        with self._lock:
+            if conversation_id in self._compacting:
+                return
+            self._compacting.add(conversation_id)
+        task = loop.create_task(self._compact_task(conversation_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _compact_task(self, conversation_id: str) -> None:
+        """Background compaction of a conversation"""
+        try:
+            # Messages added meanwhile may call for another round
+            while await self.compact(conversation_id):
+                pass
+        except Exception as e:
+            error_explainer(e)
+        finally:
+            with self._lock:
+                self._compacting.discard(conversation_id)
+
+    def _write(
+        self,
+        conversation_id: str,
+        operation: str,
+        data: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Queues a backend write (save, append or delete), if there is a backend. Call with the lock held"""
+        if self.backend is not None:
+            self._pending.append((conversation_id, operation, data))
+
+    def _flush(self) -> None:
+        """Makes the queued backend writes, in the order of the changes they hold"""
+        if self.backend is None:
+            return
+        with self._io_lock:
+            while True:
+                with self._lock:
+                    if not self._pending:
+                        return
+                    conversation_id, operation, data = self._pending.popleft()
+                try:
+                    if operation == "save":
+                        self.backend.save(conversation_id, data)
+                    elif operation == "append":
+                        self.backend.append(conversation_id, data)
+                    else:
+                        self.backend.delete(conversation_id)
+                except Exception as e:
+                    error_explainer(e)
+                    self._count("save_failed")
+
+    async def _aflush(self) -> None:
+        """Like `_flush`, in a thread"""
+        if self.backend is not None:
+            await asyncio.to_thread(self._flush)
+
+    def _count(self, event: str) -> None:
+        """Increments the memory event counter when metrics are enabled"""
+        sink = metrics.get_sink()
+        if sink:
+            sink.increment(
+                "orichain_memory_events_total",
+                1,
+                {"store": self.name, "event": event},
+            )
+
+    def __len__(self) -> int:
+        return len(self._conversations)
+
+    def __repr__(self) -> str:
+        return f"MemoryStore({self.name!r}, conversations={len(self)})"
+
+
+def _turn(user_message: Any, result: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Messages of a turn recorded from the result of a call"""
+    return [
+        {"role": "user", "content": user_message},
+        {"role": "assistant", "content": result.get("response") or ""},
+    ]
+
+
+def _text(message: Any) -> str:
+    """Text of a message, for counting its tokens and writing summaries"""
+    if not isinstance(message, dict):
+        return str(message)
+    content = message.get("content", "")
+    if not isinstance(content, str):
+        content = json.dumps(content, ensure_ascii=False, default=str)
+    # Tool calls and other provider fields are sent too
+    extra = {k: v for k, v in message.items() if k not in ("role", "content")}
+    if extra:
+        content += json.dumps(extra, ensure_ascii=False, default=str)
+    return content
+
+
+def _record(operation: str, data: Dict[str, Any]) -> str:
+    """One line of the log of a conversation, a save or an append"""
+    return json.dumps({operation: data}, ensure_ascii=False) + "\n"
+
+
+def _replay(
+    conversation_id: str, lines: List[Any], saved: Optional[Dict[str, Any]] = None
+) -> Optional[Dict[str, Any]]:
+    """Rebuilds a conversation from its log, skipping a line cut short by a crash"""
+    data = saved
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if "save" in record:
+            data = record["save"]
+        else:
+            data = _merge(data, conversation_id, record["append"])
+    return data
+
+
+def _merge(
+    stored: Optional[Dict[str, Any]], conversation_id: str, data: Dict[str, Any]
+) -> Dict[str, Any]:
+    """A stored conversation with new messages appended"""
+    stored = dict(stored) if stored else {"id": conversation_id}
+    stored["messages"] = (stored.get("messages") or []) + data["messages"]
+    stored["tokens"] = (stored.get("tokens") or []) + data["tokens"]
+    stored["updated_at"] = data.get("updated_at")
+    return stored
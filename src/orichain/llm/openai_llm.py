@@ -1,8 +1,25 @@
 import json
-from typing import Dict, List, Optional, Generator, AsyncGenerator
-from fastapi import Request
-
-from orichain import error_explainer
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncGenerator,
+    Dict,
+    Generator,
+    List,
+    Optional,
+)
+
+if TYPE_CHECKING:
+    from fastapi import Request
+
+from orichain import assets, error_explainer, pool, profiling
+from orichain.deadline import request_timeout
+from orichain.streaming import (
+    DisconnectWatcher,
+    aclose_stream,
+    close_stream,
+    stream_tracker,
+)
 
 
 class Generate(object):
@@ -14,14 +31,19 @@ class Generate(object):
     error handling, and proper request configuration.
     """
 
+    # Provider name in profiles and stream tracking
+    provider = "OpenAI"
+
     def __init__(self, **kwds) -> None:
         """
         Initialize OpenAI client and set up API key.
 
         Args:
             - api_key (str): OpenAI API key
+            - base_url (str, optional): Base URL of the API, e.g. of a proxy. Default is the OpenAI API
             - timeout (Timeout, optional): Request timeout parameter like connect, read, write. Default is 60.0, 5.0, 10.0, 2.0
             - max_retries (int, optional): Number of retries for the request. Default is 2
+            - response_hook (Callable, optional): Called with every HTTP response of the client, used by client pools to read the rate limit headers. Default: None
 
         Raises:
             - KeyError: If required parameters are not provided.
@@ -54,9 +76,12 @@ class Generate(object):
 
         self.client = OpenAI(
             api_key=kwds.get("api_key"),
+            base_url=kwds.get("base_url"),
             timeout=kwds.get("timeout")
             or Timeout(60.0, read=5.0, write=10.0, connect=2.0),
-            max_retries=kwds.get("max_retries") or 2,
+            max_retries=kwds.get("max_retries", 2),
+            # Watch the responses of the client if asked for
+            http_client=pool.http_client(kwds.get("response_hook")),
         )
         self.tiktoken = tiktoken
 
@@ -87,6 +112,9 @@ class Generate(object):
         Returns:
             Dict: Response from the model or error information
         """
+        # Time the phases when profiling is enabled
+        timer = profiling.start(self.provider, "call")
+
         try:
             # Format the chat history and user message
             messages = self._chat_formatter(
@@ -94,6 +122,7 @@ class Generate(object):
                 chat_hist=chat_hist,
                 system_prompt=system_prompt,
             )
+            timer.lap("format")
 
             # Return early if message formatting failed
             if isinstance(messages, Dict):
@@ -122,21 +151,22 @@ class Generate(object):
                         "reason": f"Invalid tool_choice '{tool_choice}' provided. It must be one of ['none', 'auto', 'required'] or match a tool name in the provided tools.",
                     }
 
+            timer.lap("prepare")
+
             # Call the OpenAI API with the formatted messages
             completion = self.client.chat.completions.create(
                 model=model_name,
                 messages=messages,
-                tools=tools,
-                tool_choice=tool_choice,
-                response_format={"type": "json_object"}
-                if do_json
-                else {"type": "text"},
+                **self._options(tools, tool_choice, do_json),
                 **sampling_paras,
             )
+            timer.lap("request")
 
             result = {
                 "response": completion.choices[0].message.content or "",
-                "metadata": {"usage": completion.usage.to_dict()},
+                "metadata": {
+                    "usage": completion.usage.to_dict() if completion.usage else {}
+                },
             }
 
             if tools:
@@ -156,11 +186,14 @@ class Generate(object):
                     )
                 result["tools"] = tool_calls
 
+            timer.lap("parse")
             return result
 
         except Exception as e:
             error_explainer(e)
             return {"error": 500, "reason": str(e)}
+        finally:
+            timer.finish()
 
     def streaming(
         self,
@@ -172,6 +205,7 @@ class Generate(object):
         tool_choice: Optional[str] = None,
         system_prompt: Optional[str] = None,
         do_json: Optional[bool] = False,
+        accumulate: Optional[bool] = True,
     ) -> Generator:
         """
         Stream responses from the specified model.
@@ -185,10 +219,17 @@ class Generate(object):
             - tools (List[Dict], optional): List of tools to be used by the model.
             - tool_choice (Optional[str], optional): Specifies if and which tool the model must call — "none" for no tools, "auto" for automatic, "required" for mandatory, or a specific tool's name.
             - do_json (bool, optional): Whether to format the response as JSON. Defaults to False
+            - accumulate (bool, optional): Whether to build the full response text for the final chunk. Defaults to True
 
         Yields:
             Generator: Chunks of the model's response or error information
         """
+        # Provider stream, always closed in the finally block
+        completion = None
+
+        # Time the phases when profiling is enabled
+        timer = profiling.start(self.provider, "stream")
+
         try:
             # Format the chat history and user message
             messages = self._chat_formatter(
@@ -196,6 +237,7 @@ class Generate(object):
                 chat_hist=chat_hist,
                 system_prompt=system_prompt,
             )
+            timer.lap("format")
 
             # Yield error and return early if message formatting failed
             if isinstance(messages, Dict):
@@ -224,31 +266,33 @@ class Generate(object):
                             f"Invalid tool_choice '{tool_choice}' provided. It must be one of ['none', 'auto', 'required'] or match a tool name in the provided tools."
                         )
 
+                timer.lap("prepare")
+
                 # Start the streaming session
                 completion = self.client.chat.completions.create(
                     model=model_name,
                     messages=messages,
                     stream=True,
-                    tools=tools,
-                    tool_choice=tool_choice,
-                    response_format={"type": "json_object"}
-                    if do_json
-                    else {"type": "text"},
-                    stream_options={"include_usage": True},
+                    **self._options(tools, tool_choice, do_json, stream=True),
                     **sampling_paras,
                 )
+                stream_tracker.track(completion, self.provider)
+                timer.lap("request")
 
-                response = ""
+                response_parts = []
                 usage = {}
                 tool_calls = []
                 tool_arg_buffer = ""
 
                 # Stream text chunks as they become available
-                for chunk in completion:
+                for chunk in timer.iterate(completion):
                     delta = chunk.choices[0].delta if chunk.choices else None
                     if delta and delta.content:
-                        response += delta.content
+                        if accumulate:
+                            response_parts.append(delta.content)
+                        timer.lap("parse")
                         yield delta.content
+                        timer.skip()
                     elif delta and delta.tool_calls:
                         tc = delta.tool_calls[0]
                         if tc.id:
@@ -266,18 +310,20 @@ class Generate(object):
                         usage = chunk.usage.to_dict()
 
                 # Format the final response with metadata
-                result = {
-                    "response": response,
-                    "metadata": {"usage": usage},
-                }
+                result = {"response": "".join(response_parts)} if accumulate else {}
+                result["metadata"] = {"usage": usage}
 
                 if tools:
                     result["tools"] = tool_calls
 
+                timer.lap("parse")
                 yield result
         except Exception as e:
             error_explainer(e)
             yield {"error": 500, "reason": str(e)}
+        finally:
+            timer.finish()
+            close_stream(completion)
 
     def _chat_formatter(
         self,
@@ -331,12 +377,29 @@ class Generate(object):
         Returns:
         int: Number of tokens"""
         if string and model_name:
-            encoding = self.tiktoken.encoding_for_model(model_name)
+            encoding = assets.encoding_for_model(model_name)
             num_tokens = len(encoding.encode(string))
             return num_tokens
         else:
             return 0
 
+    def _options(
+        self,
+        tools: Optional[List[Dict]],
+        tool_choice: Optional[Any],
+        do_json: Optional[bool],
+        stream: bool = False,
+    ) -> Dict:
+        """Tool, response format and stream options of a request"""
+        options = {
+            "tools": tools,
+            "tool_choice": tool_choice,
+            "response_format": {"type": "json_object"} if do_json else {"type": "text"},
+        }
+        if stream:
+            options["stream_options"] = {"include_usage": True}
+        return options
+
 
 class AsyncGenerate(object):
     """
@@ -347,14 +410,19 @@ class AsyncGenerate(object):
     error handling, and proper request configuration.
     """
 
+    # Provider name in profiles and stream tracking
+    provider = "OpenAI"
+
     def __init__(self, **kwds) -> None:
         """
         Initialize OpenAI client and set up API key.
 
         Args:
             - api_key (str): OpenAI API key
+            - base_url (str, optional): Base URL of the API, e.g. of a proxy. Default is the OpenAI API
             - timeout (Timeout, optional): Request timeout parameter like connect, read, write. Default is 60.0, 5.0, 10.0, 2.0
             - max_retries (int, optional): Number of retries for the request. Default is 2
+            - response_hook (Callable, optional): Called with every HTTP response of the client, used by client pools to read the rate limit headers. Default: None
 
         Raises:
             - KeyError: If required parameters are not provided.
@@ -387,9 +455,12 @@ class AsyncGenerate(object):
 
         self.client = AsyncOpenAI(
             api_key=kwds.get("api_key"),
+            base_url=kwds.get("base_url"),
             timeout=kwds.get("timeout")
             or Timeout(60.0, read=5.0, write=10.0, connect=2.0),
-            max_retries=kwds.get("max_retries") or 2,
+            max_retries=kwds.get("max_retries", 2),
+            # Watch the responses of the client if asked for
+            http_client=pool.http_client(kwds.get("response_hook"), asynchronous=True),
         )
         self.tiktoken = tiktoken
 
@@ -397,7 +468,7 @@ class AsyncGenerate(object):
         self,
         model_name: str,
         user_message: str,
-        request: Optional[Request] = None,
+        request: Optional["Request"] = None,
         chat_hist: Optional[List[str]] = None,
         sampling_paras: Optional[Dict] = None,
         tools: Optional[List[Dict]] = None,
@@ -422,6 +493,12 @@ class AsyncGenerate(object):
         Returns:
             Dict: Response from the model or error information
         """
+        # Shared background watcher for client disconnects
+        watcher = DisconnectWatcher.acquire(request)
+
+        # Time the phases when profiling is enabled
+        timer = profiling.start(self.provider, "call")
+
         try:
             # Format the chat history and user message
             messages = await self._chat_formatter(
@@ -429,6 +506,7 @@ class AsyncGenerate(object):
                 chat_hist=chat_hist,
                 system_prompt=system_prompt,
             )
+            timer.lap("format")
 
             # Return early if message formatting failed
             if isinstance(messages, Dict):
@@ -438,7 +516,7 @@ class AsyncGenerate(object):
             sampling_paras = sampling_paras or {}
 
             # Check if the request was disconnected
-            if request and await request.is_disconnected():
+            if watcher and watcher.disconnected:
                 return {"error": 400, "reason": "request aborted by user"}
 
             # Check if tools and tool_choice are provided and format them
@@ -461,21 +539,29 @@ class AsyncGenerate(object):
                         "reason": f"Invalid tool_choice '{tool_choice}' provided. It must be one of ['none', 'auto', 'required'] or match a tool name in the provided tools.",
                     }
 
+            timer.lap("prepare")
+
             # Call the OpenAI API with the formatted messages
-            completion = await self.client.chat.completions.create(
+            call = self.client.chat.completions.create(
                 model=model_name,
                 messages=messages,
-                tools=tools,
-                tool_choice=tool_choice,
-                response_format={"type": "json_object"}
-                if do_json
-                else {"type": "text"},
+                **self._options(tools, tool_choice, do_json),
                 **sampling_paras,
+                **request_timeout(self.client),
             )
 
+            # Cancel the in-flight call if the client disconnects meanwhile
+            completion = await watcher.run(call) if watcher else await call
+            if completion is None:
+                return {"error": 400, "reason": "request aborted by user"}
+
+            timer.lap("request")
+
             result = {
                 "response": completion.choices[0].message.content or "",
-                "metadata": {"usage": completion.usage.to_dict()},
+                "metadata": {
+                    "usage": completion.usage.to_dict() if completion.usage else {}
+                },
             }
 
             if tools:
@@ -495,23 +581,29 @@ class AsyncGenerate(object):
                     )
                 result["tools"] = tool_calls
 
+            timer.lap("parse")
             return result
 
         except Exception as e:
             error_explainer(e)
             return {"error": 500, "reason": str(e)}
+        finally:
+            timer.finish()
+            if watcher:
+                watcher.release()
 
     async def streaming(
         self,
         model_name: str,
         user_message: str,
-        request: Optional[Request] = None,
+        request: Optional["Request"] = None,
         chat_hist: Optional[List[str]] = None,
         sampling_paras: Optional[Dict] = None,
         tools: Optional[List[Dict]] = None,
         tool_choice: Optional[str] = None,
         system_prompt: Optional[str] = None,
         do_json: Optional[bool] = False,
+        accumulate: Optional[bool] = True,
     ) -> AsyncGenerator:
         """
         Stream responses from the specified model.
@@ -526,10 +618,20 @@ class AsyncGenerate(object):
             - tools (List[Dict], optional): List of tools to be used by the model.
             - tool_choice (Optional[str], optional): Specifies if and which tool the model must call — "none" for no tools, "auto" for automatic, "required" for mandatory, or a specific tool's name.
             - do_json (bool, optional): Whether to format the response as JSON. Defaults to False
+            - accumulate (bool, optional): Whether to build the full response text for the final chunk. Defaults to True
 
         Yields:
             AsyncGenerator: Chunks of the model's response or error information
         """
+        # Shared background watcher for client disconnects
+        watcher = DisconnectWatcher.acquire(request)
+
+        # Provider stream, always closed in the finally block
+        completion = None
+
+        # Time the phases when profiling is enabled
+        timer = profiling.start(self.provider, "stream")
+
         try:
             # Format the chat history and user message
             messages = await self._chat_formatter(
@@ -537,6 +639,7 @@ class AsyncGenerate(object):
                 chat_hist=chat_hist,
                 system_prompt=system_prompt,
             )
+            timer.lap("format")
 
             # Yield error and return early if message formatting failed
             if isinstance(messages, Dict):
@@ -565,36 +668,43 @@ class AsyncGenerate(object):
                             f"Invalid tool_choice '{tool_choice}' provided. It must be one of ['none', 'auto', 'required'] or match a tool name in the provided tools."
                         )
 
+                timer.lap("prepare")
+
                 # Start the streaming session
                 completion = await self.client.chat.completions.create(
                     model=model_name,
                     messages=messages,
                     stream=True,
-                    tools=tools,
-                    tool_choice=tool_choice,
-                    response_format={"type": "json_object"}
-                    if do_json
-                    else {"type": "text"},
-                    stream_options={"include_usage": True},
+                    **self._options(tools, tool_choice, do_json, stream=True),
                     **sampling_paras,
+                    **request_timeout(self.client),
                 )
+                stream_tracker.track(completion, self.provider)
+                timer.lap("request")
 
-                response = ""
+                # Close the stream right away if the client disconnects
+                if watcher:
+                    watcher.register(completion.close)
+
+                response_parts = []
                 usage = {}
                 tool_calls = []
                 tool_arg_buffer = ""
 
                 # Stream text chunks as they become available
-                async for chunk in completion:
-                    if request and await request.is_disconnected():
+                async for chunk in timer.aiterate(completion):
+                    if watcher and watcher.disconnected:
                         yield {"error": 400, "reason": "request aborted by user"}
                         await completion.close()
                         break
                     else:
                         delta = chunk.choices[0].delta if chunk.choices else None
                         if delta and delta.content:
-                            response += delta.content
+                            if accumulate:
+                                response_parts.append(delta.content)
+                            timer.lap("parse")
                             yield delta.content
+                            timer.skip()
                         elif delta and delta.tool_calls:
                             tc = delta.tool_calls[0]
                             if tc.id:
@@ -612,18 +722,25 @@ class AsyncGenerate(object):
                             usage = chunk.usage.to_dict()
 
                 # Format the final response with metadata
-                result = {
-                    "response": response,
-                    "metadata": {"usage": usage},
-                }
+                result = {"response": "".join(response_parts)} if accumulate else {}
+                result["metadata"] = {"usage": usage}
 
                 if tools:
                     result["tools"] = tool_calls
 
+                timer.lap("parse")
                 yield result
         except Exception as e:
-            error_explainer(e)
-            yield {"error": 500, "reason": str(e)}
+            if watcher and watcher.disconnected:
+                yield {"error": 400, "reason": "request aborted by user"}
+            else:
+                error_explainer(e)
+                yield {"error": 500, "reason": str(e)}
+        finally:
+            timer.finish()
+            await aclose_stream(completion)
+            if watcher:
+                watcher.release()
 
     async def _chat_formatter(
         self,
@@ -677,8 +794,25 @@ class AsyncGenerate(object):
         Returns:
         int: Number of tokens"""
         if string and model_name:
-            encoding = self.tiktoken.encoding_for_model(model_name)
+            encoding = assets.encoding_for_model(model_name)
             num_tokens = len(encoding.encode(string))
             return num_tokens
         else:
             return 0
+
+    def _options(
+        self,
+        tools: Optional[List[Dict]],
+        tool_choice: Optional[Any],
+        do_json: Optional[bool],
+        stream: bool = False,
+    ) -> Dict:
+        """Tool, response format and stream options of a request"""
+        options = {
+            "tools": tools,
+            "tool_choice": tool_choice,
+            "response_format": {"type": "json_object"} if do_json else {"type": "text"},
+        }
+        if stream:
+            options["stream_options"] = {"include_usage": True}
+        return options
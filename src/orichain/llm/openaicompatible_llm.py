@@ -0,0 +1,181 @@
+from typing import Any, Dict, List, Optional
+
+from orichain import assets
+from orichain.llm import openai_llm
+
+
+class Generate(openai_llm.Generate):
+    """
+    Synchronous wrapper for an OpenAI compatible inference server (vLLM, Ollama, llama.cpp
+    server, TGI, LM Studio, ...).
+
+    This class provides methods for generating responses from self-hosted models
+    both in streaming and non-streaming modes, with the chat completions API of
+    `openai_llm.Generate`. Only the request fields that every server understands
+    are sent: tools, tool_choice and response_format are left out unless they are used.
+    """
+
+    # Provider name in profiles and stream tracking
+    provider = "OpenAICompatible"
+
+    def __init__(self, **kwds) -> None:
+        """
+        Initialize the OpenAI client for the server.
+
+        Args:
+            - base_url (str): Base URL of the server's OpenAI API, e.g. http://localhost:8000/v1
+            - api_key (str, optional): API key of the server, if it checks one. Default is "EMPTY"
+            - models (List[str], optional): Models served by the server, see `list_models` to discover them
+            - stream_usage (bool, optional): Ask for the token usage at the end of streams, turn off for servers that reject `stream_options`. Default is True
+            - timeout (Timeout, optional): Request timeout parameter like connect, read, write. Default is 60.0, 5.0, 10.0, 2.0
+            - max_retries (int, optional): Number of retries for the request. Default is 2
+            - response_hook (Callable, optional): Called with every HTTP response of the client, used by client pools. Default: None
+
+        Raises:
+            - KeyError: If required parameters are not provided.
+            - TypeError: If an invalid type is provided for a parameter
+        """
+        # Validate input parameters
+        if not kwds.get("base_url"):
+            raise KeyError("Required `base_url` not found")
+
+        # Servers that do not check keys still need one for the OpenAI client
+        super().__init__(**{**kwds, "api_key": kwds.get("api_key") or "EMPTY"})
+        self.models = kwds.get("models")
+        self.stream_usage = kwds.get("stream_usage", True)
+
+    def num_tokens_from_string(
+        self, model_name: str = "gpt-3.5-turbo", string: str = None
+    ) -> int:
+        """Returns the number of tokens in a text string.
+
+        Args:
+        model_name (str): The tiktoken tokenizer for specifed model name
+        string (str): String to calculate the tokens for
+
+        Returns:
+        int: Number of tokens, estimated with the gpt-4o tokenizer for models tiktoken does not know
+        """
+        return _num_tokens(model_name, string)
+
+    def list_models(self) -> List[str]:
+        """Lists the models the server serves, from its `/models` endpoint.
+
+        Returns:
+            List[str]: Model names to pass as `model_name`
+        """
+        return [model.id for model in self.client.models.list()]
+
+    def _options(
+        self,
+        tools: Optional[List[Dict]],
+        tool_choice: Optional[Any],
+        do_json: Optional[bool],
+        stream: bool = False,
+    ) -> Dict:
+        """Optional request fields, only sent when used"""
+        return _options(tools, tool_choice, do_json, stream and self.stream_usage)
+
+
+class AsyncGenerate(openai_llm.AsyncGenerate):
+    """
+    Asynchronous wrapper for an OpenAI compatible inference server (vLLM, Ollama, llama.cpp
+    server, TGI, LM Studio, ...).
+
+    This class provides methods for generating responses from self-hosted models
+    both in streaming and non-streaming modes, with the chat completions API of
+    `openai_llm.AsyncGenerate`. Only the request fields that every server understands
+    are sent: tools, tool_choice and response_format are left out unless they are used.
+    """
+
+    # Provider name in profiles and stream tracking
+    provider = "OpenAICompatible"
+
+    def __init__(self, **kwds) -> None:
+        """
+        Initialize the OpenAI client for the server.
+
+        Args:
+            - base_url (str): Base URL of the server's OpenAI API, e.g. http://localhost:8000/v1
+            - api_key (str, optional): API key of the server, if it checks one. Default is "EMPTY"
+            - models (List[str], optional): Models served by the server, see `list_models` to discover them
+            - stream_usage (bool, optional): Ask for the token usage at the end of streams, turn off for servers that reject `stream_options`. Default is True
+            - timeout (Timeout, optional): Request timeout parameter like connect, read, write. Default is 60.0, 5.0, 10.0, 2.0
+            - max_retries (int, optional): Number of retries for the request. Default is 2
+            - response_hook (Callable, optional): Called with every HTTP response of the client, used by client pools. Default: None
+
+        Raises:
+            - KeyError: If required parameters are not provided.
+            - TypeError: If an invalid type is provided for a parameter
+        """
+        # Validate input parameters
+        if not kwds.get("base_url"):
+            raise KeyError("Required `base_url` not found")
+
+        # Servers that do not check keys still need one for the OpenAI client
+        super().__init__(**{**kwds, "api_key": kwds.get("api_key") or "EMPTY"})
+        self.models = kwds.get("models")
+        self.stream_usage = kwds.get("stream_usage", True)
+
+    async def num_tokens_from_string(
+        self, model_name: str = "gpt-3.5-turbo", string: str = None
+    ) -> int:
+        """Returns the number of tokens in a text string.
+
+        Args:
+        model_name (str): The tiktoken tokenizer for specifed model name
+        string (str): String to calculate the tokens for
+
+        Returns:
+        int: Number of tokens, estimated with the gpt-4o tokenizer for models tiktoken does not know
+        """
+        return _num_tokens(model_name, string)
+
+    async def list_models(self) -> List[str]:
+        """Lists the models the server serves, from its `/models` endpoint.
+
+        Returns:
+            List[str]: Model names to pass as `model_name`
+        """
+        return [model.id async for model in self.client.models.list()]
+
+    def _options(
+        self,
+        tools: Optional[List[Dict]],
+        tool_choice: Optional[Any],
+        do_json: Optional[bool],
+        stream: bool = False,
+    ) -> Dict:
+        """Optional request fields, only sent when used"""
+        return _options(tools, tool_choice, do_json, stream and self.stream_usage)
+
+
+def _num_tokens(model_name: str, string: Optional[str]) -> int:
+    """Tokens of a string, with the gpt-4o tokenizer for self-hosted models"""
+    if not (string and model_name):
+        return 0
+    try:
+        encoding = assets.encoding_for_model(model_name)
+    except KeyError:
+        # Self-hosted models bring their own tokenizer
+        encoding = assets.encoding_for_model("gpt-4o")
+    return len(encoding.encode(string))
+
+
+def _options(
+    tools: Optional[List[Dict]],
+    tool_choice: Optional[Any],
+    do_json: Optional[bool],
+    stream_usage: bool,
+) -> Dict:
+    """Request fields that not every server understands, only sent when used"""
+    options = {}
+    if tools:
+        options["tools"] = tools
+        if tool_choice:
+            options["tool_choice"] = tool_choice
+    if do_json:
+        options["response_format"] = {"type": "json_object"}
+    if stream_usage:
+        options["stream_options"] = {"include_usage": True}
+    return options
@@ -0,0 +1,761 @@
+import json
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncGenerator,
+    Dict,
+    Generator,
+    List,
+    Optional,
+)
+
+if TYPE_CHECKING:
+    from fastapi import Request
+
+from orichain import assets, error_explainer, pool, profiling
+from orichain.llm import conversations
+from orichain.deadline import request_timeout
+from orichain.streaming import (
+    DisconnectWatcher,
+    aclose_stream,
+    close_stream,
+    stream_tracker,
+)
+
+# Chat completions sampling parameters named differently by the Responses API
+_RENAMED_PARAMETERS = {
+    "max_tokens": "max_output_tokens",
+    "max_completion_tokens": "max_output_tokens",
+}
+
+
+class Generate(object):
+    """
+    Synchronous wrapper for the Responses API of OpenAI and Azure OpenAI.
+
+    Calls made with a `conversation_id` are stored on the server and the next turn of the
+    conversation continues from them with `previous_response_id`, sending only the new messages
+    instead of the whole chat history. The full history is sent again when the server no longer
+    has the conversation.
+    """
+
+    def __init__(self, **kwds: Any) -> None:
+        """
+        Initialize the OpenAI or Azure OpenAI client.
+
+        Args:
+            - api_key (str): OpenAI or Azure OpenAI API key
+            - azure_endpoint (str, optional): Azure OpenAI endpoint, an Azure OpenAI client is used when given
+            - api_version (str, optional): Azure OpenAI API version, 2025-03-01-preview or later. Required with azure_endpoint
+            - conversation_store (ConversationStore or Dict, optional): Store of the conversation states, or settings of the shared store. Default: the shared store of the provider
+            - timeout (Timeout, optional): Request timeout parameter like connect, read, write. Default is 60.0, 5.0, 10.0, 2.0
+            - max_retries (int, optional): Number of retries for the request. Default is 2
+            - response_hook (Callable, optional): Called with every HTTP response of the client. Default: None
+
+        Raises:
+            - KeyError: If required parameters are not provided.
+            - TypeError: If an invalid type is provided for a parameter
+        """
+        self.provider = (
+            "AzureOpenAIResponses" if kwds.get("azure_endpoint") else "OpenAIResponses"
+        )
+        self.client = _client(kwds, asynchronous=False)
+        self.conversations = conversations.resolve_store(
+            kwds.get("conversation_store"), f"llm:{self.provider}"
+        )
+
+    def __call__(
+        self,
+        model_name: str,
+        user_message: str,
+        chat_hist: Optional[List[Dict]] = None,
+        sampling_paras: Optional[Dict] = None,
+        tools: Optional[List[Dict]] = None,
+        tool_choice: Optional[str] = None,
+        system_prompt: Optional[str] = None,
+        do_json: Optional[bool] = False,
+        conversation_id: Optional[str] = None,
+    ) -> Dict:
+        """
+        Generate a response from the specified model.
+
+        Args:
+            - model_name (str): Name of the model, or of the Azure deployment, to use
+            - user_message (str): The user's message
+            - system_prompt (Optional[str], optional): System prompt to provide context to the model, sent with every turn
+            - chat_hist (Optional[List[Dict]], optional): Previous conversation history, in the chat completions format
+            - sampling_paras (Optional[Dict], optional): Parameters for controlling the model's generation
+            - tools (List[Dict], optional): List of tools to be used by the model.
+            - tool_choice (Optional[str], optional): Specifies if and which tool the model must call — "none" for no tools, "auto" for automatic, "required" for mandatory, or a specific tool's name.
+            - do_json (bool, optional): Whether to format the response as JSON. Defaults to False
+            - conversation_id (Optional[str], optional): ID of the conversation, continues it on the server when its previous turn is known. Defaults to None
+
+        Returns:
+            Dict: Response from the model or error information
+        """
+        # Time the phases when profiling is enabled
+        timer = profiling.start(self.provider, "call")
+
+        try:
+            # Only send the history the server does not have yet
+            previous, history = self.conversations.resume(conversation_id, chat_hist)
+            timer.lap("format")
+
+            if _invalid_tool_choice(tool_choice, tools):
+                return {
+                    "error": 400,
+                    "reason": f"Invalid tool_choice '{tool_choice}' provided. It must be one of ['none', 'auto', 'required'] or match a tool name in the provided tools.",
+                }
+            options = _options(
+                model_name,
+                sampling_paras,
+                tools,
+                tool_choice,
+                system_prompt,
+                do_json,
+                conversation_id,
+            )
+            timer.lap("prepare")
+
+            # Call the Responses API, resending the history if the server lost it
+            try:
+                response = self.client.responses.create(
+                    **_request(options, previous, history, user_message)
+                )
+            except Exception as e:
+                if not previous or not _expired(e):
+                    raise
+                self.conversations.expire(conversation_id)
+                previous = None
+                response = self.client.responses.create(
+                    **_request(options, None, chat_hist, user_message)
+                )
+            timer.lap("request")
+
+            self.conversations.save(conversation_id, response.id, chat_hist)
+            result = _result(response, previous, tools)
+
+            timer.lap("parse")
+            return result
+
+        except Exception as e:
+            error_explainer(e)
+            return {"error": 500, "reason": str(e)}
+        finally:
+            timer.finish()
+
+    def streaming(
+        self,
+        model_name: str,
+        user_message: str,
+        chat_hist: Optional[List[Dict]] = None,
+        sampling_paras: Optional[Dict] = None,
+        tools: Optional[List[Dict]] = None,
+        tool_choice: Optional[str] = None,
+        system_prompt: Optional[str] = None,
+        do_json: Optional[bool] = False,
+        accumulate: Optional[bool] = True,
+        conversation_id: Optional[str] = None,
+    ) -> Generator:
+        """
+        Stream responses from the specified model.
+
+        Args:
+            - model_name (str): Name of the model, or of the Azure deployment, to use
+            - user_message (str): The user's message
+            - system_prompt (Optional[str], optional): System prompt to provide context to the model, sent with every turn
+            - chat_hist (Optional[List[Dict]], optional): Previous conversation history, in the chat completions format
+            - sampling_paras (Optional[Dict], optional): Parameters for controlling the model's generation
+            - tools (List[Dict], optional): List of tools to be used by the model.
+            - tool_choice (Optional[str], optional): Specifies if and which tool the model must call — "none" for no tools, "auto" for automatic, "required" for mandatory, or a specific tool's name.
+            - do_json (bool, optional): Whether to format the response as JSON. Defaults to False
+            - accumulate (bool, optional): Whether to build the full response text for the final chunk. Defaults to True
+            - conversation_id (Optional[str], optional): ID of the conversation, continues it on the server when its previous turn is known. Defaults to None
+
+        Yields:
+            Generator: Chunks of the model's response or error information
+        """
+        # Provider stream, always closed in the finally block
+        stream = None
+
+        # Time the phases when profiling is enabled
+        timer = profiling.start(self.provider, "stream")
+
+        try:
+            # Only send the history the server does not have yet
+            previous, history = self.conversations.resume(conversation_id, chat_hist)
+            timer.lap("format")
+
+            if _invalid_tool_choice(tool_choice, tools):
+                raise ValueError(
+                    f"Invalid tool_choice '{tool_choice}' provided. It must be one of ['none', 'auto', 'required'] or match a tool name in the provided tools."
+                )
+            options = _options(
+                model_name,
+                sampling_paras,
+                tools,
+                tool_choice,
+                system_prompt,
+                do_json,
+                conversation_id,
+            )
+            timer.lap("prepare")
+
+            # Start the streaming session, resending the history if the server lost it
+            try:
+                stream = self.client.responses.create(
+                    stream=True, **_request(options, previous, history, user_message)
+                )
+            except Exception as e:
+                if not previous or not _expired(e):
+                    raise
+                self.conversations.expire(conversation_id)
+                previous = None
+                stream = self.client.responses.create(
+                    stream=True, **_request(options, None, chat_hist, user_message)
+                )
+            stream_tracker.track(stream, self.provider)
+            timer.lap("request")
+
+            response_parts = []
+            tool_calls = []
+            response = None
+
+            # Stream text chunks as they become available
+            for event in timer.iterate(stream):
+                if event.type == "response.output_text.delta":
+                    if accumulate:
+                        response_parts.append(event.delta)
+                    timer.lap("parse")
+                    yield event.delta
+                    timer.skip()
+                elif event.type == "response.output_item.done":
+                    if event.item.type == "function_call":
+                        tool_calls.append(_tool_call(event.item))
+                elif event.type in ("response.completed", "response.incomplete"):
+                    response = event.response
+                elif event.type in ("response.failed", "error"):
+                    raise RuntimeError(_event_error(event))
+
+            if response is not None:
+                self.conversations.save(conversation_id, response.id, chat_hist)
+
+            # Format the final response with metadata
+            result = {"response": "".join(response_parts)} if accumulate else {}
+            result["metadata"] = _metadata(response, previous)
+
+            if tools:
+                result["tools"] = tool_calls
+
+            timer.lap("parse")
+            yield result
+        except Exception as e:
+            error_explainer(e)
+            yield {"error": 500, "reason": str(e)}
+        finally:
+            timer.finish()
+            close_stream(stream)
+
+    def num_tokens_from_string(
+        self, model_name: str = "gpt-4o", string: str = None
+    ) -> int:
+        """Returns the number of tokens in a text string.
+
+        Args:
+        model_name (str): The tiktoken tokenizer for specifed model name
+        string (str): String to calculate the tokens for
+
+        Returns:
+        int: Number of tokens"""
+        if string and model_name:
+            encoding = assets.encoding_for_model(model_name)
+            num_tokens = len(encoding.encode(string))
+            return num_tokens
+        else:
+            return 0
+
+
+class AsyncGenerate(object):
+    """
+    Asynchronous wrapper for the Responses API of OpenAI and Azure OpenAI.
+
+    Calls made with a `conversation_id` are stored on the server and the next turn of the
+    conversation continues from them with `previous_response_id`, sending only the new messages
+    instead of the whole chat history. The full history is sent again when the server no longer
+    has the conversation.
+    """
+
+    def __init__(self, **kwds: Any) -> None:
+        """
+        Initialize the OpenAI or Azure OpenAI client.
+
+        Args:
+            - api_key (str): OpenAI or Azure OpenAI API key
+            - azure_endpoint (str, optional): Azure OpenAI endpoint, an Azure OpenAI client is used when given
+            - api_version (str, optional): Azure OpenAI API version, 2025-03-01-preview or later. Required with azure_endpoint
+            - conversation_store (ConversationStore or Dict, optional): Store of the conversation states, or settings of the shared store. Default: the shared store of the provider
+            - timeout (Timeout, optional): Request timeout parameter like connect, read, write. Default is 60.0, 5.0, 10.0, 2.0
+            - max_retries (int, optional): Number of retries for the request. Default is 2
+            - response_hook (Callable, optional): Called with every HTTP response of the client. Default: None
+
+        Raises:
+            - KeyError: If required parameters are not provided.
+            - TypeError: If an invalid type is provided for a parameter
+        """
+        self.provider = (
+            "AzureOpenAIResponses" if kwds.get("azure_endpoint") else "OpenAIResponses"
+        )
+        self.client = _client(kwds, asynchronous=True)
+        self.conversations = conversations.resolve_store(
+            kwds.get("conversation_store"), f"llm:{self.provider}"
+        )
+
+    async def __call__(
+        self,
+        model_name: str,
+        user_message: str,
+        request: Optional["Request"] = None,
+        chat_hist: Optional[List[Dict]] = None,
+        sampling_paras: Optional[Dict] = None,
+        tools: Optional[List[Dict]] = None,
+        tool_choice: Optional[str] = None,
+        system_prompt: Optional[str] = None,
+        do_json: Optional[bool] = False,
+        conversation_id: Optional[str] = None,
+    ) -> Dict:
+        """
+        Generate a response from the specified model.
+
+        Args:
+            - model_name (str): Name of the model, or of the Azure deployment, to use
+            - user_message (str): The user's message
+            - system_prompt (Optional[str], optional): System prompt to provide context to the model, sent with every turn
+            - request (Optional[Request], optional): FastAPI request object for connection tracking
+            - chat_hist (Optional[List[Dict]], optional): Previous conversation history, in the chat completions format
+            - sampling_paras (Optional[Dict], optional): Parameters for controlling the model's generation
+            - tools (List[Dict], optional): List of tools to be used by the model.
+            - tool_choice (Optional[str], optional): Specifies if and which tool the model must call — "none" for no tools, "auto" for automatic, "required" for mandatory, or a specific tool's name.
+            - do_json (bool, optional): Whether to format the response as JSON. Defaults to False
+            - conversation_id (Optional[str], optional): ID of the conversation, continues it on the server when its previous turn is known. Defaults to None
+
+        Returns:
+            Dict: Response from the model or error information
+        """
+        # Shared background watcher for client disconnects
+        watcher = DisconnectWatcher.acquire(request)
+
+        # Time the phases when profiling is enabled
+        timer = profiling.start(self.provider, "call")
+
+        try:
+            # Only send the history the server does not have yet
+            previous, history = self.conversations.resume(conversation_id, chat_hist)
+            timer.lap("format")
+
+            # Check if the request was disconnected
+            if watcher and watcher.disconnected:
+                return {"error": 400, "reason": "request aborted by user"}
+
+            if _invalid_tool_choice(tool_choice, tools):
+                return {
+                    "error": 400,
+                    "reason": f"Invalid tool_choice '{tool_choice}' provided. It must be one of ['none', 'auto', 'required'] or match a tool name in the provided tools.",
+                }
+            options = _options(
+                model_name,
+                sampling_paras,
+                tools,
+                tool_choice,
+                system_prompt,
+                do_json,
+                conversation_id,
+            )
+            timer.lap("prepare")
+
+            # Call the Responses API, resending the history if the server lost it
+            try:
+                call = self.client.responses.create(
+                    **_request(options, previous, history, user_message),
+                    **request_timeout(self.client),
+                )
+                # Cancel the in-flight call if the client disconnects meanwhile
+                response = await watcher.run(call) if watcher else await call
+            except Exception as e:
+                if not previous or not _expired(e):
+                    raise
+                self.conversations.expire(conversation_id)
+                previous = None
+                call = self.client.responses.create(
+                    **_request(options, None, chat_hist, user_message),
+                    **request_timeout(self.client),
+                )
+                response = await watcher.run(call) if watcher else await call
+            if response is None:
+                return {"error": 400, "reason": "request aborted by user"}
+            timer.lap("request")
+
+            self.conversations.save(conversation_id, response.id, chat_hist)
+            result = _result(response, previous, tools)
+
+            timer.lap("parse")
+            return result
+
+        except Exception as e:
+            error_explainer(e)
+            return {"error": 500, "reason": str(e)}
+        finally:
+            timer.finish()
+            if watcher:
+                watcher.release()
+
+    async def streaming(
+        self,
+        model_name: str,
+        user_message: str,
+        request: Optional["Request"] = None,
+        chat_hist: Optional[List[Dict]] = None,
+        sampling_paras: Optional[Dict] = None,
+        tools: Optional[List[Dict]] = None,
+        tool_choice: Optional[str] = None,
+        system_prompt: Optional[str] = None,
+        do_json: Optional[bool] = False,
+        accumulate: Optional[bool] = True,
+        conversation_id: Optional[str] = None,
+    ) -> AsyncGenerator:
+        """
+        Stream responses from the specified model.
+
+        Args:
+            - model_name (str): Name of the model, or of the Azure deployment, to use
+            - user_message (str): The user's message
+            - system_prompt (Optional[str], optional): System prompt to provide context to the model, sent with every turn
+            - request (Optional[Request], optional): FastAPI request object for connection tracking
+            - chat_hist (Optional[List[Dict]], optional): Previous conversation history, in the chat completions format
+            - sampling_paras (Optional[Dict], optional): Parameters for controlling the model's generation
+            - tools (List[Dict], optional): List of tools to be used by the model.
+            - tool_choice (Optional[str], optional): Specifies if and which tool the model must call — "none" for no tools, "auto" for automatic, "required" for mandatory, or a specific tool's name.
+            - do_json (bool, optional): Whether to format the response as JSON. Defaults to False
+            - accumulate (bool, optional): Whether to build the full response text for the final chunk. Defaults to True
+            - conversation_id (Optional[str], optional): ID of the conversation, continues it on the server when its previous turn is known. Defaults to None
+
+        Yields:
+            AsyncGenerator: Chunks of the model's response or error information
+        """
+        # Shared background watcher for client disconnects
+        watcher = DisconnectWatcher.acquire(request)
+
+        # Provider stream, always closed in the finally block
+        stream = None
+
+        # Time the phases when profiling is enabled
+        timer = profiling.start(self.provider, "stream")
+
+        try:
+            # Only send the history the server does not have yet
+            previous, history = self.conversations.resume(conversation_id, chat_hist)
+            timer.lap("format")
+
+            if _invalid_tool_choice(tool_choice, tools):
+                raise ValueError(
+                    f"Invalid tool_choice '{tool_choice}' provided. It must be one of ['none', 'auto', 'required'] or match a tool name in the provided tools."
+                )
+            options = _options(
+                model_name,
+                sampling_paras,
+                tools,
+                tool_choice,
+                system_prompt,
+                do_json,
+                conversation_id,
+            )
+            timer.lap("prepare")
+
+            # Start the streaming session, resending the history if the server lost it
+            try:
+                stream = await self.client.responses.create(
+                    stream=True,
+                    **_request(options, previous, history, user_message),
+                    **request_timeout(self.client),
+                )
+            except Exception as e:
+                if not previous or not _expired(e):
+                    raise
+                self.conversations.expire(conversation_id)
+                previous = None
+                stream = await self.client.responses.create(
+                    stream=True,
+                    **_request(options, None, chat_hist, user_message),
+                    **request_timeout(self.client),
+                )
+            stream_tracker.track(stream, self.provider)
+            timer.lap("request")
+
+            # Close the stream right away if the client disconnects
+            if watcher:
+                watcher.register(stream.close)
+
+            response_parts = []
+            tool_calls = []
+            response = None
+
+            # Stream text chunks as they become available
+            async for event in timer.aiterate(stream):
+                if watcher and watcher.disconnected:
+                    yield {"error": 400, "reason": "request aborted by user"}
+                    await stream.close()
+                    return
+                if event.type == "response.output_text.delta":
+                    if accumulate:
+                        response_parts.append(event.delta)
+                    timer.lap("parse")
+                    yield event.delta
+                    timer.skip()
+                elif event.type == "response.output_item.done":
+                    if event.item.type == "function_call":
+                        tool_calls.append(_tool_call(event.item))
+                elif event.type in ("response.completed", "response.incomplete"):
+                    response = event.response
+                elif event.type in ("response.failed", "error"):
+                    raise RuntimeError(_event_error(event))
+
+            if response is not None:
+                self.conversations.save(conversation_id, response.id, chat_hist)
+
+            # Format the final response with metadata
+            result = {"response": "".join(response_parts)} if accumulate else {}
+            result["metadata"] = _metadata(response, previous)
+
+            if tools:
+                result["tools"] = tool_calls
+
+            timer.lap("parse")
+            yield result
+        except Exception as e:
+            if watcher and watcher.disconnected:
+                yield {"error": 400, "reason": "request aborted by user"}
+            else:
+                error_explainer(e)
+                yield {"error": 500, "reason": str(e)}
+        finally:
+            timer.finish()
+            await aclose_stream(stream)
+            if watcher:
+                watcher.release()
+
+    async def num_tokens_from_string(
+        self, model_name: str = "gpt-4o", string: str = None
+    ) -> int:
+        """Returns the number of tokens in a text string.
+
+        Args:
+        model_name (str): The tiktoken tokenizer for specifed model name
+        string (str): String to calculate the tokens for
+
+        Returns:
+        int: Number of tokens"""
+        if string and model_name:
+            encoding = assets.encoding_for_model(model_name)
+            num_tokens = len(encoding.encode(string))
+            return num_tokens
+        else:
+            return 0
+
+
+def _client(kwds: Dict[str, Any], asynchronous: bool) -> Any:
+    """Validates the client arguments and creates the OpenAI or Azure OpenAI client"""
+    from httpx import Timeout
+
+    # Validate input parameters
+    if not kwds.get("api_key"):
+        raise KeyError("Required `api_key` not found")
+    elif kwds.get("azure_endpoint") and not kwds.get("api_version"):
+        raise KeyError("Required `api_version` not found")
+    elif kwds.get("timeout") and not isinstance(kwds.get("timeout"), Timeout):
+        raise TypeError(
+            "Invalid 'timeout' type detected:",
+            type(kwds.get("timeout")),
+            ", Please enter valid timeout using:\n'from httpx import Timeout'",
+        )
+    elif kwds.get("max_retries") and not isinstance(kwds.get("max_retries"), int):
+        raise TypeError(
+            "Invalid 'max_retries' type detected:,",
+            type(kwds.get("max_retries")),
+            ", Please enter a value that is 'int'",
+        )
+    else:
+        pass
+
+    # Watch the responses of the client if asked for
+    http_client = pool.http_client(kwds.get("response_hook"), asynchronous)
+
+    arguments = {
+        "api_key": kwds.get("api_key"),
+        "timeout": kwds.get("timeout")
+        or Timeout(60.0, read=5.0, write=10.0, connect=2.0),
+        "max_retries": kwds.get("max_retries", 2),
+        "http_client": http_client,
+    }
+
+    # Initialize the OpenAI or Azure OpenAI client with provided parameters
+    if kwds.get("azure_endpoint"):
+        from openai import AsyncAzureOpenAI, AzureOpenAI
+
+        client = AsyncAzureOpenAI if asynchronous else AzureOpenAI
+        return client(
+            azure_endpoint=kwds.get("azure_endpoint"),
+            api_version=kwds.get("api_version"),
+            **arguments,
+        )
+
+    from openai import AsyncOpenAI, OpenAI
+
+    client = AsyncOpenAI if asynchronous else OpenAI
+    return client(**arguments)
+
+
+def _options(
+    model_name: str,
+    sampling_paras: Optional[Dict],
+    tools: Optional[List[Dict]],
+    tool_choice: Optional[str],
+    system_prompt: Optional[str],
+    do_json: Optional[bool],
+    conversation_id: Optional[str],
+) -> Dict[str, Any]:
+    """Arguments of a Responses API call other than its input"""
+    options = {
+        _RENAMED_PARAMETERS.get(key, key): value
+        for key, value in (sampling_paras or {}).items()
+    }
+    options["model"] = model_name
+
+    # Only conversations need their responses kept on the server
+    options.setdefault("store", bool(conversation_id))
+
+    # Instructions are not carried over from the previous response, send them every turn
+    if system_prompt:
+        options["instructions"] = system_prompt
+    if do_json:
+        options["text"] = {"format": {"type": "json_object"}}
+    if tools:
+        options["tools"] = [{"type": "function", **tool} for tool in tools]
+        if tool_choice in ("none", "auto", "required"):
+            options["tool_choice"] = tool_choice
+        elif tool_choice:
+            options["tool_choice"] = {"type": "function", "name": tool_choice}
+    return options
+
+
+def _request(
+    options: Dict[str, Any],
+    previous: Optional[str],
+    history: Optional[List[Dict]],
+    user_message: str,
+) -> Dict[str, Any]:
+    """Arguments of a Responses API call, continuing from `previous` if given"""
+    request = {
+        **options,
+        "input": _input_items(history or [])
+        + [{"role": "user", "content": user_message}],
+    }
+    if previous:
+        request["previous_response_id"] = previous
+    return request
+
+
+def _input_items(messages: List[Dict]) -> List[Dict]:
+    """Converts chat completions messages into Responses API input items"""
+    items = []
+    for message in messages:
+        role = message.get("role")
+        if role == "tool":
+            output = message.get("content")
+            items.append(
+                {
+                    "type": "function_call_output",
+                    "call_id": message.get("tool_call_id"),
+                    "output": output if isinstance(output, str) else json.dumps(output),
+                }
+            )
+        elif role == "assistant" and message.get("tool_calls"):
+            if message.get("content"):
+                items.append({"role": "assistant", "content": message["content"]})
+            for tool_call in message["tool_calls"]:
+                function = tool_call.get("function") or {}
+                arguments = function.get("arguments")
+                items.append(
+                    {
+                        "type": "function_call",
+                        "call_id": tool_call.get("id"),
+                        "name": function.get("name"),
+                        "arguments": (
+                            arguments
+                            if isinstance(arguments, str)
+                            else json.dumps(arguments or {})
+                        ),
+                    }
+                )
+        else:
+            items.append(message)
+    return items
+
+
+def _invalid_tool_choice(
+    tool_choice: Optional[str], tools: Optional[List[Dict]]
+) -> bool:
+    """Whether tool_choice is neither a mode nor the name of one of the tools"""
+    if not tool_choice or tool_choice in ("none", "auto", "required"):
+        return False
+    return tool_choice not in [tool.get("name") for tool in tools or []]
+
+
+def _expired(error: BaseException) -> bool:
+    """Whether a call failed because the server no longer has the previous response"""
+    return getattr(error, "status_code", None) in (400, 404) and (
+        "previous_response" in str(error) or "previous response" in str(error).lower()
+    )
+
+
+def _result(response: Any, previous: Optional[str], tools: Optional[List]) -> Dict:
+    """Formats a Responses API response like the other providers"""
+    result = {
+        "response": response.output_text or "",
+        "metadata": _metadata(response, previous),
+    }
+    if tools:
+        result["tools"] = [
+            _tool_call(item) for item in response.output if item.type == "function_call"
+        ]
+    return result
+
+
+def _metadata(response: Any, previous: Optional[str]) -> Dict:
+    """Usage and conversation state of a response"""
+    if response is None:
+        return {"usage": {}}
+    return {
+        "usage": response.usage.to_dict() if response.usage else {},
+        "response_id": response.id,
+        "previous_response_id": previous,
+    }
+
+
+def _tool_call(item: Any) -> Dict:
+    """Formats a function call output item like the tool calls of chat completions"""
+    return {
+        "id": item.call_id,
+        "type": "function",
+        "function": {
+            "name": item.name,
+            "arguments": json.loads(item.arguments) if item.arguments else {},
+        },
+    }
+
+
+def _event_error(event: Any) -> str:
+    """Message of a failed stream event"""
+    response = getattr(event, "response", None)
+    error = getattr(response, "error", None) if response is not None else None
+    return (
+        getattr(error, "message", None) or getattr(event, "message", None) or str(event)
+    )
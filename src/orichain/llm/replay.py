@@ -0,0 +1,397 @@
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncGenerator,
+    Dict,
+    Generator,
+    List,
+    Optional,
+    Union,
+)
+import threading
+import asyncio
+import hashlib
+import copy
+import json
+import gzip
+import time
+import os
+
+if TYPE_CHECKING:
+    from fastapi import Request
+
+from orichain import error_explainer
+from orichain.streaming import DisconnectWatcher, aclose_stream, close_stream
+
+# Request parameters that never take part in the fingerprint
+IGNORED_PARAMS = ("request",)
+
+# Precision of the recorded timings, in seconds
+TIME_PRECISION = 4
+
+
+def fingerprint(provider: str, operation: str, params: Dict[str, Any]) -> str:
+    """Computes a stable fingerprint of a provider request.
+
+    Args:
+        - provider (str): Provider name, e.g. OpenAI
+        - operation (str): call or stream
+        - params (Dict[str, Any]): Keyword arguments the provider `__call__` or `streaming` received
+
+    Returns:
+        str: Hex digest identifying the request
+    """
+    body = {key: value for key, value in params.items() if key not in IGNORED_PARAMS}
+    canonical = json.dumps(
+        [provider, operation, body],
+        sort_keys=True,
+        separators=(",", ":"),
+        default=_canonical,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _canonical(value: Any) -> Any:
+    """Converts SDK objects (e.g. Gemini configs) into something JSON serializable"""
+    for method in ("model_dump", "to_dict"):
+        if callable(getattr(value, method, None)):
+            try:
+                return getattr(value, method)()
+            except Exception:
+                pass
+    return type(value).__name__
+
+
+class ReplayStore(object):
+    """
+    Compact on-disk store of recorded provider traffic.
+
+    The store is a JSON Lines file, gzip compressed when the path ends with `.gz`, holding one
+    recording per line:
+
+    - call: `{"fp": ..., "op": "call", "latency": seconds, "response": {...}}`
+    - stream: `{"fp": ..., "op": "stream", "chunks": [[gap, chunk], ...]}`, where `gap` is the
+      number of seconds the provider took to produce the chunk after the previous one (the first
+      gap is the time to first token) and the last chunk is the final dictionary
+
+    Recordings are appended as they are made, so several runs can share one store. When a request
+    was recorded more than once, the recordings are replayed in turn.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Args:
+            - path (str): Path of the store file, created on the first recording if missing
+        """
+        self.path = path
+        self._recordings: Dict[str, List[Dict]] = {}
+        self._turns: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _open(self, mode: str) -> Any:
+        """Opens the store file, through gzip when the path ends with .gz"""
+        if self.path.endswith(".gz"):
+            return gzip.open(self.path, mode + "t", encoding="utf-8")
+        return open(self.path, mode, encoding="utf-8")
+
+    def _load(self) -> None:
+        """Loads the recordings already in the store file"""
+        if not os.path.exists(self.path):
+            return
+        with self._open("r") as file:
+            for line in file:
+                if line.strip():
+                    recording = json.loads(line)
+                    self._recordings.setdefault(recording["fp"], []).append(recording)
+
+    def add(self, recording: Dict) -> None:
+        """Adds a recording and appends it to the store file.
+
+        Args:
+            - recording (Dict): Recording with at least the `fp` and `op` keys
+        """
+        # Keep the serialized copy, the caller may still modify the response afterwards
+        line = json.dumps(recording, separators=(",", ":"), default=_canonical)
+        with self._lock:
+            self._recordings.setdefault(recording["fp"], []).append(json.loads(line))
+            with self._open("a") as file:
+                file.write(line + "\n")
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Returns the next recording of a request, cycling through the recordings made for it.
+
+        Args:
+            - key (str): Request fingerprint
+
+        Returns:
+            Optional[Dict]: The recording, or None if the request was never recorded
+        """
+        with self._lock:
+            recordings = self._recordings.get(key)
+            if not recordings:
+                return None
+            turn = self._turns.get(key, 0)
+            self._turns[key] = turn + 1
+            return recordings[turn % len(recordings)]
+
+    def __len__(self) -> int:
+        return sum(len(recordings) for recordings in self._recordings.values())
+
+
+def _store(store: Union[ReplayStore, str]) -> ReplayStore:
+    """Accepts either a ReplayStore or the path of one"""
+    return store if isinstance(store, ReplayStore) else ReplayStore(store)
+
+
+def _missing(key: str) -> Dict:
+    """Error returned when a replayed request has no recording"""
+    return {"error": 404, "reason": f"no recording found for request {key[:12]}"}
+
+
+class Recorder(object):
+    """Wraps a provider `Generate` instance and records every successful call and stream."""
+
+    def __init__(
+        self, model: Any, provider: str, store: Union[ReplayStore, str]
+    ) -> None:
+        """
+        Args:
+            - model (Generate): Provider instance to record
+            - provider (str): Provider name, part of the request fingerprints
+            - store (ReplayStore or str): Store, or path of the store, to record into
+        """
+        self.model = model
+        self.provider = provider
+        self.store = _store(store)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.model, name)
+
+    def __call__(self, **kwds: Any) -> Dict:
+        start = time.perf_counter()
+        result = self.model(**kwds)
+        latency = time.perf_counter() - start
+
+        # Only successful responses are worth replaying
+        if isinstance(result, Dict) and "error" not in result:
+            self.store.add(
+                {
+                    "fp": fingerprint(self.provider, "call", kwds),
+                    "op": "call",
+                    "latency": round(latency, TIME_PRECISION),
+                    "response": result,
+                }
+            )
+        return result
+
+    def streaming(self, **kwds: Any) -> Generator:
+        stream = self.model.streaming(**kwds)
+        chunks = []
+        try:
+            iterator = iter(stream)
+            while True:
+                # Time only the wait for the provider, not the consumer of the chunks
+                start = time.perf_counter()
+                try:
+                    chunk = next(iterator)
+                except StopIteration:
+                    break
+                chunks.append(
+                    [round(time.perf_counter() - start, TIME_PRECISION), chunk]
+                )
+                if isinstance(chunk, Dict):
+                    chunks[-1][1] = copy.deepcopy(chunk)
+                yield chunk
+        finally:
+            close_stream(stream)
+
+        # Store only streams that ran to completion
+        if chunks and isinstance(chunks[-1][1], Dict) and "error" not in chunks[-1][1]:
+            self.store.add(
+                {
+                    "fp": fingerprint(self.provider, "stream", kwds),
+                    "op": "stream",
+                    "chunks": chunks,
+                }
+            )
+
+
+class AsyncRecorder(Recorder):
+    """Wraps a provider `AsyncGenerate` instance and records every successful call and stream."""
+
+    async def __call__(self, **kwds: Any) -> Dict:
+        start = time.perf_counter()
+        result = await self.model(**kwds)
+        latency = time.perf_counter() - start
+
+        # Only successful responses are worth replaying
+        if isinstance(result, Dict) and "error" not in result:
+            self.store.add(
+                {
+                    "fp": fingerprint(self.provider, "call", kwds),
+                    "op": "call",
+                    "latency": round(latency, TIME_PRECISION),
+                    "response": result,
+                }
+            )
+        return result
+
+    async def streaming(self, **kwds: Any) -> AsyncGenerator:
+        stream = self.model.streaming(**kwds)
+        chunks = []
+        try:
+            iterator = stream.__aiter__()
+            while True:
+                # Time only the wait for the provider, not the consumer of the chunks
+                start = time.perf_counter()
+                try:
+                    chunk = await iterator.__anext__()
+                except StopAsyncIteration:
+                    break
+                chunks.append(
+                    [round(time.perf_counter() - start, TIME_PRECISION), chunk]
+                )
+                if isinstance(chunk, Dict):
+                    chunks[-1][1] = copy.deepcopy(chunk)
+                yield chunk
+        finally:
+            await aclose_stream(stream)
+
+        # Store only streams that ran to completion
+        if chunks and isinstance(chunks[-1][1], Dict) and "error" not in chunks[-1][1]:
+            self.store.add(
+                {
+                    "fp": fingerprint(self.provider, "stream", kwds),
+                    "op": "stream",
+                    "chunks": chunks,
+                }
+            )
+
+
+class Replayer(object):
+    """
+    Stands in for a provider `Generate` instance and serves recorded responses, without any
+    network access or credentials.
+
+    Responses are replayed with the recorded latency and inter-chunk timing multiplied by
+    `time_scale`, so load tests see realistic token pacing.
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        store: Union[ReplayStore, str],
+        time_scale: float = 1.0,
+    ) -> None:
+        """
+        Args:
+            - provider (str): Provider name, part of the request fingerprints
+            - store (ReplayStore or str): Store, or path of the store, to replay from
+            - time_scale (float, optional): Multiplier applied to the recorded timings. 0.5 replays
+              twice as fast, 0 replays without waiting. Default: 1.0
+        """
+        self.provider = provider
+        self.store = _store(store)
+        self.time_scale = time_scale
+
+    def __call__(self, **kwds: Any) -> Dict:
+        key = fingerprint(self.provider, "call", kwds)
+        recording = self.store.get(key)
+        if recording is None:
+            return _missing(key)
+
+        if self.time_scale:
+            time.sleep(recording["latency"] * self.time_scale)
+        return copy.deepcopy(recording["response"])
+
+    def streaming(self, **kwds: Any) -> Generator:
+        key = fingerprint(self.provider, "stream", kwds)
+        recording = self.store.get(key)
+        if recording is None:
+            yield _missing(key)
+            return
+
+        for gap, chunk in recording["chunks"]:
+            if self.time_scale:
+                time.sleep(gap * self.time_scale)
+            yield copy.deepcopy(chunk) if isinstance(chunk, Dict) else chunk
+
+
+class AsyncReplayer(Replayer):
+    """Asynchronous version of `Replayer`, honouring client disconnects like the providers do."""
+
+    async def __call__(self, request: Optional["Request"] = None, **kwds: Any) -> Dict:
+        key = fingerprint(self.provider, "call", kwds)
+        recording = self.store.get(key)
+        if recording is None:
+            return _missing(key)
+
+        if self.time_scale:
+            await asyncio.sleep(recording["latency"] * self.time_scale)
+        return copy.deepcopy(recording["response"])
+
+    async def streaming(
+        self, request: Optional["Request"] = None, **kwds: Any
+    ) -> AsyncGenerator:
+        # Shared background watcher for client disconnects
+        watcher = DisconnectWatcher.acquire(request)
+
+        try:
+            key = fingerprint(self.provider, "stream", kwds)
+            recording = self.store.get(key)
+            if recording is None:
+                yield _missing(key)
+                return
+
+            for gap, chunk in recording["chunks"]:
+                if self.time_scale:
+                    await asyncio.sleep(gap * self.time_scale)
+                if watcher and watcher.disconnected:
+                    yield {"error": 400, "reason": "request aborted by user"}
+                    break
+                yield copy.deepcopy(chunk) if isinstance(chunk, Dict) else chunk
+        except Exception as e:
+            error_explainer(e)
+            yield {"error": 500, "reason": str(e)}
+        finally:
+            if watcher:
+                watcher.release()
+
+
+def wrap(
+    generate: Any,
+    model_provider: str,
+    replay_mode: str,
+    replay_store: Union[ReplayStore, str],
+    replay_time_scale: float = 1.0,
+    asynchronous: bool = False,
+    **kwds: Any,
+) -> Any:
+    """Builds the record or replay layer for a `model_handler` entry.
+
+    Args:
+        - generate (type): Provider class from `model_handler`, e.g. `openai_llm.Generate`
+        - model_provider (str): Provider name
+        - replay_mode (str): "record" to call the provider and record its traffic, or "replay" to
+          serve recorded traffic without instantiating the provider
+        - replay_store (ReplayStore or str): Store, or path of the store
+        - replay_time_scale (float, optional): Multiplier applied to the replayed timings. Default: 1.0
+        - asynchronous (bool, optional): Whether `generate` is an `AsyncGenerate` class. Default: False
+        - **kwds: Arguments of the provider class, only used when recording
+
+    Returns:
+        Recorder or Replayer: Object with the provider's `__call__` and `streaming` interface
+
+    Raises:
+        - ValueError: If the replay mode is unknown
+    """
+    if replay_mode == "record":
+        recorder = AsyncRecorder if asynchronous else Recorder
+        return recorder(generate(**kwds), model_provider, replay_store)
+    elif replay_mode == "replay":
+        replayer = AsyncReplayer if asynchronous else Replayer
+        return replayer(model_provider, replay_store, replay_time_scale)
+    raise ValueError(
+        f"\nUnsupported replay mode: {replay_mode}\nSupported modes are: record, replay"
+    )
@@ -0,0 +1,494 @@
+from typing import (
+    Any,
+    AsyncGenerator,
+    Callable,
+    Dict,
+    Generator,
+    List,
+    Optional,
+    Union,
+)
+import threading
+import math
+import time
+
+from orichain import metrics, resilience, usage
+from orichain.streaming import aclose_stream, close_stream
+
+# Rough number of characters per token, for estimating prompt sizes without a tokenizer
+CHARS_PER_TOKEN = 4
+
+# Words that usually ask for more than a lookup or a yes/no answer
+REASONING_MARKERS = (
+    "why",
+    "how",
+    "explain",
+    "compare",
+    "analyze",
+    "analyse",
+    "summarize",
+    "summarise",
+    "write",
+    "code",
+    "debug",
+    "design",
+    "plan",
+    "step",
+    "difference",
+    "evaluate",
+    "reason",
+)
+
+
+def estimate_tokens(
+    user_message: Any,
+    system_prompt: Optional[str] = None,
+    chat_hist: Optional[List[Any]] = None,
+    matched_sentence: Optional[List[str]] = None,
+) -> int:
+    """Estimates the prompt tokens of a call from its length, without a tokenizer.
+
+    Args:
+        - user_message (Any): The user's message
+        - system_prompt (str, optional): System prompt
+        - chat_hist (List, optional): Previous conversation history
+        - matched_sentence (List[str], optional): Retrieved chunks
+
+    Returns:
+        int: Estimated number of input tokens
+    """
+    characters = len(str(user_message)) + len(system_prompt or "")
+    for turn in chat_hist or []:
+        content = turn.get("content", "") if isinstance(turn, dict) else turn
+        characters += len(str(content))
+    for sentence in matched_sentence or []:
+        characters += len(str(sentence))
+    return characters // CHARS_PER_TOKEN + 1
+
+
+def heuristic_complexity(user_message: Any, features: Dict[str, Any]) -> float:
+    """Default classifier: scores how demanding a call is from cheap surface features.
+
+    Args:
+        - user_message (Any): The user's message
+        - features (Dict[str, Any]): Features of the call, see `Router.features`
+
+    Returns:
+        float: Complexity between 0 (trivial) and 1 (demanding)
+    """
+    words = str(user_message).lower().split()
+    markers = sum(1 for word in words if word.strip("?,.!:;") in REASONING_MARKERS)
+
+    score = 0.4 * min(features["input_tokens"] / 2000, 1.0)
+    score += min(0.15 * markers, 0.45)
+    if len(words) > 60:
+        score += 0.1
+    if features["tools"]:
+        score += 0.1
+    if features["turns"] > 4:
+        score += 0.1
+    return min(score, 1.0)
+
+
+class Route(object):
+    """
+    One model the router can send calls to, with its limits and observed behaviour.
+
+    Latency, cost, output tokens and quality feedback are tracked as exponentially weighted
+    moving averages, so the routing follows the recent behaviour of each model.
+    """
+
+    def __init__(
+        self,
+        llm: Any,
+        name: Optional[str] = None,
+        max_input_tokens: Optional[int] = None,
+        max_complexity: float = 1.0,
+        tools: bool = True,
+        json: bool = True,
+    ) -> None:
+        """
+        Args:
+            - llm (LLM or AsyncLLM): Model instance serving the route
+            - name (str, optional): Route name. Default: <provider>:<model_name>
+            - max_input_tokens (int, optional): Largest prompt the route takes. Default: None
+            - max_complexity (float, optional): Most complex call the route takes, between 0 and
+              1. Default: 1.0
+            - tools (bool, optional): Whether the route takes calls with tools. Default: True
+            - json (bool, optional): Whether the route takes calls with `do_json`. Default: True
+        """
+        self.llm = llm
+        self.name = name or f"{llm.model_provider}:{llm.model_name}"
+        self.max_input_tokens = max_input_tokens
+        self.max_complexity = max_complexity
+        self.tools = tools
+        self.json = json
+
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.latency: Optional[float] = None
+        self.cost: Optional[float] = None
+        self.output_tokens: Optional[float] = None
+        self.quality: Optional[float] = None
+        self.feedbacks = 0
+
+    @property
+    def model_name(self) -> str:
+        """Model served by the route."""
+        return self.llm.model_name
+
+    def accepts(self, features: Dict[str, Any]) -> bool:
+        """Tells whether the route can serve a call.
+
+        Args:
+            - features (Dict[str, Any]): Features of the call, see `Router.features`
+
+        Returns:
+            bool: True if the call fits the route's limits and its circuit is not open
+        """
+        if (
+            self.max_input_tokens is not None
+            and features["input_tokens"] > self.max_input_tokens
+        ):
+            return False
+        if features["complexity"] > self.max_complexity:
+            return False
+        if (features["tools"] and not self.tools) or (
+            features["do_json"] and not self.json
+        ):
+            return False
+        breaker = getattr(self.llm, "breaker", None)
+        return not (breaker and breaker.state == resilience.OPEN)
+
+    def estimated_cost(self, input_tokens: int, output_tokens: float) -> float:
+        """Estimates the cost of a call from `usage.pricing`.
+
+        Args:
+            - input_tokens (int): Estimated prompt tokens
+            - output_tokens (float): Expected output tokens when the route has no history
+
+        Returns:
+            float: Cost in USD, infinite when the model has no registered prices
+        """
+        price = usage.pricing.get(self.model_name)
+        if price is None:
+            return math.inf
+        if self.output_tokens is not None:
+            output_tokens = self.output_tokens
+        return (input_tokens * price[0] + output_tokens * price[1]) / 1_000_000
+
+    def record(self, result: Any, duration: float, smoothing: float) -> None:
+        """Updates the observed behaviour with the outcome of a call.
+
+        Args:
+            - result (Any): Result of the call, or the final chunk of a stream
+            - duration (float): Wall time of the call in seconds
+            - smoothing (float): Weight of the new observation in the moving averages
+        """
+        failed = not isinstance(result, dict) or "error" in result
+        normalized = None
+        if not failed:
+            normalized = (result.get("metadata") or {}).get("normalized_usage")
+        with self._lock:
+            self.calls += 1
+            if failed:
+                self.errors += 1
+                return
+            self.latency = _average(self.latency, duration, smoothing)
+            if normalized:
+                if normalized.get("cost") is not None:
+                    self.cost = _average(self.cost, normalized["cost"], smoothing)
+                self.output_tokens = _average(
+                    self.output_tokens, normalized.get("output_tokens", 0), smoothing
+                )
+
+    def add_feedback(self, quality: float, smoothing: float) -> None:
+        """Records a quality score of an answer given by the route.
+
+        Args:
+            - quality (float): Score between 0 (bad) and 1 (good)
+            - smoothing (float): Weight of the new score in the moving average
+        """
+        with self._lock:
+            self.feedbacks += 1
+            self.quality = _average(self.quality, quality, smoothing)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Returns the observed behaviour of the route."""
+        with self._lock:
+            return {
+                "name": self.name,
+                "model": self.model_name,
+                "calls": self.calls,
+                "errors": self.errors,
+                "latency": self.latency,
+                "cost": self.cost,
+                "output_tokens": self.output_tokens,
+                "quality": self.quality,
+                "feedbacks": self.feedbacks,
+            }
+
+    def __repr__(self) -> str:
+        return f"Route({self.name!r})"
+
+
+def _average(current: Optional[float], value: float, smoothing: float) -> float:
+    """Exponentially weighted moving average, seeded with the first value"""
+    if current is None:
+        return float(value)
+    return current + smoothing * (value - current)
+
+
+class Router(object):
+    """
+    Picks a model per call among several `LLM` routes, sending cheap traffic to small fast models.
+
+    For every call the router estimates the input tokens, notes whether tools or `do_json` are
+    used and scores the call's complexity with a pluggable classifier. Among the routes that
+    accept the call (limits, open circuit, observed quality), it picks the one with the lowest
+    `estimated cost + latency_weight * observed latency`. Routes whose model has no registered
+    price in `usage.pricing` rank after the priced ones, in the order given. When no route
+    accepts the call, the last route serves it, so list the most capable model last.
+
+    Every result carries the route under `metadata.route`. Pass it back with `feedback` to steer
+    traffic away from routes whose answers are not good enough.
+
+    Example:
+        router = Router(
+            [
+                Route(LLM(model_name="gpt-4.1-nano", ...), max_complexity=0.3, tools=False),
+                Route(LLM(model_name="claude-3-5-haiku-latest", ...), max_complexity=0.6),
+                Route(LLM(model_name="gpt-4.1", ...)),
+            ]
+        )
+        result = router("Is the store open on Sundays?")
+        router.feedback(result, 1.0)
+    """
+
+    def __init__(
+        self,
+        routes: List[Route],
+        classifier: Optional[Callable[[Any, Dict[str, Any]], float]] = None,
+        latency_weight: float = 0.0,
+        expected_output_tokens: int = 256,
+        min_quality: Optional[float] = None,
+        min_feedbacks: int = 20,
+        smoothing: float = 0.1,
+    ) -> None:
+        """
+        Args:
+            - routes (List[Route]): Candidate routes, the most capable one last
+            - classifier (Callable, optional): Function of `(user_message, features)` returning a
+              complexity between 0 and 1. Default: `heuristic_complexity`
+            - latency_weight (float, optional): USD a second of latency is worth, to trade cost
+              for speed. Default: 0
+            - expected_output_tokens (int, optional): Output tokens assumed for routes without
+              history. Default: 256
+            - min_quality (float, optional): Routes whose average feedback falls below this stop
+              receiving calls. Default: None
+            - min_feedbacks (int, optional): Feedbacks needed before `min_quality` applies. Default: 20
+            - smoothing (float, optional): Weight of new observations in the moving averages.
+              Default: 0.1
+
+        Raises:
+            - ValueError: If no route is given
+        """
+        if not routes:
+            raise ValueError("Router needs at least one route")
+        self.routes = list(routes)
+        self.classifier = classifier or heuristic_complexity
+        self.latency_weight = latency_weight
+        self.expected_output_tokens = expected_output_tokens
+        self.min_quality = min_quality
+        self.min_feedbacks = min_feedbacks
+        self.smoothing = smoothing
+        self._by_name = {route.name: route for route in self.routes}
+
+    def features(
+        self,
+        user_message: Any,
+        system_prompt: Optional[str] = None,
+        chat_hist: Optional[List[Any]] = None,
+        matched_sentence: Optional[List[str]] = None,
+        tools: Optional[List[Dict]] = None,
+        do_json: bool = False,
+    ) -> Dict[str, Any]:
+        """Extracts the routing features of a call.
+
+        Args:
+            - user_message (Any): The user's message
+            - system_prompt (str, optional): System prompt
+            - chat_hist (List, optional): Previous conversation history
+            - matched_sentence (List[str], optional): Retrieved chunks
+            - tools (List[Dict], optional): Tools offered to the model
+            - do_json (bool, optional): Whether a JSON answer is asked for. Default: False
+
+        Returns:
+            Dict[str, Any]: input_tokens, tools, do_json, turns and complexity
+        """
+        features = {
+            "input_tokens": estimate_tokens(
+                user_message, system_prompt, chat_hist, matched_sentence
+            ),
+            "tools": bool(tools),
+            "do_json": bool(do_json),
+            "turns": len(chat_hist or []),
+        }
+        features["complexity"] = min(
+            max(float(self.classifier(user_message, features)), 0.0), 1.0
+        )
+        return features
+
+    def select(self, features: Dict[str, Any]) -> Route:
+        """Picks the route of a call.
+
+        Args:
+            - features (Dict[str, Any]): Features of the call, see `features`
+
+        Returns:
+            Route: The cheapest acceptable route, else the last one
+        """
+        best = None
+        best_key = None
+        for index, route in enumerate(self.routes):
+            if not route.accepts(features) or not self._good_enough(route):
+                continue
+            cost = route.estimated_cost(
+                features["input_tokens"], self.expected_output_tokens
+            )
+            if self.latency_weight and route.latency is not None:
+                cost += self.latency_weight * route.latency
+            key = (cost, index)
+            if best_key is None or key < best_key:
+                best, best_key = route, key
+        return best or self.routes[-1]
+
+    def feedback(self, result: Union[Dict, str], quality: float) -> None:
+        """Records how good an answer was, for the route that gave it.
+
+        Args:
+            - result (Dict or str): Result returned by the router, or a route name
+            - quality (float): Score between 0 (bad) and 1 (good)
+
+        Raises:
+            - KeyError: If the route is unknown
+        """
+        name = result
+        if isinstance(result, dict):
+            name = (result.get("metadata") or {}).get("route")
+        self._by_name[name].add_feedback(quality, self.smoothing)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Returns the observed behaviour of every route."""
+        return [route.snapshot() for route in self.routes]
+
+    def _good_enough(self, route: Route) -> bool:
+        """Whether the feedback on a route allows sending it more calls"""
+        return (
+            self.min_quality is None
+            or route.feedbacks < self.min_feedbacks
+            or route.quality is None
+            or route.quality >= self.min_quality
+        )
+
+    def _route(self, user_message: Any, kwds: Dict[str, Any]) -> Route:
+        """Selects the route of a call and counts the selection"""
+        route = self.select(
+            self.features(
+                user_message,
+                system_prompt=kwds.get("system_prompt"),
+                chat_hist=kwds.get("chat_hist"),
+                matched_sentence=kwds.get("matched_sentence"),
+                tools=kwds.get("tools"),
+                do_json=kwds.get("do_json", False),
+            )
+        )
+        sink = metrics.get_sink()
+        if sink:
+            sink.increment("orichain_router_selections_total", 1, {"route": route.name})
+        return route
+
+    def _finish(self, route: Route, result: Any, started: float) -> None:
+        """Records the outcome of a call and tags the result with its route"""
+        route.record(result, time.perf_counter() - started, self.smoothing)
+        if isinstance(result, dict) and isinstance(result.get("metadata"), dict):
+            result["metadata"]["route"] = route.name
+
+    def __call__(self, user_message: Any, **kwds: Any) -> Dict:
+        """Generates a response with the route picked for the call.
+
+        Args:
+            - user_message (str): The user's message
+            - **kwds: Arguments of `LLM.__call__`
+
+        Returns:
+            Dict: The model's response, with the route under `metadata.route`
+        """
+        route = self._route(user_message, kwds)
+        started = time.perf_counter()
+        result = route.llm(user_message, **kwds)
+        self._finish(route, result, started)
+        return result
+
+    def stream(self, user_message: Any, **kwds: Any) -> Generator:
+        """Streams a response from the route picked for the call.
+
+        Args:
+            - user_message (str): The user's message
+            - **kwds: Arguments of `LLM.stream`, `do_sse=False` is needed to read the route back
+
+        Yields:
+            Generator: Chunks of `LLM.stream`, the final dictionary with `metadata.route`
+        """
+        route = self._route(user_message, kwds)
+        started = time.perf_counter()
+        stream = route.llm.stream(user_message, **kwds)
+        try:
+            for chunk in stream:
+                if isinstance(chunk, dict):
+                    self._finish(route, chunk, started)
+                yield chunk
+        finally:
+            close_stream(stream)
+
+
+class AsyncRouter(Router):
+    """Asynchronous version of `Router`, with `AsyncLLM` routes."""
+
+    async def __call__(self, user_message: Any, **kwds: Any) -> Dict:
+        """Generates a response with the route picked for the call.
+
+        Args:
+            - user_message (str): The user's message
+            - **kwds: Arguments of `AsyncLLM.__call__`
+
+        Returns:
+            Dict: The model's response, with the route under `metadata.route`
+        """
+        route = self._route(user_message, kwds)
+        started = time.perf_counter()
+        result = await route.llm(user_message, **kwds)
+        self._finish(route, result, started)
+        return result
+
+    async def stream(self, user_message: Any, **kwds: Any) -> AsyncGenerator:
+        """Streams a response from the route picked for the call.
+
+        Args:
+            - user_message (str): The user's message
+            - **kwds: Arguments of `AsyncLLM.stream`, `do_sse=False` is needed to read the route back
+
+        Yields:
+            AsyncGenerator: Chunks of `AsyncLLM.stream`, the final dictionary with `metadata.route`
+        """
+        route = self._route(user_message, kwds)
+        started = time.perf_counter()
+        stream = route.llm.stream(user_message, **kwds)
+        try:
+            async for chunk in stream:
+                if isinstance(chunk, dict):
+                    self._finish(route, chunk, started)
+                yield chunk
+        finally:
+            await aclose_stream(stream)
@@ -0,0 +1,351 @@
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+import itertools
+import heapq
+import time
+import warnings
+
+if TYPE_CHECKING:
+    import asyncio
+
+from orichain import metrics, resilience
+
+# Priority classes, served strictly in this order
+PRIORITIES = ("interactive", "normal", "batch")
+DEFAULT_PRIORITY = "normal"
+
+# Tenant key of calls that do not name one
+DEFAULT_TENANT = "default"
+
+# Shared schedulers, by name
+_schedulers: Dict[str, "Scheduler"] = {}
+
+
+class SchedulerRejected(Exception):
+    """Raised by `Scheduler.acquire` when a call is shed or rejected instead of admitted."""
+
+    def __init__(self, reason: str) -> None:
+        super().__init__(reason)
+        self.reason = reason
+
+
+class Ticket(object):
+    """Admission of one call by a `Scheduler`, released once the call is done."""
+
+    def __init__(
+        self, scheduler: "Scheduler", priority: str, tenant: str, waited: float
+    ) -> None:
+        """
+        Args:
+            - scheduler (Scheduler): Scheduler that admitted the call
+            - priority (str): Priority class of the call
+            - tenant (str): Tenant key of the call
+            - waited (float): Seconds spent in the queue
+        """
+        self.scheduler = scheduler
+        self.priority = priority
+        self.tenant = tenant
+        self.waited = waited
+        self.released = False
+
+    def release(self) -> None:
+        """Gives the slot back to the scheduler. Releasing twice is a no-op."""
+        if not self.released:
+            self.released = True
+            self.scheduler._release()
+
+
+class _Waiter(object):
+    """A queued call"""
+
+    __slots__ = ("priority", "tenant", "finish", "enqueued", "future", "state")
+
+    def __init__(
+        self,
+        priority: str,
+        tenant: str,
+        finish: float,
+        enqueued: float,
+        future: "asyncio.Future",
+    ) -> None:
+        self.priority = priority
+        self.tenant = tenant
+        self.finish = finish
+        self.enqueued = enqueued
+        self.future = future
+        # queued, granted, shed or cancelled
+        self.state = "queued"
+
+
+class Scheduler(object):
+    """
+    Admission scheduler for the calls made through one provider client.
+
+    At most `max_concurrency` calls run at a time, the others wait in a queue:
+
+    - Priority classes (interactive, normal, batch) are served strictly in that order, so queued
+      batch work never delays interactive requests.
+    - Within a class, tenants are served with weighted fair queuing: every call gets a virtual
+      finish time of `max(virtual time, tenant's last finish) + cost / weight`, and the call with
+      the smallest finish time goes first. A tenant sending many calls only delays its own.
+    - When the queue is full, a newcomer of a higher class preempts the lowest priority call
+      queued last, which is shed. A newcomer that cannot preempt anything is rejected. Queued
+      calls of a class with a `max_queue_wait` that waited longer are shed instead of started.
+
+    The scheduler lives on one asyncio event loop. Use `get_scheduler` to share one scheduler
+    between every AsyncLLM instance of a provider.
+    """
+
+    def __init__(
+        self,
+        name: str = "default",
+        max_concurrency: int = 16,
+        max_queue: int = 1000,
+        weights: Optional[Dict[str, float]] = None,
+        max_queue_wait: Optional[Dict[str, float]] = None,
+    ) -> None:
+        """
+        Args:
+            - name (str, optional): Name used in metrics and errors, e.g. llm:OpenAI
+            - max_concurrency (int, optional): Calls running at a time. Default: 16
+            - max_queue (int, optional): Calls waiting at a time, over every class. Default: 1000
+            - weights (Dict[str, float], optional): Share of each tenant key, tenants not listed
+              weigh 1. Default: None
+            - max_queue_wait (Dict[str, float], optional): Longest time a call of a priority class
+              may wait before being shed, e.g. {"batch": 30}. Default: None
+        """
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.weights = dict(weights or {})
+        self.max_queue_wait = dict(max_queue_wait or {})
+
+        self.active = 0
+        self.queued = 0
+        self.shed = 0
+        self.rejected = 0
+        self._heap: List[Tuple[int, float, int, _Waiter]] = []
+        self._sequence = itertools.count()
+        # Virtual time of each class, and last finish time and backlog of each tenant in it
+        self._virtual: Dict[str, float] = {priority: 0.0 for priority in PRIORITIES}
+        self._last_finish: Dict[Tuple[str, str], float] = {}
+        self._backlog: Dict[Tuple[str, str], int] = {}
+
+    async def acquire(
+        self,
+        priority: Optional[str] = None,
+        tenant: Optional[str] = None,
+        cost: float = 1.0,
+    ) -> Ticket:
+        """Waits for a slot.
+
+        Args:
+            - priority (str, optional): interactive, normal or batch. Default: normal
+            - tenant (str, optional): Tenant key for fair queuing. Default: default
+            - cost (float, optional): Relative cost of the call, e.g. its expected tokens. Default: 1
+
+        Returns:
+            Ticket: The admission, to `release` once the call is done
+
+        Raises:
+            - ValueError: If the priority class is unknown
+            - SchedulerRejected: If the call is shed or rejected
+        """
+        import asyncio
+
+        priority = priority or DEFAULT_PRIORITY
+        tenant = tenant or DEFAULT_TENANT
+        if priority not in PRIORITIES:
+            raise ValueError(
+                f"\nUnsupported priority: {priority}\nSupported priorities are: "
+                + ", ".join(PRIORITIES)
+            )
+
+        now = time.perf_counter()
+
+        # Fast path, a free slot and nobody waiting
+        if self.active < self.max_concurrency and not self.queued:
+            self.active += 1
+            return Ticket(self, priority, tenant, 0.0)
+
+        # Make room in a full queue by shedding queued work of a lower class
+        if self.queued >= self.max_queue and not self._preempt(priority):
+            self.rejected += 1
+            self._count("orichain_scheduler_rejected_total", priority)
+            raise SchedulerRejected(
+                f"scheduler {self.name} queue is full, {priority} request rejected"
+            )
+
+        # Weighted fair queuing tag of the call
+        key = (priority, tenant)
+        start = max(self._virtual[priority], self._last_finish.get(key, 0.0))
+        finish = start + cost / self.weights.get(tenant, 1.0)
+        self._last_finish[key] = finish
+        self._backlog[key] = self._backlog.get(key, 0) + 1
+
+        waiter = _Waiter(
+            priority, tenant, finish, now, asyncio.get_running_loop().create_future()
+        )
+        heapq.heappush(
+            self._heap,
+            (PRIORITIES.index(priority), finish, next(self._sequence), waiter),
+        )
+        self.queued += 1
+
+        try:
+            return await waiter.future
+        except asyncio.CancelledError:
+            if waiter.state == "granted":
+                # Granted while being cancelled, hand the slot on
+                waiter.future.result().release()
+            elif waiter.state == "queued":
+                waiter.state = "cancelled"
+                self._dequeued(waiter)
+            raise
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Returns the state of the scheduler, for metrics and health endpoints."""
+        queued = {priority: 0 for priority in PRIORITIES}
+        for _, _, _, waiter in self._heap:
+            if waiter.state == "queued":
+                queued[waiter.priority] += 1
+        return {
+            "name": self.name,
+            "active": self.active,
+            "queued": queued,
+            "shed": self.shed,
+            "rejected": self.rejected,
+        }
+
+    def _release(self) -> None:
+        """Frees a slot and starts the next queued calls"""
+        self.active -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Grants free slots to the queued calls, in priority then virtual finish order"""
+        now = time.perf_counter()
+        while self.active < self.max_concurrency and self._heap:
+            _, finish, _, waiter = heapq.heappop(self._heap)
+            if waiter.state != "queued":
+                continue
+            if waiter.future.done():
+                # Cancelled, its task has not cleaned up yet
+                waiter.state = "cancelled"
+                self._dequeued(waiter)
+                continue
+            self._dequeued(waiter)
+            self._virtual[waiter.priority] = max(self._virtual[waiter.priority], finish)
+
+            # Work that waited too long for its class is not worth starting anymore
+            limit = self.max_queue_wait.get(waiter.priority)
+            if limit is not None and now - waiter.enqueued > limit:
+                self._shed(waiter, "waited too long")
+                continue
+
+            waiter.state = "granted"
+            self.active += 1
+            waiter.future.set_result(
+                Ticket(self, waiter.priority, waiter.tenant, now - waiter.enqueued)
+            )
+
+    def _preempt(self, priority: str) -> bool:
+        """Sheds the queued call of the lowest class below `priority` that was queued last"""
+        rank = PRIORITIES.index(priority)
+        victim = None
+        for entry in self._heap:
+            waiter = entry[3]
+            if waiter.state != "queued" or entry[0] <= rank:
+                continue
+            if victim is None or entry[:3] > victim[:3]:
+                victim = entry
+        if victim is None:
+            return False
+        self._dequeued(victim[3])
+        self._shed(victim[3], f"preempted by {priority} work")
+        return True
+
+    def _shed(self, waiter: _Waiter, why: str) -> None:
+        """Fails a queued call that was taken out of the queue"""
+        waiter.state = "shed"
+        self.shed += 1
+        self._count("orichain_scheduler_shed_total", waiter.priority)
+        if not waiter.future.done():
+            waiter.future.set_exception(
+                SchedulerRejected(
+                    f"scheduler {self.name} shed {waiter.priority} request, {why}"
+                )
+            )
+
+    def _dequeued(self, waiter: _Waiter) -> None:
+        """Updates the queue counters once a call leaves the queue"""
+        self.queued -= 1
+        key = (waiter.priority, waiter.tenant)
+        backlog = self._backlog.get(key, 1) - 1
+        if backlog:
+            self._backlog[key] = backlog
+        else:
+            # An idle tenant starts again from the virtual time
+            self._backlog.pop(key, None)
+            self._last_finish.pop(key, None)
+
+    def _count(self, name: str, priority: str) -> None:
+        """Increments a scheduler counter when metrics are enabled"""
+        sink = metrics.get_sink()
+        if sink:
+            sink.increment(name, 1, {"scheduler": self.name, "priority": priority})
+
+    def __repr__(self) -> str:
+        return f"Scheduler({self.name!r}, active={self.active}, queued={self.queued})"
+
+
+def get_scheduler(name: str, **settings: Any) -> Scheduler:
+    """Returns the shared scheduler of that name, creating it on first use.
+
+    Args:
+        - name (str): Scheduler name, e.g. llm:OpenAI
+        - **settings: `Scheduler` arguments, only used when the scheduler is created. A warning is
+          issued if they differ from the ones of the existing scheduler
+
+    Returns:
+        Scheduler: The shared scheduler
+    """
+    scheduler = _schedulers.get(name)
+    if scheduler is None:
+        scheduler = _schedulers[name] = Scheduler(name, **settings)
+    elif settings and resilience.differs(
+        scheduler, Scheduler(name, **settings), settings
+    ):
+        warnings.warn(
+            f"\nThe shared scheduler {name!r} already exists with other settings, {settings} are ignored. Pass an `orichain.llm.scheduler.Scheduler` to use them.",
+            UserWarning,
+        )
+    return scheduler
+
+
+def schedulers() -> Dict[str, Scheduler]:
+    """Returns every shared scheduler, by name."""
+    return dict(_schedulers)
+
+
+def resolve_scheduler(
+    scheduler: Any, provider: str, kwds: Optional[Dict[str, Any]] = None
+) -> Optional[Scheduler]:
+    """Turns the `scheduler` argument of AsyncLLM into a scheduler.
+
+    Args:
+        - scheduler (Scheduler, Dict, bool or None): A scheduler, True for the shared scheduler
+          of the client, a dict of `Scheduler` settings for the shared scheduler, or
+          None/False to disable it
+        - provider (str): Provider name
+        - kwds (Dict, optional): Arguments of the AsyncLLM, telling its client apart (see
+          `orichain.resilience.client_name`)
+
+    Returns:
+        Optional[Scheduler]: The scheduler to use, if any
+    """
+    if not scheduler:
+        return None
+    if isinstance(scheduler, Scheduler):
+        return scheduler
+    settings = scheduler if isinstance(scheduler, dict) else {}
+    return get_scheduler(f"llm:{resilience.client_name(provider, kwds)}", **settings)
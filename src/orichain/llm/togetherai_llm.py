@@ -1,8 +1,16 @@
 import json
-from typing import Dict, List, Optional, Generator, AsyncGenerator
-from fastapi import Request
+from typing import TYPE_CHECKING, Dict, List, Optional, Generator, AsyncGenerator
 
-from orichain import error_explainer
+if TYPE_CHECKING:
+    from fastapi import Request
+
+from orichain import error_explainer, profiling
+from orichain.streaming import (
+    DisconnectWatcher,
+    aclose_stream,
+    close_stream,
+    stream_tracker,
+)
 
 
 class Generate(object):
@@ -82,6 +90,9 @@ class Generate(object):
         Returns:
             Dict: Response from the model or error information
         """
+        # Time the phases when profiling is enabled
+        timer = profiling.start("TogetherAI", "call")
+
         try:
             # Format the chat history and user message
             messages = self._chat_formatter(
@@ -89,6 +100,7 @@ class Generate(object):
                 chat_hist=chat_hist,
                 system_prompt=system_prompt,
             )
+            timer.lap("format")
 
             # Return early if message formatting failed
             if isinstance(messages, Dict):
@@ -130,8 +142,11 @@ class Generate(object):
             if do_json:
                 params["response_format"] = {"type": "json_object"}
 
+            timer.lap("prepare")
+
             # Call the TogetherAI API with the formatted parameters
             completion = self.client.chat.completions.create(**params)
+            timer.lap("request")
 
             result = {
                 "response": completion.choices[0].message.content or "",
@@ -155,11 +170,14 @@ class Generate(object):
                     )
                 result["tools"] = tool_calls
 
+            timer.lap("parse")
             return result
 
         except Exception as e:
             error_explainer(e)
             return {"error": 500, "reason": str(e)}
+        finally:
+            timer.finish()
 
     def streaming(
         self,
@@ -171,6 +189,7 @@ class Generate(object):
         tool_choice: Optional[str] = None,
         system_prompt: Optional[str] = None,
         do_json: Optional[bool] = False,
+        accumulate: Optional[bool] = True,
     ) -> Generator:
         """
         Stream responses from the specified model.
@@ -184,10 +203,17 @@ class Generate(object):
             - tools (List[Dict], optional): List of tools to be used by the model.
             - tool_choice (Optional[str], optional): Specifies if and which tool the model must call — "none" for no tools, "auto" for automatic, "required" for mandatory, or a specific tool's name.
             - do_json (bool, optional): Whether to format the response as JSON. Defaults to False
+            - accumulate (bool, optional): Whether to build the full response text for the final chunk. Defaults to True
 
         Yields:
             Generator: Chunks of the model's response or error information
         """
+        # Provider stream, always closed in the finally block
+        completion = None
+
+        # Time the phases when profiling is enabled
+        timer = profiling.start("TogetherAI", "stream")
+
         try:
             # Format the chat history and user message
             messages = self._chat_formatter(
@@ -195,6 +221,7 @@ class Generate(object):
                 chat_hist=chat_hist,
                 system_prompt=system_prompt,
             )
+            timer.lap("format")
 
             # Yield error and return early if message formatting failed
             if isinstance(messages, Dict):
@@ -238,20 +265,27 @@ class Generate(object):
                 if do_json:
                     params["response_format"] = {"type": "json_object"}
 
+                timer.lap("prepare")
+
                 # Start the streaming session
                 completion = self.client.chat.completions.create(**params)
+                stream_tracker.track(completion, "TogetherAI")
+                timer.lap("request")
 
-                response = ""
+                response_parts = []
                 usage = {}
                 tool_calls = []
                 tool_arg_buffer = ""
 
                 # Stream text chunks as they become available
-                for chunk in completion:
+                for chunk in timer.iterate(completion):
                     delta = chunk.choices[0].delta if chunk.choices else None
                     if delta and delta.content:
-                        response += delta.content
+                        if accumulate:
+                            response_parts.append(delta.content)
+                        timer.lap("parse")
                         yield delta.content
+                        timer.skip()
                     elif delta and hasattr(delta, "tool_calls") and delta.tool_calls:
                         tc = delta.tool_calls[0]
                         if tc.get("id"):
@@ -271,18 +305,20 @@ class Generate(object):
                         usage = chunk.usage.model_dump()
 
                 # Format the final response with metadata
-                result = {
-                    "response": response,
-                    "metadata": {"usage": usage},
-                }
+                result = {"response": "".join(response_parts)} if accumulate else {}
+                result["metadata"] = {"usage": usage}
 
                 if tools:
                     result["tools"] = tool_calls
 
+                timer.lap("parse")
                 yield result
         except Exception as e:
             error_explainer(e)
             yield {"error": 500, "reason": str(e)}
+        finally:
+            timer.finish()
+            close_stream(completion)
 
     def _chat_formatter(
         self,
@@ -379,7 +415,7 @@ class AsyncGenerate(object):
         self,
         model_name: str,
         user_message: str,
-        request: Optional[Request] = None,
+        request: Optional["Request"] = None,
         chat_hist: Optional[List[str]] = None,
         sampling_paras: Optional[Dict] = None,
         tools: Optional[List[Dict]] = None,
@@ -404,6 +440,12 @@ class AsyncGenerate(object):
         Returns:
             Dict: Response from the model or error information
         """
+        # Shared background watcher for client disconnects
+        watcher = DisconnectWatcher.acquire(request)
+
+        # Time the phases when profiling is enabled
+        timer = profiling.start("TogetherAI", "call")
+
         try:
             # Format the chat history and user message
             messages = await self._chat_formatter(
@@ -411,6 +453,7 @@ class AsyncGenerate(object):
                 chat_hist=chat_hist,
                 system_prompt=system_prompt,
             )
+            timer.lap("format")
 
             # Return early if message formatting failed
             if isinstance(messages, Dict):
@@ -420,7 +463,7 @@ class AsyncGenerate(object):
             sampling_paras = sampling_paras or {}
 
             # Check if the request was disconnected
-            if request and await request.is_disconnected():
+            if watcher and watcher.disconnected:
                 return {"error": 400, "reason": "request aborted by user"}
 
             # Check if tools and tool_choice are provided and format them
@@ -456,8 +499,17 @@ class AsyncGenerate(object):
             if do_json:
                 params["response_format"] = {"type": "json_object"}
 
+            timer.lap("prepare")
+
             # Call the TogetherAI API with the formatted parameters
-            completion = await self.client.chat.completions.create(**params)
+            call = self.client.chat.completions.create(**params)
+
+            # Cancel the in-flight call if the client disconnects meanwhile
+            completion = await watcher.run(call) if watcher else await call
+            if completion is None:
+                return {"error": 400, "reason": "request aborted by user"}
+
+            timer.lap("request")
 
             result = {
                 "response": completion.choices[0].message.content or "",
@@ -481,23 +533,29 @@ class AsyncGenerate(object):
                     )
                 result["tools"] = tool_calls
 
+            timer.lap("parse")
             return result
 
         except Exception as e:
             error_explainer(e)
             return {"error": 500, "reason": str(e)}
+        finally:
+            timer.finish()
+            if watcher:
+                watcher.release()
 
     async def streaming(
         self,
         model_name: str,
         user_message: str,
-        request: Optional[Request] = None,
+        request: Optional["Request"] = None,
         chat_hist: Optional[List[str]] = None,
         sampling_paras: Optional[Dict] = None,
         tools: Optional[List[Dict]] = None,
         tool_choice: Optional[str] = None,
         system_prompt: Optional[str] = None,
         do_json: Optional[bool] = False,
+        accumulate: Optional[bool] = True,
     ) -> AsyncGenerator:
         """
         Stream responses from the specified model.
@@ -512,10 +570,20 @@ class AsyncGenerate(object):
             - tools (List[Dict], optional): List of tools to be used by the model.
             - tool_choice (Optional[str], optional): Specifies if and which tool the model must call — "none" for no tools, "auto" for automatic, "required" for mandatory, or a specific tool's name.
             - do_json (bool, optional): Whether to format the response as JSON. Defaults to False
+            - accumulate (bool, optional): Whether to build the full response text for the final chunk. Defaults to True
 
         Yields:
             AsyncGenerator: Chunks of the model's response or error information
         """
+        # Shared background watcher for client disconnects
+        watcher = DisconnectWatcher.acquire(request)
+
+        # Provider stream, always closed in the finally block
+        completion = None
+
+        # Time the phases when profiling is enabled
+        timer = profiling.start("TogetherAI", "stream")
+
         try:
             # Format the chat history and user message
             messages = await self._chat_formatter(
@@ -523,6 +591,7 @@ class AsyncGenerate(object):
                 chat_hist=chat_hist,
                 system_prompt=system_prompt,
             )
+            timer.lap("format")
 
             # Yield error and return early if message formatting failed
             if isinstance(messages, Dict):
@@ -566,25 +635,32 @@ class AsyncGenerate(object):
                 if do_json:
                     params["response_format"] = {"type": "json_object"}
 
+                timer.lap("prepare")
+
                 # Start the streaming session
                 completion = await self.client.chat.completions.create(**params)
+                stream_tracker.track(completion, "TogetherAI")
+                timer.lap("request")
 
-                response = ""
+                response_parts = []
                 usage = {}
                 tool_calls = []
                 tool_arg_buffer = ""
 
                 # Stream text chunks as they become available
-                async for chunk in completion:
-                    if request and await request.is_disconnected():
+                async for chunk in timer.aiterate(completion):
+                    if watcher and watcher.disconnected:
                         yield {"error": 400, "reason": "request aborted by user"}
-                        await completion.close()
+                        await aclose_stream(completion)
                         break
                     else:
                         delta = chunk.choices[0].delta if chunk.choices else None
                         if delta and delta.content:
-                            response += delta.content
+                            if accumulate:
+                                response_parts.append(delta.content)
+                            timer.lap("parse")
                             yield delta.content
+                            timer.skip()
                         elif (
                             delta and hasattr(delta, "tool_calls") and delta.tool_calls
                         ):
@@ -606,18 +682,25 @@ class AsyncGenerate(object):
                             usage = chunk.usage.model_dump()
 
                 # Format the final response with metadata
-                result = {
-                    "response": response,
-                    "metadata": {"usage": usage},
-                }
+                result = {"response": "".join(response_parts)} if accumulate else {}
+                result["metadata"] = {"usage": usage}
 
                 if tools:
                     result["tools"] = tool_calls
 
+                timer.lap("parse")
                 yield result
         except Exception as e:
-            error_explainer(e)
-            yield {"error": 500, "reason": str(e)}
+            if watcher and watcher.disconnected:
+                yield {"error": 400, "reason": "request aborted by user"}
+            else:
+                error_explainer(e)
+                yield {"error": 500, "reason": str(e)}
+        finally:
+            timer.finish()
+            await aclose_stream(completion)
+            if watcher:
+                watcher.release()
 
     async def _chat_formatter(
         self,
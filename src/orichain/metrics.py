@@ -0,0 +1,673 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from contextvars import ContextVar
+import threading
+import time
+
+from orichain.usage import normalize
+
+# Histogram buckets, latency ones are in seconds
+LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+GAP_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+PHASE_BUCKETS = (
+    0.00001,
+    0.000025,
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+THROUGHPUT_BUCKETS = (1, 5, 10, 25, 50, 75, 100, 150, 200, 300, 500, 1000)
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+# Name, type, help text and buckets of every metric orichain records
+METRICS = {
+    "orichain_requests_total": (
+        "counter",
+        "Number of calls made through orichain",
+        None,
+    ),
+    "orichain_errors_total": (
+        "counter",
+        "Number of failed calls by error class",
+        None,
+    ),
+    "orichain_request_duration_seconds": (
+        "histogram",
+        "End to end latency of a call",
+        LATENCY_BUCKETS,
+    ),
+    "orichain_time_to_first_token_seconds": (
+        "histogram",
+        "Time from the start of a stream to its first text chunk",
+        LATENCY_BUCKETS,
+    ),
+    "orichain_inter_token_gap_seconds": (
+        "histogram",
+        "Time between two consecutive text chunks of a stream",
+        GAP_BUCKETS,
+    ),
+    "orichain_output_tokens_per_second": (
+        "histogram",
+        "Output tokens generated per second",
+        THROUGHPUT_BUCKETS,
+    ),
+    "orichain_queue_wait_seconds": (
+        "histogram",
+        "Time spent waiting for a worker thread or an admission slot",
+        LATENCY_BUCKETS,
+    ),
+    "orichain_phase_duration_seconds": (
+        "histogram",
+        "Time spent in each phase of a provider call, recorded by orichain.profiling",
+        PHASE_BUCKETS,
+    ),
+    "orichain_circuit_transitions_total": (
+        "counter",
+        "Number of circuit breaker state changes, by breaker and new state",
+        None,
+    ),
+    "orichain_circuit_rejections_total": (
+        "counter",
+        "Number of calls rejected by an open circuit breaker",
+        None,
+    ),
+    "orichain_retries_total": (
+        "counter",
+        "Number of retries made by orichain retry policies, by target and error status",
+        None,
+    ),
+    "orichain_retry_budget_exhausted_total": (
+        "counter",
+        "Number of retries skipped because the retry budget was spent",
+        None,
+    ),
+    "orichain_scheduler_shed_total": (
+        "counter",
+        "Number of queued LLM calls shed by a scheduler, by scheduler and priority class",
+        None,
+    ),
+    "orichain_scheduler_rejected_total": (
+        "counter",
+        "Number of LLM calls rejected by a scheduler with a full queue",
+        None,
+    ),
+    "orichain_router_selections_total": (
+        "counter",
+        "Number of calls sent to each route by an LLM router",
+        None,
+    ),
+    "orichain_pool_calls_total": (
+        "counter",
+        "Number of attempts made on each member of a client pool, by status",
+        None,
+    ),
+    "orichain_pool_failovers_total": (
+        "counter",
+        "Number of attempts that moved on to another member of a client pool",
+        None,
+    ),
+    "orichain_pool_tokens_total": (
+        "counter",
+        "Input and output tokens used through each member of a client pool",
+        None,
+    ),
+    "orichain_pool_latency_seconds": (
+        "histogram",
+        "Latency of the successful attempts on each member of a client pool",
+        LATENCY_BUCKETS,
+    ),
+    "orichain_conversation_turns_total": (
+        "counter",
+        "Number of Responses API turns by conversation state: continued, resent or expired",
+        None,
+    ),
+    "orichain_context_cache_events_total": (
+        "counter",
+        "Number of Gemini/Vertex AI context cache events: hit, miss, created, refused, refreshed, evicted or invalidated",
+        None,
+    ),
+    "orichain_memory_events_total": (
+        "counter",
+        "Number of conversation memory events: loaded, evicted, compacted, compaction_failed, compaction_discarded, truncated or save_failed",
+        None,
+    ),
+    "orichain_embedding_cache_lookups_total": (
+        "counter",
+        "Number of texts looked up in an embedding cache by result: memory, disk, coalesced or miss",
+        None,
+    ),
+    "orichain_embedding_batch_size": (
+        "histogram",
+        "Number of texts in each provider call sent by an embedding micro-batcher",
+        BATCH_BUCKETS,
+    ),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Optional[Dict[str, Any]]) -> Labels:
+    """Converts a labels dict into a hashable, sorted tuple"""
+    if not labels:
+        return ()
+    return tuple(sorted((k, "" if v is None else str(v)) for k, v in labels.items()))
+
+
+class MetricsSink(object):
+    """
+    Base class for metric sinks.
+
+    A sink receives counter increments and histogram observations. Subclass it and override
+    `increment` and `observe` to ship metrics to any other backend.
+    """
+
+    def increment(
+        self, name: str, value: float = 1, labels: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Increments a counter.
+
+        Args:
+            - name (str): Metric name
+            - value (float, optional): Amount to add. Defaults to 1
+            - labels (Dict[str, Any], optional): Metric labels
+        """
+        raise NotImplementedError
+
+    def observe(
+        self, name: str, value: float, labels: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Records one observation of a histogram.
+
+        Args:
+            - name (str): Metric name
+            - value (float): Observed value
+            - labels (Dict[str, Any], optional): Metric labels
+        """
+        raise NotImplementedError
+
+
+class InMemorySink(MetricsSink):
+    """Keeps counters and bucketed histograms in process memory."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.counters: Dict[str, Dict[Labels, float]] = {}
+        self.histograms: Dict[str, Dict[Labels, Dict[str, Any]]] = {}
+
+    def increment(
+        self, name: str, value: float = 1, labels: Optional[Dict[str, Any]] = None
+    ) -> None:
+        key = _labels(labels)
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(
+        self, name: str, value: float, labels: Optional[Dict[str, Any]] = None
+    ) -> None:
+        key = _labels(labels)
+        buckets = (METRICS.get(name) or (None, None, None))[2] or LATENCY_BUCKETS
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = {
+                    "buckets": buckets,
+                    "counts": [0] * len(buckets),
+                    "sum": 0.0,
+                    "count": 0,
+                }
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    histogram["counts"][i] += 1
+                    break
+            histogram["sum"] += value
+            histogram["count"] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Returns a copy of everything recorded so far.
+
+        Returns:
+            Dict[str, Any]: {"counters": {...}, "histograms": {...}} keyed by metric name and label tuple
+        """
+        with self._lock:
+            return {
+                "counters": {n: dict(s) for n, s in self.counters.items()},
+                "histograms": {
+                    n: {k: {**h, "counts": list(h["counts"])} for k, h in s.items()}
+                    for n, s in self.histograms.items()
+                },
+            }
+
+    def quantile(
+        self, name: str, q: float, labels: Optional[Dict[str, Any]] = None
+    ) -> Optional[float]:
+        """Estimates a quantile of a histogram from its buckets.
+
+        Args:
+            - name (str): Histogram name
+            - q (float): Quantile between 0 and 1
+            - labels (Dict[str, Any], optional): Only use the series with these exact labels, all series are merged otherwise
+
+        Returns:
+            Optional[float]: Upper bound of the bucket holding the quantile, None if nothing was observed
+        """
+        with self._lock:
+            series = self.histograms.get(name, {})
+            selected = (
+                [series.get(_labels(labels))] if labels is not None else series.values()
+            )
+            selected = [h for h in selected if h]
+            if not selected:
+                return None
+            buckets = selected[0]["buckets"]
+            counts = [
+                sum(h["counts"][i] for h in selected) for i in range(len(buckets))
+            ]
+            total = sum(h["count"] for h in selected)
+
+        rank = q * total
+        seen = 0
+        for bound, count in zip(buckets, counts):
+            seen += count
+            if seen >= rank and seen > 0:
+                return bound
+        return float("inf")
+
+    def reset(self) -> None:
+        """Drops everything recorded so far."""
+        with self._lock:
+            self.counters = {}
+            self.histograms = {}
+
+
+class PrometheusSink(InMemorySink):
+    """
+    In-memory sink that renders the Prometheus text exposition format.
+
+    Serve `render()` from your own endpoint, e.g. with FastAPI:
+    `app.get("/metrics", response_class=PlainTextResponse)(lambda: sink.render())`,
+    or call `start_http_server` to expose it on a dedicated port.
+    """
+
+    def render(self) -> str:
+        """Renders all the metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: Exposition text, version 0.0.4
+        """
+        data = self.snapshot()
+        lines: List[str] = []
+
+        for name, series in sorted(data["counters"].items()):
+            lines.extend(self._header(name, "counter"))
+            for key, value in series.items():
+                lines.append(f"{name}{self._format_labels(key)} {value}")
+
+        for name, series in sorted(data["histograms"].items()):
+            lines.extend(self._header(name, "histogram"))
+            for key, histogram in series.items():
+                cumulative = 0
+                for bound, count in zip(histogram["buckets"], histogram["counts"]):
+                    cumulative += count
+                    le = self._format_labels(key + (("le", repr(float(bound))),))
+                    lines.append(f"{name}_bucket{le} {cumulative}")
+                le = self._format_labels(key + (("le", "+Inf"),))
+                lines.append(f"{name}_bucket{le} {histogram['count']}")
+                lines.append(f"{name}_sum{self._format_labels(key)} {histogram['sum']}")
+                lines.append(
+                    f"{name}_count{self._format_labels(key)} {histogram['count']}"
+                )
+
+        return "\n".join(lines) + "\n"
+
+    def start_http_server(self, port: int, addr: str = "0.0.0.0") -> Any:
+        """Serves `render()` on http://addr:port/metrics from a daemon thread.
+
+        Args:
+            - port (int): Port to listen on
+            - addr (str, optional): Address to bind. Defaults to "0.0.0.0"
+
+        Returns:
+            ThreadingHTTPServer: The running server, call `shutdown()` to stop it
+        """
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        sink = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = sink.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((addr, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+    @staticmethod
+    def _header(name: str, metric_type: str) -> List[str]:
+        help_text = (METRICS.get(name) or (None, name, None))[1]
+        return [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+
+    @staticmethod
+    def _format_labels(key: Labels) -> str:
+        if not key:
+            return ""
+        pairs = ",".join(
+            '{}="{}"'.format(
+                k, v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+            )
+            for k, v in key
+        )
+        return "{" + pairs + "}"
+
+
+class StatsDSink(MetricsSink):
+    """
+    Sends metrics to a StatsD agent over UDP.
+
+    Histograms measured in seconds are sent as millisecond timers, the others as histograms.
+    Labels are sent as DogStatsD tags, or appended to the metric name when `use_tags` is False.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8125,
+        prefix: Optional[str] = None,
+        use_tags: bool = True,
+    ) -> None:
+        """
+        Args:
+            - host (str, optional): StatsD host. Defaults to "127.0.0.1"
+            - port (int, optional): StatsD port. Defaults to 8125
+            - prefix (str, optional): Prefix added to every metric name
+            - use_tags (bool, optional): Send labels as DogStatsD tags. Defaults to True
+        """
+        self.address = (host, port)
+        self.prefix = f"{prefix}." if prefix else ""
+        self.use_tags = use_tags
+
+        import socket
+
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.setblocking(False)
+
+    def increment(
+        self, name: str, value: float = 1, labels: Optional[Dict[str, Any]] = None
+    ) -> None:
+        self._send(name, value, "c", labels)
+
+    def observe(
+        self, name: str, value: float, labels: Optional[Dict[str, Any]] = None
+    ) -> None:
+        if name.endswith("_seconds"):
+            self._send(name[: -len("_seconds")] + "_ms", value * 1000, "ms", labels)
+        else:
+            self._send(name, value, "h", labels)
+
+    def close(self) -> None:
+        """Closes the UDP socket."""
+        self._socket.close()
+
+    def _send(
+        self, name: str, value: float, kind: str, labels: Optional[Dict[str, Any]]
+    ) -> None:
+        key = _labels(labels)
+        if self.use_tags:
+            line = f"{self.prefix}{name}:{value:g}|{kind}"
+            if key:
+                line += "|#" + ",".join(f"{k}:{v}" for k, v in key)
+        else:
+            suffix = "".join(f".{v}" for _, v in key if v).replace(":", "_")
+            line = f"{self.prefix}{name}{suffix}:{value:g}|{kind}"
+
+        try:
+            self._socket.sendto(line.encode("utf-8"), self.address)
+        except OSError:
+            # Metrics must never break the call being measured
+            pass
+
+
+# Active sink, None means metrics are disabled
+_sink: Optional[MetricsSink] = None
+
+# Call being measured in the current context, used to attribute errors and queue waits
+_current_call: ContextVar[Optional["CallMetrics"]] = ContextVar(
+    "orichain_current_call", default=None
+)
+
+
+def configure(sink: Optional[MetricsSink]) -> None:
+    """Enables metrics by installing a sink, or disables them with None.
+
+    Args:
+        - sink (Optional[MetricsSink]): e.g. InMemorySink(), PrometheusSink() or StatsDSink()
+    """
+    global _sink
+    _sink = sink
+
+
+def get_sink() -> Optional[MetricsSink]:
+    """Returns the active sink, or None when metrics are disabled."""
+    return _sink
+
+
+class CallMetrics(object):
+    """Timings of one instrumented call. Created by `start_call` only when metrics are enabled."""
+
+    __slots__ = (
+        "sink",
+        "labels",
+        "start",
+        "first_chunk",
+        "last_chunk",
+        "error_class",
+        "finished",
+        "_token",
+    )
+
+    def __init__(self, sink: MetricsSink, labels: Dict[str, Any]) -> None:
+        self.sink = sink
+        self.labels = labels
+        self.start = time.perf_counter()
+        self.first_chunk: Optional[float] = None
+        self.last_chunk: Optional[float] = None
+        self.error_class: Optional[str] = None
+        self.finished = False
+        self._token = _current_call.set(self)
+
+    def chunk(self) -> None:
+        """Records a streamed text chunk, for time to first token and inter-token gaps."""
+        now = time.perf_counter()
+        labels = self._stream_labels()
+        if self.first_chunk is None:
+            self.first_chunk = now
+            self.sink.observe(
+                "orichain_time_to_first_token_seconds", now - self.start, labels
+            )
+        else:
+            self.sink.observe(
+                "orichain_inter_token_gap_seconds", now - self.last_chunk, labels
+            )
+        self.last_chunk = now
+
+    def queue_wait(self, seconds: float) -> None:
+        """Records time spent waiting before the work could start.
+
+        Args:
+            - seconds (float): Wait time in seconds
+        """
+        self.sink.observe("orichain_queue_wait_seconds", seconds, self.labels)
+
+    def finish(self, result: Any = None, error: Optional[BaseException] = None) -> None:
+        """Records latency, throughput and errors of the finished call. Later calls are ignored.
+
+        Args:
+            - result (Any, optional): Value returned by the call, error dicts are counted as errors
+            - error (BaseException, optional): Exception raised by the call
+        """
+        if self.finished:
+            return
+        self.finished = True
+
+        end = time.perf_counter()
+        self.sink.increment("orichain_requests_total", 1, self.labels)
+
+        if error is None and isinstance(result, dict) and "error" in result:
+            if result.get("reason") == "request aborted by user":
+                error_class = "ClientDisconnected"
+            else:
+                error_class = self.error_class or f"Error{result.get('error')}"
+        elif error is not None:
+            error_class = type(error).__name__
+        else:
+            error_class = None
+
+        if error_class:
+            self.sink.increment(
+                "orichain_errors_total", 1, {**self.labels, "error_class": error_class}
+            )
+
+        self.sink.observe(
+            "orichain_request_duration_seconds",
+            end - self.start,
+            {**self.labels, "status": "error" if error_class else "ok"},
+        )
+
+        if not error_class and isinstance(result, dict):
+            usage = normalize((result.get("metadata") or {}).get("usage"))
+            tokens = usage.output_tokens if usage else None
+            started = self.first_chunk or self.start
+            if tokens and end > started:
+                self.sink.observe(
+                    "orichain_output_tokens_per_second",
+                    tokens / (end - started),
+                    self._stream_labels(),
+                )
+
+        try:
+            _current_call.reset(self._token)
+        except ValueError:
+            # Finished from another context (e.g. a generator resumed elsewhere)
+            pass
+
+    def close(self) -> None:
+        """Finishes a call that stopped before producing a result, e.g. a stream closed early
+        by its consumer or a cancelled task. Ignored if the call already finished."""
+        if not self.finished:
+            self.error_class = "Cancelled"
+            self.finish({"error": 499})
+
+    def _stream_labels(self) -> Dict[str, Any]:
+        return {
+            "component": self.labels.get("component"),
+            "provider": self.labels.get("provider"),
+            "model": self.labels.get("model"),
+        }
+
+
+def start_call(
+    component: str,
+    operation: str,
+    provider: Optional[str] = None,
+    model: Optional[str] = None,
+) -> Optional[CallMetrics]:
+    """Starts measuring a call. Returns None, at the cost of one global lookup, when disabled.
+
+    Args:
+        - component (str): llm, embeddings, knowledge_base or lang_detect
+        - operation (str): Name of the operation, e.g. call, stream, fetch
+        - provider (str, optional): Model provider or vector database
+        - model (str, optional): Model or index name
+
+    Returns:
+        Optional[CallMetrics]: Call to report chunks and the result to
+    """
+    sink = _sink
+    if sink is None:
+        return None
+    return CallMetrics(
+        sink,
+        {
+            "component": component,
+            "operation": operation,
+            "provider": provider,
+            "model": model,
+        },
+    )
+
+
+def note_exception(e: BaseException) -> None:
+    """Remembers the exception class for the call being measured in this context.
+
+    Called by `error_explainer`, so providers that swallow exceptions into error dicts still
+    report the real error class.
+
+    Args:
+        - e (BaseException): The exception
+    """
+    call = _current_call.get()
+    if call is not None and not call.finished:
+        call.error_class = type(e).__name__
+
+
+async def run_in_thread(func: Callable, /, *args: Any, **kwargs: Any) -> Any:
+    """`asyncio.to_thread` that also records how long the call waited for a worker thread.
+
+    Args:
+        - func (Callable): Blocking function to run
+        - *args, **kwargs: Arguments for the function
+
+    Returns:
+        Any: Result of the function
+    """
+    import asyncio
+
+    call = _current_call.get() if _sink is not None else None
+    if call is None:
+        return await asyncio.to_thread(func, *args, **kwargs)
+
+    submitted = time.perf_counter()
+
+    def _run() -> Any:
+        call.queue_wait(time.perf_counter() - submitted)
+        return func(*args, **kwargs)
+
+    return await asyncio.to_thread(_run)
@@ -0,0 +1,793 @@
+from typing import Any, AsyncGenerator, Callable, Dict, Generator, List, Optional, Set
+import threading
+import time
+
+from orichain import last_error, metrics, resilience, usage
+from orichain.streaming import aclose_stream, close_stream
+
+# Pool arguments of the model classes, and the providers that accept them
+POOL_ARGUMENTS = {
+    "deployments": ("AzureOpenAI",),
+    "regions": ("AWSBedrock", "AnthropicBedrock"),
+    "api_keys": ("OpenAI", "Anthropic", "TogetherAI", "GoogleGemini"),
+    "servers": ("OpenAICompatible",),
+}
+
+# How a member is picked within a tier
+STRATEGIES = ("latency", "least_loaded", "round_robin")
+
+# Named tiers, served in this order: provisioned throughput first, pay-as-you-go after
+TIERS = {"ptu": 0, "payg": 1}
+
+# Provider argument given by the entries that are plain strings
+_STRING_ENTRIES = {
+    "regions": "aws_region",
+    "api_keys": "api_key",
+    "servers": "base_url",
+}
+
+# Settings of a member entry that are not provider arguments
+_MEMBER_SETTINGS = ("name", "tier", "weight")
+
+# Response headers carrying the rate limit state of a member
+_UTILIZATION_HEADER = "azure-openai-deployment-utilization"
+_LIMITS = ("requests", "tokens")
+
+# Marks a stream that ended before its first chunk
+_END = object()
+
+
+class PoolMember(object):
+    """
+    One provider client of a `ClientPool`, e.g. an Azure deployment, a Bedrock region or a
+    self-hosted server replica, with what was observed of it: smoothed latency and health, calls
+    in flight, rate limit headers and throttling cooldown.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        model: Any = None,
+        tier: Any = 0,
+        weight: float = 1.0,
+        model_name: Optional[str] = None,
+        models: Optional[List[str]] = None,
+    ) -> None:
+        """
+        Args:
+            - name (str): Name used in metrics and snapshots
+            - model (Generate or Embed, optional): Provider instance of the member
+            - tier (int or str, optional): Tier of the member, lower tiers are served first. Also
+              "ptu" (0) or "payg" (1). Default: 0
+            - weight (float, optional): Relative capacity of the member within its tier. Default: 1
+            - model_name (str, optional): Model name sent with the calls of this member instead of
+              the caller's, e.g. an Azure deployment name. Default: None
+            - models (List[str], optional): Models the member serves, calls for other models skip
+              it. Default: None, every model
+
+        Raises:
+            - ValueError: If the tier name is unknown
+        """
+        if isinstance(tier, str):
+            if tier not in TIERS:
+                raise ValueError(
+                    f"\nUnsupported tier: {tier}\nSupported tiers are: "
+                    + ", ".join(TIERS)
+                )
+            tier = TIERS[tier]
+        self.name = name
+        self.model = model
+        self.tier = tier
+        self.weight = weight
+        self.model_name = model_name
+        self.models = models
+
+        self.latency: Optional[float] = None
+        self.health = 1.0
+        self.inflight = 0
+        self.calls = 0
+        self.failures = 0
+        self.throttled = 0
+        self.cooldown_until = 0.0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        # Smooth weighted round robin state
+        self.current_weight = 0.0
+        self.utilization: Optional[float] = None
+        self.observed_at = 0.0
+        self.remaining: Dict[str, Optional[float]] = {limit: None for limit in _LIMITS}
+
+    def observe(self, response: Any) -> None:
+        """Reads the rate limit headers of a provider response.
+
+        Azure provisioned deployments report their utilization, other endpoints their remaining
+        requests and tokens. Passed to the provider client as its response hook.
+
+        Args:
+            - response (httpx.Response or headers): Response of the provider
+        """
+        headers = getattr(response, "headers", response)
+        if not hasattr(headers, "get"):
+            return
+        utilization = None
+        value = headers.get(_UTILIZATION_HEADER)
+        if value is not None:
+            utilization = _number(str(value).rstrip("%"))
+            if utilization is not None:
+                utilization /= 100
+        for limit in _LIMITS:
+            remaining = _number(headers.get(f"x-ratelimit-remaining-{limit}"))
+            if remaining is None:
+                continue
+            self.remaining[limit] = remaining
+            total = _number(headers.get(f"x-ratelimit-limit-{limit}"))
+            if total:
+                used = 1 - remaining / total
+                utilization = used if utilization is None else max(utilization, used)
+            elif remaining <= 0:
+                utilization = 1.0
+        if utilization is not None:
+            self.utilization = utilization
+            self.observed_at = time.monotonic()
+
+    def serves(self, model_name: Optional[str]) -> bool:
+        """Whether calls for that model can go to the member"""
+        return (
+            not model_name
+            or self.models is None
+            or self.model_name is not None
+            or model_name in self.models
+        )
+
+    def available(self, now: float) -> bool:
+        """Whether the member is out of its throttling cooldown."""
+        return now >= self.cooldown_until
+
+    def saturated(self, now: float, max_utilization: float, ttl: float) -> bool:
+        """Whether the member reported a utilization above `max_utilization` recently."""
+        return (
+            self.utilization is not None
+            and now - self.observed_at < ttl
+            and self.utilization >= max_utilization
+        )
+
+    def score(self) -> float:
+        """Expected latency of one more call, the member with the lowest score is picked."""
+        return (
+            (self.latency or 0.0)
+            * (1 + self.inflight / self.weight)
+            * (1 + (self.utilization or 0.0))
+            / max(self.health, 0.05)
+        )
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Returns what was observed of the member, for metrics and health endpoints."""
+        return {
+            "name": self.name,
+            "tier": self.tier,
+            "latency": self.latency,
+            "health": self.health,
+            "inflight": self.inflight,
+            "calls": self.calls,
+            "failures": self.failures,
+            "throttled": self.throttled,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "cooling_down": max(self.cooldown_until - time.monotonic(), 0.0),
+            "utilization": self.utilization,
+            "remaining": dict(self.remaining),
+        }
+
+    def __repr__(self) -> str:
+        return f"PoolMember({self.name!r}, tier={self.tier})"
+
+
+class ClientPool(object):
+    """
+    Spreads the calls of one model over several provider clients.
+
+    - Members are served by tier, lowest first: a provisioned (PTU) deployment takes the traffic
+      while it can, pay-as-you-go deployments take the spillover.
+    - A member that reported a utilization above `max_utilization` in the last
+      `utilization_ttl` seconds is skipped while another member of its tier, or of a later tier,
+      has room.
+    - A throttled member (429) cools down for the Retry-After it was given, or `cooldown`
+      seconds, and the call moves on to the next member. Other transient errors move on too.
+    - Members that list the `models` they serve only get the calls for those models.
+    - Within a tier, the member is picked by `strategy`:
+        - latency: the lowest expected latency, i.e. its smoothed latency, scaled by its calls in
+          flight over its weight and by its utilization, and divided by its health (the smoothed
+          share of its calls that succeeded)
+        - least_loaded: the fewest calls in flight for its weight
+        - round_robin: in turn, each member as often as its weight
+
+    The pool is thread-safe.
+    """
+
+    def __init__(
+        self,
+        members: List[PoolMember],
+        name: str = "default",
+        cooldown: float = 10.0,
+        max_utilization: float = 0.9,
+        utilization_ttl: float = 10.0,
+        smoothing: float = 0.2,
+        strategy: str = "latency",
+    ) -> None:
+        """
+        Args:
+            - members (List[PoolMember]): Members of the pool
+            - name (str, optional): Name used in metrics and errors, e.g. llm:AzureOpenAI
+            - cooldown (float, optional): Seconds a throttled member is skipped for when the
+              provider did not send a Retry-After. Default: 10
+            - max_utilization (float, optional): Utilization from which a member spills its
+              traffic over to the others, between 0 and 1. Default: 0.9
+            - utilization_ttl (float, optional): Seconds a reported utilization is trusted for.
+              Default: 10
+            - smoothing (float, optional): Weight of the newest call in the moving averages of
+              latency and health. Default: 0.2
+            - strategy (str, optional): latency, least_loaded or round_robin. Default: latency
+
+        Raises:
+            - ValueError: If the pool has no members or the strategy is unknown
+        """
+        if not members:
+            raise ValueError(f"Client pool {name} needs at least one member")
+        if strategy not in STRATEGIES:
+            raise ValueError(
+                f"\nUnsupported strategy: {strategy}\nSupported strategies are: "
+                + ", ".join(STRATEGIES)
+            )
+        self.members = sorted(members, key=lambda member: member.tier)
+        self.name = name
+        self.cooldown = cooldown
+        self.max_utilization = max_utilization
+        self.utilization_ttl = utilization_ttl
+        self.smoothing = smoothing
+        self.strategy = strategy
+        self._lock = threading.Lock()
+
+    def select(
+        self,
+        exclude: Optional[Set[PoolMember]] = None,
+        model_name: Optional[str] = None,
+    ) -> Optional[PoolMember]:
+        """Picks the member for the next attempt of a call and counts it in flight.
+
+        Args:
+            - exclude (Set[PoolMember], optional): Members already tried by the call
+            - model_name (str, optional): Model of the call, members that do not serve it are
+              skipped
+
+        Returns:
+            Optional[PoolMember]: The member, None when every member was tried or is cooling down
+        """
+        now = time.monotonic()
+        with self._lock:
+            candidates = [
+                member
+                for member in self.members
+                if member.available(now)
+                and member.serves(model_name)
+                and not (exclude and member in exclude)
+            ]
+            if not candidates:
+                return None
+
+            # First tier with a member that has room, else every candidate
+            roomy = [
+                member
+                for member in candidates
+                if not member.saturated(now, self.max_utilization, self.utilization_ttl)
+            ]
+            pick_from = roomy or candidates
+            tier = pick_from[0].tier
+            member = self._pick([member for member in pick_from if member.tier == tier])
+            member.inflight += 1
+            return member
+
+    def _pick(self, members: List[PoolMember]) -> PoolMember:
+        """Picks one of the members of a tier according to the strategy"""
+        if self.strategy == "least_loaded":
+            return min(
+                members,
+                key=lambda member: (
+                    member.inflight / member.weight,
+                    member.calls / member.weight,
+                ),
+            )
+        if self.strategy == "round_robin":
+            # Smooth weighted round robin: no member gets two turns in a row unless it weighs more
+            total = 0.0
+            for member in members:
+                member.current_weight += member.weight
+                total += member.weight
+            member = max(members, key=lambda member: member.current_weight)
+            member.current_weight -= total
+            return member
+        return min(members, key=lambda member: member.score())
+
+    def record(
+        self,
+        member: PoolMember,
+        result: Any,
+        error: Optional[BaseException],
+        duration: float,
+    ) -> bool:
+        """Records the outcome of an attempt on a member.
+
+        Args:
+            - member (PoolMember): Member the attempt went to
+            - result (Any): Value returned by the provider, or None if it raised
+            - error (BaseException, optional): Exception raised or explained by the provider
+            - duration (float): Seconds the attempt took, to its first chunk for streams
+
+        Returns:
+            bool: True if the call should move on to another member
+        """
+        failed = error is not None or (isinstance(result, dict) and "error" in result)
+        status = resilience.error_status(result, error) if failed else None
+        # A client error says nothing about the health of the member
+        unhealthy = failed and (status is None or status >= 500 or status in (408, 429))
+        with self._lock:
+            member.inflight -= 1
+            member.calls += 1
+            member.health += self.smoothing * (
+                (0.0 if unhealthy else 1.0) - member.health
+            )
+            if not failed:
+                if member.latency is None:
+                    member.latency = duration
+                else:
+                    member.latency += self.smoothing * (duration - member.latency)
+            else:
+                member.failures += 1
+                if status == 429:
+                    member.throttled += 1
+                    wait = resilience.retry_after(result, error)
+                    member.cooldown_until = time.monotonic() + (
+                        self.cooldown if wait is None else wait
+                    )
+
+        self._count(
+            "orichain_pool_calls_total",
+            member,
+            "ok" if not failed else str(status or "error"),
+        )
+        sink = metrics.get_sink()
+        if sink and not failed:
+            sink.observe(
+                "orichain_pool_latency_seconds",
+                duration,
+                {"pool": self.name, "member": member.name},
+            )
+        move_on = failed and (status == 429 or resilience.is_retryable(result, error))
+        if move_on:
+            self._count("orichain_pool_failovers_total", member, str(status or "error"))
+        return move_on
+
+    def account(self, member: PoolMember, result: Any) -> None:
+        """Adds the token usage of a result, or of the final chunk of a stream, to a member.
+
+        Args:
+            - member (PoolMember): Member that answered
+            - result (Any): Value returned by the provider
+        """
+        if not isinstance(result, dict) or not isinstance(result.get("metadata"), dict):
+            return
+        record = usage.normalize(result["metadata"].get("usage"))
+        if record is None:
+            return
+        with self._lock:
+            member.input_tokens += record.input_tokens
+            member.output_tokens += record.output_tokens
+        sink = metrics.get_sink()
+        if sink:
+            labels = {"pool": self.name, "member": member.name}
+            sink.increment(
+                "orichain_pool_tokens_total",
+                record.input_tokens,
+                {**labels, "kind": "input"},
+            )
+            sink.increment(
+                "orichain_pool_tokens_total",
+                record.output_tokens,
+                {**labels, "kind": "output"},
+            )
+
+    def release(self, member: PoolMember) -> None:
+        """Gives back a member whose attempt should not count, e.g. a stream closed early."""
+        with self._lock:
+            member.inflight -= 1
+
+    def exhausted(self, model_name: Optional[str] = None) -> Dict:
+        """Error dict returned when no member can take a call.
+
+        Args:
+            - model_name (str, optional): Model of the call
+
+        Returns:
+            Dict: 404 if no member serves the model, else 429 as every member is cooling down
+        """
+        if not any(member.serves(model_name) for member in self.members):
+            return {
+                "error": 404,
+                "reason": f"no member of client pool {self.name} serves model {model_name}",
+            }
+        return {
+            "error": 429,
+            "reason": f"every member of client pool {self.name} is throttled",
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Returns the state of the pool and its members, for metrics and health endpoints."""
+        return {
+            "name": self.name,
+            "members": [member.snapshot() for member in self.members],
+        }
+
+    def _count(self, name: str, member: PoolMember, status: str) -> None:
+        """Increments a pool counter when metrics are enabled"""
+        sink = metrics.get_sink()
+        if sink:
+            sink.increment(
+                name, 1, {"pool": self.name, "member": member.name, "status": status}
+            )
+
+    def __repr__(self) -> str:
+        return f"ClientPool({self.name!r}, members={len(self.members)})"
+
+
+class Pooled(object):
+    """Sends the calls of a provider `Generate` or `Embed` to the members of a `ClientPool`.
+
+    A call that is throttled or fails transiently on one member is made again on the next one.
+    Streams only move on while nothing has been yielded yet.
+    """
+
+    def __init__(self, pool: ClientPool) -> None:
+        """
+        Args:
+            - pool (ClientPool): Pool whose members make the calls
+        """
+        self.pool = pool
+        self.model = pool.members[0].model
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.model, name)
+
+    def __call__(self, **kwds: Any) -> Any:
+        tried: Set[PoolMember] = set()
+        member, result, error = None, None, None
+        while True:
+            candidate = self.pool.select(tried, kwds.get("model_name"))
+            if candidate is None:
+                break
+            member = candidate
+            tried.add(member)
+            last_error.set(None)
+            start = time.perf_counter()
+            try:
+                result, error = member.model(**_arguments(member, kwds)), None
+            except Exception as e:
+                result, error = None, e
+            if not self.pool.record(
+                member, result, error or last_error.get(), time.perf_counter() - start
+            ):
+                break
+
+        if member is None:
+            return self.pool.exhausted(kwds.get("model_name"))
+        if error is not None:
+            raise error
+        return self._answered(result, member)
+
+    def streaming(self, **kwds: Any) -> Generator:
+        tried: Set[PoolMember] = set()
+        member, stream, first, error = None, None, _END, None
+        while True:
+            candidate = self.pool.select(tried, kwds.get("model_name"))
+            if candidate is None:
+                break
+            if stream is not None:
+                # The previous member failed before its first chunk
+                close_stream(stream)
+            member = candidate
+            tried.add(member)
+            last_error.set(None)
+            start = time.perf_counter()
+            stream = member.model.streaming(**_arguments(member, kwds))
+            try:
+                first, error = next(iter(stream), _END), None
+            except Exception as e:
+                first, error = None, e
+            if first is _END:
+                self.pool.release(member)
+                break
+            if not self.pool.record(
+                member,
+                first if isinstance(first, dict) else None,
+                error or (last_error.get() if isinstance(first, dict) else None),
+                time.perf_counter() - start,
+            ):
+                break
+
+        if stream is None:
+            yield self.pool.exhausted(kwds.get("model_name"))
+            return
+        try:
+            if error is not None:
+                raise error
+            if first is not _END:
+                yield self._answered(first, member)
+                for chunk in stream:
+                    yield self._answered(chunk, member)
+        finally:
+            close_stream(stream)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Returns the state of the pool, see `ClientPool.snapshot`."""
+        return self.pool.snapshot()
+
+    def _answered(self, result: Any, member: PoolMember) -> Any:
+        """Accounts the usage of a result, or chunk, and tags it with its member"""
+        self.pool.account(member, result)
+        return _tagged(result, member)
+
+
+class AsyncPooled(Pooled):
+    """Sends the calls of a provider `AsyncGenerate` or `AsyncEmbed` to the members of a `ClientPool`."""
+
+    async def __call__(self, **kwds: Any) -> Any:
+        tried: Set[PoolMember] = set()
+        member, result, error = None, None, None
+        while True:
+            candidate = self.pool.select(tried, kwds.get("model_name"))
+            if candidate is None:
+                break
+            member = candidate
+            tried.add(member)
+            last_error.set(None)
+            start = time.perf_counter()
+            try:
+                result, error = await member.model(**_arguments(member, kwds)), None
+            except Exception as e:
+                result, error = None, e
+            except BaseException:
+                # Cancelled by the caller
+                self.pool.release(member)
+                raise
+            if not self.pool.record(
+                member, result, error or last_error.get(), time.perf_counter() - start
+            ):
+                break
+
+        if member is None:
+            return self.pool.exhausted(kwds.get("model_name"))
+        if error is not None:
+            raise error
+        return self._answered(result, member)
+
+    async def streaming(self, **kwds: Any) -> AsyncGenerator:
+        tried: Set[PoolMember] = set()
+        member, stream, first, error = None, None, _END, None
+        while True:
+            candidate = self.pool.select(tried, kwds.get("model_name"))
+            if candidate is None:
+                break
+            if stream is not None:
+                # The previous member failed before its first chunk
+                await aclose_stream(stream)
+            member = candidate
+            tried.add(member)
+            last_error.set(None)
+            start = time.perf_counter()
+            stream = member.model.streaming(**_arguments(member, kwds))
+            try:
+                first, error = await stream.__aiter__().__anext__(), None
+            except StopAsyncIteration:
+                first, error = _END, None
+            except Exception as e:
+                first, error = None, e
+            except BaseException:
+                # Cancelled by the caller
+                self.pool.release(member)
+                await aclose_stream(stream)
+                raise
+            if first is _END:
+                self.pool.release(member)
+                break
+            if not self.pool.record(
+                member,
+                first if isinstance(first, dict) else None,
+                error or (last_error.get() if isinstance(first, dict) else None),
+                time.perf_counter() - start,
+            ):
+                break
+
+        if stream is None:
+            yield self.pool.exhausted(kwds.get("model_name"))
+            return
+        try:
+            if error is not None:
+                raise error
+            if first is not _END:
+                yield self._answered(first, member)
+                async for chunk in stream:
+                    yield self._answered(chunk, member)
+        finally:
+            await aclose_stream(stream)
+
+
+def pool_argument(kwds: Dict[str, Any], provider: str) -> Optional[str]:
+    """Returns the pool argument given to a model class, if any.
+
+    Args:
+        - kwds (Dict): Arguments of the model class
+        - provider (str): Provider name
+
+    Returns:
+        Optional[str]: Name of the pool argument, e.g. deployments
+
+    Raises:
+        - ValueError: If the provider does not support that pool argument
+    """
+    for argument, providers in POOL_ARGUMENTS.items():
+        if kwds.get(argument):
+            if provider not in providers:
+                raise ValueError(
+                    f"\n`{argument}` is not supported by {provider}, only by: "
+                    + ", ".join(providers)
+                )
+            return argument
+    return None
+
+
+def build(
+    handler: Callable,
+    kwds: Dict[str, Any],
+    argument: str,
+    name: str,
+    asynchronous: bool = False,
+) -> Pooled:
+    """Creates one provider instance per member entry and pools them.
+
+    Every member entry is a dict of provider arguments (e.g. azure_endpoint, api_key) that
+    override the shared ones, plus the member settings `name`, `tier` and `weight`. An Azure
+    deployment entry names its deployment with `deployment`, a Bedrock region entry may name an
+    inference profile with `model_name`, a server entry may list the `models` it serves. Region,
+    API key and server entries can also be just the region name, the key or the base URL.
+
+    Args:
+        - handler (Callable): Provider `Generate` or `Embed` class
+        - kwds (Dict): Arguments of the model class, with the member entries under `argument`
+          and the `ClientPool` settings under `pool`
+        - argument (str): Name of the pool argument, e.g. deployments
+        - name (str): Pool name, e.g. llm:AzureOpenAI
+        - asynchronous (bool, optional): Whether the provider instances are async. Default: False
+
+    Returns:
+        Pooled: The pooled provider
+    """
+    shared = {
+        key: value
+        for key, value in kwds.items()
+        if key not in POOL_ARGUMENTS and key != "pool"
+    }
+    members = []
+    for index, entry in enumerate(kwds[argument]):
+        if isinstance(entry, str):
+            entry = {_STRING_ENTRIES.get(argument, "model_name"): entry}
+        entry = dict(entry)
+        settings = {key: entry.pop(key) for key in _MEMBER_SETTINGS if key in entry}
+        model_name = entry.pop("deployment", None) or entry.pop("model_name", None)
+        member = PoolMember(
+            name=settings.get("name") or _member_name(entry, model_name, index),
+            tier=settings.get("tier", 0),
+            weight=settings.get("weight", 1.0),
+            model_name=model_name,
+            models=entry.get("models") or shared.get("models"),
+        )
+        arguments = {**shared, **entry, "response_hook": member.observe}
+        if "aws_region" in entry and shared.get("config") and "config" not in entry:
+            # A shared botocore config names one region, give each member its own
+            from botocore.config import Config
+
+            arguments["config"] = shared["config"].merge(
+                Config(region_name=entry["aws_region"])
+            )
+        member.model = handler(**arguments)
+        members.append(member)
+
+    pool = ClientPool(members, name=name, **(kwds.get("pool") or {}))
+    return AsyncPooled(pool) if asynchronous else Pooled(pool)
+
+
+def _member_name(entry: Dict[str, Any], model_name: Optional[str], index: int) -> str:
+    """Default member name, e.g. myresource.openai.azure.com/gpt-4o-ptu, us-west-2 or gpu-1:8000"""
+    endpoint = entry.get("azure_endpoint")
+    if endpoint:
+        from urllib.parse import urlparse
+
+        host = urlparse(endpoint).hostname or endpoint
+        return f"{host}/{model_name}" if model_name else host
+    if entry.get("base_url"):
+        from urllib.parse import urlparse
+
+        return urlparse(entry["base_url"]).netloc or entry["base_url"]
+    if entry.get("aws_region"):
+        region = entry["aws_region"]
+        return f"{region}/{model_name}" if model_name else region
+    if entry.get("api_key"):
+        # Never the key itself, it ends up in metrics
+        return f"key#{index}"
+    return f"{model_name or 'member'}#{index}"
+
+
+def served_models(kwds: Dict[str, Any]) -> List[str]:
+    """Returns the models listed for a model class and its server entries, in order.
+
+    Args:
+        - kwds (Dict): Arguments of the model class
+
+    Returns:
+        List[str]: The models, empty when none are listed
+    """
+    models = list(kwds.get("models") or [])
+    for entry in kwds.get("servers") or []:
+        if isinstance(entry, dict):
+            models += [
+                model for model in entry.get("models") or [] if model not in models
+            ]
+    return models
+
+
+def http_client(hook: Optional[Callable], asynchronous: bool = False) -> Any:
+    """Creates the HTTP client of an OpenAI SDK client that passes every response to the
+    `response_hook` of its pool member.
+
+    Args:
+        - hook (Callable, optional): The `response_hook` given to the provider, see `PoolMember.observe`
+        - asynchronous (bool, optional): Whether the client is async. Default: False
+
+    Returns:
+        Optional[httpx.Client]: The HTTP client, None without a hook for the SDK's default one
+    """
+    if hook is None:
+        return None
+    if not asynchronous:
+        from openai import DefaultHttpxClient
+
+        return DefaultHttpxClient(event_hooks={"response": [hook]})
+
+    from openai import DefaultAsyncHttpxClient
+
+    # httpx awaits the hooks of async clients
+    async def observe(response: Any) -> None:
+        hook(response)
+
+    return DefaultAsyncHttpxClient(event_hooks={"response": [observe]})
+
+
+def _arguments(member: PoolMember, kwds: Dict[str, Any]) -> Dict[str, Any]:
+    """Call arguments for a member, with its own model name if it has one"""
+    if member.model_name:
+        return {**kwds, "model_name": member.model_name}
+    return kwds
+
+
+def _tagged(result: Any, member: PoolMember) -> Any:
+    """Adds the member that answered to the metadata of a result"""
+    if isinstance(result, dict) and isinstance(result.get("metadata"), dict):
+        result["metadata"]["pool_member"] = member.name
+    return result
+
+
+def _number(value: Any) -> Optional[float]:
+    """Parses a header value as a number"""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
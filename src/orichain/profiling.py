@@ -0,0 +1,279 @@
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
+import time
+
+from orichain.metrics import InMemorySink
+
+# Phases spent waiting on the provider, every other phase is orichain's own work
+NETWORK_PHASES = ("request", "wait")
+
+# Name of the histogram holding the phase timings
+PHASE_METRIC = "orichain_phase_duration_seconds"
+
+# Active profiler, None means profiling is disabled
+_profiler: Optional["Profiler"] = None
+
+
+class Profiler(object):
+    """
+    Aggregates the phase timings of provider calls into per-phase histograms.
+
+    Every provider `__call__` and `streaming` splits its time into phases:
+
+    - format: `_chat_formatter`
+    - prepare: tool schema conversion and building the request parameters
+    - request: the SDK call, until the response or the stream is returned
+    - wait: waiting for the next stream event
+    - parse: response and chunk parsing, `.to_dict()` conversions and `json.loads` of tool arguments
+
+    Time spent by the consumer of a stream between two chunks is not counted.
+    """
+
+    def __init__(self, sink: Optional[InMemorySink] = None) -> None:
+        """
+        Args:
+            - sink (InMemorySink, optional): Sink holding the histograms. Pass a `PrometheusSink` to
+              scrape the phase timings along with the other metrics. Defaults to a new InMemorySink
+        """
+        self.sink = sink or InMemorySink()
+
+    def record(self, provider: str, operation: str, phases: Dict[str, float]) -> None:
+        """Records the phase timings of one call.
+
+        Args:
+            - provider (str): Provider name, e.g. OpenAI
+            - operation (str): call or stream
+            - phases (Dict[str, float]): Seconds spent in each phase during the call
+        """
+        for phase, seconds in phases.items():
+            self.sink.observe(
+                PHASE_METRIC,
+                seconds,
+                {"provider": provider, "operation": operation, "phase": phase},
+            )
+
+    def stats(self) -> Dict[Tuple[str, str, str], Dict[str, Any]]:
+        """Returns the aggregated timings of every phase.
+
+        Returns:
+            Dict[Tuple[str, str, str], Dict[str, Any]]: (provider, operation, phase) mapped to the
+            number of calls, total, mean, p50 and p99 seconds
+        """
+        series = self.sink.snapshot()["histograms"].get(PHASE_METRIC, {})
+        stats = {}
+        for key, histogram in series.items():
+            labels = dict(key)
+            name = (labels["provider"], labels["operation"], labels["phase"])
+            stats[name] = {
+                "calls": histogram["count"],
+                "total": histogram["sum"],
+                "mean": histogram["sum"] / histogram["count"],
+                "p50": self.sink.quantile(PHASE_METRIC, 0.5, labels),
+                "p99": self.sink.quantile(PHASE_METRIC, 0.99, labels),
+            }
+        return dict(sorted(stats.items()))
+
+    def folded(self) -> str:
+        """Dumps the total time of every phase in the folded stack format.
+
+        One `orichain;provider;operation;phase microseconds` line per phase, ready for
+        flamegraph.pl, speedscope or inferno.
+
+        Returns:
+            str: Folded stacks
+        """
+        lines = [
+            f"orichain;{provider};{operation};{phase} {round(stat['total'] * 1e6)}"
+            for (provider, operation, phase), stat in self.stats().items()
+        ]
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def summary(self) -> str:
+        """Renders a flame-style text summary, one block per provider operation.
+
+        Each phase shows its share of the operation's time with a bar, and every block ends with
+        the client-side overhead, i.e. the share of time spent outside the network phases.
+
+        Returns:
+            str: Human readable summary
+        """
+        groups: Dict[Tuple[str, str], List[Tuple[str, Dict[str, Any]]]] = {}
+        for (provider, operation, phase), stat in self.stats().items():
+            groups.setdefault((provider, operation), []).append((phase, stat))
+
+        lines = []
+        for (provider, operation), phases in groups.items():
+            total = sum(stat["total"] for _, stat in phases) or 1e-12
+            calls = max(stat["calls"] for _, stat in phases)
+            lines.append(f"{provider};{operation}  calls={calls}  total={total:.6f}s")
+            for phase, stat in sorted(phases, key=lambda p: -p[1]["total"]):
+                share = stat["total"] / total
+                lines.append(
+                    f"  {phase:<8} {'#' * round(share * 40):<40} {share:7.2%}"
+                    f"  mean={_format_seconds(stat['mean'])}"
+                    f"  p50<={_format_seconds(stat['p50'])}"
+                    f"  p99<={_format_seconds(stat['p99'])}"
+                )
+            client = sum(
+                stat["total"] for phase, stat in phases if phase not in NETWORK_PHASES
+            )
+            lines.append(f"  client overhead {client / total:.2%}")
+        return "\n".join(lines)
+
+    def reset(self) -> None:
+        """Drops everything recorded so far."""
+        self.sink.reset()
+
+
+class PhaseTimer(object):
+    """Lap timer for one provider call. Created by `start` only when profiling is enabled."""
+
+    __slots__ = ("profiler", "provider", "operation", "phases", "mark", "finished")
+
+    def __init__(self, profiler: Profiler, provider: str, operation: str) -> None:
+        self.profiler = profiler
+        self.provider = provider
+        self.operation = operation
+        self.phases: Dict[str, float] = {}
+        self.mark = time.perf_counter()
+        self.finished = False
+
+    def lap(self, phase: str) -> None:
+        """Attributes the time since the previous lap to a phase.
+
+        Args:
+            - phase (str): Name of the phase that just ended
+        """
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self.mark
+        self.mark = now
+
+    def skip(self) -> None:
+        """Discards the time since the previous lap, e.g. the time the consumer of a stream
+        spent before asking for the next chunk."""
+        self.mark = time.perf_counter()
+
+    def iterate(self, stream: Iterable) -> Iterator:
+        """Iterates a provider stream, timing the waits for events as the wait phase and the
+        handling of each event as the parse phase.
+
+        Args:
+            - stream (Iterable): Provider stream
+
+        Yields:
+            Any: Events of the stream
+        """
+        iterator = iter(stream)
+        while True:
+            self.lap("parse")
+            try:
+                event = next(iterator)
+            except StopIteration:
+                self.lap("wait")
+                return
+            self.lap("wait")
+            yield event
+
+    async def aiterate(self, stream: Any) -> AsyncIterator:
+        """Asynchronous version of `iterate`.
+
+        Args:
+            - stream (AsyncIterable): Provider stream
+
+        Yields:
+            Any: Events of the stream
+        """
+        iterator = stream.__aiter__()
+        while True:
+            self.lap("parse")
+            try:
+                event = await iterator.__anext__()
+            except StopAsyncIteration:
+                self.lap("wait")
+                return
+            self.lap("wait")
+            yield event
+
+    def finish(self) -> None:
+        """Hands the phase timings over to the profiler. Later calls are ignored."""
+        if self.finished:
+            return
+        self.finished = True
+        self.profiler.record(self.provider, self.operation, self.phases)
+
+
+class _NullTimer(object):
+    """Timer used when profiling is disabled, every method is a no-op."""
+
+    __slots__ = ()
+
+    def lap(self, phase: str) -> None:
+        pass
+
+    def skip(self) -> None:
+        pass
+
+    def iterate(self, stream: Iterable) -> Iterable:
+        return stream
+
+    def aiterate(self, stream: Any) -> Any:
+        return stream
+
+    def finish(self) -> None:
+        pass
+
+
+NULL_TIMER = _NullTimer()
+
+
+def enable(profiler: Optional[Profiler] = None) -> Profiler:
+    """Enables profiling of the provider phases.
+
+    Args:
+        - profiler (Profiler, optional): Profiler to aggregate into. Defaults to a new Profiler
+
+    Returns:
+        Profiler: The profiler in use, to read `summary()`, `folded()` or `stats()` from
+    """
+    global _profiler
+    _profiler = profiler or Profiler()
+    return _profiler
+
+
+def disable() -> None:
+    """Disables profiling."""
+    global _profiler
+    _profiler = None
+
+
+def get_profiler() -> Optional[Profiler]:
+    """Returns the active profiler, or None when profiling is disabled."""
+    return _profiler
+
+
+def start(provider: str, operation: str) -> Any:
+    """Starts timing the phases of a provider call.
+
+    Args:
+        - provider (str): Provider name, e.g. OpenAI
+        - operation (str): call or stream
+
+    Returns:
+        PhaseTimer: A new timer, or the shared no-op timer when profiling is disabled
+    """
+    profiler = _profiler
+    if profiler is None:
+        return NULL_TIMER
+    return PhaseTimer(profiler, provider, operation)
+
+
+def _format_seconds(seconds: Optional[float]) -> str:
+    """Formats a duration with a readable unit"""
+    if seconds is None:
+        return "-"
+    if seconds == float("inf"):
+        return "inf"
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.0f}us"
+    if seconds < 1:
+        return f"{seconds * 1e3:.1f}ms"
+    return f"{seconds:.2f}s"
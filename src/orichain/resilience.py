@@ -0,0 +1,1144 @@
+from typing import (
+    Any,
+    AsyncGenerator,
+    Deque,
+    Dict,
+    Generator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+from collections import deque
+import hashlib
+import json
+import threading
+import random
+import re
+import time
+import warnings
+
+from orichain import last_error, metrics
+from orichain.deadline import current_deadline
+from orichain.streaming import aclose_stream, close_stream
+
+# Circuit states
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Provider errors forwarded in the reason of an error dict, e.g. "Error code: 400 - {...}"
+_ERROR_CODE = re.compile(r"Error code: (\d{3})")
+
+# Gemini errors, e.g. "429 RESOURCE_EXHAUSTED. {...}"
+_LEADING_CODE = re.compile(r"^(\d{3}) [A-Z_]+")
+
+# AWS errors, e.g. "An error occurred (ThrottlingException) when calling ..."
+_AWS_CODE = re.compile(r"An error occurred \((\w+)\)")
+
+# HTTP status of the AWS error codes Bedrock returns
+AWS_STATUS = {
+    "ValidationException": 400,
+    "AccessDeniedException": 403,
+    "ResourceNotFoundException": 404,
+    "ModelTimeoutException": 408,
+    "ThrottlingException": 429,
+    "TooManyRequestsException": 429,
+    "ServiceQuotaExceededException": 429,
+    "InternalServerException": 500,
+    "ServiceUnavailableException": 503,
+    "ModelNotReadyException": 503,
+}
+
+# Statuses worth retrying: timeouts, throttling, server errors and overloaded (Anthropic)
+RETRYABLE_STATUS = (408, 429, 500, 502, 503, 504, 529)
+
+# Exception class names of network errors and timeouts, across httpx, botocore and builtins
+TRANSIENT_ERRORS = ("Timeout", "Connect", "RemoteProtocol", "IncompleteRead")
+
+# Retry delay suggested in the reason of Gemini errors, e.g. "'retryDelay': '30s'"
+_RETRY_DELAY = re.compile(r"retryDelay['\"]?\s*:\s*['\"]?(\d+(?:\.\d+)?)s")
+
+# Durations of the OpenAI rate limit headers, e.g. "6m0s" or "120ms"
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+# Prefix of the reason of a call rejected by an open circuit breaker
+_REJECTION = "circuit breaker "
+
+# Arguments telling the clients of a provider apart: endpoint, region, account, key and pool
+CLIENT_ARGUMENTS = (
+    "base_url",
+    "azure_endpoint",
+    "api_version",
+    "aws_region",
+    "project",
+    "location",
+    "api_key",
+    "aws_access_key",
+    "deployments",
+    "regions",
+    "api_keys",
+    "servers",
+)
+
+# Shared breakers, by name
+_breakers: Dict[str, "CircuitBreaker"] = {}
+_registry_lock = threading.Lock()
+
+# Retry budget shared by every retry policy that does not bring its own
+_shared_budget: Optional["RetryBudget"] = None
+
+
+def error_status(result: Any, error: Optional[BaseException] = None) -> Optional[int]:
+    """Finds the HTTP status of a provider error, whichever provider it comes from.
+
+    The status is read from the exception when there is one (OpenAI, Anthropic and Together
+    `status_code`, Gemini `code`, botocore error codes, else its message), else from the error
+    dict the provider returned, where the reason usually carries the original status.
+
+    Args:
+        - result (Any): Value returned by the provider, or None if it raised
+        - error (BaseException, optional): Exception raised or explained by the provider
+
+    Returns:
+        Optional[int]: The HTTP status, None if there is none
+    """
+    if error is not None:
+        status = _exception_status(error)
+        if status is None:
+            status = _reason_status(str(error))
+        if status is not None:
+            return status
+    if not isinstance(result, dict) or "error" not in result:
+        return None
+    status = _reason_status(str(result.get("reason", "")))
+    if status is not None:
+        return status
+    status = result.get("error")
+    return status if isinstance(status, int) else None
+
+
+def _exception_status(error: BaseException) -> Optional[int]:
+    """HTTP status carried by an SDK exception, if any"""
+    for attribute in ("status_code", "code"):
+        status = getattr(error, attribute, None)
+        if isinstance(status, int) and 100 <= status < 600:
+            return status
+    response = getattr(error, "response", None)
+    if isinstance(response, dict):
+        # botocore ClientError
+        code = response.get("Error", {}).get("Code")
+        if code in AWS_STATUS:
+            return AWS_STATUS[code]
+        status = response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+        if isinstance(status, int):
+            return status
+    status = getattr(response, "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def _reason_status(reason: str) -> Optional[int]:
+    """HTTP status forwarded in the text of a provider error, if any"""
+    for pattern in (_ERROR_CODE, _LEADING_CODE):
+        match = pattern.search(reason)
+        if match:
+            return int(match.group(1))
+    match = _AWS_CODE.search(reason)
+    if match:
+        return AWS_STATUS.get(match.group(1))
+    return None
+
+
+def is_retryable(result: Any, error: Optional[BaseException] = None) -> bool:
+    """Tells whether a failed provider call is worth retrying.
+
+    Network errors, timeouts, throttling and server errors are retried, the same way for every
+    provider. Client errors, calls aborted by the client, calls rejected by an open circuit
+    breaker and exceptions that are not about the provider (e.g. a bug in the response parsing)
+    are not.
+
+    Args:
+        - result (Any): Value returned by the provider, or None if it raised
+        - error (BaseException, optional): Exception raised or explained by the provider
+
+    Returns:
+        bool: True if the call should be retried
+    """
+    if error is None and (not isinstance(result, dict) or "error" not in result):
+        return False
+    if isinstance(result, dict):
+        reason = str(result.get("reason", ""))
+        if reason == "request aborted by user" or reason.startswith(_REJECTION):
+            return False
+
+    if error is not None:
+        if any(
+            marker in cls.__name__
+            for cls in type(error).__mro__
+            for marker in TRANSIENT_ERRORS
+        ):
+            return True
+        status = _exception_status(error)
+        if status is None:
+            status = _reason_status(str(error))
+        if status is None:
+            return False
+    else:
+        status = error_status(result)
+    return status in RETRYABLE_STATUS
+
+
+def retry_after(result: Any, error: Optional[BaseException] = None) -> Optional[float]:
+    """Reads the wait a provider asked for before the next attempt.
+
+    Honours the `retry-after-ms` and `retry-after` headers (seconds or HTTP date), the OpenAI
+    `x-ratelimit-reset-*` headers of an exhausted limit, and the `retryDelay` of Gemini errors.
+
+    Args:
+        - result (Any): Value returned by the provider, or None if it raised
+        - error (BaseException, optional): Exception raised or explained by the provider
+
+    Returns:
+        Optional[float]: Seconds to wait, None if the provider did not say
+    """
+    headers = _headers(error) if error is not None else None
+    if headers:
+        value = headers.get("retry-after-ms")
+        if value is not None:
+            try:
+                return max(float(value) / 1000, 0.0)
+            except ValueError:
+                pass
+        value = headers.get("retry-after")
+        if value is not None:
+            try:
+                return max(float(value), 0.0)
+            except ValueError:
+                from email.utils import parsedate_to_datetime
+
+                try:
+                    date = parsedate_to_datetime(value)
+                    return max(date.timestamp() - time.time(), 0.0)
+                except (TypeError, ValueError):
+                    pass
+        for limit in ("requests", "tokens"):
+            if headers.get(f"x-ratelimit-remaining-{limit}") == "0":
+                seconds = _duration(headers.get(f"x-ratelimit-reset-{limit}") or "")
+                if seconds is not None:
+                    return seconds
+
+    reason = str(error) if error is not None else ""
+    if isinstance(result, dict):
+        reason += str(result.get("reason", ""))
+    match = _RETRY_DELAY.search(reason)
+    if match:
+        return float(match.group(1))
+    return None
+
+
+def _headers(error: BaseException) -> Optional[Any]:
+    """Response headers of an SDK exception, with lower case names"""
+    response = getattr(error, "response", None)
+    if isinstance(response, dict):
+        # botocore ClientError, whose header names are already lower case
+        return response.get("ResponseMetadata", {}).get("HTTPHeaders")
+    headers = getattr(response, "headers", None)
+    if headers is None or not hasattr(headers, "get"):
+        return None
+    if isinstance(headers, dict):
+        return {str(name).lower(): value for name, value in headers.items()}
+    # httpx and requests headers are case insensitive already
+    return headers
+
+
+def _duration(value: str) -> Optional[float]:
+    """Parses durations like 1s, 6m0s or 120ms"""
+    parts = _DURATION.findall(value)
+    if not parts:
+        return None
+    return sum(float(number) * _UNITS[unit] for number, unit in parts)
+
+
+def is_failure(result: Any) -> Optional[bool]:
+    """Tells whether a result points at an unhealthy provider.
+
+    Server errors, throttling and timeouts are failures. Client errors (a bad request, an invalid
+    model) are not, the provider answered. A call aborted by the client says nothing either way.
+
+    Args:
+        - result (Any): Value returned by a provider `__call__`, or the final chunk of a stream
+
+    Returns:
+        Optional[bool]: True for a failure, False for a success, None when it should not count
+    """
+    if not isinstance(result, dict) or "error" not in result:
+        return False
+    reason = str(result.get("reason", ""))
+    if reason == "request aborted by user":
+        return None
+
+    status = error_status(result)
+    if status is None:
+        return True
+    return status >= 500 or status in (408, 429)
+
+
+class CircuitBreakerOpen(Exception):
+    """Raised by `CircuitBreaker.call` when the circuit rejects the call."""
+
+
+class CircuitBreaker(object):
+    """
+    Circuit breaker for one provider client.
+
+    - closed: calls go through, outcomes are kept over a rolling time window. Once the window
+      holds at least `minimum_calls` outcomes and the share of failures reaches `failure_rate`,
+      the circuit opens.
+    - open: calls are rejected right away, without waiting on the provider, for `open_seconds`.
+    - half_open: up to `half_open_probes` calls at a time are let through as probes. After
+      `half_open_probes` successful probes the circuit closes, a single failed probe opens it
+      again.
+
+    Every call let through by `allow` must be reported with `record` (or `release` when its
+    outcome should not count). The breaker is thread-safe and can be shared by sync and async
+    callers, e.g. by several LLM instances of the same provider or by a fallback router.
+    """
+
+    def __init__(
+        self,
+        name: str = "default",
+        failure_rate: float = 0.5,
+        minimum_calls: int = 10,
+        window: float = 60.0,
+        open_seconds: float = 30.0,
+        half_open_probes: int = 1,
+        slow_call_seconds: Optional[float] = None,
+    ) -> None:
+        """
+        Args:
+            - name (str, optional): Name used in metrics and errors, e.g. llm:OpenAI
+            - failure_rate (float, optional): Share of failed calls that opens the circuit. Default: 0.5
+            - minimum_calls (int, optional): Calls needed in the window before it can open. Default: 10
+            - window (float, optional): Length of the rolling window, in seconds. Default: 60
+            - open_seconds (float, optional): Time the circuit stays open before probing. Default: 30
+            - half_open_probes (int, optional): Probes allowed at a time, and successes needed to
+              close the circuit. Default: 1
+            - slow_call_seconds (float, optional): Calls slower than this count as failures. Default: None
+        """
+        self.name = name
+        self.failure_rate = failure_rate
+        self.minimum_calls = minimum_calls
+        self.window = window
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.slow_call_seconds = slow_call_seconds
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._outcomes: Deque[Tuple[float, bool]] = deque()
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self._probe_successes = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        """Current state: closed, open or half_open."""
+        with self._lock:
+            transition = self._refresh(time.monotonic())
+            state = self._state
+        self._report(transition)
+        return state
+
+    def allow(self) -> bool:
+        """Asks to make a call.
+
+        Returns:
+            bool: True if the call may go ahead, False if it must fail fast
+        """
+        with self._lock:
+            transition = self._refresh(time.monotonic())
+            if self._state == CLOSED:
+                allowed = True
+            elif self._state == HALF_OPEN and self._probes < self.half_open_probes:
+                self._probes += 1
+                allowed = True
+            else:
+                self.rejected += 1
+                allowed = False
+        self._report(transition)
+        if not allowed:
+            self._count("orichain_circuit_rejections_total")
+        return allowed
+
+    def record(self, result: Any = None, duration: Optional[float] = None) -> None:
+        """Reports the outcome of a call let through by `allow`.
+
+        Args:
+            - result (Any, optional): Result of the call, classified with `is_failure`
+            - duration (float, optional): Duration of the call in seconds, for slow call detection
+        """
+        failed = is_failure(result)
+        if failed is None:
+            self.release()
+            return
+        if (
+            not failed
+            and duration is not None
+            and self.slow_call_seconds is not None
+            and duration > self.slow_call_seconds
+        ):
+            failed = True
+        if failed:
+            self.record_failure()
+        else:
+            self.record_success()
+
+    def record_success(self) -> None:
+        """Reports a successful call."""
+        with self._lock:
+            now = time.monotonic()
+            if self._state == HALF_OPEN:
+                self._probes = max(self._probes - 1, 0)
+                self._probe_successes += 1
+                if self._probe_successes >= self.half_open_probes:
+                    transition = self._move(CLOSED, now)
+                else:
+                    transition = None
+            else:
+                self._add(now, False)
+                transition = None
+        self._report(transition)
+
+    def record_failure(self) -> None:
+        """Reports a failed call."""
+        with self._lock:
+            now = time.monotonic()
+            if self._state == HALF_OPEN:
+                transition = self._move(OPEN, now)
+            elif self._state == CLOSED:
+                self._add(now, True)
+                calls = len(self._outcomes)
+                if (
+                    calls >= self.minimum_calls
+                    and self._failures / calls >= self.failure_rate
+                ):
+                    transition = self._move(OPEN, now)
+                else:
+                    transition = None
+            else:
+                transition = None
+        self._report(transition)
+
+    def release(self) -> None:
+        """Gives back a call let through by `allow` whose outcome does not count."""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probes = max(self._probes - 1, 0)
+
+    def retry_after(self) -> float:
+        """Seconds left before an open circuit starts probing, 0 otherwise."""
+        with self._lock:
+            if self._state != OPEN:
+                return 0.0
+            return max(self._opened_at + self.open_seconds - time.monotonic(), 0.0)
+
+    def rejection(self) -> Dict:
+        """Error dict returned to callers while the circuit rejects calls."""
+        return {
+            "error": 503,
+            "reason": f"circuit breaker {self.name} is {self.state}, "
+            f"retry in {self.retry_after():.1f}s",
+        }
+
+    def call(self, func: Any, *args: Any, **kwargs: Any) -> Any:
+        """Runs a function through the breaker.
+
+        Args:
+            - func (Callable): Function to call
+            - *args, **kwargs: Arguments of the function
+
+        Returns:
+            Any: Result of the function
+
+        Raises:
+            - CircuitBreakerOpen: If the circuit rejects the call
+        """
+        if not self.allow():
+            raise CircuitBreakerOpen(self.rejection()["reason"])
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+        self.record(result, time.perf_counter() - start)
+        return result
+
+    async def acall(self, func: Any, *args: Any, **kwargs: Any) -> Any:
+        """Asynchronous version of `call`, for coroutine functions."""
+        if not self.allow():
+            raise CircuitBreakerOpen(self.rejection()["reason"])
+        start = time.perf_counter()
+        try:
+            result = await func(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+        self.record(result, time.perf_counter() - start)
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Returns the state of the breaker, for metrics and health endpoints."""
+        with self._lock:
+            now = time.monotonic()
+            transition = self._refresh(now)
+            self._trim(now)
+            calls = len(self._outcomes)
+            snapshot = {
+                "name": self.name,
+                "state": self._state,
+                "calls": calls,
+                "failures": self._failures,
+                "failure_rate": self._failures / calls if calls else 0.0,
+                "rejected": self.rejected,
+                "retry_after": (
+                    max(self._opened_at + self.open_seconds - now, 0.0)
+                    if self._state == OPEN
+                    else 0.0
+                ),
+            }
+        self._report(transition)
+        return snapshot
+
+    def reset(self) -> None:
+        """Closes the circuit and forgets every outcome."""
+        with self._lock:
+            transition = self._move(CLOSED, time.monotonic())
+            self.rejected = 0
+        self._report(transition)
+
+    def _refresh(self, now: float) -> Optional[str]:
+        """Moves an open circuit to half open once its open time is over"""
+        if self._state == OPEN and now - self._opened_at >= self.open_seconds:
+            return self._move(HALF_OPEN, now)
+        return None
+
+    def _trim(self, now: float) -> None:
+        """Drops the outcomes that fell out of the rolling window"""
+        while self._outcomes and now - self._outcomes[0][0] > self.window:
+            if self._outcomes.popleft()[1]:
+                self._failures -= 1
+
+    def _add(self, now: float, failed: bool) -> None:
+        """Adds an outcome to the rolling window"""
+        self._trim(now)
+        self._outcomes.append((now, failed))
+        if failed:
+            self._failures += 1
+
+    def _move(self, state: str, now: float) -> Optional[str]:
+        """Switches state, returns the new state if it changed"""
+        if state == self._state and state != CLOSED:
+            return None
+        changed = state != self._state
+        self._state = state
+        self._probes = 0
+        self._probe_successes = 0
+        if state == OPEN:
+            self._opened_at = now
+        if state == CLOSED:
+            self._outcomes.clear()
+            self._failures = 0
+        return state if changed else None
+
+    def _report(self, transition: Optional[str]) -> None:
+        """Counts a state change when metrics are enabled"""
+        if transition:
+            self._count("orichain_circuit_transitions_total", {"state": transition})
+
+    def _count(self, name: str, labels: Optional[Dict[str, Any]] = None) -> None:
+        """Increments a breaker counter when metrics are enabled"""
+        sink = metrics.get_sink()
+        if sink:
+            sink.increment(name, 1, {"breaker": self.name, **(labels or {})})
+
+    def __repr__(self) -> str:
+        return f"CircuitBreaker({self.name!r}, state={self.state!r})"
+
+
+def get_breaker(name: str, **settings: Any) -> CircuitBreaker:
+    """Returns the shared breaker of that name, creating it on first use.
+
+    Args:
+        - name (str): Breaker name, e.g. llm:OpenAI
+        - **settings: `CircuitBreaker` arguments, only used when the breaker is created. A warning
+          is issued if they differ from the ones of the existing breaker
+
+    Returns:
+        CircuitBreaker: The shared breaker
+    """
+    with _registry_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name, **settings)
+        elif settings and differs(breaker, CircuitBreaker(name, **settings), settings):
+            warnings.warn(
+                f"\nThe shared circuit breaker {name!r} already exists with other settings, {settings} are ignored. Pass an `orichain.resilience.CircuitBreaker` to use them.",
+                UserWarning,
+            )
+        return breaker
+
+
+def breakers() -> Dict[str, CircuitBreaker]:
+    """Returns every shared breaker, by name."""
+    with _registry_lock:
+        return dict(_breakers)
+
+
+def resolve_breaker(
+    circuit_breaker: Any,
+    component: str,
+    provider: str,
+    kwds: Optional[Dict[str, Any]] = None,
+) -> Optional[CircuitBreaker]:
+    """Turns the `circuit_breaker` argument of LLM/EmbeddingModel into a breaker.
+
+    Args:
+        - circuit_breaker (CircuitBreaker, Dict, bool or None): A breaker, True for the shared
+          breaker of the client, a dict of `CircuitBreaker` settings for the shared breaker, or
+          None/False to disable it
+        - component (str): llm or embeddings
+        - provider (str): Provider name
+        - kwds (Dict, optional): Arguments of the model class, telling its client apart (see
+          `client_name`)
+
+    Returns:
+        Optional[CircuitBreaker]: The breaker to use, if any
+    """
+    if not circuit_breaker:
+        return None
+    if isinstance(circuit_breaker, CircuitBreaker):
+        return circuit_breaker
+    settings = circuit_breaker if isinstance(circuit_breaker, dict) else {}
+    return get_breaker(f"{component}:{client_name(provider, kwds)}", **settings)
+
+
+def client_name(provider: str, kwds: Optional[Dict[str, Any]] = None) -> str:
+    """Name of the client of a model class, for the breakers and schedulers it shares.
+
+    Model classes of the same provider, endpoint, region and key share a name, e.g. every LLM
+    of one Azure resource, while the ones of another resource or key get their own.
+
+    Args:
+        - provider (str): Provider name
+        - kwds (Dict, optional): Arguments of the model class
+
+    Returns:
+        str: The provider, followed by a hash of its `CLIENT_ARGUMENTS` if any is given, e.g.
+        AzureOpenAI#1f2e3d4c
+    """
+    identity = {key: kwds[key] for key in CLIENT_ARGUMENTS if kwds and kwds.get(key)}
+    if not identity:
+        return provider
+    digest = hashlib.sha256(
+        json.dumps(identity, sort_keys=True, default=repr).encode()
+    ).hexdigest()
+    return f"{provider}#{digest[:8]}"
+
+
+def differs(shared: Any, wanted: Any, settings: Dict[str, Any]) -> bool:
+    """Whether a shared breaker or scheduler was created with other values of these settings"""
+    return any(
+        getattr(shared, key, None) != getattr(wanted, key, None) for key in settings
+    )
+
+
+class Guarded(object):
+    """Wraps a provider `Generate` or `Embed` instance behind a circuit breaker."""
+
+    def __init__(self, model: Any, breaker: CircuitBreaker) -> None:
+        """
+        Args:
+            - model (Generate or Embed): Provider instance to guard
+            - breaker (CircuitBreaker): Breaker of the provider
+        """
+        self.model = model
+        self.breaker = breaker
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.model, name)
+
+    def __call__(self, **kwds: Any) -> Any:
+        if not self.breaker.allow():
+            return self.breaker.rejection()
+        start = time.perf_counter()
+        try:
+            result = self.model(**kwds)
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record(result, time.perf_counter() - start)
+        return result
+
+    def streaming(self, **kwds: Any) -> Generator:
+        if not self.breaker.allow():
+            yield self.breaker.rejection()
+            return
+        start = time.perf_counter()
+        outcome = None
+        stream = self.model.streaming(**kwds)
+        try:
+            for chunk in stream:
+                if isinstance(chunk, dict):
+                    outcome = chunk
+                yield chunk
+        except Exception:
+            outcome = {"error": 500}
+            raise
+        finally:
+            # A stream closed early by its consumer does not count
+            if outcome is None:
+                self.breaker.release()
+            else:
+                self.breaker.record(outcome, time.perf_counter() - start)
+            close_stream(stream)
+
+
+class AsyncGuarded(Guarded):
+    """Wraps a provider `AsyncGenerate` or `AsyncEmbed` instance behind a circuit breaker."""
+
+    async def __call__(self, **kwds: Any) -> Any:
+        if not self.breaker.allow():
+            return self.breaker.rejection()
+        start = time.perf_counter()
+        try:
+            result = await self.model(**kwds)
+        except BaseException as e:
+            if isinstance(e, Exception):
+                self.breaker.record_failure()
+            else:
+                # Cancelled by the caller
+                self.breaker.release()
+            raise
+        self.breaker.record(result, time.perf_counter() - start)
+        return result
+
+    async def streaming(self, **kwds: Any) -> AsyncGenerator:
+        if not self.breaker.allow():
+            yield self.breaker.rejection()
+            return
+        start = time.perf_counter()
+        outcome = None
+        stream = self.model.streaming(**kwds)
+        try:
+            async for chunk in stream:
+                if isinstance(chunk, dict):
+                    outcome = chunk
+                yield chunk
+        except Exception:
+            outcome = {"error": 500}
+            raise
+        finally:
+            # A stream closed early by its consumer does not count
+            if outcome is None:
+                self.breaker.release()
+            else:
+                self.breaker.record(outcome, time.perf_counter() - start)
+            await aclose_stream(stream)
+
+
+class RetryBudget(object):
+    """
+    Caps retries at a share of the calls, so that retries cannot multiply the load on a provider
+    that is already overloaded.
+
+    Over a rolling window of `window` seconds, retries may add at most `ratio` of the calls made
+    (0.1 allows 10% extra load), plus `min_per_second` retries per second so that quiet
+    processes can still retry. The budget is thread-safe and meant to be shared.
+    """
+
+    def __init__(
+        self, ratio: float = 0.1, min_per_second: float = 1.0, window: float = 10.0
+    ) -> None:
+        """
+        Args:
+            - ratio (float, optional): Retries allowed per call. Default: 0.1
+            - min_per_second (float, optional): Retries per second always allowed. Default: 1.0
+            - window (float, optional): Length of the rolling window, in seconds. Default: 10
+        """
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.window = window
+
+        self._lock = threading.Lock()
+        # [second, calls, retries] per second of the window
+        self._buckets: Deque[List[int]] = deque()
+        self._calls = 0
+        self._retries = 0
+        self.exhausted = 0
+
+    def record_call(self) -> None:
+        """Counts a call, which earns `ratio` retries."""
+        with self._lock:
+            self._bucket(time.monotonic())[1] += 1
+            self._calls += 1
+
+    def try_spend(self) -> bool:
+        """Asks to make a retry.
+
+        Returns:
+            bool: True if the retry fits in the budget, False if it must not be made
+        """
+        with self._lock:
+            bucket = self._bucket(time.monotonic())
+            allowed = self._retries < (
+                self._calls * self.ratio + self.min_per_second * self.window
+            )
+            if allowed:
+                bucket[2] += 1
+                self._retries += 1
+            else:
+                self.exhausted += 1
+        return allowed
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Returns the usage of the budget, for metrics and health endpoints."""
+        with self._lock:
+            self._bucket(time.monotonic())
+            return {
+                "calls": self._calls,
+                "retries": self._retries,
+                "allowed": self._calls * self.ratio + self.min_per_second * self.window,
+                "exhausted": self.exhausted,
+            }
+
+    def _bucket(self, now: float) -> List[int]:
+        """Returns the bucket of the current second, dropping the ones out of the window"""
+        second = int(now)
+        while self._buckets and second - self._buckets[0][0] >= self.window:
+            _, calls, retries = self._buckets.popleft()
+            self._calls -= calls
+            self._retries -= retries
+        if not self._buckets or self._buckets[-1][0] != second:
+            self._buckets.append([second, 0, 0])
+        return self._buckets[-1]
+
+
+def shared_budget() -> RetryBudget:
+    """Returns the retry budget shared by the retry policies of the process."""
+    global _shared_budget
+    with _registry_lock:
+        if _shared_budget is None:
+            _shared_budget = RetryBudget()
+        return _shared_budget
+
+
+class RetryPolicy(object):
+    """
+    Retry policy owned by orichain, applied the same way to every provider.
+
+    Retryable errors (see `is_retryable`) are retried up to `max_attempts` calls in total,
+    waiting between attempts with decorrelated jitter exponential backoff
+    (`min(max_delay, uniform(base_delay, previous * 3))`), so that clients throttled together do
+    not retry in lockstep. When the provider says how long to wait (`Retry-After`, rate limit
+    reset headers), the wait is honoured, or the call gives up if it is over `max_retry_after`.
+    Every retry is taken from a `RetryBudget`.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 20.0,
+        max_retry_after: float = 60.0,
+        budget: Union[RetryBudget, bool, None] = None,
+    ) -> None:
+        """
+        Args:
+            - max_attempts (int, optional): Calls made in total, the first one included. Default: 3
+            - base_delay (float, optional): Shortest wait between attempts, in seconds. Default: 0.5
+            - max_delay (float, optional): Longest backoff between attempts, in seconds. Default: 20
+            - max_retry_after (float, optional): Longest wait asked by the provider that is
+              honoured, longer ones end the retries. Default: 60
+            - budget (RetryBudget or bool, optional): Budget to take the retries from. None uses
+              the budget shared by the process, False retries without a budget. Default: None
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        if budget is None:
+            budget = shared_budget()
+        self.budget = budget or None
+
+    def backoff(self, previous: float) -> float:
+        """Draws the next decorrelated jitter backoff.
+
+        Args:
+            - previous (float): Previous wait, `base_delay` before the first retry
+
+        Returns:
+            float: Seconds to wait
+        """
+        return min(
+            self.max_delay,
+            random.uniform(self.base_delay, max(previous, self.base_delay) * 3),
+        )
+
+    def begin(self) -> None:
+        """Counts a new call against the retry budget."""
+        if self.budget:
+            self.budget.record_call()
+
+    def next_wait(
+        self,
+        attempt: int,
+        previous: float,
+        result: Any,
+        error: Optional[BaseException] = None,
+        target: str = "default",
+    ) -> Optional[float]:
+        """Decides whether to retry a failed attempt and how long to wait first.
+
+        Args:
+            - attempt (int): Number of the attempt that just ended, starting at 1
+            - previous (float): Previous wait, `base_delay` before the first retry
+            - result (Any): Value returned by the provider, or None if it raised
+            - error (BaseException, optional): Exception raised or explained by the provider
+            - target (str, optional): Name used in metrics, e.g. llm:OpenAI
+
+        Returns:
+            Optional[float]: Seconds to wait before retrying, None to stop
+        """
+        if attempt >= self.max_attempts or not is_retryable(result, error):
+            return None
+
+        wait = retry_after(result, error)
+        if wait is None:
+            wait = self.backoff(previous)
+        elif wait > self.max_retry_after:
+            return None
+        else:
+            # Spread the clients told to come back at the same time
+            wait += random.uniform(0, self.base_delay)
+
+        # A retry that cannot start before the deadline would only waste the budget
+        deadline = current_deadline()
+        if deadline and not deadline.allows(wait):
+            return None
+
+        if self.budget and not self.budget.try_spend():
+            _count("orichain_retry_budget_exhausted_total", {"target": target})
+            return None
+        _count(
+            "orichain_retries_total",
+            {"target": target, "status": str(error_status(result, error) or "error")},
+        )
+        return wait
+
+    def __repr__(self) -> str:
+        return (
+            f"RetryPolicy(max_attempts={self.max_attempts}, "
+            f"base_delay={self.base_delay}, max_delay={self.max_delay})"
+        )
+
+
+def resolve_retry_policy(retry_policy: Any) -> Optional[RetryPolicy]:
+    """Turns the `retry_policy` argument of LLM/EmbeddingModel into a policy.
+
+    Args:
+        - retry_policy (RetryPolicy, Dict, bool or None): A policy, True for the default policy, a
+          dict of `RetryPolicy` settings, or None/False to leave retries to the provider SDK
+
+    Returns:
+        Optional[RetryPolicy]: The policy to use, if any
+    """
+    if not retry_policy:
+        return None
+    if isinstance(retry_policy, RetryPolicy):
+        return retry_policy
+    settings = retry_policy if isinstance(retry_policy, dict) else {}
+    return RetryPolicy(**settings)
+
+
+def botocore_config(kwds: Dict[str, Any]) -> Any:
+    """botocore `Config` of an AWS Bedrock client.
+
+    The `config` given, or the default one with `max_retries` retries. Under a retry policy the
+    retries of a given config are set to `max_retries` too (none unless given), so they do not
+    multiply with the orichain ones.
+
+    Args:
+        - kwds (Dict): Arguments of the provider class
+
+    Returns:
+        Config: Config of the client
+    """
+    from botocore.config import Config
+
+    attempts = (kwds.get("max_retries", 1) or 0) + 1
+    config = kwds.get("config")
+    if not config:
+        return Config(
+            region_name=kwds.get("aws_region"),
+            read_timeout=10,
+            connect_timeout=2,
+            retries={"total_max_attempts": attempts},
+            max_pool_connections=100,
+        )
+    if not kwds.get("retry_policy"):
+        return config
+
+    # Keep the retry mode of the config, only its number of attempts changes
+    retries = {
+        key: value
+        for key, value in (config.retries or {}).items()
+        if key not in ("max_attempts", "total_max_attempts")
+    }
+    retries["total_max_attempts"] = attempts
+    return config.merge(Config(retries=retries))
+
+
+def _count(name: str, labels: Dict[str, Any]) -> None:
+    """Increments a retry counter when metrics are enabled"""
+    sink = metrics.get_sink()
+    if sink:
+        sink.increment(name, 1, labels)
+
+
+# Marks a stream that ended before its first chunk
+_END = object()
+
+
+class Retrying(object):
+    """Retries a provider `Generate` or `Embed` instance according to a `RetryPolicy`.
+
+    Streams are only retried while nothing has been yielded yet, i.e. when they fail before their
+    first chunk.
+    """
+
+    def __init__(self, model: Any, policy: RetryPolicy, target: str) -> None:
+        """
+        Args:
+            - model (Generate or Embed): Provider instance to retry
+            - policy (RetryPolicy): Retry policy
+            - target (str): Name used in metrics, e.g. llm:OpenAI
+        """
+        self.model = model
+        self.policy = policy
+        self.target = target
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.model, name)
+
+    def __call__(self, **kwds: Any) -> Any:
+        self.policy.begin()
+        attempt, wait = 1, self.policy.base_delay
+        while True:
+            last_error.set(None)
+            try:
+                result, error = self.model(**kwds), None
+            except Exception as e:
+                result, error = None, e
+            next_wait = self.policy.next_wait(
+                attempt, wait, result, error or last_error.get(), self.target
+            )
+            if next_wait is None:
+                if error is not None:
+                    raise error
+                return result
+            time.sleep(next_wait)
+            attempt, wait = attempt + 1, next_wait
+
+    def streaming(self, **kwds: Any) -> Generator:
+        self.policy.begin()
+        attempt, wait = 1, self.policy.base_delay
+        while True:
+            last_error.set(None)
+            stream = self.model.streaming(**kwds)
+            try:
+                first, error = next(iter(stream), _END), None
+            except Exception as e:
+                first, error = None, e
+            next_wait = None
+            if error is not None or isinstance(first, dict):
+                next_wait = self.policy.next_wait(
+                    attempt, wait, first, error or last_error.get(), self.target
+                )
+            if next_wait is None:
+                break
+            close_stream(stream)
+            time.sleep(next_wait)
+            attempt, wait = attempt + 1, next_wait
+
+        try:
+            if error is not None:
+                raise error
+            if first is not _END:
+                yield first
+                yield from stream
+        finally:
+            close_stream(stream)
+
+
+class AsyncRetrying(Retrying):
+    """Retries a provider `AsyncGenerate` or `AsyncEmbed` instance according to a `RetryPolicy`."""
+
+    async def __call__(self, **kwds: Any) -> Any:
+        import asyncio
+
+        self.policy.begin()
+        attempt, wait = 1, self.policy.base_delay
+        while True:
+            last_error.set(None)
+            try:
+                result, error = await self.model(**kwds), None
+            except Exception as e:
+                result, error = None, e
+            next_wait = self.policy.next_wait(
+                attempt, wait, result, error or last_error.get(), self.target
+            )
+            if next_wait is None:
+                if error is not None:
+                    raise error
+                return result
+            await asyncio.sleep(next_wait)
+            attempt, wait = attempt + 1, next_wait
+
+    async def streaming(self, **kwds: Any) -> AsyncGenerator:
+        import asyncio
+
+        self.policy.begin()
+        attempt, wait = 1, self.policy.base_delay
+        while True:
+            last_error.set(None)
+            stream = self.model.streaming(**kwds)
+            try:
+                first, error = await stream.__aiter__().__anext__(), None
+            except StopAsyncIteration:
+                first, error = _END, None
+            except Exception as e:
+                first, error = None, e
+            next_wait = None
+            if error is not None or isinstance(first, dict):
+                next_wait = self.policy.next_wait(
+                    attempt, wait, first, error or last_error.get(), self.target
+                )
+            if next_wait is None:
+                break
+            await aclose_stream(stream)
+            await asyncio.sleep(next_wait)
+            attempt, wait = attempt + 1, next_wait
+
+        try:
+            if error is not None:
+                raise error
+            if first is not _END:
+                yield first
+                async for chunk in stream:
+                    yield chunk
+        finally:
+            await aclose_stream(stream)
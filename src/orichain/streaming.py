@@ -0,0 +1,288 @@
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional
+import threading
+import inspect
+
+# asyncio is only imported once a watcher is used, sync callers never pay for it
+if TYPE_CHECKING:
+    from fastapi import Request
+    import asyncio
+
+from orichain import error_explainer
+
+
+class DisconnectWatcher(object):
+    """
+    Background watcher that listens for the client disconnecting from a FastAPI/Starlette request.
+
+    One watcher is shared by everything handling the same request (it is stored in the request
+    scope), so the ASGI receive channel is read by a single task instead of once per streamed
+    chunk. Callers check the ``disconnected`` flag, race awaitables against the disconnect with
+    ``run`` and register closers that are invoked as soon as the client goes away.
+
+    NOTE: Like ``Request.is_disconnected``, the watcher consumes ASGI messages, so the request
+    body must already have been read before a watcher is acquired.
+    """
+
+    scope_key = "orichain.disconnect_watcher"
+    poll_interval = 0.1
+
+    def __init__(self, request: "Request") -> None:
+        """
+        Initialize the watcher for a request.
+
+        Args:
+            - request (Request): FastAPI request object to watch
+        """
+        self.request = request
+        self.disconnected = False
+        self._users = 0
+        self._closers: List[Callable] = []
+        self._task: Optional["asyncio.Task"] = None
+
+    @classmethod
+    def acquire(cls, request: Optional["Request"]) -> Optional["DisconnectWatcher"]:
+        """Returns the watcher shared by this request, starting it if needed.
+
+        Every call to `acquire` must be paired with a call to `release`.
+
+        Args:
+            request (Optional[Request]): FastAPI request object, may be None
+
+        Returns:
+            Optional[DisconnectWatcher]: The watcher, or None if no request was given
+        """
+        if request is None:
+            return None
+
+        scope = getattr(request, "scope", None)
+        watcher = scope.get(cls.scope_key) if isinstance(scope, dict) else None
+
+        if watcher is None:
+            watcher = cls(request)
+            if isinstance(scope, dict):
+                scope[cls.scope_key] = watcher
+
+        watcher._users += 1
+        if watcher._task is None and not watcher.disconnected:
+            import asyncio
+
+            watcher._task = asyncio.get_running_loop().create_task(watcher._watch())
+
+        return watcher
+
+    def release(self) -> None:
+        """Releases one user of the watcher, stopping the background task after the last one."""
+        self._users -= 1
+        if self._users > 0:
+            return
+
+        if self._task and not self._task.done():
+            self._task.cancel()
+        self._task = None
+        self._closers = []
+
+        scope = getattr(self.request, "scope", None)
+        if isinstance(scope, dict) and scope.get(self.scope_key) is self:
+            del scope[self.scope_key]
+
+    def register(self, closer: Callable) -> None:
+        """Registers a sync or async callable to be invoked once the client disconnects.
+
+        Args:
+            closer (Callable): Usually the `close`/`aclose` method of a provider stream
+        """
+        self._closers.append(closer)
+
+    def unregister(self, closer: Callable) -> None:
+        """Removes a closer registered earlier, if it is still registered.
+
+        Args:
+            closer (Callable): Callable passed to `register`
+        """
+        if closer in self._closers:
+            self._closers.remove(closer)
+
+    async def run(self, awaitable: Awaitable) -> Any:
+        """Awaits the given awaitable, cancelling it as soon as the client disconnects.
+
+        Args:
+            awaitable (Awaitable): The provider call to run
+
+        Returns:
+            Any: Result of the awaitable, or None if the client disconnected first
+        """
+        import asyncio
+
+        # The client is already gone, do not start the call at all
+        if self.disconnected:
+            if inspect.iscoroutine(awaitable):
+                awaitable.close()
+            elif isinstance(awaitable, asyncio.Future):
+                awaitable.cancel()
+            return None
+
+        call = asyncio.ensure_future(awaitable)
+
+        if self._task is None or self._task.done():
+            return await call
+
+        try:
+            await asyncio.wait({call, self._task}, return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            call.cancel()
+            raise
+
+        if not call.done() and self.disconnected:
+            call.cancel()
+            await asyncio.gather(call, return_exceptions=True)
+            return None
+
+        return await call
+
+    async def _watch(self) -> None:
+        """Waits for `http.disconnect` and then runs the registered closers."""
+        import asyncio
+
+        try:
+            receive = getattr(self.request, "receive", None)
+            if receive is not None:
+                # A single pending receive, resolved by the server once the client goes away
+                while True:
+                    message = await receive()
+                    if message.get("type") == "http.disconnect":
+                        break
+            else:
+                # Fallback for request objects that only expose `is_disconnected`
+                while not await self.request.is_disconnected():
+                    await asyncio.sleep(self.poll_interval)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error_explainer(e)
+            return
+
+        self.disconnected = True
+
+        for closer in list(self._closers):
+            try:
+                result = closer()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception:
+                # The stream may already be closed or be in the middle of closing
+                pass
+
+
+class StreamTracker(object):
+    """
+    Leak detector for provider streams.
+
+    Every provider streaming path tracks the stream it opens and untracks it once it has been
+    closed, whether iteration finished, failed, was cancelled or the consumer closed the
+    generator early. A non-zero count while no stream is in flight points at a leaked
+    connection.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty tracker."""
+        self._open: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def track(self, stream: Any, provider: str) -> Any:
+        """Marks a provider stream as open.
+
+        Args:
+            stream (Any): The provider stream object
+            provider (str): Name of the provider that opened the stream
+
+        Returns:
+            Any: The same stream, for convenience
+        """
+        with self._lock:
+            self._open[id(stream)] = provider
+        return stream
+
+    def untrack(self, stream: Any) -> None:
+        """Marks a provider stream as closed. Untracking twice is a no-op.
+
+        Args:
+            stream (Any): The provider stream object
+        """
+        with self._lock:
+            self._open.pop(id(stream), None)
+
+    def open_streams(self, provider: Optional[str] = None) -> int:
+        """Returns the number of streams currently open.
+
+        Args:
+            provider (Optional[str]): Only count streams of this provider
+
+        Returns:
+            int: Number of open streams
+        """
+        with self._lock:
+            if provider is None:
+                return len(self._open)
+            return sum(1 for name in self._open.values() if name == provider)
+
+    def snapshot(self) -> Dict[str, int]:
+        """Returns the number of open streams per provider.
+
+        Returns:
+            Dict[str, int]: Provider name mapped to its open stream count
+        """
+        counts: Dict[str, int] = {}
+        with self._lock:
+            for name in self._open.values():
+                counts[name] = counts.get(name, 0) + 1
+        return counts
+
+
+# Process wide tracker used by all the providers
+stream_tracker = StreamTracker()
+
+
+def close_stream(stream: Any) -> None:
+    """Closes a synchronous provider stream and stops tracking it. Never raises.
+
+    Args:
+        stream (Any): Provider stream or generator, may be None
+    """
+    if stream is None:
+        return
+
+    try:
+        closer = getattr(stream, "close", None)
+        if closer is not None:
+            closer()
+    except Exception:
+        # The stream may already be closed or the connection already dropped
+        pass
+    finally:
+        stream_tracker.untrack(stream)
+
+
+async def aclose_stream(stream: Any) -> None:
+    """Closes an asynchronous provider stream and stops tracking it. Never raises.
+
+    Uses `aclose` when available (async generators) and falls back to `close`, awaiting the
+    result if needed, so it works for OpenAI `AsyncStream`, Anthropic `AsyncMessageStream`,
+    async generators and plain synchronous streams alike.
+
+    Args:
+        stream (Any): Provider stream or generator, may be None
+    """
+    if stream is None:
+        return
+
+    try:
+        closer = getattr(stream, "aclose", None) or getattr(stream, "close", None)
+        if closer is not None:
+            result = closer()
+            if inspect.isawaitable(result):
+                await result
+    except Exception:
+        # The stream may already be closed or the connection already dropped
+        pass
+    finally:
+        stream_tracker.untrack(stream)
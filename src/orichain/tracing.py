@@ -0,0 +1,207 @@
+from typing import Any, Dict, Optional
+
+from orichain.usage import normalize
+
+# Active tracer, None means tracing is disabled
+_tracer: Optional[Any] = None
+
+# opentelemetry.context and opentelemetry.trace, set when the API package is installed
+_otel_context: Optional[Any] = None
+_otel_trace: Optional[Any] = None
+
+
+def configure(tracer: Optional[Any]) -> None:
+    """Enables tracing with an OpenTelemetry compatible tracer, or disables it with None.
+
+    Any object exposing `start_span(name, attributes=...)` and returning spans with
+    `set_attribute`, `record_exception` and `end` works. When the `opentelemetry-api`
+    package is installed, spans of non-streaming calls are also made current, so spans
+    opened by instrumented SDKs and by code running in `asyncio.to_thread` nest under them.
+
+    Args:
+        - tracer (Optional[Any]): e.g. `opentelemetry.trace.get_tracer("orichain")`
+    """
+    global _tracer, _otel_context, _otel_trace
+
+    _tracer = tracer
+    if tracer is None:
+        return
+
+    try:
+        from opentelemetry import context, trace
+
+        _otel_context, _otel_trace = context, trace
+    except ImportError:
+        _otel_context, _otel_trace = None, None
+
+
+def configure_opentelemetry(name: str = "orichain") -> Any:
+    """Enables tracing with the globally configured OpenTelemetry tracer provider.
+
+    Args:
+        - name (str, optional): Instrumentation scope name. Defaults to "orichain"
+
+    Returns:
+        Tracer: The OpenTelemetry tracer in use
+
+    Raises:
+        - ImportError: If opentelemetry-api is not installed
+    """
+    try:
+        from opentelemetry import trace
+    except ImportError:
+        raise ImportError(
+            "opentelemetry-api is required for tracing. Please install it using `pip install opentelemetry-api opentelemetry-sdk`."
+        )
+
+    tracer = trace.get_tracer(name)
+    configure(tracer)
+    return tracer
+
+
+def get_tracer() -> Optional[Any]:
+    """Returns the active tracer, or None when tracing is disabled."""
+    return _tracer
+
+
+class Span(object):
+    """Thin wrapper around a tracer span. Created by `start_span` only when tracing is enabled."""
+
+    __slots__ = ("span", "chunks", "finished", "_token")
+
+    def __init__(
+        self, tracer: Any, name: str, attributes: Dict[str, Any], current: bool
+    ) -> None:
+        self.span = tracer.start_span(name, attributes=_clean(attributes))
+        self.chunks = 0
+        self.finished = False
+        self._token = None
+
+        if current and _otel_context is not None:
+            self._token = _otel_context.attach(
+                _otel_trace.set_span_in_context(self.span)
+            )
+
+    def set(self, key: str, value: Any) -> None:
+        """Sets one attribute, None values are skipped.
+
+        Args:
+            - key (str): Attribute name
+            - value (Any): Attribute value
+        """
+        if value is not None:
+            self.span.set_attribute(key, value)
+
+    def error(self, error: Any) -> None:
+        """Marks the span as failed.
+
+        Args:
+            - error (Any): The exception, or the error reason of an error dict
+        """
+        if isinstance(error, BaseException):
+            self.span.record_exception(error)
+            self.set("error.type", type(error).__name__)
+            description = str(error)
+        else:
+            description = str(error)
+
+        if _otel_trace is not None:
+            self.span.set_status(
+                _otel_trace.Status(_otel_trace.StatusCode.ERROR, description)
+            )
+        else:
+            self.set("error", True)
+
+    def finish(self, result: Any = None, error: Optional[BaseException] = None) -> None:
+        """Records the outcome of the call and ends the span. Later calls are ignored.
+
+        Token counts and prompt cache hits are read from `metadata.usage` of dict results,
+        error dicts mark the span as failed.
+
+        Args:
+            - result (Any, optional): Value returned by the call
+            - error (BaseException, optional): Exception raised by the call
+        """
+        if self.finished:
+            return
+        self.finished = True
+
+        try:
+            if error is not None:
+                self.error(error)
+            elif isinstance(result, dict) and "error" in result:
+                self.set("error.type", str(result.get("error")))
+                self.error(result.get("reason"))
+            elif isinstance(result, dict):
+                usage = normalize((result.get("metadata") or {}).get("usage"))
+                if usage:
+                    self.set("gen_ai.usage.input_tokens", usage.input_tokens)
+                    self.set("gen_ai.usage.output_tokens", usage.output_tokens)
+                    self.set("orichain.cache_hit", usage.cache_read_tokens > 0)
+                    self.set("orichain.cached_tokens", usage.cache_read_tokens)
+
+            if self.chunks:
+                self.set("orichain.stream.chunks", self.chunks)
+        finally:
+            if self._token is not None:
+                try:
+                    _otel_context.detach(self._token)
+                except Exception:
+                    # Finished from another context (e.g. a generator resumed elsewhere)
+                    pass
+            self.span.end()
+
+    def close(self) -> None:
+        """Ends a span whose call stopped early, e.g. a stream closed by its consumer."""
+        if not self.finished:
+            self.set("orichain.cancelled", True)
+            self.finish()
+
+
+def start_span(
+    name: str, attributes: Dict[str, Any], current: bool = True
+) -> Optional[Span]:
+    """Starts a span. Returns None, at the cost of one global lookup, when tracing is disabled.
+
+    Args:
+        - name (str): Span name, e.g. "orichain.llm.call"
+        - attributes (Dict[str, Any]): Initial attributes, None values are skipped
+        - current (bool, optional): Make the span current until it finishes. Must be False for
+          spans living in generators, whose code is interleaved with the consumer's. Defaults to True
+
+    Returns:
+        Optional[Span]: The started span
+    """
+    tracer = _tracer
+    if tracer is None:
+        return None
+    return Span(tracer, name, attributes, current)
+
+
+def count_chunks(result: Any) -> Optional[int]:
+    """Counts the chunks in a knowledge base result.
+
+    Args:
+        - result (Any): Pinecone or ChromaDB query/fetch result
+
+    Returns:
+        Optional[int]: Number of chunks, None if unknown
+    """
+    if not isinstance(result, dict) or "error" in result:
+        return None
+    if isinstance(result.get("matches"), list):
+        return len(result["matches"])
+    if isinstance(result.get("vectors"), dict):
+        return len(result["vectors"])
+    ids = result.get("ids")
+    if isinstance(ids, list):
+        # ChromaDB query results hold one list of ids per query embedding
+        if ids and isinstance(ids[0], list):
+            return sum(len(i) for i in ids)
+        return len(ids)
+    return None
+
+
+def _clean(attributes: Dict[str, Any]) -> Dict[str, Any]:
+    """Drops the None values that OpenTelemetry does not accept"""
+    return {k: v for k, v in attributes.items() if v is not None}
@@ -0,0 +1,413 @@
+from typing import Any, Dict, Optional, Tuple
+import threading
+
+
+class Usage(object):
+    """
+    Token usage of one call, normalized across providers.
+
+    `input_tokens` counts every prompt token, including the ones read from or written to the
+    provider's prompt cache, and `output_tokens` includes the reasoning tokens, so the counts
+    are comparable whichever provider produced them.
+    """
+
+    __slots__ = (
+        "input_tokens",
+        "output_tokens",
+        "cache_read_tokens",
+        "cache_write_tokens",
+        "reasoning_tokens",
+        "latency_ms",
+    )
+
+    def __init__(
+        self,
+        input_tokens: int = 0,
+        output_tokens: int = 0,
+        cache_read_tokens: int = 0,
+        cache_write_tokens: int = 0,
+        reasoning_tokens: int = 0,
+        latency_ms: Optional[float] = None,
+    ) -> None:
+        """
+        Args:
+            - input_tokens (int, optional): Prompt tokens, cached ones included
+            - output_tokens (int, optional): Generated tokens, reasoning ones included
+            - cache_read_tokens (int, optional): Prompt tokens served from the prompt cache
+            - cache_write_tokens (int, optional): Prompt tokens written to the prompt cache
+            - reasoning_tokens (int, optional): Tokens spent on reasoning or thinking
+            - latency_ms (float, optional): Latency reported by the provider, if any
+        """
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+        self.cache_read_tokens = cache_read_tokens
+        self.cache_write_tokens = cache_write_tokens
+        self.reasoning_tokens = reasoning_tokens
+        self.latency_ms = latency_ms
+
+    @property
+    def total_tokens(self) -> int:
+        """Input and output tokens together"""
+        return self.input_tokens + self.output_tokens
+
+    @property
+    def uncached_input_tokens(self) -> int:
+        """Prompt tokens that were neither read from nor written to the prompt cache"""
+        return max(
+            self.input_tokens - self.cache_read_tokens - self.cache_write_tokens, 0
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns the record as a dict, as attached to `metadata.normalized_usage`"""
+        return {
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "cache_read_tokens": self.cache_read_tokens,
+            "cache_write_tokens": self.cache_write_tokens,
+            "reasoning_tokens": self.reasoning_tokens,
+            "latency_ms": self.latency_ms,
+        }
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{k}={getattr(self, k)!r}" for k in self.__slots__)
+        return f"Usage({fields})"
+
+
+def _count(usage: Dict, *keys: str) -> int:
+    """Sums the numeric values found under the keys"""
+    total = 0
+    for key in keys:
+        value = usage.get(key)
+        if isinstance(value, (int, float)):
+            total += value
+    return total
+
+
+def _nested(usage: Dict, key: str, field: str) -> int:
+    """Reads a count out of a nested details dict, e.g. prompt_tokens_details"""
+    details = usage.get(key)
+    return _count(details, field) if isinstance(details, dict) else 0
+
+
+def normalize(usage: Any) -> Optional[Usage]:
+    """Converts the `metadata.usage` of any provider into a Usage record.
+
+    Supported shapes:
+        - OpenAI, AzureOpenAI and TogetherAI: prompt_tokens, completion_tokens and their details
+        - OpenAI Responses API: input_tokens, output_tokens and their details
+        - Anthropic and AnthropicBedrock: input_tokens, output_tokens and the cache_*_input_tokens
+        - AWSBedrock Converse: inputTokens, outputTokens, cache*InputTokens and latencyMs
+        - GoogleGemini and GoogleVertexAI: the usage_metadata JSON dict
+
+    Args:
+        - usage (Any): `metadata.usage` of a response
+
+    Returns:
+        Optional[Usage]: The normalized record, None if the shape is not recognized
+    """
+    if not isinstance(usage, dict):
+        return None
+
+    if "prompt_tokens" in usage or "completion_tokens" in usage:
+        return Usage(
+            input_tokens=_count(usage, "prompt_tokens"),
+            output_tokens=_count(usage, "completion_tokens"),
+            cache_read_tokens=_nested(usage, "prompt_tokens_details", "cached_tokens"),
+            reasoning_tokens=_nested(
+                usage, "completion_tokens_details", "reasoning_tokens"
+            ),
+        )
+
+    if "input_tokens_details" in usage or "output_tokens_details" in usage:
+        # The Responses API counts cached prompt tokens in input_tokens, unlike Anthropic
+        return Usage(
+            input_tokens=_count(usage, "input_tokens"),
+            output_tokens=_count(usage, "output_tokens"),
+            cache_read_tokens=_nested(usage, "input_tokens_details", "cached_tokens"),
+            reasoning_tokens=_nested(
+                usage, "output_tokens_details", "reasoning_tokens"
+            ),
+        )
+
+    if "input_tokens" in usage or "output_tokens" in usage:
+        # Anthropic does not count cached prompt tokens in input_tokens
+        return Usage(
+            input_tokens=_count(
+                usage,
+                "input_tokens",
+                "cache_read_input_tokens",
+                "cache_creation_input_tokens",
+            ),
+            output_tokens=_count(usage, "output_tokens"),
+            cache_read_tokens=_count(usage, "cache_read_input_tokens"),
+            cache_write_tokens=_count(usage, "cache_creation_input_tokens"),
+        )
+
+    if "inputTokens" in usage or "outputTokens" in usage:
+        # Neither does Bedrock Converse in inputTokens
+        return Usage(
+            input_tokens=_count(
+                usage, "inputTokens", "cacheReadInputTokens", "cacheWriteInputTokens"
+            ),
+            output_tokens=_count(usage, "outputTokens"),
+            cache_read_tokens=_count(usage, "cacheReadInputTokens"),
+            cache_write_tokens=_count(usage, "cacheWriteInputTokens"),
+            latency_ms=usage.get("latencyMs"),
+        )
+
+    if "prompt_token_count" in usage or "candidates_token_count" in usage:
+        # Gemini does not count thinking tokens in candidates_token_count
+        return Usage(
+            input_tokens=_count(usage, "prompt_token_count"),
+            output_tokens=_count(
+                usage, "candidates_token_count", "thoughts_token_count"
+            ),
+            cache_read_tokens=_count(usage, "cached_content_token_count"),
+            reasoning_tokens=_count(usage, "thoughts_token_count"),
+        )
+
+    return None
+
+
+class Pricing(object):
+    """
+    Per-model token prices, in USD per million tokens.
+
+    Models are matched by exact name first and then by the longest registered prefix, so a price
+    registered for "gpt-4o" also applies to "gpt-4o-2024-08-06". Cache prices default to the
+    input price when not given.
+    """
+
+    def __init__(self, prices: Optional[Dict[str, Dict[str, float]]] = None) -> None:
+        """
+        Args:
+            - prices (Dict[str, Dict[str, float]], optional): Model name mapped to a dict with the
+              input, output, cache_read and cache_write prices
+        """
+        self._prices: Dict[str, Tuple[float, float, float, float]] = {}
+        self._lookup: Dict[str, Optional[Tuple[float, float, float, float]]] = {}
+        for model, price in (prices or {}).items():
+            self.set(model, **price)
+
+    def set(
+        self,
+        model: str,
+        input: float,
+        output: float,
+        cache_read: Optional[float] = None,
+        cache_write: Optional[float] = None,
+    ) -> None:
+        """Registers the prices of a model.
+
+        Args:
+            - model (str): Model name or prefix
+            - input (float): Price of a million uncached input tokens
+            - output (float): Price of a million output tokens
+            - cache_read (float, optional): Price of a million input tokens read from the cache
+            - cache_write (float, optional): Price of a million input tokens written to the cache
+        """
+        self._prices[model] = (
+            input,
+            output,
+            input if cache_read is None else cache_read,
+            input if cache_write is None else cache_write,
+        )
+        self._lookup = {}
+
+    def get(self, model: Optional[str]) -> Optional[Tuple[float, float, float, float]]:
+        """Returns the (input, output, cache_read, cache_write) prices of a model.
+
+        Args:
+            - model (str): Model name
+
+        Returns:
+            Optional[Tuple[float, float, float, float]]: The prices, None if the model is unknown
+        """
+        if not model:
+            return None
+        if model in self._lookup:
+            return self._lookup[model]
+
+        price = self._prices.get(model)
+        if price is None:
+            prefixes = [p for p in self._prices if model.startswith(p)]
+            price = self._prices[max(prefixes, key=len)] if prefixes else None
+
+        self._lookup[model] = price
+        return price
+
+    def cost(self, model: Optional[str], usage: Usage) -> Optional[float]:
+        """Computes the cost of one call.
+
+        Args:
+            - model (str): Model name
+            - usage (Usage): Normalized usage of the call
+
+        Returns:
+            Optional[float]: Cost in USD, None if the model has no registered prices
+        """
+        price = self.get(model)
+        if price is None:
+            return None
+        input_price, output_price, read_price, write_price = price
+        return (
+            usage.uncached_input_tokens * input_price
+            + usage.cache_read_tokens * read_price
+            + usage.cache_write_tokens * write_price
+            + usage.output_tokens * output_price
+        ) / 1_000_000
+
+
+# Prices used for the cost of every call, empty until models are registered
+pricing = Pricing()
+
+
+class UsageAggregator(object):
+    """
+    In-process rollup of usage and cost per provider and model.
+
+    Recording a call is a handful of additions under a lock, so it can stay enabled in
+    production. Read `snapshot()` from a dashboard endpoint or a periodic reporter.
+    """
+
+    # Counters kept for every provider and model
+    FIELDS = (
+        "calls",
+        "input_tokens",
+        "output_tokens",
+        "cache_read_tokens",
+        "cache_write_tokens",
+        "reasoning_tokens",
+        "cost",
+        "duration",
+        "priced_calls",
+    )
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._rollups: Dict[Tuple[str, str], list] = {}
+
+    def record(
+        self,
+        provider: str,
+        model: str,
+        usage: Usage,
+        duration: float,
+        cost: Optional[float] = None,
+    ) -> None:
+        """Adds one call to the rollup of its model.
+
+        Args:
+            - provider (str): Provider name
+            - model (str): Model name
+            - usage (Usage): Normalized usage of the call
+            - duration (float): Wall time of the call in seconds
+            - cost (float, optional): Cost of the call in USD, if priced
+        """
+        key = (provider, model)
+        with self._lock:
+            rollup = self._rollups.get(key)
+            if rollup is None:
+                rollup = self._rollups[key] = [0] * len(self.FIELDS)
+            rollup[0] += 1
+            rollup[1] += usage.input_tokens
+            rollup[2] += usage.output_tokens
+            rollup[3] += usage.cache_read_tokens
+            rollup[4] += usage.cache_write_tokens
+            rollup[5] += usage.reasoning_tokens
+            rollup[7] += duration
+            if cost is not None:
+                rollup[6] += cost
+                rollup[8] += 1
+
+    def snapshot(self) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """Returns the rollups with their derived rates.
+
+        Returns:
+            Dict[Tuple[str, str], Dict[str, Any]]: (provider, model) mapped to the summed counters,
+            plus output_tokens_per_second, cache_hit_ratio (share of input tokens read from the
+            cache) and cost_per_call
+        """
+        with self._lock:
+            rollups = {key: list(values) for key, values in self._rollups.items()}
+
+        snapshot = {}
+        for key, values in sorted(rollups.items()):
+            rollup = dict(zip(self.FIELDS, values))
+            rollup["output_tokens_per_second"] = (
+                rollup["output_tokens"] / rollup["duration"]
+                if rollup["duration"]
+                else None
+            )
+            rollup["cache_hit_ratio"] = (
+                rollup["cache_read_tokens"] / rollup["input_tokens"]
+                if rollup["input_tokens"]
+                else None
+            )
+            rollup["cost_per_call"] = (
+                rollup["cost"] / rollup["priced_calls"]
+                if rollup["priced_calls"]
+                else None
+            )
+            snapshot[key] = rollup
+        return snapshot
+
+    def reset(self) -> None:
+        """Drops everything recorded so far."""
+        with self._lock:
+            self._rollups = {}
+
+
+# Active aggregator, None means usage is not aggregated
+_aggregator: Optional[UsageAggregator] = None
+
+
+def configure(aggregator: Optional[UsageAggregator]) -> None:
+    """Enables usage aggregation, or disables it with None.
+
+    Args:
+        - aggregator (Optional[UsageAggregator]): Aggregator receiving every call
+    """
+    global _aggregator
+    _aggregator = aggregator
+
+
+def get_aggregator() -> Optional[UsageAggregator]:
+    """Returns the active aggregator, or None when aggregation is disabled."""
+    return _aggregator
+
+
+def account(result: Any, provider: str, model: str, duration: float) -> Optional[Usage]:
+    """Normalizes the usage of a successful call, attaches it to the result and aggregates it.
+
+    The record is added to `metadata.normalized_usage` along with the cost in USD under
+    `metadata.normalized_usage.cost` when the model has registered prices.
+
+    Args:
+        - result (Any): Result of the call, or the final chunk of a stream
+        - provider (str): Provider name
+        - model (str): Model name
+        - duration (float): Wall time of the call in seconds
+
+    Returns:
+        Optional[Usage]: The normalized usage, None for errors and unrecognized usage shapes
+    """
+    if not isinstance(result, dict) or "error" in result:
+        return None
+
+    metadata = result.get("metadata")
+    if not isinstance(metadata, dict):
+        return None
+
+    record = normalize(metadata.get("usage"))
+    if record is None:
+        return None
+
+    cost = pricing.cost(model, record)
+    metadata["normalized_usage"] = {**record.to_dict(), "cost": cost}
+
+    aggregator = _aggregator
+    if aggregator is not None:
+        aggregator.record(provider, model, record, duration, cost)
+
+    return record
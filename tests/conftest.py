@@ -0,0 +1,126 @@
+import asyncio
+import warnings
+from typing import Any, AsyncGenerator, Dict, Optional
+
+import pytest
+
+from orichain.llm import AsyncLLM
+from orichain.streaming import DisconnectWatcher, aclose_stream, stream_tracker
+
+
+class FakeStream(object):
+    """Provider stream yielding `chunks` text chunks, like the SDK stream objects"""
+
+    def __init__(self, chunks: int, delay: float) -> None:
+        self.chunks = chunks
+        self.delay = delay
+        self.sent = 0
+        self.closed = False
+
+    def __aiter__(self) -> "FakeStream":
+        return self
+
+    async def __anext__(self) -> str:
+        if self.closed or self.sent >= self.chunks:
+            raise StopAsyncIteration
+        await asyncio.sleep(self.delay)
+        self.sent += 1
+        return f"chunk{self.sent} "
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+class FakeAsyncGenerate(object):
+    """Async provider following the streaming contract of the real ones:
+    track the stream, register it with the disconnect watcher, close it in `finally`."""
+
+    provider = "Fake"
+
+    def __init__(self, **kwds: Any) -> None:
+        self.chunks = kwds.get("chunks", 20)
+        self.delay = kwds.get("delay", 0)
+        # Errors returned by the first calls, one per call
+        self.failures = list(kwds.get("failures") or [])
+        self.calls = 0
+
+    async def __call__(self, **kwds: Any) -> Dict:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.failures:
+            return dict(self.failures.pop(0))
+        return {"response": "ok", "metadata": {"usage": {}}}
+
+    async def streaming(
+        self, request: Optional[Any] = None, **kwds: Any
+    ) -> AsyncGenerator:
+        watcher = DisconnectWatcher.acquire(request)
+        stream = None
+        try:
+            self.calls += 1
+            if self.failures:
+                yield dict(self.failures.pop(0))
+                return
+            stream = stream_tracker.track(
+                FakeStream(self.chunks, self.delay), self.provider
+            )
+            if watcher:
+                watcher.register(stream.close)
+            parts = []
+            async for chunk in stream:
+                if watcher and watcher.disconnected:
+                    break
+                parts.append(chunk)
+                yield chunk
+            if watcher and watcher.disconnected:
+                yield {"error": 400, "reason": "request aborted by user"}
+            else:
+                yield {"response": "".join(parts), "metadata": {"usage": {}}}
+        finally:
+            await aclose_stream(stream)
+            if watcher:
+                watcher.release()
+
+
+class FakeRequest(object):
+    """ASGI request whose client disconnects once `disconnect` is called"""
+
+    def __init__(self) -> None:
+        self.scope: Dict[str, Any] = {}
+        self._gone = asyncio.Event()
+
+    async def receive(self) -> Dict[str, str]:
+        await self._gone.wait()
+        return {"type": "http.disconnect"}
+
+    def disconnect(self) -> None:
+        self._gone.set()
+
+
+@pytest.fixture
+def fake_provider() -> type:
+    return FakeAsyncGenerate
+
+
+@pytest.fixture
+def fake_request() -> type:
+    return FakeRequest
+
+
+@pytest.fixture
+def async_llm(monkeypatch: pytest.MonkeyPatch) -> Any:
+    """Builds AsyncLLM instances backed by `FakeAsyncGenerate`"""
+    monkeypatch.setattr(AsyncLLM, "model_handler", {"OpenAI": FakeAsyncGenerate})
+
+    def build(**kwds: Any) -> AsyncLLM:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            return AsyncLLM(model_name="gpt-4o-mini", provider="OpenAI", **kwds)
+
+    return build
+
+
+@pytest.fixture(autouse=True)
+def no_leaked_streams() -> Any:
+    yield
+    assert stream_tracker.open_streams() == 0, stream_tracker.snapshot()
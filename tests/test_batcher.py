@@ -0,0 +1,132 @@
+import asyncio
+import contextvars
+import warnings
+
+import pytest
+
+from orichain.deadline import current_deadline
+from orichain.embeddings import AsyncEmbeddingModel
+from orichain.embeddings.batcher import MicroBatcher
+
+
+def vector(text):
+    return [float(len(text)), 0.5]
+
+
+class FakeAsyncEmbed(object):
+    """Async embedding provider returning a vector per text, like the real ones"""
+
+    def __init__(self, **kwds):
+        self.calls = []
+        self.deadlines = []
+
+    async def __call__(self, text, model_name, **kwds):
+        texts = [text] if isinstance(text, str) else list(text)
+        self.calls.append(texts)
+        self.deadlines.append(current_deadline())
+        await asyncio.sleep(0.01)
+        if "boom" in texts:
+            return {"error": 500, "reason": "boom"}
+        # A single vector for a single text, like the providers
+        vectors = [vector(text) for text in texts]
+        return vectors[0] if len(vectors) == 1 else vectors
+
+
+@pytest.fixture
+def embedding_model(monkeypatch):
+    monkeypatch.setattr(
+        AsyncEmbeddingModel, "model_handler", {"OpenAI": FakeAsyncEmbed}
+    )
+
+    def build(**kwds):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            return AsyncEmbeddingModel(
+                model_name="text-embedding-3-small", provider="OpenAI", **kwds
+            )
+
+    return build
+
+
+def test_batcher_groups_concurrent_calls(embedding_model):
+    model = embedding_model(micro_batch={"max_batch": 8, "max_wait": 0.01})
+
+    async def main():
+        return await asyncio.gather(*[model("t" * i) for i in range(1, 21)])
+
+    assert asyncio.run(main()) == [vector("t" * i) for i in range(1, 21)]
+    assert [len(call) for call in model.model.calls] == [8, 8, 4]
+
+
+def test_batcher_hands_each_caller_its_vectors(embedding_model):
+    model = embedding_model(micro_batch=True)
+
+    async def main():
+        return await asyncio.gather(
+            model(["a", "bb"]), model("ccc"), model(["dddd"]), model("e", dimensions=3)
+        )
+
+    results = asyncio.run(main())
+    assert results == [
+        [vector("a"), vector("bb")],
+        vector("ccc"),
+        vector("dddd"),
+        vector("e"),
+    ]
+    # Different generation arguments are not batched together
+    assert len(model.model.calls) == 2
+
+
+def test_batcher_errors_reach_every_caller(embedding_model):
+    model = embedding_model(micro_batch=True)
+
+    async def main():
+        return await asyncio.gather(model("boom"), model("x"))
+
+    assert asyncio.run(main()) == [{"error": 500, "reason": "boom"}] * 2
+
+
+def test_batch_sent_in_a_clean_context(embedding_model):
+    model = embedding_model(micro_batch={"max_wait": 0.005})
+    marker = contextvars.ContextVar("marker", default=None)
+
+    async def compute(texts):
+        seen.append((marker.get(), current_deadline()))
+        return vector(texts[0])
+
+    seen = []
+
+    async def main():
+        marker.set("caller")
+        batcher = MicroBatcher("test", max_wait=0.005)
+        short = asyncio.create_task(model("short", deadline=0.002))
+        await asyncio.sleep(0)
+        other = asyncio.create_task(model("long", deadline=5))
+        direct = await batcher.embed("m", {}, "x", compute)
+        return await short, await other, direct
+
+    short, other, direct = asyncio.run(main())
+    # The short deadline only ends its own wait, the batch goes on for the other caller
+    assert short["error"] == 504
+    assert other == vector("long")
+    assert direct == vector("x")
+    assert model.model.deadlines == [None]
+    assert seen == [(None, None)]
+
+
+def test_batcher_leaves_cancelled_callers_out():
+    batcher = MicroBatcher("test", max_wait=0.005)
+
+    async def compute(texts):
+        await asyncio.sleep(0.01)
+        return [vector(text) for text in texts]
+
+    async def main():
+        gone = asyncio.create_task(batcher.embed("m", {}, "gone", compute))
+        kept = asyncio.create_task(batcher.embed("m", {}, "kept", compute))
+        await asyncio.sleep(0)
+        gone.cancel()
+        return await kept
+
+    assert asyncio.run(main()) == vector("kept")
+    assert batcher.snapshot()["in_flight"] == 0
@@ -0,0 +1,136 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from orichain.deadline import (
+    Deadline,
+    DeadlineExceeded,
+    current_deadline,
+    request_timeout,
+)
+
+
+def test_budget():
+    deadline = Deadline(10)
+    assert 9 < deadline.remaining() <= 10
+    assert deadline.allows(5) and not deadline.allows(11)
+    assert deadline.timeout(2) == 2
+    assert not deadline.expired
+    assert deadline.child(reserve=4).remaining() <= 6
+    with pytest.raises(ValueError):
+        Deadline()
+
+
+def test_run_returns_504_once_expired():
+    async def main():
+        deadline = Deadline(0.01)
+        assert await deadline.run(asyncio.sleep(0, result="done"), "step") == "done"
+        return await deadline.run(asyncio.sleep(1), "step")
+
+    assert asyncio.run(main()) == {
+        "error": 504,
+        "reason": "deadline exceeded during step",
+    }
+
+
+def test_wait_sets_the_current_deadline():
+    async def main():
+        deadline = Deadline(1)
+
+        async def inner():
+            return current_deadline()
+
+        assert await deadline.wait(inner()) is deadline
+        assert current_deadline() is None
+        with pytest.raises(DeadlineExceeded):
+            await Deadline(0).wait(inner())
+
+    asyncio.run(main())
+
+
+def test_limit_cuts_a_stream_and_closes_it():
+    closed = []
+
+    async def stream():
+        try:
+            while True:
+                await asyncio.sleep(0.001)
+                yield "chunk"
+        finally:
+            closed.append(True)
+
+    async def main():
+        return [chunk async for chunk in Deadline(0.05).limit(stream(), "llm stream")]
+
+    chunks = asyncio.run(main())
+    assert chunks[-1]["error"] == 504
+    assert chunks[:-1] and all(chunk == "chunk" for chunk in chunks[:-1])
+    assert closed
+
+
+def test_limit_does_not_cancel_the_consumer():
+    async def stream():
+        for _ in range(3):
+            yield "chunk"
+
+    async def main():
+        received = []
+        async for chunk in Deadline(0.02).limit(stream(), "llm stream"):
+            # Slow consumer work between chunks is not interrupted
+            await asyncio.sleep(0.015)
+            received.append(chunk)
+        return received
+
+    received = asyncio.run(main())
+    assert received[0] == "chunk"
+    assert received[-1]["error"] == 504
+
+
+def test_deadline_stops_a_stream(async_llm):
+    llm = async_llm(chunks=1000, delay=0.001)
+
+    async def main():
+        return [
+            chunk
+            async for chunk in llm.stream(
+                user_message="hi", do_sse=False, deadline=0.05
+            )
+        ]
+
+    chunks = asyncio.run(main())
+    assert chunks[-1]["error"] == 504
+    assert 0 < len(chunks) - 1 < 1000
+
+
+def test_request_timeout_follows_the_current_deadline():
+    httpx = pytest.importorskip("httpx")
+    client = SimpleNamespace(timeout=httpx.Timeout(60.0, connect=2.0))
+    assert request_timeout(client) == {}
+    with Deadline(5):
+        timeout = request_timeout(client)["timeout"]
+        assert timeout.connect == 2.0 and 4 < timeout.read <= 5
+        assert request_timeout(SimpleNamespace(timeout=1.0)) == {"timeout": 1.0}
+        assert 4 < request_timeout()["timeout"] <= 5
+
+
+def test_deadline_bounds_the_sdk_request():
+    pytest.importorskip("openai")
+    from orichain.llm import AsyncLLM
+
+    llm = AsyncLLM(model_name="gpt-4o-mini", provider="OpenAI", api_key="test")
+    sent = {}
+
+    async def create(**kwds):
+        sent.update(kwds)
+        message = SimpleNamespace(content="ok", tool_calls=None)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+    llm.model.client = SimpleNamespace(
+        timeout=60.0, chat=SimpleNamespace(completions=SimpleNamespace(create=create))
+    )
+    assert asyncio.run(llm(user_message="hi", deadline=5))["response"] == "ok"
+    assert 4 < sent["timeout"] <= 5
+    sent.clear()
+    asyncio.run(llm(user_message="hi"))
+    assert "timeout" not in sent
@@ -0,0 +1,120 @@
+import asyncio
+import threading
+
+from orichain.embeddings.cache import DiskTier, EmbeddingCache
+
+
+def vector(text):
+    return [float(len(text)), 0.5]
+
+
+def test_cache_serves_hits_without_the_provider():
+    cache = EmbeddingCache("test")
+    calls = []
+
+    async def compute(texts):
+        calls.append(list(texts))
+        return [vector(text) for text in texts]
+
+    async def main():
+        first = await cache.aembed("OpenAI", "m", {}, ["a", "bb"], compute)
+        second = await cache.aembed("OpenAI", "m", {}, ["bb", "ccc"], compute)
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert first == [vector("a"), vector("bb")]
+    assert second == [vector("bb"), vector("ccc")]
+    assert calls == [["a", "bb"], ["ccc"]]
+
+
+def test_cache_keys_include_the_arguments():
+    cache = EmbeddingCache("test")
+    calls = []
+
+    def compute(texts):
+        calls.append(list(texts))
+        return [vector(text) for text in texts]
+
+    cache.embed("OpenAI", "m", {}, ["a"], compute)
+    cache.embed("OpenAI", "m", {"dimensions": 8}, ["a"], compute)
+    cache.embed("OpenAI", "other", {}, ["a"], compute)
+    cache.embed("OpenAI", "m", {}, ["a"], compute)
+    assert len(calls) == 3
+
+
+def test_concurrent_calls_share_one_provider_call():
+    cache = EmbeddingCache("test")
+    calls = []
+
+    async def compute(texts):
+        calls.append(list(texts))
+        await asyncio.sleep(0.01)
+        return [vector(text) for text in texts]
+
+    async def main():
+        return await asyncio.gather(
+            *[cache.aembed("OpenAI", "m", {}, "same", compute) for _ in range(50)]
+        )
+
+    assert asyncio.run(main()) == [vector("same")] * 50
+    assert calls == [["same"]]
+
+
+def test_disk_tier_persists(tmp_path):
+    calls = []
+
+    def compute(texts):
+        calls.append(list(texts))
+        return [vector(text) for text in texts]
+
+    cache = EmbeddingCache("test", path=str(tmp_path))
+    cache.embed("OpenAI", "m", {}, ["a", "bb"], compute)
+    cache.close()
+
+    reopened = EmbeddingCache("test", path=str(tmp_path))
+    assert reopened.embed("OpenAI", "m", {}, ["a", "bb"], compute) == [
+        vector("a"),
+        vector("bb"),
+    ]
+    assert len(calls) == 1
+    reopened.close()
+
+
+def test_errors_are_not_cached():
+    cache = EmbeddingCache("test")
+
+    def compute(texts):
+        return {"error": 500, "reason": "boom"}
+
+    assert cache.embed("OpenAI", "m", {}, "a", compute)["error"] == 500
+    assert cache.snapshot()["memory"] == 0
+
+
+def test_async_disk_tier_runs_in_threads_without_the_lock(tmp_path, monkeypatch):
+    cache = EmbeddingCache("test", path=str(tmp_path))
+    calls = []
+
+    def spy(method):
+        def call(self, *args):
+            calls.append((threading.current_thread(), cache._lock.locked()))
+            return method(self, *args)
+
+        return call
+
+    monkeypatch.setattr(DiskTier, "get", spy(DiskTier.get))
+    monkeypatch.setattr(DiskTier, "put", spy(DiskTier.put))
+
+    async def compute(texts):
+        return [vector(text) for text in texts]
+
+    async def main():
+        await cache.aembed("OpenAI", "m", {}, ["a", "bb"], compute)
+        cache.clear()
+        return await cache.aembed("OpenAI", "m", {}, ["a", "bb"], compute)
+
+    assert asyncio.run(main()) == [vector("a"), vector("bb")]
+    assert calls and all(
+        thread is not threading.main_thread() and not locked for thread, locked in calls
+    )
+    assert cache.snapshot()["memory"] == 2
+    cache.close()
@@ -0,0 +1,67 @@
+import asyncio
+
+from orichain.llm.memory import FileBackend, MemoryStore
+
+
+def contents(messages):
+    return [message["content"] for message in messages]
+
+
+def store(path, **settings):
+    return MemoryStore(
+        "test", backend=FileBackend(str(path)), token_counter=len, **settings
+    )
+
+
+def test_record_and_reload(tmp_path):
+    memory = store(tmp_path)
+    memory.record("c", "hi", {"response": "hello"})
+    memory.record("c", "bye", {"error": 500})
+    memory.record("c", "how are you", {"response": "fine"})
+    assert contents(memory.history("c")) == ["hi", "hello", "how are you", "fine"]
+    assert store(tmp_path).history("c") == memory.history("c")
+
+
+def test_truncation_without_summarizer(tmp_path):
+    memory = store(tmp_path, max_tokens=10, keep_tokens=4, keep_messages=2)
+    for turn in range(5):
+        memory.record("c", f"q{turn}", {"response": f"a{turn}"})
+    assert memory.tokens("c") <= 10
+    assert memory.history("c")[0]["role"] == "user"
+    assert store(tmp_path).history("c") == memory.history("c")
+
+
+def test_queued_save_does_not_pick_up_later_messages(tmp_path):
+    memory = store(tmp_path, max_tokens=5, keep_tokens=2, keep_messages=2)
+    for turn in range(4):
+        memory._add(
+            "c",
+            memory.get("c"),
+            [{"role": "user", "content": str(turn)}] * 2,
+            [1, 1],
+        )
+    memory._flush()
+    assert store(tmp_path).history("c") == memory.history("c")
+
+
+def test_concurrent_aextend_matches_the_backend(tmp_path):
+    memory = store(tmp_path, max_tokens=30, keep_tokens=10, keep_messages=2)
+
+    async def main():
+        await asyncio.gather(
+            *[
+                memory.aextend(
+                    "c",
+                    [
+                        {"role": "user", "content": str(turn)},
+                        {"role": "assistant", "content": str(turn)},
+                    ],
+                    [5, 5],
+                )
+                for turn in range(8)
+            ]
+        )
+
+    asyncio.run(main())
+    assert memory.snapshot()["pending_writes"] == 0
+    assert contents(store(tmp_path).history("c")) == contents(memory.history("c"))
@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from orichain.pool import ClientPool, PoolMember
+
+
+def members(*names, **settings):
+    return [PoolMember(name, **settings) for name in names]
+
+
+def test_round_robin_follows_the_weights():
+    pool = ClientPool(
+        [PoolMember("a", weight=2), PoolMember("b")], strategy="round_robin"
+    )
+    picks = []
+    for _ in range(6):
+        member = pool.select()
+        picks.append(member.name)
+        pool.release(member)
+    assert picks.count("a") == 4 and picks.count("b") == 2
+
+
+def test_least_loaded_spreads_calls_in_flight():
+    pool = ClientPool(members("a", "b", "c"), strategy="least_loaded")
+    picked = {pool.select().name for _ in range(3)}
+    assert picked == {"a", "b", "c"}
+
+
+def test_throttled_member_cools_down():
+    pool = ClientPool(members("a", "b"), cooldown=60)
+    first = pool.select()
+    assert pool.record(first, {"error": 429, "reason": "Error code: 429"}, None, 0.1)
+    for _ in range(5):
+        member = pool.select()
+        assert member is not first
+        pool.record(member, {"response": "ok"}, None, 0.1)
+    assert pool.select(exclude={pool.members[0], pool.members[1]}) is None
+
+
+def test_client_errors_do_not_move_on():
+    pool = ClientPool(members("a", "b"))
+    member = pool.select()
+    assert not pool.record(member, {"error": 400, "reason": "Error code: 400"}, None, 1)
+    assert member.health == 1.0
+
+
+def test_lower_tiers_first():
+    pool = ClientPool([PoolMember("payg", tier="payg"), PoolMember("ptu", tier="ptu")])
+    assert pool.select().name == "ptu"
+    with pytest.raises(ValueError):
+        PoolMember("x", tier="spot")
+
+
+def test_members_only_serve_their_models():
+    pool = ClientPool([PoolMember("a", models=["m1"]), PoolMember("b", models=["m2"])])
+    assert pool.select(model_name="m2").name == "b"
+    assert pool.select(model_name="m3") is None
+    assert pool.exhausted("m3")["error"] == 404
+
+
+def test_pooled_llm_fails_over(async_llm):
+    llm = async_llm(
+        api_keys=[
+            {
+                "api_key": "k1",
+                "failures": [{"error": 429, "reason": "Error code: 429"}],
+            },
+            {"api_key": "k2"},
+        ],
+        pool={"strategy": "round_robin"},
+    )
+    result = asyncio.run(llm(user_message="hi"))
+    assert result["response"] == "ok"
+    assert result["metadata"]["pool_member"] == "key#1"
+    throttled = [m for m in llm.model.pool.members if m.throttled]
+    assert [m.name for m in throttled] == ["key#0"]
@@ -0,0 +1,219 @@
+import asyncio
+import random
+import warnings
+from types import SimpleNamespace
+
+import pytest
+
+from orichain.llm import LLM, AsyncLLM
+from orichain.llm.scheduler import Scheduler
+from orichain.streaming import DisconnectWatcher, stream_tracker
+
+STREAMS = 500
+
+GEMINI_CHUNK = SimpleNamespace(text="x", function_calls=None, usage_metadata=None)
+BEDROCK_EVENT = {"contentBlockDelta": {"delta": {"text": "x"}}}
+
+
+class FakeMessageStream(object):
+    """Anthropic `messages.stream` manager and stream, never ending until closed"""
+
+    def __init__(self, opened):
+        self.closed = False
+        opened.append(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def text_stream(self):
+        while not self.closed:
+            yield "x"
+
+    def close(self):
+        self.closed = True
+
+
+class FakeAsyncMessageStream(FakeMessageStream):
+    """Anthropic async `messages.stream` manager and stream, never ending until closed"""
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    @property
+    def text_stream(self):
+        return self._text()
+
+    async def _text(self):
+        while not self.closed:
+            await asyncio.sleep(0)
+            yield "x"
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeChunks(object):
+    """Gemini response stream or Bedrock event stream, never ending until closed"""
+
+    def __init__(self, opened, chunk):
+        self.chunk = chunk
+        self.closed = False
+        opened.append(self)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.closed:
+            raise StopIteration
+        return self.chunk
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.closed:
+            raise StopAsyncIteration
+        await asyncio.sleep(0)
+        return self.chunk
+
+    def close(self):
+        self.closed = True
+
+
+def anthropic_client(opened, asynchronous):
+    stream = FakeAsyncMessageStream if asynchronous else FakeMessageStream
+    return SimpleNamespace(
+        messages=SimpleNamespace(stream=lambda **kwds: stream(opened))
+    )
+
+
+def gemini_client(opened, asynchronous):
+    async def send_message_stream(message):
+        return FakeChunks(opened, GEMINI_CHUNK)
+
+    session = SimpleNamespace(
+        send_message_stream=lambda message: FakeChunks(opened, GEMINI_CHUNK)
+    )
+    async_session = SimpleNamespace(send_message_stream=send_message_stream)
+    return SimpleNamespace(
+        chats=SimpleNamespace(create=lambda **kwds: session),
+        aio=SimpleNamespace(chats=SimpleNamespace(create=lambda **kwds: async_session)),
+    )
+
+
+def bedrock_client(opened, asynchronous):
+    return SimpleNamespace(
+        converse_stream=lambda **kwds: {"stream": FakeChunks(opened, BEDROCK_EVENT)}
+    )
+
+
+AWS = {"aws_access_key": "test", "aws_secret_key": "test", "aws_region": "us-east-1"}
+
+PROVIDERS = {
+    "Anthropic": (
+        "anthropic",
+        anthropic_client,
+        {"model_name": "claude-3-5-haiku-latest", "api_key": "test"},
+    ),
+    "AnthropicBedrock": (
+        "anthropic",
+        anthropic_client,
+        {"model_name": "anthropic.claude-3-haiku-20240307-v1:0", **AWS},
+    ),
+    "GoogleGemini": (
+        "google.genai",
+        gemini_client,
+        {"model_name": "gemini-2.0-flash", "api_key": "test"},
+    ),
+    "GoogleVertexAI": (
+        "google.genai",
+        gemini_client,
+        {
+            "model_name": "gemini-2.0-flash",
+            "api_key": "test",
+            "project": "test",
+            "location": "us-central1",
+        },
+    ),
+    "AWSBedrock": (
+        "boto3",
+        bedrock_client,
+        {"model_name": "meta.llama3-8b-instruct-v1:0", **AWS},
+    ),
+}
+
+
+def build(cls, provider, monkeypatch, opened, **kwds):
+    """LLM of `provider` whose SDK client is replaced by a fake one"""
+    module, client, settings = PROVIDERS[provider]
+    pytest.importorskip(module)
+    if provider == "GoogleVertexAI":
+        # Newer SDKs refuse an API key next to a project, the fake client replaces it anyway
+        monkeypatch.setattr("google.genai.Client", lambda **kwds: None)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        llm = cls(provider=provider, **settings, **kwds)
+    llm.model.client = client(opened, cls is AsyncLLM)
+    return llm
+
+
+@pytest.mark.parametrize("provider", PROVIDERS)
+def test_sync_streams_closed_early_by_the_consumer(provider, monkeypatch):
+    opened = []
+    llm = build(LLM, provider, monkeypatch, opened)
+
+    for stop in (1, 3, 10):
+        stream = llm.stream(user_message="hi", do_sse=False)
+        for received, _ in enumerate(stream, 1):
+            if received >= stop:
+                break
+        stream.close()
+
+    assert len(opened) == 3
+    assert all(fake.closed for fake in opened)
+    assert stream_tracker.open_streams() == 0
+
+
+@pytest.mark.parametrize("provider", PROVIDERS)
+def test_async_streams_cancelled_and_disconnected(provider, monkeypatch, fake_request):
+    opened = []
+    llm = build(
+        AsyncLLM,
+        provider,
+        monkeypatch,
+        opened,
+        scheduler=Scheduler("test", max_concurrency=64, max_queue=STREAMS),
+    )
+
+    async def consume(request):
+        async for _ in llm.stream(user_message="hi", do_sse=False, request=request):
+            # Bedrock reads its event stream synchronously, let the others run
+            await asyncio.sleep(0)
+
+    async def main():
+        requests = [fake_request() for _ in range(STREAMS)]
+        tasks = [asyncio.create_task(consume(request)) for request in requests]
+        while stream_tracker.open_streams(provider) < 32:
+            await asyncio.sleep(0.001)
+        # Half of the clients leave, the other half are cancelled
+        for request, task in zip(requests, tasks):
+            if random.random() < 0.5:
+                request.disconnect()
+            else:
+                task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for request in requests:
+            assert DisconnectWatcher.scope_key not in request.scope
+
+    asyncio.run(main())
+    assert opened and all(fake.closed for fake in opened)
+    assert stream_tracker.open_streams() == 0
+    assert llm.scheduler.active == 0 and llm.scheduler.queued == 0
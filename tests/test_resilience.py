@@ -0,0 +1,149 @@
+import asyncio
+
+import pytest
+
+from orichain.resilience import (
+    CircuitBreaker,
+    CircuitBreakerOpen,
+    RetryPolicy,
+    botocore_config,
+    client_name,
+    error_status,
+    is_failure,
+    is_retryable,
+    resolve_breaker,
+)
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"Error code: {status_code}")
+        self.status_code = status_code
+
+
+def test_error_status():
+    assert error_status(None, StatusError(429)) == 429
+    assert error_status(None, Exception("400 INVALID_ARGUMENT")) == 400
+    assert error_status({"error": 500, "reason": "Error code: 503 - overloaded"}) == 503
+    assert error_status({"error": 500, "reason": "boom"}) == 500
+    assert error_status({"response": "ok"}) is None
+
+
+def test_failures_count_for_the_breaker():
+    assert is_failure({"error": 500, "reason": "boom"})
+    assert is_failure({"error": 429, "reason": "Error code: 429"})
+    assert not is_failure({"error": 400, "reason": "Error code: 400"})
+    assert is_failure({"error": 400, "reason": "request aborted by user"}) is None
+    assert not is_failure({"response": "ok"})
+
+
+def test_breaker_opens_and_recovers(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("orichain.resilience.time.monotonic", lambda: now[0])
+    breaker = CircuitBreaker("test", minimum_calls=4, open_seconds=10)
+
+    for _ in range(4):
+        assert breaker.allow()
+        breaker.record({"error": 500, "reason": "boom"})
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    assert breaker.rejection()["error"] == 503
+
+    # Half open after open_seconds, a single probe at a time
+    now[0] += 10
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record({"response": "ok"})
+    assert breaker.state == "closed"
+
+
+def test_breaker_failed_probe_opens_again(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("orichain.resilience.time.monotonic", lambda: now[0])
+    breaker = CircuitBreaker("test", minimum_calls=1, open_seconds=5)
+    breaker.allow()
+    breaker.record_failure()
+    now[0] += 5
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitBreakerOpen):
+        breaker.call(lambda: None)
+
+
+def test_breaker_client_errors_do_not_open_it():
+    breaker = CircuitBreaker("test", minimum_calls=2)
+    for _ in range(10):
+        breaker.allow()
+        breaker.record({"error": 400, "reason": "Error code: 400"})
+    assert breaker.state == "closed"
+
+
+def test_shared_breakers_by_client():
+    first = resolve_breaker(True, "llm", "OpenAI", {"api_key": "k1"})
+    assert resolve_breaker(True, "llm", "OpenAI", {"api_key": "k1"}) is first
+    assert resolve_breaker(True, "llm", "OpenAI", {"api_key": "k2"}) is not first
+    assert client_name("OpenAI") == "OpenAI"
+    assert client_name("OpenAI", {"api_key": "k1"}) != client_name(
+        "OpenAI", {"api_key": "k1", "base_url": "http://localhost"}
+    )
+    with pytest.warns(UserWarning):
+        resolve_breaker({"minimum_calls": 3}, "llm", "OpenAI", {"api_key": "k1"})
+
+
+def test_retryable_errors():
+    assert is_retryable(None, StatusError(429))
+    assert is_retryable(None, StatusError(503))
+    assert not is_retryable(None, StatusError(400))
+    assert not is_retryable({"error": 400, "reason": "request aborted by user"})
+    assert not is_retryable({"response": "ok"})
+
+
+def test_retry_policy_retries_transient_errors_only():
+    policy = RetryPolicy(max_attempts=3, base_delay=0.01, budget=False)
+    assert policy.next_wait(1, 0.01, None, StatusError(503)) is not None
+    assert policy.next_wait(1, 0.01, None, StatusError(400)) is None
+    assert policy.next_wait(3, 0.01, None, StatusError(503)) is None
+
+
+def test_retrying_llm_recovers_from_transient_errors(async_llm):
+    llm = async_llm(
+        failures=[{"error": 503, "reason": "Error code: 503"}],
+        retry_policy={"max_attempts": 3, "base_delay": 0.001, "budget": False},
+    )
+    assert asyncio.run(llm(user_message="hi"))["response"] == "ok"
+    assert llm.model.model.calls == 2
+
+
+def test_retrying_llm_gives_up_on_client_errors(async_llm):
+    llm = async_llm(
+        failures=[{"error": 400, "reason": "Error code: 400"}],
+        retry_policy={"max_attempts": 3, "base_delay": 0.001, "budget": False},
+    )
+    assert asyncio.run(llm(user_message="hi"))["error"] == 400
+    assert llm.model.model.calls == 1
+
+
+def test_stream_retried_before_its_first_chunk(async_llm):
+    llm = async_llm(
+        chunks=3,
+        failures=[{"error": 429, "reason": "Error code: 429"}],
+        retry_policy={"max_attempts": 2, "base_delay": 0.001, "budget": False},
+    )
+
+    async def main():
+        return [chunk async for chunk in llm.stream(user_message="hi", do_sse=False)]
+
+    chunks = asyncio.run(main())
+    assert len(chunks) == 4 and "error" not in chunks[-1]
+
+
+def test_botocore_retries_off_under_a_retry_policy():
+    Config = pytest.importorskip("botocore.config").Config
+    config = Config(retries={"mode": "adaptive", "max_attempts": 5})
+    assert botocore_config({"config": config}) is config
+    merged = botocore_config({"config": config, "retry_policy": True, "max_retries": 0})
+    assert merged.retries == {"mode": "adaptive", "total_max_attempts": 1}
+    assert botocore_config({}).retries == {"total_max_attempts": 2}
+    assert botocore_config({"max_retries": None}).retries == {"total_max_attempts": 1}
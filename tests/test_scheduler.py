@@ -0,0 +1,126 @@
+import asyncio
+
+import pytest
+
+from orichain.llm.scheduler import Scheduler, SchedulerRejected, resolve_scheduler
+
+
+def test_concurrency_is_bounded():
+    scheduler = Scheduler("test", max_concurrency=2)
+    running, peak = 0, 0
+
+    async def call():
+        nonlocal running, peak
+        ticket = await scheduler.acquire()
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.001)
+        running -= 1
+        ticket.release()
+
+    async def main():
+        await asyncio.gather(*[call() for _ in range(20)])
+
+    asyncio.run(main())
+    assert peak == 2
+    assert scheduler.active == 0 and scheduler.queued == 0
+
+
+def test_priorities_are_served_in_order():
+    scheduler = Scheduler("test", max_concurrency=1)
+    order = []
+
+    async def call(priority):
+        ticket = await scheduler.acquire(priority)
+        order.append(priority)
+        ticket.release()
+
+    async def main():
+        first = await scheduler.acquire()
+        tasks = [
+            asyncio.create_task(call(priority))
+            for priority in ("batch", "normal", "interactive")
+        ]
+        await asyncio.sleep(0)
+        first.release()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+    assert order == ["interactive", "normal", "batch"]
+
+
+def test_tenants_share_fairly():
+    scheduler = Scheduler("test", max_concurrency=1)
+    order = []
+
+    async def call(tenant):
+        ticket = await scheduler.acquire(tenant=tenant)
+        order.append(tenant)
+        ticket.release()
+
+    async def main():
+        first = await scheduler.acquire()
+        tasks = [asyncio.create_task(call("noisy")) for _ in range(6)]
+        tasks += [asyncio.create_task(call("quiet")) for _ in range(2)]
+        await asyncio.sleep(0)
+        first.release()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+    # The quiet tenant does not wait behind the whole backlog of the noisy one
+    assert order.index("quiet") <= 1
+    assert order[:4].count("quiet") == 2
+
+
+def test_full_queue_sheds_lower_priority_work():
+    scheduler = Scheduler("test", max_concurrency=1, max_queue=1)
+
+    async def main():
+        first = await scheduler.acquire()
+        batch = asyncio.create_task(scheduler.acquire("batch"))
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(scheduler.acquire("interactive"))
+        await asyncio.sleep(0)
+        with pytest.raises(SchedulerRejected):
+            await batch
+        with pytest.raises(SchedulerRejected):
+            await scheduler.acquire("batch")
+        first.release()
+        (await interactive).release()
+
+    asyncio.run(main())
+    assert scheduler.shed == 1 and scheduler.rejected == 1
+    assert scheduler.active == 0 and scheduler.queued == 0
+
+
+def test_cancelled_waiters_release_their_place():
+    scheduler = Scheduler("test", max_concurrency=1)
+
+    async def main():
+        first = await scheduler.acquire()
+        waiters = [asyncio.create_task(scheduler.acquire()) for _ in range(100)]
+        await asyncio.sleep(0)
+        for waiter in waiters[:-1]:
+            waiter.cancel()
+        first.release()
+        (await waiters[-1]).release()
+        await asyncio.gather(*waiters, return_exceptions=True)
+
+    asyncio.run(main())
+    assert scheduler.active == 0 and scheduler.queued == 0
+
+
+def test_unknown_priority():
+    with pytest.raises(ValueError):
+        asyncio.run(Scheduler("test").acquire("urgent"))
+
+
+def test_shared_schedulers_by_client():
+    first = resolve_scheduler(True, "OpenAI", {"api_key": "k1"})
+    assert resolve_scheduler(True, "OpenAI", {"api_key": "k1"}) is first
+    assert resolve_scheduler(True, "OpenAI", {"api_key": "k2"}) is not first
+    assert (
+        resolve_scheduler({"max_concurrency": 16}, "OpenAI", {"api_key": "k1"}) is first
+    )
+    with pytest.warns(UserWarning):
+        resolve_scheduler({"max_concurrency": 4}, "OpenAI", {"api_key": "k1"})
@@ -0,0 +1,221 @@
+import asyncio
+import json
+import random
+from contextlib import aclosing
+
+import pytest
+
+from orichain.llm.scheduler import Scheduler
+from orichain.streaming import DisconnectWatcher, stream_tracker
+
+STREAMS = 2000
+
+
+def error_of(chunk):
+    """Error status of a final chunk, plain or SSE formatted"""
+    if isinstance(chunk, str):
+        chunk = json.loads(chunk.split("data: ", 1)[1])
+    return chunk.get("error")
+
+
+def test_stream_completes(async_llm):
+    llm = async_llm(chunks=5)
+
+    async def main():
+        return [chunk async for chunk in llm.stream(user_message="hi", do_sse=False)]
+
+    chunks = asyncio.run(main())
+    assert len(chunks) == 6
+    assert chunks[-1]["response"] == "".join(chunks[:-1])
+    assert chunks[-1]["message"] == "hi"
+
+
+def test_thousands_of_cancelled_streams_close_everything(async_llm):
+    scheduler = Scheduler("test", max_concurrency=64, max_queue=STREAMS)
+    llm = async_llm(chunks=1000, scheduler=scheduler)
+    started = 0
+
+    async def consume():
+        nonlocal started
+        started += 1
+        async for _ in llm.stream(user_message="hi", do_sse=False):
+            pass
+
+    async def main():
+        tasks = [asyncio.create_task(consume()) for _ in range(STREAMS)]
+        for _ in range(20):
+            await asyncio.sleep(0)
+        assert stream_tracker.open_streams() > 0
+        # Cancel running and queued streams alike
+        random.shuffle(tasks)
+        for task in tasks:
+            task.cancel()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        assert all(isinstance(r, asyncio.CancelledError) for r in results)
+
+    asyncio.run(main())
+    assert started == STREAMS
+    assert stream_tracker.open_streams() == 0
+    assert scheduler.active == 0 and scheduler.queued == 0
+
+
+def test_streams_closed_early_by_the_consumer(async_llm):
+    scheduler = Scheduler("test", max_concurrency=32, max_queue=STREAMS)
+    llm = async_llm(chunks=100, scheduler=scheduler)
+
+    async def consume(stop):
+        received = 0
+        async with aclosing(llm.stream(user_message="hi", do_sse=False)) as stream:
+            async for _ in stream:
+                received += 1
+                if received >= stop:
+                    break
+        return received
+
+    async def main():
+        stops = [random.randint(1, 50) for _ in range(STREAMS)]
+        received = await asyncio.gather(*[consume(stop) for stop in stops])
+        assert received == stops
+
+    asyncio.run(main())
+    assert stream_tracker.open_streams() == 0
+    assert scheduler.active == 0 and scheduler.queued == 0
+
+
+def test_client_disconnects_release_the_watcher(async_llm, fake_request):
+    scheduler = Scheduler("test", max_concurrency=128, max_queue=STREAMS)
+    llm = async_llm(chunks=10000, scheduler=scheduler)
+
+    async def consume(request):
+        return [
+            chunk
+            async for chunk in llm.stream(
+                user_message="hi", do_sse=False, request=request
+            )
+        ]
+
+    async def main():
+        requests = [fake_request() for _ in range(STREAMS)]
+        tasks = [asyncio.create_task(consume(request)) for request in requests]
+        for _ in range(20):
+            await asyncio.sleep(0)
+        for request in requests:
+            request.disconnect()
+        results = await asyncio.gather(*tasks)
+        for chunks in results:
+            assert error_of(chunks[-1]) == 400
+        for request in requests:
+            # Released by the last user, which drops it from the request scope
+            assert DisconnectWatcher.scope_key not in request.scope
+
+    asyncio.run(main())
+    assert stream_tracker.open_streams() == 0
+    assert scheduler.active == 0 and scheduler.queued == 0
+
+
+def test_watcher_shared_by_one_request(fake_request):
+    async def main():
+        request = fake_request()
+        watcher = DisconnectWatcher.acquire(request)
+        assert DisconnectWatcher.acquire(request) is watcher
+        call = asyncio.create_task(watcher.run(asyncio.sleep(10, result="done")))
+        await asyncio.sleep(0)
+        request.disconnect()
+        assert await call is None
+        assert watcher.disconnected
+        watcher.release()
+        assert DisconnectWatcher.scope_key in request.scope
+        watcher.release()
+        assert DisconnectWatcher.scope_key not in request.scope
+
+    asyncio.run(main())
+
+
+def test_watcher_does_not_start_calls_after_a_disconnect(fake_request):
+    started = []
+
+    async def call():
+        started.append(True)
+        return "done"
+
+    async def main():
+        request = fake_request()
+        watcher = DisconnectWatcher.acquire(request)
+        request.disconnect()
+        while not watcher.disconnected:
+            await asyncio.sleep(0)
+        assert await watcher.run(call()) is None
+        future = asyncio.get_running_loop().create_future()
+        assert await watcher.run(future) is None
+        assert future.cancelled()
+        watcher.release()
+
+    asyncio.run(main())
+    assert not started
+
+
+class FakeCompletion(object):
+    """Chat completions stream of the OpenAI SDK, never ending until closed"""
+
+    def __init__(self):
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        from types import SimpleNamespace
+
+        if self.closed:
+            raise StopAsyncIteration
+        await asyncio.sleep(0)
+        delta = SimpleNamespace(content="x", tool_calls=None)
+        return SimpleNamespace(choices=[SimpleNamespace(delta=delta)], usage=None)
+
+    async def close(self):
+        self.closed = True
+
+
+def test_openai_streams_cancelled_and_disconnected(monkeypatch, fake_request):
+    pytest.importorskip("openai")
+    from types import SimpleNamespace
+
+    from orichain.llm import AsyncLLM
+
+    llm = AsyncLLM(
+        model_name="gpt-4o-mini",
+        provider="OpenAI",
+        api_key="test",
+        scheduler=Scheduler("test", max_concurrency=64, max_queue=STREAMS),
+    )
+
+    async def create(**kwds):
+        return FakeCompletion()
+
+    llm.model.client = SimpleNamespace(
+        chat=SimpleNamespace(completions=SimpleNamespace(create=create))
+    )
+
+    async def consume(request):
+        async for _ in llm.stream(user_message="hi", do_sse=False, request=request):
+            pass
+
+    async def main():
+        requests = [fake_request() for _ in range(STREAMS)]
+        tasks = [asyncio.create_task(consume(request)) for request in requests]
+        for _ in range(20):
+            await asyncio.sleep(0)
+        assert stream_tracker.open_streams("OpenAI") > 0
+        # Half of the clients leave, the other half are cancelled
+        for request, task in zip(requests, tasks):
+            if random.random() < 0.5:
+                request.disconnect()
+            else:
+                task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for request in requests:
+            assert DisconnectWatcher.scope_key not in request.scope
+
+    asyncio.run(main())
+    assert stream_tracker.open_streams() == 0
+    assert llm.scheduler.active == 0 and llm.scheduler.queued == 0